@@ -0,0 +1,53 @@
+"""
+Checking connections out of a :class:`~pycassa.pool.ConnectionPool` and
+back in, from one thread and from many threads contending for fewer
+connections than there are threads. See ``pool_checkout.py`` for the
+placeholder connections that are used.
+"""
+
+import threading
+
+from pool_checkout import BenchmarkPool
+
+POOL_SIZE = 20
+THREADS = 50
+
+_pools = []
+
+
+def _checkout(pool, threads):
+    def worker(checkouts):
+        get, put = pool.get, pool.put
+        for i in xrange(checkouts):
+            put(get())
+
+    def run(loops):
+        if threads == 1:
+            worker(loops)
+            return
+        per_thread = max(loops // threads, 1)
+        workers = [threading.Thread(target=worker, args=(per_thread,))
+                   for i in range(threads)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+    return run
+
+
+def benchmarks():
+    result = []
+    for use_threadlocal in (False, True):
+        pool = BenchmarkPool('Keyspace1', ['localhost:9160'], pool_size=POOL_SIZE,
+                             max_overflow=0, prefill=True, pool_timeout=-1,
+                             recycle=-1, use_threadlocal=use_threadlocal)
+        _pools.append(pool)
+        suffix = '.threadlocal' if use_threadlocal else ''
+        result.append(('checkout.threads1' + suffix, _checkout(pool, 1)))
+        result.append(('checkout.threads%d%s' % (THREADS, suffix), _checkout(pool, THREADS)))
+    return result
+
+
+def teardown():
+    while _pools:
+        _pools.pop().dispose()
@@ -0,0 +1,55 @@
+"""
+Packing and unpacking single values with the packers and unpackers from
+:func:`pycassa.marshal.packer_for` and :func:`pycassa.marshal.unpacker_for`.
+"""
+
+import datetime
+import uuid
+from decimal import Decimal
+
+from pycassa.marshal import packer_for, unpacker_for
+
+VALUES = [
+    ('BytesType', 'some bytes'),
+    ('AsciiType', 'some text'),
+    ('UTF8Type', u'some text \xe9'),
+    ('LongType', 1234567890123),
+    ('Int32Type', 123456),
+    ('IntegerType', 12345678901234567890),
+    ('CounterColumnType', 42),
+    ('FloatType', 1.5),
+    ('DoubleType', 1.0 / 3),
+    ('BooleanType', True),
+    ('DecimalType', Decimal('1234.5678')),
+    ('DateType', datetime.datetime(2012, 6, 1, 12, 30, 15)),
+    ('TimestampType', datetime.datetime(2012, 6, 1, 12, 30, 15)),
+    ('UUIDType', uuid.UUID('6ba7b810-9dad-41d1-80b4-00c04fd430c8')),
+    ('LexicalUUIDType', uuid.UUID('6ba7b810-9dad-41d1-80b4-00c04fd430c8')),
+    ('TimeUUIDType', uuid.UUID('d0a2b2a0-abb1-11e1-8000-000000000000')),
+    ('CompositeType(LongType,UTF8Type)', (1234, u'name')),
+    ('CompositeType(ReversedType(TimeUUIDType),Int32Type,AsciiType)',
+     (uuid.UUID('d0a2b2a0-abb1-11e1-8000-000000000000'), 7, 'name')),
+    ('DynamicCompositeType(l=>LongType,s=>UTF8Type)',
+     (('l', 1234), ('s', u'name'))),
+]
+
+
+def _loop(func, value):
+    def run(loops):
+        for i in xrange(loops):
+            func(value)
+    return run
+
+
+def _label(typestr):
+    return typestr.replace(' ', '')
+
+
+def benchmarks():
+    result = []
+    for typestr, value in VALUES:
+        pack = packer_for(typestr)
+        unpack = unpacker_for(typestr)
+        result.append(('codec.pack.' + _label(typestr), _loop(pack, value)))
+        result.append(('codec.unpack.' + _label(typestr), _loop(unpack, pack(value))))
+    return result
@@ -0,0 +1,92 @@
+"""
+Whole operations through a :class:`~pycassa.pool.ConnectionPool` against
+a :class:`~pycassa.contrib.server.CassandraServer` in the same process.
+
+The server shares the interpreter with the client, so these numbers
+include the server's own work; they are meant for comparing client
+changes with each other, not with a real cluster.
+"""
+
+import threading
+
+from pycassa import ConnectionPool, ColumnFamily
+from pycassa.contrib.server import CassandraServer
+
+import fixtures
+
+NARROW = 10
+WIDE = 1000
+ROWS = 100
+THREADS = 8
+
+_server = _pool = None
+
+
+def _repeat(func, *args, **kwargs):
+    def run(loops):
+        for i in xrange(loops):
+            func(*args, **kwargs)
+    return run
+
+
+def _concurrent(func, *args):
+    def worker(calls):
+        for i in xrange(calls):
+            func(*args)
+
+    def run(loops):
+        per_thread = max(loops // THREADS, 1)
+        workers = [threading.Thread(target=worker, args=(per_thread,))
+                   for i in range(THREADS)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+    return run
+
+
+def _get_range(cf):
+    def run(loops):
+        for i in xrange(loops):
+            for row in cf.get_range(row_count=ROWS, buffer_size=ROWS):
+                pass
+    return run
+
+
+def benchmarks():
+    global _server, _pool
+    _server = CassandraServer().start()
+    for name, cfdef in fixtures.SCHEMA.column_families.iteritems():
+        _server.create_column_family(fixtures.KEYSPACE, name,
+                                     column_type=cfdef.column_type,
+                                     comparator_type=cfdef.comparator_type,
+                                     subcomparator_type=cfdef.subcomparator_type,
+                                     default_validation_class=cfdef.default_validation_class,
+                                     key_validation_class=cfdef.key_validation_class)
+    _pool = ConnectionPool(fixtures.KEYSPACE, [_server.server], pool_size=THREADS)
+    cf = ColumnFamily(_pool, 'Standard1')
+
+    narrow = fixtures.row(NARROW)
+    keys = [u'key%05d' % i for i in xrange(ROWS)]
+    cf.batch_insert(dict((key, narrow) for key in keys))
+    cf.insert(u'wide', fixtures.row(WIDE))
+
+    return [
+        ('endtoend.insert.narrow', _repeat(cf.insert, u'insert', narrow)),
+        ('endtoend.get.narrow', _repeat(cf.get, keys[0])),
+        ('endtoend.get.wide', _repeat(cf.get, u'wide', column_count=WIDE)),
+        ('endtoend.multiget.narrow', _repeat(cf.multiget, keys[:NARROW])),
+        ('endtoend.get_range.narrow', _get_range(cf)),
+        ('endtoend.batch_insert.narrow',
+         _repeat(cf.batch_insert, dict((key, narrow) for key in keys[:NARROW]))),
+        ('endtoend.get.narrow.threads%d' % THREADS, _concurrent(cf.get, keys[0])),
+    ]
+
+
+def teardown():
+    global _server, _pool
+    if _pool is not None:
+        _pool.dispose()
+    if _server is not None:
+        _server.stop()
+    _server = _pool = None
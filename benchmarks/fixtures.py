@@ -0,0 +1,79 @@
+"""
+Column families and rows shared by the benchmarks that do not talk to a
+server.
+"""
+
+from pycassa.cassandra.ttypes import CfDef, Column, ColumnOrSuperColumn, SuperColumn
+from pycassa.columnfamily import ColumnFamily
+from pycassa.snapshot import SchemaSnapshot
+
+KEYSPACE = 'Keyspace1'
+
+SCHEMA = SchemaSnapshot(KEYSPACE, {
+    'Standard1': CfDef(KEYSPACE, 'Standard1', column_type='Standard',
+                       comparator_type='UTF8Type',
+                       default_validation_class='LongType',
+                       key_validation_class='UTF8Type',
+                       column_metadata={}),
+    'Super1': CfDef(KEYSPACE, 'Super1', column_type='Super',
+                    comparator_type='UTF8Type',
+                    subcomparator_type='UTF8Type',
+                    default_validation_class='LongType',
+                    key_validation_class='UTF8Type',
+                    column_metadata={}),
+})
+
+TIMESTAMP = 1349000000000000
+
+
+class NullConnection(object):
+    """ Accepts every request and answers with ``None``. """
+
+    def batch_mutate(self, *args, **kwargs):
+        pass
+
+    atomic_batch_mutate = batch_mutate
+
+    def return_to_pool(self):
+        pass
+
+
+class NullPool(object):
+    """ Stands in for a pool, dropping every request. """
+
+    keyspace = KEYSPACE
+
+    def get(self, *args):
+        return NullConnection()
+
+    def execute(self, method, *args, **kwargs):
+        return None
+
+
+def column_family(name, pool=None):
+    return ColumnFamily(pool or NullPool(), name, schema_snapshot=SCHEMA)
+
+
+def row(width):
+    """ A row of `width` columns, as passed to :meth:`.ColumnFamily.insert()`. """
+    return dict((u'column%05d' % i, i) for i in xrange(width))
+
+
+def super_row(width, subwidth):
+    return dict((u'super%05d' % i, row(subwidth)) for i in xrange(width))
+
+
+def packed_row(width):
+    """ A row of `width` columns, as returned by ``get_slice``. """
+    cf = column_family('Standard1')
+    return [ColumnOrSuperColumn(column=Column(cf._pack_name(name), cf._pack_value(value, name),
+                                              TIMESTAMP))
+            for name, value in sorted(row(width).iteritems())]
+
+
+def packed_super_row(width, subwidth):
+    cf = column_family('Super1')
+    return [ColumnOrSuperColumn(super_column=SuperColumn(
+                cf._pack_name(name, True),
+                [cosc.column for cosc in packed_row(subwidth)]))
+            for name in sorted(super_row(width, 0))]
@@ -0,0 +1,174 @@
+"""
+Timing, results files and comparisons for the benchmark suite.
+
+A benchmark is a function that takes a number of loops and performs the
+operation being measured that many times. The harness raises the number
+of loops until a run takes at least `min_time` seconds, then times
+`repeat` runs with the garbage collector off and keeps the time per loop
+of each run.
+
+Results files are JSON objects of the form::
+
+    {"format": 1,
+     "commit": "50cb5c5...", "dirty": false,
+     "python": "2.7.18", "implementation": "CPython", "platform": "...",
+     "thrift": "0.9.3", "fastbinary": true,
+     "time": "2026-10-18T12:00:00Z",
+     "repeat": 5, "min_time": 0.2,
+     "results": {"codec.pack.LongType": {"loops": 65536,
+                                         "times": [3.1e-07, ...],
+                                         "median": 3.1e-07,
+                                         "min": 3.0e-07}}}
+
+where `times`, `median` and `min` are seconds per loop, so results from
+runs with different numbers of loops can still be compared.
+"""
+
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+FORMAT = 1
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def _run(func, loops):
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.time()
+        func(loops)
+        return time.time() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def measure(func, repeat=5, min_time=0.2):
+    """
+    Times `func` and returns its result entry: the number of loops, the
+    seconds per loop of each run and their median and minimum.
+    """
+    loops = 1
+    while True:
+        elapsed = _run(func, loops)
+        if elapsed >= min_time:
+            break
+        if elapsed <= 0:
+            loops *= 10
+        else:
+            loops = max(loops * 2, int(loops * min_time / elapsed * 1.1))
+    times = [_run(func, loops) / loops for i in range(repeat)]
+    return {'loops': loops, 'times': times, 'median': _median(times),
+            'min': min(times)}
+
+
+def _git(*args):
+    try:
+        process = subprocess.Popen(('git',) + args, cwd=ROOT,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        output = process.communicate()[0]
+    except OSError:
+        return None
+    if process.returncode != 0:
+        return None
+    return output.strip()
+
+
+def environment():
+    """ Describes the commit and interpreter a run is made with. """
+    try:
+        import thrift
+        thrift_version = getattr(thrift, '__version__', None)
+    except ImportError:
+        thrift_version = None
+    try:
+        from thrift.protocol import fastbinary
+        fastbinary = True
+    except ImportError:
+        fastbinary = False
+    commit = _git('rev-parse', 'HEAD')
+    status = _git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'format': FORMAT,
+        'commit': commit,
+        'dirty': bool(status) if status is not None else None,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'thrift': thrift_version,
+        'fastbinary': fastbinary,
+        'time': datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+    }
+
+
+def save(path, results):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=1, sort_keys=True, separators=(',', ': '))
+        f.write('\n')
+
+
+def load(path):
+    with open(path) as f:
+        results = json.load(f)
+    if results.get('format') != FORMAT:
+        raise ValueError('%s has results format %r, expected %d'
+                         % (path, results.get('format'), FORMAT))
+    return results
+
+
+def format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e3), ('us', 1e6)):
+        if seconds * scale >= 1:
+            return '%.2f %s' % (seconds * scale, unit)
+    return '%.0f ns' % (seconds * 1e9)
+
+
+def compare(base, new, threshold=0.05):
+    """
+    Returns a text table comparing the median time per loop of each
+    benchmark in both results, marking changes larger than `threshold`.
+    """
+    lines = ['base: %s%s  new: %s%s' % (
+                 (base.get('commit') or '?')[:10], ' (dirty)' if base.get('dirty') else '',
+                 (new.get('commit') or '?')[:10], ' (dirty)' if new.get('dirty') else '')]
+    for key in ('python', 'implementation', 'thrift', 'fastbinary'):
+        if base.get(key) != new.get(key):
+            lines.append('warning: %s differs (%s vs %s)' % (key, base.get(key), new.get(key)))
+
+    names = sorted(set(base['results']) & set(new['results']))
+    width = max([len(name) for name in names] + [len('benchmark')])
+    lines.append('%-*s %12s %12s %8s' % (width, 'benchmark', 'base', 'new', 'change'))
+    for name in names:
+        before = base['results'][name]['median']
+        after = new['results'][name]['median']
+        change = after / before - 1 if before else 0.0
+        mark = ''
+        if change > threshold:
+            mark = '  slower'
+        elif change < -threshold:
+            mark = '  faster'
+        lines.append('%-*s %12s %12s %+7.1f%%%s' % (width, name, format_time(before),
+                                                    format_time(after), change * 100, mark))
+    for label, only in (('base', set(base['results']) - set(new['results'])),
+                        ('new', set(new['results']) - set(base['results']))):
+        if only:
+            lines.append('%d benchmarks only in %s' % (len(only), label))
+    return '\n'.join(lines)
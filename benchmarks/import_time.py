@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""
+Measures how long it takes a fresh interpreter to import parts of pycassa.
+
+Each statement is timed in a new process, so nothing is shared between runs
+but the compiled bytecode on disk. Run it from the top of the source tree::
+
+    python benchmarks/import_time.py [-n RUNS]
+
+"""
+
+import os
+import subprocess
+import sys
+from optparse import OptionParser
+
+STATEMENTS = [
+    'import pycassa',
+    'import pycassa.util',
+    'import pycassa.marshal',
+    'import pycassa.types',
+    'from pycassa import ColumnFamily',
+    'from pycassa import ConnectionPool',
+    'from pycassa import *',
+]
+
+TIMER = """
+import time
+start = time.time()
+%s
+print time.time() - start
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_statement(statement, runs):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    times = []
+    for i in range(runs):
+        output = subprocess.Popen([sys.executable, '-c', TIMER % statement],
+                                  stdout=subprocess.PIPE, env=env).communicate()[0]
+        times.append(float(output))
+    times.sort()
+    return times[len(times) // 2], times[0]
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-n', '--runs', type='int', default=20,
+                      help='number of interpreters to start for each statement')
+    options, args = parser.parse_args()
+
+    # compile everything first so the first run is not penalized
+    time_statement('from pycassa import *', 1)
+
+    print '%-40s %10s %10s' % ('statement', 'median ms', 'best ms')
+    for statement in args or STATEMENTS:
+        median, best = time_statement(statement, options.runs)
+        print '%-40s %10.2f %10.2f' % (statement, median * 1000, best * 1000)
+
+if __name__ == '__main__':
+    main()
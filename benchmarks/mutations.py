@@ -0,0 +1,64 @@
+"""
+Building mutations: packing columns into mutation lists, encoding
+``batch_mutate`` maps and queueing and sending a
+:class:`~pycassa.batch.Mutator`, without sending anything over the network.
+"""
+
+from pycassa import wire
+from pycassa.batch import Mutator
+
+import fixtures
+
+NARROW = 10
+WIDE = 1000
+ROWS = 100
+
+
+def _mutation_list(cf, columns):
+    make_mutation_list = cf._make_mutation_list
+    timestamp = fixtures.TIMESTAMP
+
+    def run(loops):
+        for i in xrange(loops):
+            make_mutation_list(columns, timestamp, None)
+    return run
+
+
+def _encode_mutation_map(mutation_map):
+    encode = wire.encode_mutation_map
+
+    def run(loops):
+        for i in xrange(loops):
+            encode(mutation_map)
+    return run
+
+
+def _mutator(cf, rows):
+    pool = cf.pool
+
+    def run(loops):
+        for i in xrange(loops):
+            batch = Mutator(pool, queue_size=0)
+            for key, columns in rows:
+                batch.insert(cf, key, columns, timestamp=fixtures.TIMESTAMP)
+            batch.send()
+    return run
+
+
+def benchmarks():
+    standard = fixtures.column_family('Standard1')
+    super_cf = fixtures.column_family('Super1')
+    narrow = fixtures.row(NARROW)
+    rows = [(u'key%05d' % i, narrow) for i in xrange(ROWS)]
+    mutation_map = dict(
+            (standard._pack_key(key), {'Standard1': standard._make_mutation_list(
+                    columns, fixtures.TIMESTAMP, None)})
+            for key, columns in rows)
+    return [
+        ('mutations.mutation_list.narrow', _mutation_list(standard, narrow)),
+        ('mutations.mutation_list.wide', _mutation_list(standard, fixtures.row(WIDE))),
+        ('mutations.mutation_list.super',
+         _mutation_list(super_cf, fixtures.super_row(NARROW, NARROW))),
+        ('mutations.encode_mutation_map.rows', _encode_mutation_map(mutation_map)),
+        ('mutations.mutator_send.rows', _mutator(standard, rows)),
+    ]
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Measures the throughput of checking connections out of a
+:class:`~pycassa.pool.ConnectionPool` and back in from many threads.
+
+No Cassandra node is needed: the pool hands out placeholder connections,
+so only the pool's own bookkeeping (locking, the idle connections and
+listener notifications) is measured. Run it from the top of the source
+tree::
+
+    python benchmarks/pool_checkout.py [-t THREADS] [-n CHECKOUTS] [-s POOL_SIZE]
+
+"""
+
+import os
+import sys
+import threading
+import time
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pycassa.pool import ConnectionPool, ConnectionWrapper
+from pycassa.logging.pool_stats_logger import StatsLogger
+
+
+class _Transport(object):
+
+    def isOpen(self):
+        return True
+
+    def close(self):
+        pass
+
+
+class _Wrapper(ConnectionWrapper):
+
+    def __init__(self, pool, server):
+        # skips opening a real connection
+        self._pool = pool
+        self._retry_count = 0
+        self.max_retries = pool.max_retries
+        self.info = {}
+        self.starttime = time.time()
+        self.operation_count = 0
+        self.server = server
+        self.transport = _Transport()
+        self._state = ConnectionWrapper._CHECKED_OUT
+        self._pid = pool._pid
+        pool._notify_on_connect(self)
+
+
+class BenchmarkPool(ConnectionPool):
+
+    def _get_new_wrapper(self, server):
+        return _Wrapper(self, server)
+
+
+def run(threads, checkouts, pool_size, listeners, use_threadlocal):
+    pool = BenchmarkPool('Keyspace1', ['localhost:9160'], pool_size=pool_size,
+                         max_overflow=0, prefill=True, pool_timeout=-1,
+                         recycle=-1, use_threadlocal=use_threadlocal,
+                         listeners=listeners)
+    start_event = threading.Event()
+
+    def worker():
+        start_event.wait()
+        get, put = pool.get, pool.put
+        for i in xrange(checkouts):
+            put(get())
+
+    workers = [threading.Thread(target=worker) for i in range(threads)]
+    for w in workers:
+        w.start()
+    start = time.time()
+    start_event.set()
+    for w in workers:
+        w.join()
+    elapsed = time.time() - start
+    pool.dispose()
+    return threads * checkouts / elapsed
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-t', '--threads', type='int', default=200)
+    parser.add_option('-n', '--checkouts', type='int', default=500,
+                      help='checkouts per thread')
+    parser.add_option('-s', '--pool-size', type='int', default=20)
+    options, args = parser.parse_args()
+
+    print '%d threads, pool_size %d, %d checkouts per thread' % (
+            options.threads, options.pool_size, options.checkouts)
+    print '%-40s %12s' % ('configuration', 'checkouts/s')
+    for use_threadlocal in (False, True):
+        for label, listeners in (('default listeners', []),
+                                 ('with a StatsLogger', [StatsLogger()])):
+            label = '%s%s' % (label, ', threadlocal' if use_threadlocal else '')
+            rate = run(options.threads, options.checkouts, options.pool_size,
+                       listeners, use_threadlocal)
+            print '%-40s %12.0f' % (label, rate)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Building result rows: converting Thrift column lists with
+``ColumnFamily._cosc_to_dict()`` and decoding encoded replies with
+:class:`pycassa.wire.SliceDecoder`, for narrow and wide rows.
+"""
+
+from thrift.protocol import TBinaryProtocol
+from thrift.transport import TTransport
+
+from pycassa.cassandra.Cassandra import (get_slice_result, multiget_slice_result,
+                                         get_range_slices_result)
+from pycassa.cassandra.ttypes import KeySlice
+
+import fixtures
+
+NARROW = 10
+WIDE = 1000
+ROWS = 100
+
+
+def _encode(result):
+    trans = TTransport.TMemoryBuffer()
+    result.write(TBinaryProtocol.TBinaryProtocol(trans))
+    return trans.getvalue()
+
+
+def _cosc_to_dict(cf, coscs):
+    cosc_to_dict = cf._cosc_to_dict
+
+    def run(loops):
+        for i in xrange(loops):
+            cosc_to_dict(coscs, False, False)
+    return run
+
+
+def _decode(decode, data):
+    def run(loops):
+        for i in xrange(loops):
+            decode(data)
+    return run
+
+
+def benchmarks():
+    standard = fixtures.column_family('Standard1')
+    super_cf = fixtures.column_family('Super1')
+    narrow = fixtures.packed_row(NARROW)
+    wide = fixtures.packed_row(WIDE)
+    super_row = fixtures.packed_super_row(NARROW, NARROW)
+    keys = ['key%05d' % i for i in xrange(ROWS)]
+
+    decoder = standard._slice_decoder(False, False)
+    return [
+        ('rows.cosc_to_dict.narrow', _cosc_to_dict(standard, narrow)),
+        ('rows.cosc_to_dict.wide', _cosc_to_dict(standard, wide)),
+        ('rows.cosc_to_dict.super', _cosc_to_dict(super_cf, super_row)),
+        ('rows.decode_slice.narrow',
+         _decode(decoder.decode_slice, _encode(get_slice_result(narrow)))),
+        ('rows.decode_slice.wide',
+         _decode(decoder.decode_slice, _encode(get_slice_result(wide)))),
+        ('rows.decode_slice.super',
+         _decode(super_cf._slice_decoder(False, False).decode_slice,
+                 _encode(get_slice_result(super_row)))),
+        ('rows.decode_multiget_slice.narrow',
+         _decode(decoder.decode_multiget_slice,
+                 _encode(multiget_slice_result(dict((key, narrow) for key in keys))))),
+        ('rows.decode_key_slices.narrow',
+         _decode(decoder.decode_key_slices,
+                 _encode(get_range_slices_result([KeySlice(key, narrow) for key in keys])))),
+    ]
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Runs the benchmark suite and saves the results so that runs can be
+compared across commits.
+
+The suites are:
+
+* ``codec``: packing and unpacking values of each type;
+* ``rows``: building result rows from Thrift columns and encoded replies;
+* ``mutations``: building mutation lists, mutation maps and batches;
+* ``checkout``: checking connections out of a pool, with and without
+  contention;
+* ``endtoend``: operations against an in-process
+  :class:`~pycassa.contrib.server.CassandraServer`.
+
+Run it from the top of the source tree::
+
+    python benchmarks/run.py [-s SUITE]... [-o RESULTS] [-c BASELINE] [PATTERN]...
+
+Only benchmarks whose names match one of the shell-style `PATTERN`\\s are
+run, such as ``'codec.*.LongType'``. To check a change, save the results
+of the base commit and compare against them::
+
+    git checkout master && python benchmarks/run.py -o base.json
+    git checkout my-branch && python benchmarks/run.py -c base.json
+
+Two results files can also be compared without running anything with
+``python benchmarks/run.py --compare-files base.json new.json``. See
+``harness.py`` for the results format.
+"""
+
+import fnmatch
+import sys
+from optparse import OptionParser
+
+import harness
+
+SUITES = ['codec', 'rows', 'mutations', 'checkout', 'endtoend']
+
+
+def run_suite(name, patterns, repeat, min_time, results):
+    module = __import__(name)
+    try:
+        for bench_name, func in module.benchmarks():
+            if patterns and not any(fnmatch.fnmatch(bench_name, p) for p in patterns):
+                continue
+            entry = harness.measure(func, repeat, min_time)
+            results[bench_name] = entry
+            print '%-55s %12s %12s' % (bench_name, harness.format_time(entry['median']),
+                                       harness.format_time(entry['min']))
+            sys.stdout.flush()
+    finally:
+        teardown = getattr(module, 'teardown', None)
+        if teardown is not None:
+            teardown()
+
+
+def main():
+    parser = OptionParser(usage='%prog [options] [PATTERN]...')
+    parser.add_option('-s', '--suite', action='append', choices=SUITES,
+                      help='suite to run; may be given more than once (default: all)')
+    parser.add_option('-o', '--output', help='file to save the results to')
+    parser.add_option('-c', '--compare', metavar='BASELINE',
+                      help='results file to compare this run against')
+    parser.add_option('--compare-files', action='store_true',
+                      help='compare the two results files given as arguments')
+    parser.add_option('-r', '--repeat', type='int', default=5,
+                      help='number of timed runs of each benchmark')
+    parser.add_option('-t', '--min-time', type='float', default=0.2,
+                      help='minimum duration of each run, in seconds')
+    parser.add_option('--threshold', type='float', default=0.05,
+                      help='relative change to flag when comparing')
+    options, args = parser.parse_args()
+
+    if options.compare_files:
+        if len(args) != 2:
+            parser.error('--compare-files takes two results files')
+        print harness.compare(harness.load(args[0]), harness.load(args[1]),
+                              options.threshold)
+        return
+
+    baseline = harness.load(options.compare) if options.compare else None
+    results = harness.environment()
+    results.update({'repeat': options.repeat, 'min_time': options.min_time,
+                    'results': {}})
+
+    print '%-55s %12s %12s' % ('benchmark', 'median', 'best')
+    for suite in options.suite or SUITES:
+        run_suite(suite, args, options.repeat, options.min_time, results['results'])
+
+    if options.output:
+        harness.save(options.output, results)
+    if baseline is not None:
+        print
+        print harness.compare(baseline, results, options.threshold)
+
+if __name__ == '__main__':
+    main()
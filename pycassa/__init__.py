@@ -1,14 +1,88 @@
-from pycassa.columnfamily import *
-from pycassa.columnfamilymap import *
-from pycassa.index import *
-from pycassa.pool import *
-from pycassa.system_manager import *
+"""
+The names exported here are loaded lazily: importing :mod:`pycassa` (or a
+lightweight submodule such as :mod:`pycassa.util`) does not import the
+generated Thrift modules until a name which needs them is first used.
+"""
 
-from pycassa.cassandra.ttypes import AuthenticationException,\
-    AuthorizationException, ConsistencyLevel, InvalidRequestException,\
-    NotFoundException, UnavailableException, TimedOutException
-
-from pycassa.logging.pycassa_logger import *
+import sys
 
 __version_info__ = (1, 11, 0, 'post')
 __version__ = '.'.join(map(str, __version_info__))
+
+_exports = {
+    'pycassa.columnfamily': ['gm_timestamp', 'ColumnFamily', 'PooledColumnFamily'],
+    'pycassa.columnfamilymap': ['ColumnFamilyMap'],
+    'pycassa.deadline': ['Deadline', 'DeadlineExceeded'],
+    'pycassa.exporters': ['PrometheusExporter', 'StatsdExporter'],
+    'pycassa.index': ['create_index_clause', 'create_index_expression',
+                      'EQ', 'GT', 'GTE', 'LT', 'LTE'],
+    'pycassa.metrics': ['Metrics'],
+    'pycassa.pool': ['QueuePool', 'ConnectionPool', 'PoolListener',
+                     'ConnectionWrapper', 'TrafficClass',
+                     'AllServersUnavailable', 'MaximumRetryException',
+                     'NoConnectionAvailable', 'InvalidRequestError'],
+    'pycassa.retry': ['RetryPolicy', 'RetryBudget'],
+    'pycassa.slowlog': ['SlowOperationLog'],
+    'pycassa.snapshot': ['SchemaSnapshot'],
+    'pycassa.throttle': ['RateLimiter', 'AdaptiveConcurrencyLimiter'],
+    'pycassa.system_manager': ['SystemManager', 'SIMPLE_STRATEGY',
+                               'NETWORK_TOPOLOGY_STRATEGY',
+                               'OLD_NETWORK_TOPOLOGY_STRATEGY', 'KEYS_INDEX',
+                               'BYTES_TYPE', 'LONG_TYPE', 'INT_TYPE',
+                               'ASCII_TYPE', 'UTF8_TYPE', 'TIME_UUID_TYPE',
+                               'LEXICAL_UUID_TYPE', 'COUNTER_COLUMN_TYPE',
+                               'DOUBLE_TYPE', 'FLOAT_TYPE', 'DECIMAL_TYPE',
+                               'BOOLEAN_TYPE', 'DATE_TYPE', 'KsDef', 'CfDef',
+                               'ColumnDef', 'IndexType',
+                               'SchemaDisagreementException', 'Connection',
+                               'default_socket_factory',
+                               'default_transport_factory'],
+    'pycassa.cassandra.ttypes': ['AuthenticationException',
+                                 'AuthorizationException', 'ConsistencyLevel',
+                                 'InvalidRequestException', 'NotFoundException',
+                                 'UnavailableException', 'TimedOutException'],
+    'pycassa.logging.pycassa_logger': ['PycassaLogger'],
+}
+
+_submodules = ['batch', 'cassandra', 'columnfamily', 'columnfamilymap',
+               'connection', 'contrib', 'deadline', 'exporters', 'index',
+               'logging', 'marshal', 'metrics', 'pool', 'profiling', 'retry',
+               'slowlog', 'snapshot', 'system_manager', 'throttle', 'types',
+               'util', 'wire']
+
+_origins = {}
+for _module, _names in _exports.iteritems():
+    for _name in _names:
+        _origins[_name] = _module
+
+
+class _LazyModule(type(sys)):
+
+    def __getattr__(self, name):
+        if name in _origins:
+            module = __import__(_origins[name], None, None, ['__name__'])
+            for other in _exports[module.__name__]:
+                setattr(self, other, getattr(module, other))
+            return getattr(module, name)
+        elif name in _submodules:
+            return __import__('pycassa.' + name, None, None, ['__name__'])
+        raise AttributeError("'module' object has no attribute '%s'" % (name,))
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_origins) | set(_submodules))
+
+
+# Keep a reference to the original module so that its globals, which
+# _LazyModule uses, are not cleared when it is replaced
+_original_module = sys.modules['pycassa']
+_lazy_module = sys.modules['pycassa'] = _LazyModule('pycassa')
+_lazy_module.__dict__.update({
+    '__file__': __file__,
+    '__path__': __path__,
+    '__package__': 'pycassa',
+    '__doc__': __doc__,
+    '__all__': sorted(_origins),
+    '__version_info__': __version_info__,
+    '__version__': __version__,
+    '_original_module': _original_module,
+})
@@ -80,6 +80,9 @@ or when sending it:
 
 import threading
 from pycassa.cassandra.ttypes import (ConsistencyLevel, Deletion, Mutation, SlicePredicate)
+from pycassa.deadline import Deadline
+from pycassa.pool import _acquire_throttles, _release_throttles
+from pycassa.wire import encode_mutation_map
 
 __all__ = ['Mutator', 'CfMutator']
 
@@ -91,19 +94,36 @@ class Mutator(object):
     is full or `send` is called explicitly.
     """
 
-    def __init__(self, pool, queue_size=100, write_consistency_level=None, allow_retries=True, atomic=False):
+    def __init__(self, pool, queue_size=100, write_consistency_level=None, allow_retries=True, atomic=False,
+                 retry_policy=None, traffic_class=None, throttles=None):
         """
         `pool` is the :class:`~pycassa.pool.ConnectionPool` that will be used
         for operations.
 
         After `queue_size` operations, :meth:`send()` will be executed
         automatically.  Use 0 to disable automatic sends.
+
+        If `retry_policy` is set, that :class:`~pycassa.retry.RetryPolicy`
+        is used instead of the pool's when sending the batch.
+
+        If `traffic_class` is set, connections are checked out for the
+        :class:`~pycassa.pool.TrafficClass` with that name.
+
+        If `throttles` is set, that list of :class:`~pycassa.throttle.Throttle`
+        objects is used instead of the pool's when sending the batch.
+
+        .. versionchanged:: 1.12.0
+            The `retry_policy`, `traffic_class` and `throttles` parameters
+            were added.
         """
         self._buffer = []
         self._lock = threading.RLock()
         self.pool = pool
         self.limit = queue_size
         self.allow_retries = allow_retries
+        self.retry_policy = retry_policy
+        self.traffic_class = traffic_class
+        self.throttles = throttles
         self.atomic = atomic
         if write_consistency_level is None:
             self.write_consistency_level = ConsistencyLevel.ONE
@@ -127,12 +147,23 @@ class Mutator(object):
             self._lock.release()
         return self
 
-    def send(self, write_consistency_level=None, atomic=None):
-        """ Sends all operations currently in the batch and clears the batch. """
+    def send(self, write_consistency_level=None, atomic=None, timeout_budget=None):
+        """
+        Sends all operations currently in the batch and clears the batch.
+
+        `timeout_budget` limits the time, in seconds, that sending may take,
+        including waiting for a connection and any retries; if it runs out,
+        a :exc:`~pycassa.deadline.DeadlineExceeded` is raised and the batch
+        is kept.
+
+        .. versionchanged:: 1.12.0
+            The `timeout_budget` parameter was added.
+        """
         if write_consistency_level is None:
             write_consistency_level = self.write_consistency_level
         if atomic is None:
             atomic = self.atomic
+        deadline = Deadline.start(timeout_budget)
         mutations = {}
         conn = None
         self._lock.acquire()
@@ -140,10 +171,36 @@ class Mutator(object):
             for key, column_family, cols in self._buffer:
                 mutations.setdefault(key, {}).setdefault(column_family, []).extend(cols)
             if mutations:
-                conn = self.pool.get()
+                kwargs = {'allow_retries': self.allow_retries,
+                          'retry_policy': self.retry_policy,
+                          'throttles': self.throttles}
+                if getattr(self.pool, 'metrics', None) is not None or \
+                        getattr(self.pool, 'slow_log', None) is not None:
+                    column_families = set(cf for key, cf, cols in self._buffer)
+                    if len(column_families) == 1:
+                        kwargs['column_family'] = column_families.pop()
+                # Wait on the throttles before taking a connection, so
+                # that it is not held while waiting
+                throttles = self.throttles
+                if throttles is None:
+                    throttles = getattr(self.pool, 'throttles', None)
+                acquired = None
+                if throttles:
+                    acquired = _acquire_throttles(throttles, deadline)
+                    kwargs['acquired_throttles'] = acquired
+                try:
+                    if deadline is None and self.traffic_class is None:
+                        conn = self.pool.get()
+                    else:
+                        conn = self.pool.get(deadline, self.traffic_class)
+                except:
+                    if acquired:
+                        _release_throttles(acquired)
+                    raise
+                if deadline is not None:
+                    kwargs['deadline'] = deadline
                 mutatefn = conn.atomic_batch_mutate if atomic else conn.batch_mutate
-                mutatefn(mutations, write_consistency_level,
-                         allow_retries=self.allow_retries)
+                mutatefn(encode_mutation_map(mutations), write_consistency_level, **kwargs)
             self._buffer = []
         finally:
             if conn:
@@ -199,13 +256,19 @@ class CfMutator(Mutator):
     """
 
     def __init__(self, column_family, queue_size=100, write_consistency_level=None,
-                 allow_retries=True, atomic=False):
+                 allow_retries=True, atomic=False, retry_policy=None, traffic_class=None,
+                 throttles=None):
         """
         `column_family` is the :class:`~pycassa.columnfamily.ColumnFamily`
         that all operations will be executed on.
         """
         wcl = write_consistency_level or column_family.write_consistency_level
-        Mutator.__init__(self, column_family.pool, queue_size, wcl, allow_retries, atomic)
+        retry_policy = retry_policy or column_family.retry_policy
+        traffic_class = traffic_class or column_family.traffic_class
+        if throttles is None:
+            throttles = column_family.throttles
+        Mutator.__init__(self, column_family.pool, queue_size, wcl, allow_retries, atomic,
+                         retry_policy, traffic_class, throttles)
         self._column_family = column_family
 
     def insert(self, key, cols, timestamp=None, ttl=None):
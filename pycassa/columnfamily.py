@@ -9,13 +9,14 @@ import time
 import struct
 from UserDict import DictMixin
 
-from pycassa.cassandra.ttypes import Column, ColumnOrSuperColumn,\
-    ColumnParent, ColumnPath, ConsistencyLevel, NotFoundException,\
-    SlicePredicate, SliceRange, SuperColumn, KeyRange,\
-    IndexExpression, IndexClause, CounterColumn, Mutation
+from pycassa.cassandra.ttypes import ColumnParent, ColumnPath,\
+    ConsistencyLevel, NotFoundException, SlicePredicate, SliceRange,\
+    KeyRange, IndexExpression, IndexClause, CounterColumn
 import pycassa.marshal as marshal
 import pycassa.types as types
+import pycassa.wire as wire
 from pycassa.batch import CfMutator
+from pycassa.deadline import Deadline
 try:
     from collections import OrderedDict
 except ImportError:
@@ -135,6 +136,34 @@ class ColumnFamily(object):
 
     """
 
+    retry_policy = None
+    """ The :class:`~pycassa.retry.RetryPolicy` used for operations on this
+    column family, including batches created with :meth:`batch()`. If this
+    is ``None``, the pool's :attr:`~.ConnectionPool.retry_policy` is used.
+    By default, this is ``None``.
+
+    .. versionadded:: 1.12.0
+    """
+
+    throttles = None
+    """ A list of :class:`~pycassa.throttle.Throttle` objects that operations
+    on this column family, including batches created with :meth:`batch()`,
+    must pass through. If this is ``None``, the pool's
+    :attr:`~.ConnectionPool.throttles` are used. By default, this is ``None``.
+
+    .. versionadded:: 1.12.0
+    """
+
+    traffic_class = None
+    """ The name of the :class:`~pycassa.pool.TrafficClass` that connections
+    are checked out for when operating on this column family, including
+    through batches created with :meth:`batch()`. If this is ``None``,
+    the pool's :attr:`~.ConnectionPool.default_traffic_class` is used.
+    By default, this is ``None``.
+
+    .. versionadded:: 1.12.0
+    """
+
     def _set_column_name_class(self, t):
         if isinstance(t, types.CassandraType):
             self._column_name_class = t
@@ -190,28 +219,16 @@ class ColumnFamily(object):
 
         if not self.super:
             if self._have_counters:
-                def _make_counter_cosc(name, value, timestamp, ttl):
-                    return ColumnOrSuperColumn(counter_column=CounterColumn(name, value))
-                self._make_cosc = _make_counter_cosc
+                def _make_counter_mutation(name, value, timestamp, ttl):
+                    return wire.encode_counter_mutation(name, value)
+                self._make_mutation = _make_counter_mutation
             else:
-                def _make_normal_cosc(name, value, timestamp, ttl):
-                    return ColumnOrSuperColumn(Column(name, value, timestamp, ttl))
-                self._make_cosc = _make_normal_cosc
+                self._make_mutation = wire.encode_column_mutation
         else:
             if self._have_counters:
-                def _make_column(name, value, timestamp, ttl):
-                    return CounterColumn(name, value)
-                self._make_column = _make_column
-
-                def _make_counter_super_cosc(scol_name, subcols):
-                    return ColumnOrSuperColumn(counter_super_column=(SuperColumn(scol_name, subcols)))
-                self._make_cosc = _make_counter_super_cosc
+                self._make_mutation = wire.encode_counter_super_column_mutation
             else:
-                self._make_column = Column
-
-                def _make_super_cosc(scol_name, subcols):
-                    return ColumnOrSuperColumn(super_column=(SuperColumn(scol_name, subcols)))
-                self._make_cosc = _make_super_cosc
+                self._make_mutation = wire.encode_super_column_mutation
 
     def _get_default_validation_class(self):
         return self._default_validation_class
@@ -276,18 +293,36 @@ class ColumnFamily(object):
         `column_family` should be the name of the column family that you
         want to use in Cassandra. Note that the keyspace to be used is
         determined by the pool.
+
+        If a :class:`~pycassa.snapshot.SchemaSnapshot` is passed as
+        `schema_snapshot`, the column family's definition is taken from
+        it instead of being fetched from Cassandra.
+
+        .. versionchanged:: 1.12.0
+            The `schema_snapshot` parameter was added.
         """
 
         self.pool = pool
         self.column_family = column_family
         self.timestamp = gm_timestamp
-        self.load_schema()
+
+        snapshot = kwargs.pop('schema_snapshot', None)
+        if snapshot is None:
+            self._load_schema(refresh=False)
+        else:
+            keyspace = getattr(pool, 'keyspace', None)
+            if keyspace is not None and keyspace != snapshot.keyspace:
+                raise ValueError(
+                        "The schema snapshot is for keyspace %s, but the pool "
+                        "uses keyspace %s" % (snapshot.keyspace, keyspace))
+            self._set_cfdef(snapshot.get_cfdef(column_family))
 
         recognized_kwargs = ("buffer_size", "read_consistency_level",
                              "write_consistency_level", "timestamp",
                              "dict_class", "buffer_size", "autopack_names",
                              "autopack_values", "autopack_keys",
-                             "retry_counter_mutations")
+                             "retry_counter_mutations", "retry_policy",
+                             "throttles", "traffic_class")
         for k, v in kwargs.iteritems():
             if k in recognized_kwargs:
                 setattr(self, k, v)
@@ -301,16 +336,34 @@ class ColumnFamily(object):
         Loads the schema definition for this column family from
         Cassandra and updates comparator and validation classes if
         neccessary.
+
+        .. versionchanged:: 1.12.0
+            The pool's cached keyspace description is refreshed as well.
         """
-        ksdef = self.pool.execute('get_keyspace_description',
-                                  use_dict_for_col_metadata=True)
+        self._load_schema(refresh=True)
+
+    def _describe_keyspace(self, refresh):
+        if hasattr(self.pool, 'get_keyspace_description'):
+            return self.pool.get_keyspace_description(refresh=refresh)
+        return self.pool.execute('get_keyspace_description',
+                                 use_dict_for_col_metadata=True)
+
+    def _load_schema(self, refresh):
+        ksdef = self._describe_keyspace(refresh)
+        if self.column_family not in ksdef and not refresh:
+            # The column family may have been created since the pool
+            # cached its keyspace description
+            ksdef = self._describe_keyspace(True)
         try:
-            self._cfdef = ksdef[self.column_family]
+            cfdef = ksdef[self.column_family]
         except KeyError:
             nfe = NotFoundException()
             nfe.why = 'Column family %s not found.' % self.column_family
             raise nfe
+        self._set_cfdef(cfdef)
 
+    def _set_cfdef(self, cfdef):
+        self._cfdef = cfdef
         self.super = self._cfdef.column_type == 'Super'
         self._load_comparator_classes()
         self._load_validation_classes()
@@ -377,6 +430,41 @@ class ColumnFamily(object):
                 ret[self._unpack_name(scounter.name, True)] = self._scounter_to_dict(scounter)
         return ret
 
+    def _slice_decoder(self, include_timestamp, include_ttl, as_items=False):
+        name_unpacker = super_name_unpacker = None
+        value_unpacker = value_unpackers = None
+        if self.autopack_names:
+            name_unpacker = self._name_unpacker
+            super_name_unpacker = self._super_name_unpacker
+        if self.autopack_values:
+            value_unpacker = self._default_value_unpacker
+            value_unpackers = self._column_validators.unpackers
+        return wire.SliceDecoder(name_unpacker, super_name_unpacker,
+                                 value_unpacker, value_unpackers, self.dict_class,
+                                 include_timestamp, include_ttl, as_items)
+
+    def _execute(self, method, *args, **kwargs):
+        if self.retry_policy is not None:
+            kwargs['retry_policy'] = self.retry_policy
+        if self.throttles is not None:
+            kwargs['throttles'] = self.throttles
+        if self.traffic_class is not None:
+            kwargs['traffic_class'] = self.traffic_class
+        if getattr(self.pool, 'metrics', None) is not None or \
+                getattr(self.pool, 'slow_log', None) is not None:
+            kwargs['column_family'] = self.column_family
+        if kwargs.get('deadline', False) is None:
+            del kwargs['deadline']
+        return self.pool.execute(method, *args, **kwargs)
+
+    def _execute_decoded(self, method, *args, **kwargs):
+        try:
+            return self._execute(method, *args, **kwargs)
+        except struct.error, exc:
+            raise TypeError("The results for %s could not be unpacked to "
+                            "match its column name and validation classes: %s"
+                            % (self.column_family, exc))
+
     def _column_path(self, super_column=None, column=None):
         return ColumnPath(self.column_family,
                           self._pack_name(super_column, is_supercol_name=True),
@@ -504,20 +592,21 @@ class ColumnFamily(object):
     def _make_mutation_list(self, columns, timestamp, ttl):
         _pack_name = self._pack_name
         _pack_value = self._pack_value
+        _make_mutation = self._make_mutation
         if not self.super:
-            return map(lambda (c, v): Mutation(self._make_cosc(_pack_name(c), _pack_value(v, c), timestamp, ttl)),
-                       columns.iteritems())
+            return [_make_mutation(_pack_name(c), _pack_value(v, c), timestamp, ttl)
+                    for c, v in columns.iteritems()]
         else:
             mut_list = []
             for super_col, subcs in columns.items():
-                subcols = map(lambda (c, v): self._make_column(_pack_name(c), _pack_value(v, c), timestamp, ttl),
-                              subcs.iteritems())
-                mut_list.append(Mutation(self._make_cosc(_pack_name(super_col, True), subcols)))
+                subcols = [(_pack_name(c), _pack_value(v, c), timestamp, ttl)
+                           for c, v in subcs.iteritems()]
+                mut_list.append(_make_mutation(_pack_name(super_col, True), subcols))
             return mut_list
 
     def xget(self, key, column_start="", column_finish="", column_reversed=False,
              column_count=None, include_timestamp=False, read_consistency_level=None,
-             buffer_size=None, include_ttl=False):
+             buffer_size=None, include_ttl=False, timeout_budget=None):
         """
         Like :meth:`get()`, but creates a generator that pages over the columns
         automatically.
@@ -526,11 +615,15 @@ class ColumnFamily(object):
         `buffer_size` parameter. The default is :attr:`column_buffer_size`.
 
         The generator returns `(name, value)` tuples.
+
+        `timeout_budget` covers the fetching of every page; see :meth:`get()`.
         """
 
+        deadline = Deadline.start(timeout_budget)
         packed_key = self._pack_key(key)
         cp = self._column_parent(None)
         rcl = read_consistency_level or self.read_consistency_level
+        decoder = self._slice_decoder(include_timestamp, include_ttl, as_items=True)
 
         if buffer_size is None:
             buffer_size = self.column_buffer_size
@@ -555,50 +648,33 @@ class ColumnFamily(object):
 
             sp = self._slice_predicate(None, last_name, finish,
                                        column_reversed, buffer_size, None, pack=False)
-            list_cosc = self.pool.execute('get_slice', packed_key, cp, sp, rcl)
+            items, num_fetched, last_fetched = self._execute_decoded(
+                    'get_slice_decoded', packed_key, cp, sp, rcl, decoder,
+                    deadline=deadline)
 
-            if not list_cosc:
+            if not num_fetched:
                 return
 
-            for j, cosc in enumerate(list_cosc):
+            for j, item in enumerate(items):
                 if j == 0 and i != 0:
                     continue
 
-                if self.super:
-                    if self._have_counters:
-                        scol = cosc.counter_super_column
-                    else:
-                        scol = cosc.super_column
-                    yield (self._unpack_name(scol.name, True), self._scol_to_dict(scol, include_timestamp, include_ttl))
-                else:
-                    if self._have_counters:
-                        col = cosc.counter_column
-                    else:
-                        col = cosc.column
-                    yield (self._unpack_name(col.name, False), self._col_to_dict(col, include_timestamp, include_ttl))
+                yield item
 
                 count += 1
                 if column_count is not None and count >= column_count:
                     return
 
-            if len(list_cosc) != buffer_size:
+            if num_fetched != buffer_size:
                 return
 
-            if self.super:
-                if self._have_counters:
-                    last_name = list_cosc[-1].counter_super_column.name
-                else:
-                    last_name = list_cosc[-1].super_column.name
-            else:
-                if self._have_counters:
-                    last_name = list_cosc[-1].counter_column.name
-                else:
-                    last_name = list_cosc[-1].column.name
+            last_name = last_fetched
             i += 1
 
     def get(self, key, columns=None, column_start="", column_finish="",
             column_reversed=False, column_count=100, include_timestamp=False,
-            super_column=None, read_consistency_level=None, include_ttl=False):
+            super_column=None, read_consistency_level=None, include_ttl=False,
+            timeout_budget=None):
         """
         Fetches all or part of the row with key `key`.
 
@@ -636,8 +712,19 @@ class ColumnFamily(object):
         the super column name will be excluded and the results are of the form
         ``{column_name: column_value}``.
 
+        `timeout_budget` limits the time, in seconds, that the whole call may
+        take, including waiting for a connection and any retries; if it runs
+        out, a :exc:`~pycassa.deadline.DeadlineExceeded` is raised. The other
+        methods of this class that accept `timeout_budget` treat it the same
+        way; see :mod:`pycassa.deadline`.
+
+        .. versionchanged:: 1.12.0
+            The `timeout_budget` parameter was added to this and most other
+            methods.
+
         """
 
+        deadline = Deadline.start(timeout_budget)
         packed_key = self._pack_key(key)
         single_column = columns is not None and len(columns) == 1
         if (not self.super and single_column) or \
@@ -648,24 +735,27 @@ class ColumnFamily(object):
             else:
                 column = columns[0]
             cp = self._column_path(super_column, column)
-            col_or_super = self.pool.execute('get', packed_key, cp,
-                    read_consistency_level or self.read_consistency_level)
+            col_or_super = self._execute('get', packed_key, cp,
+                    read_consistency_level or self.read_consistency_level,
+                    deadline=deadline)
             return self._cosc_to_dict([col_or_super], include_timestamp, include_ttl)
         else:
             cp = self._column_parent(super_column)
             sp = self._slice_predicate(columns, column_start, column_finish,
                                        column_reversed, column_count, super_column)
 
-            list_col_or_super = self.pool.execute('get_slice', packed_key, cp, sp,
-                read_consistency_level or self.read_consistency_level)
+            row, num_fetched, last_fetched = self._execute_decoded('get_slice_decoded',
+                packed_key, cp, sp, read_consistency_level or self.read_consistency_level,
+                self._slice_decoder(include_timestamp, include_ttl), deadline=deadline)
 
-            if len(list_col_or_super) == 0:
+            if num_fetched == 0:
                 raise NotFoundException()
-            return self._cosc_to_dict(list_col_or_super, include_timestamp, include_ttl)
+            return row
 
     def get_indexed_slices(self, index_clause, columns=None, column_start="", column_finish="",
                            column_reversed=False, column_count=100, include_timestamp=False,
-                           read_consistency_level=None, buffer_size=None, include_ttl=False):
+                           read_consistency_level=None, buffer_size=None, include_ttl=False,
+                           timeout_budget=None):
         """
         Similar to :meth:`get_range()`, but an :class:`~pycassa.cassandra.ttypes.IndexClause`
         is used instead of a key range.
@@ -685,6 +775,7 @@ class ColumnFamily(object):
         assert not self.super, "get_indexed_slices() is not " \
                 "supported by super column families"
 
+        deadline = Deadline.start(timeout_budget)
         cl = read_consistency_level or self.read_consistency_level
         cp = self._column_parent()
         sp = self._slice_predicate(columns, column_start, column_finish,
@@ -705,6 +796,8 @@ class ColumnFamily(object):
             buffer_size = self.buffer_size
         row_count = clause.count
 
+        decoder = self._slice_decoder(include_timestamp, include_ttl)
+
         count = 0
         i = 0
         last_key = clause.start_key
@@ -717,18 +810,18 @@ class ColumnFamily(object):
                     buffer_size = min(row_count - count + 1, buffer_size)
             clause.count = buffer_size
             clause.start_key = last_key
-            key_slices = self.pool.execute('get_indexed_slices', cp, clause, sp, cl)
+            key_slices = self._execute_decoded('get_indexed_slices_decoded',
+                                               cp, clause, sp, cl, decoder,
+                                               deadline=deadline)
 
             if key_slices is None:
                 return
-            for j, key_slice in enumerate(key_slices):
+            for j, (key, row) in enumerate(key_slices):
                 # Ignore the first element after the first iteration
                 # because it will be a duplicate.
                 if j == 0 and i != 0:
                     continue
-                unpacked_key = self._unpack_key(key_slice.key)
-                yield (unpacked_key,
-                       self._cosc_to_dict(key_slice.columns, include_timestamp, include_ttl))
+                yield (self._unpack_key(key), row)
 
                 count += 1
                 if row_count is not None and count >= row_count:
@@ -736,12 +829,13 @@ class ColumnFamily(object):
 
             if len(key_slices) != buffer_size:
                 return
-            last_key = key_slices[-1].key
+            last_key = key_slices[-1][0]
             i += 1
 
     def multiget(self, keys, columns=None, column_start="", column_finish="",
                  column_reversed=False, column_count=100, include_timestamp=False,
-                 super_column=None, read_consistency_level=None, buffer_size=None, include_ttl=False):
+                 super_column=None, read_consistency_level=None, buffer_size=None, include_ttl=False,
+                 timeout_budget=None):
         """
         Fetch multiple rows from a Cassandra server.
 
@@ -758,18 +852,21 @@ class ColumnFamily(object):
 
         """
 
+        deadline = Deadline.start(timeout_budget)
         packed_keys = map(self._pack_key, keys)
         cp = self._column_parent(super_column)
         sp = self._slice_predicate(columns, column_start, column_finish,
                                    column_reversed, column_count, super_column)
         consistency = read_consistency_level or self.read_consistency_level
+        decoder = self._slice_decoder(include_timestamp, include_ttl)
 
         buffer_size = buffer_size or self.buffer_size
         offset = 0
         keymap = {}
         while offset < len(packed_keys):
-            new_keymap = self.pool.execute('multiget_slice',
-                packed_keys[offset:offset + buffer_size], cp, sp, consistency)
+            new_keymap = self._execute_decoded('multiget_slice_decoded',
+                packed_keys[offset:offset + buffer_size], cp, sp, consistency, decoder,
+                deadline=deadline)
             keymap.update(new_keymap)
             offset += buffer_size
 
@@ -783,7 +880,7 @@ class ColumnFamily(object):
         for packed_key, columns in keymap.iteritems():
             unpacked_key = self._unpack_key(packed_key)
             if len(columns) > 0:
-                ret[unpacked_key] = self._cosc_to_dict(columns, include_timestamp, include_ttl)
+                ret[unpacked_key] = columns
             else:
                 empty_keys.append(unpacked_key)
 
@@ -799,7 +896,7 @@ class ColumnFamily(object):
 
     def get_count(self, key, super_column=None, read_consistency_level=None,
                   columns=None, column_start="", column_finish="",
-                  column_reversed=False, max_count=None):
+                  column_reversed=False, max_count=None, timeout_budget=None):
         """
         Count the number of columns in the row with key `key`.
 
@@ -823,14 +920,15 @@ class ColumnFamily(object):
         sp = self._slice_predicate(columns, column_start, column_finish,
                                    column_reversed, max_count, super_column)
 
-        return self.pool.execute('get_count', packed_key, cp, sp,
-                read_consistency_level or self.read_consistency_level)
+        return self._execute('get_count', packed_key, cp, sp,
+                read_consistency_level or self.read_consistency_level,
+                deadline=Deadline.start(timeout_budget))
 
     def multiget_count(self, keys, super_column=None,
                        read_consistency_level=None,
                        columns=None, column_start="",
                        column_finish="", buffer_size=None,
-                       column_reversed=False, max_count=None):
+                       column_reversed=False, max_count=None, timeout_budget=None):
         """
         Perform a column count in parallel on a set of rows.
 
@@ -848,6 +946,7 @@ class ColumnFamily(object):
         if max_count is None:
             max_count = self.MAX_COUNT
 
+        deadline = Deadline.start(timeout_budget)
         packed_keys = map(self._pack_key, keys)
         cp = self._column_parent(super_column)
         sp = self._slice_predicate(columns, column_start, column_finish,
@@ -858,8 +957,9 @@ class ColumnFamily(object):
         offset = 0
         keymap = {}
         while offset < len(packed_keys):
-            new_keymap = self.pool.execute('multiget_count',
-                packed_keys[offset:offset + buffer_size], cp, sp, consistency)
+            new_keymap = self._execute('multiget_count',
+                packed_keys[offset:offset + buffer_size], cp, sp, consistency,
+                deadline=deadline)
             keymap.update(new_keymap)
             offset += buffer_size
 
@@ -879,7 +979,7 @@ class ColumnFamily(object):
                   row_count=None, include_timestamp=False,
                   super_column=None, read_consistency_level=None,
                   buffer_size=None, filter_empty=True, include_ttl=False,
-                  start_token=None, finish_token=None):
+                  start_token=None, finish_token=None, timeout_budget=None):
         """
         Get an iterator over rows in a specified key range.
 
@@ -919,12 +1019,16 @@ class ColumnFamily(object):
         A generator over ``(key, {column_name: column_value})`` is returned.
         To convert this to a list, use ``list()`` on the result.
 
+        `timeout_budget` covers the fetching of every page; see :meth:`get()`.
+
         """
 
+        deadline = Deadline.start(timeout_budget)
         cl = read_consistency_level or self.read_consistency_level
         cp = self._column_parent(super_column)
         sp = self._slice_predicate(columns, column_start, column_finish,
                                    column_reversed, column_count, super_column)
+        decoder = self._slice_decoder(include_timestamp, include_ttl)
 
         kr_args = {}
         count = 0
@@ -961,19 +1065,20 @@ class ColumnFamily(object):
                     buffer_size = min(row_count - count + 1, buffer_size)
             kr_args['count'] = buffer_size
             key_range = KeyRange(**kr_args)
-            key_slices = self.pool.execute('get_range_slices', cp, sp, key_range, cl)
+            key_slices = self._execute_decoded('get_range_slices_decoded',
+                                               cp, sp, key_range, cl, decoder,
+                                               deadline=deadline)
             # This may happen if nothing was ever inserted
             if key_slices is None:
                 return
-            for j, key_slice in enumerate(key_slices):
+            for j, (key, row) in enumerate(key_slices):
                 # Ignore the first element after the first iteration
                 # because it will be a duplicate.
                 if j == 0 and i != 0:
                     continue
-                if filter_empty and not key_slice.columns:
+                if filter_empty and not row:
                     continue
-                yield (self._unpack_key(key_slice.key),
-                       self._cosc_to_dict(key_slice.columns, include_timestamp, include_ttl))
+                yield (self._unpack_key(key), row)
                 count += 1
                 if row_count is not None and count >= row_count:
                     return
@@ -982,11 +1087,11 @@ class ColumnFamily(object):
                 return
             if 'start_token' in kr_args:
                 del kr_args['start_token']
-            kr_args['start_key'] = key_slices[-1].key
+            kr_args['start_key'] = key_slices[-1][0]
             i += 1
 
     def insert(self, key, columns, timestamp=None, ttl=None,
-               write_consistency_level=None):
+               write_consistency_level=None, timeout_budget=None):
         """
         Insert or update columns in the row with key `key`.
 
@@ -1012,14 +1117,16 @@ class ColumnFamily(object):
 
         packed_key = self._pack_key(key)
         mut_list = self._make_mutation_list(columns, timestamp, ttl)
-        mutations = {packed_key: {self.column_family: mut_list}}
-        self.pool.execute('batch_mutate', mutations,
+        mutations = wire.encode_mutation_map({packed_key: {self.column_family: mut_list}})
+        self._execute('batch_mutate', mutations,
                 write_consistency_level or self.write_consistency_level,
-                allow_retries=self._allow_retries)
+                allow_retries=self._allow_retries,
+                deadline=Deadline.start(timeout_budget))
 
         return timestamp
 
-    def batch_insert(self, rows, timestamp=None, ttl=None, write_consistency_level=None):
+    def batch_insert(self, rows, timestamp=None, ttl=None, write_consistency_level=None,
+                     timeout_budget=None):
         """
         Like :meth:`insert()`, but multiple rows may be inserted at once.
 
@@ -1041,13 +1148,15 @@ class ColumnFamily(object):
             mutations[packed_key] = {cf: mut_list}
 
         if mutations:
-            self.pool.execute('batch_mutate', mutations,
+            self._execute('batch_mutate', wire.encode_mutation_map(mutations),
                     write_consistency_level or self.write_consistency_level,
-                    allow_retries=self._allow_retries)
+                    allow_retries=self._allow_retries,
+                    deadline=Deadline.start(timeout_budget))
 
         return timestamp
 
-    def add(self, key, column, value=1, super_column=None, write_consistency_level=None):
+    def add(self, key, column, value=1, super_column=None, write_consistency_level=None,
+            timeout_budget=None):
         """
         Increment or decrement a counter.
 
@@ -1061,12 +1170,14 @@ class ColumnFamily(object):
         packed_key = self._pack_key(key)
         cp = self._column_parent(super_column)
         column = self._pack_name(column)
-        self.pool.execute('add', packed_key, cp, CounterColumn(column, value),
+        self._execute('add', packed_key, cp, CounterColumn(column, value),
                           write_consistency_level or self.write_consistency_level,
-                          allow_retries=self._allow_retries)
+                          allow_retries=self._allow_retries,
+                          deadline=Deadline.start(timeout_budget))
 
     def remove(self, key, columns=None, super_column=None,
-               write_consistency_level=None, timestamp=None, counter=None):
+               write_consistency_level=None, timestamp=None, counter=None,
+               timeout_budget=None):
         """
         Remove a specified row or a set of columns within the row with key `key`.
 
@@ -1087,10 +1198,11 @@ class ColumnFamily(object):
             timestamp = self.timestamp()
         batch = self.batch(write_consistency_level=write_consistency_level)
         batch.remove(key, columns, super_column, timestamp)
-        batch.send()
+        batch.send(timeout_budget=timeout_budget)
         return timestamp
 
-    def remove_counter(self, key, column, super_column=None, write_consistency_level=None):
+    def remove_counter(self, key, column, super_column=None, write_consistency_level=None,
+                       timeout_budget=None):
         """
         Remove a counter at the specified location.
 
@@ -1104,8 +1216,9 @@ class ColumnFamily(object):
         """
         packed_key = self._pack_key(key)
         cp = self._column_path(super_column, column)
-        self.pool.execute('remove_counter', packed_key, cp,
-                          write_consistency_level or self.write_consistency_level)
+        self._execute('remove_counter', packed_key, cp,
+                          write_consistency_level or self.write_consistency_level,
+                          deadline=Deadline.start(timeout_budget))
 
     def batch(self, queue_size=100, write_consistency_level=None, atomic=None):
         """
@@ -1121,7 +1234,7 @@ class ColumnFamily(object):
         return CfMutator(self, queue_size,
                          write_consistency_level or self.write_consistency_level,
                          allow_retries=self._allow_retries,
-                         atomic=atomic)
+                         atomic=atomic, retry_policy=self.retry_policy)
 
     def truncate(self):
         """
@@ -1137,6 +1250,6 @@ class ColumnFamily(object):
         down.
 
         """
-        self.pool.execute('truncate', self.column_family)
+        self._execute('truncate', self.column_family)
 
 PooledColumnFamily = ColumnFamily
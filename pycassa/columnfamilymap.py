@@ -42,6 +42,9 @@ class ColumnFamilyMap(ColumnFamily):
 
         If `raw_columns` is ``True``, all columns will be fetched into the
         `raw_columns` field in requests.
+
+        Other keyword arguments, such as `schema_snapshot`, are handled
+        as they are by :class:`~.ColumnFamily`.
         """
         ColumnFamily.__init__(self, pool, column_family, **kwargs)
 
@@ -218,7 +221,7 @@ class ColumnFamilyMap(ColumnFamily):
         return instance_dict
 
     def insert(self, instance, columns=None, timestamp=None, ttl=None,
-               write_consistency_level=None):
+               write_consistency_level=None, timeout_budget=None):
         """
         Insert or update stored instances.
 
@@ -237,10 +240,11 @@ class ColumnFamilyMap(ColumnFamily):
         insert_dict = self._get_instance_as_dict(instance, columns=fields)
         return ColumnFamily.insert(self, instance.key, insert_dict,
                                    timestamp=timestamp, ttl=ttl,
-                                   write_consistency_level=write_consistency_level)
+                                   write_consistency_level=write_consistency_level,
+                                   timeout_budget=timeout_budget)
 
     def batch_insert(self, instances, timestamp=None, ttl=None,
-            write_consistency_level=None):
+            write_consistency_level=None, timeout_budget=None):
         """
         Insert or update stored instances.
 
@@ -252,9 +256,11 @@ class ColumnFamilyMap(ColumnFamily):
         )
         return ColumnFamily.batch_insert(self, insert_dict,
                 timestamp=timestamp, ttl=ttl,
-                write_consistency_level=write_consistency_level)
+                write_consistency_level=write_consistency_level,
+                timeout_budget=timeout_budget)
 
-    def remove(self, instance, columns=None, write_consistency_level=None):
+    def remove(self, instance, columns=None, write_consistency_level=None,
+               timeout_budget=None):
         """
         Removes a stored instance.
 
@@ -267,7 +273,9 @@ class ColumnFamilyMap(ColumnFamily):
             return ColumnFamily.remove(self, instance.key,
                                        super_column=instance.super_column,
                                        columns=columns,
-                                       write_consistency_level=write_consistency_level)
+                                       write_consistency_level=write_consistency_level,
+                                       timeout_budget=timeout_budget)
         else:
             return ColumnFamily.remove(self, instance.key, columns,
-                                       write_consistency_level=write_consistency_level)
+                                       write_consistency_level=write_consistency_level,
+                                       timeout_budget=timeout_budget)
@@ -5,13 +5,23 @@ from thrift.transport import TTransport, TSocket, TSSLSocket
 from thrift.transport.TTransport import (TTransportBase, CReadableTransport,
         TTransportException)
 from thrift.protocol import TBinaryProtocol
+from thrift.Thrift import TMessageType, TApplicationException
 
 from pycassa.cassandra import Cassandra
 from pycassa.cassandra.ttypes import AuthenticationRequest
+from pycassa.wire import EncodedMutationMap, encode_batch_mutate_args
 
 DEFAULT_SERVER = 'localhost:9160'
 DEFAULT_PORT = 9160
 
+_frame_header = struct.Struct('!i')
+
+try:
+    _memoryview = memoryview
+except NameError:
+    # Python 2.6
+    _memoryview = None
+
 
 def default_socket_factory(host, port):
     """
@@ -22,9 +32,13 @@ def default_socket_factory(host, port):
 
 def default_transport_factory(tsocket, host, port):
     """
-    Returns a normal :class:`TFramedTransport` instance wrapping `tsocket`.
+    Returns a :class:`TFramedSocketTransport` instance wrapping `tsocket`.
+
+    .. versionchanged:: 1.12.0
+        A :class:`TFramedSocketTransport` is used instead of Thrift's
+        :class:`TFramedTransport`.
     """
-    return TTransport.TFramedTransport(tsocket)
+    return TFramedSocketTransport(tsocket)
 
 
 class Connection(Cassandra.Client):
@@ -45,6 +59,7 @@ class Connection(Cassandra.Client):
         socket = socket_factory(host, int(port))
         if timeout is not None:
             socket.setTimeout(timeout * 1000.0)
+        self._socket = socket
         self.transport = transport_factory(socket, host, port)
         protocol = TBinaryProtocol.TBinaryProtocolAccelerated(self.transport)
         Cassandra.Client.__init__(self, protocol)
@@ -64,6 +79,106 @@ class Connection(Cassandra.Client):
     def close(self):
         self.transport.close()
 
+    def set_timeout(self, timeout):
+        """
+        Changes how long, in seconds, socket operations on this connection
+        may block before timing out. ``None`` disables the timeout.
+        This has no effect if the socket does not support timeouts.
+
+        .. versionadded:: 1.12.0
+        """
+        if hasattr(self._socket, 'setTimeout'):
+            if timeout is not None:
+                timeout *= 1000.0
+            self._socket.setTimeout(timeout)
+
+    def _send_encoded_mutations(self, name, mutation_map, consistency_level):
+        self._oprot.writeMessageBegin(name, TMessageType.CALL, self._seqid)
+        self._oprot.trans.write(encode_batch_mutate_args(mutation_map, consistency_level))
+        self._oprot.writeMessageEnd()
+        self._oprot.trans.flush()
+
+    def send_batch_mutate(self, mutation_map, consistency_level):
+        if isinstance(mutation_map, EncodedMutationMap):
+            self._send_encoded_mutations('batch_mutate', mutation_map, consistency_level)
+        else:
+            Cassandra.Client.send_batch_mutate(self, mutation_map, consistency_level)
+
+    def send_atomic_batch_mutate(self, mutation_map, consistency_level):
+        if isinstance(mutation_map, EncodedMutationMap):
+            self._send_encoded_mutations('atomic_batch_mutate', mutation_map, consistency_level)
+        else:
+            Cassandra.Client.send_atomic_batch_mutate(self, mutation_map, consistency_level)
+
+    def _recv_decoded(self, result_class, decode):
+        iprot = self._iprot
+        (fname, mtype, rseqid) = iprot.readMessageBegin()
+        if mtype == TMessageType.EXCEPTION:
+            x = TApplicationException()
+            x.read(iprot)
+            iprot.readMessageEnd()
+            raise x
+
+        if isinstance(iprot.trans, _frame_buffering_transports):
+            # The rest of the reply is already sitting in the frame buffer
+            data = iprot.trans.cstringio_buf.read()
+            ret = decode(data)
+            if ret is not None:
+                return ret
+            result = result_class()
+            result.read(TBinaryProtocol.TBinaryProtocol(TTransport.TMemoryBuffer(data)))
+        else:
+            result = result_class()
+            result.read(iprot)
+            iprot.readMessageEnd()
+            if result.success is not None:
+                trans = TTransport.TMemoryBuffer()
+                result.write(TBinaryProtocol.TBinaryProtocolAccelerated(trans))
+                return decode(trans.getvalue())
+
+        for exc in (result.ire, result.ue, result.te):
+            if exc is not None:
+                raise exc
+        raise TApplicationException(TApplicationException.MISSING_RESULT,
+                                    "%s failed: unknown result" % fname)
+
+    def get_slice_decoded(self, key, column_parent, predicate, consistency_level, decoder):
+        """
+        Like :meth:`get_slice()`, but the result is decoded by `decoder`,
+        a :class:`~pycassa.wire.SliceDecoder`.
+        """
+        self.send_get_slice(key, column_parent, predicate, consistency_level)
+        return self._recv_decoded(Cassandra.get_slice_result, decoder.decode_slice)
+
+    def multiget_slice_decoded(self, keys, column_parent, predicate, consistency_level, decoder):
+        """
+        Like :meth:`multiget_slice()`, but the result is decoded by `decoder`,
+        a :class:`~pycassa.wire.SliceDecoder`.
+        """
+        self.send_multiget_slice(keys, column_parent, predicate, consistency_level)
+        return self._recv_decoded(Cassandra.multiget_slice_result,
+                                  decoder.decode_multiget_slice)
+
+    def get_range_slices_decoded(self, column_parent, predicate, range, consistency_level, decoder):
+        """
+        Like :meth:`get_range_slices()`, but the result is decoded by `decoder`,
+        a :class:`~pycassa.wire.SliceDecoder`.
+        """
+        self.send_get_range_slices(column_parent, predicate, range, consistency_level)
+        return self._recv_decoded(Cassandra.get_range_slices_result,
+                                  decoder.decode_key_slices)
+
+    def get_indexed_slices_decoded(self, column_parent, index_clause, column_predicate,
+                                   consistency_level, decoder):
+        """
+        Like :meth:`get_indexed_slices()`, but the result is decoded by
+        `decoder`, a :class:`~pycassa.wire.SliceDecoder`.
+        """
+        self.send_get_indexed_slices(column_parent, index_clause, column_predicate,
+                                     consistency_level)
+        return self._recv_decoded(Cassandra.get_indexed_slices_result,
+                                  decoder.decode_key_slices)
+
 
 def make_ssl_socket_factory(ca_certs, validate=True):
     """
@@ -82,7 +197,176 @@ def make_ssl_socket_factory(ca_certs, validate=True):
     return ssl_socket_factory
 
 
-class TSaslClientTransport(TTransportBase, CReadableTransport):
+class _FrameBuffers(object):
+    """
+    Reads and writes length-prefixed frames through reusable buffers.
+
+    When the wrapped transport is a :class:`TSocket`, frames are received
+    straight into a preallocated ``bytearray`` with ``recv_into()`` and
+    sent from one with a single ``sendall()``. The frame header is
+    reserved at the front of the write buffer so that it does not have to
+    be joined to the payload. Other transports are read from and written
+    to through their usual methods.
+    """
+
+    initial_buffer_size = 64 * 1024
+    """ The initial size of the read and write buffers in bytes. """
+
+    max_retained_buffer_size = 4 * 1024 * 1024
+    """
+    Buffers that have grown past this many bytes to fit a large frame
+    are released once the frame has been handled.
+    """
+
+    bytes_sent = 0
+    """ The number of bytes sent, including frame headers. """
+
+    bytes_received = 0
+    """ The number of bytes received, including frame headers. """
+
+    def _init_buffers(self):
+        self._header = bytearray(4)
+        self._frame = bytearray(self.initial_buffer_size)
+        self._wbuf = bytearray(self.initial_buffer_size)
+        self._wpos = 4
+
+    def _socket(self):
+        if isinstance(self.transport, TSocket.TSocket):
+            return self.transport.handle
+        return None
+
+    def _recv_into(self, sock, buf, size):
+        if sock is None:
+            buf[:size] = self.transport.readAll(size)
+            return
+
+        received = sock.recv_into(buf, size)
+        if received == size:
+            return
+
+        if _memoryview is not None:
+            view = _memoryview(buf)
+        else:
+            # Without memoryview, the rest is received into a temporary
+            # buffer and copied into place
+            rest = bytearray(size - received)
+        while received < size:
+            if _memoryview is not None:
+                count = sock.recv_into(view[received:size])
+            else:
+                count = sock.recv_into(rest, size - received)
+                buf[received:received + count] = rest[:count]
+            if count == 0:
+                raise TTransportException(type=TTransportException.END_OF_FILE,
+                                          message='TSocket read 0 bytes')
+            received += count
+
+    def _recv_frame(self):
+        """
+        Reads the next frame into ``self._frame``, returning its length.
+        """
+        sock = self._socket()
+        self._recv_into(sock, self._header, 4)
+        size = _frame_header.unpack_from(self._header)[0]
+        if size < 0:
+            raise TTransportException(message='Invalid frame size %d' % size)
+
+        # A new buffer is allocated rather than resizing the old one,
+        # which may still be referenced by the previous frame's reader
+        if size > len(self._frame) or len(self._frame) > self.max_retained_buffer_size:
+            self._frame = bytearray(max(size, self.initial_buffer_size))
+        self._recv_into(sock, self._frame, size)
+        self.bytes_received += size + 4
+        return size
+
+    def _send(self, data):
+        # `data` should be an old-style buffer rather than a memoryview
+        # so that it does not prevent the write buffer from being resized
+        # while a failed send's traceback is still alive
+        sock = self._socket()
+        if sock is None:
+            self.transport.write(str(data))
+            self.transport.flush()
+        elif sock:
+            sock.sendall(data)
+        else:
+            raise TTransportException(type=TTransportException.NOT_OPEN,
+                                      message='Transport not open')
+        self.bytes_sent += len(data)
+
+    def write(self, data):
+        wpos = self._wpos
+        end = wpos + len(data)
+        # When `end` is past the end of the buffer, this replaces the
+        # buffer's tail and it grows in place
+        self._wbuf[wpos:end] = data
+        self._wpos = end
+
+    def _reset_write_buffer(self):
+        self._wpos = 4
+        if len(self._wbuf) > self.max_retained_buffer_size:
+            self._wbuf = bytearray(self.initial_buffer_size)
+
+
+class TFramedSocketTransport(_FrameBuffers, TTransportBase, CReadableTransport):
+    """
+    A drop-in replacement for Thrift's :class:`TFramedTransport` that
+    reuses its buffers between frames, avoiding most of the copying of
+    large requests and responses.
+
+    .. versionadded:: 1.12.0
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+        self._init_buffers()
+        self.__rbuf = StringIO()
+
+    def isOpen(self):
+        return self.transport.isOpen()
+
+    def open(self):
+        return self.transport.open()
+
+    def close(self):
+        return self.transport.close()
+
+    def read(self, sz):
+        ret = self.__rbuf.read(sz)
+        if len(ret) != 0:
+            return ret
+
+        self._read_frame()
+        return self.__rbuf.read(sz)
+
+    def _read_frame(self):
+        size = self._recv_frame()
+        self.__rbuf = StringIO(buffer(self._frame, 0, size))
+
+    def flush(self):
+        wbuf, wpos = self._wbuf, self._wpos
+        _frame_header.pack_into(wbuf, 0, wpos - 4)
+        # reset the buffer before writing to preserve state on failure
+        self._reset_write_buffer()
+        self._send(buffer(wbuf, 0, wpos))
+
+    # Implement the CReadableTransport interface.
+    @property
+    def cstringio_buf(self):
+        return self.__rbuf
+
+    def cstringio_refill(self, prefix, reqlen):
+        # self.__rbuf will already be empty here because fastbinary doesn't
+        # ask for a refill until the previous buffer is empty.  Therefore,
+        # we can start reading new frames immediately.
+        while len(prefix) < reqlen:
+            size = self._recv_frame()
+            prefix += str(buffer(self._frame, 0, size))
+        self.__rbuf = StringIO(prefix)
+        return self.__rbuf
+
+
+class TSaslClientTransport(_FrameBuffers, TTransportBase, CReadableTransport):
 
     START = 1
     OK = 2
@@ -98,7 +382,7 @@ class TSaslClientTransport(TTransportBase, CReadableTransport):
         self.transport = transport
         self.sasl = SASLClient(host, service, mechanism, **sasl_kwargs)
 
-        self.__wbuf = StringIO()
+        self._init_buffers()
         self.__rbuf = StringIO()
 
     def open(self):
@@ -136,20 +420,16 @@ class TSaslClientTransport(TTransportBase, CReadableTransport):
             payload = ""
         return status, payload
 
-    def write(self, data):
-        self.__wbuf.write(data)
-
     def flush(self):
-        data = self.__wbuf.getvalue()
+        data = str(buffer(self._wbuf, 4, self._wpos - 4))
+        self._reset_write_buffer()
         encoded = self.sasl.wrap(data)
         # Note stolen from TFramedTransport:
         # N.B.: Doing this string concatenation is WAY cheaper than making
         # two separate calls to the underlying socket object. Socket writes in
         # Python turn out to be REALLY expensive, but it seems to do a pretty
         # good job of managing string buffer operations without excessive copies
-        self.transport.write(''.join((struct.pack("!i", len(encoded)), encoded)))
-        self.transport.flush()
-        self.__wbuf = StringIO()
+        self._send(_frame_header.pack(len(encoded)) + encoded)
 
     def read(self, sz):
         ret = self.__rbuf.read(sz)
@@ -160,10 +440,8 @@ class TSaslClientTransport(TTransportBase, CReadableTransport):
         return self.__rbuf.read(sz)
 
     def _read_frame(self):
-        header = self.transport.readAll(4)
-        length, = struct.unpack('!i', header)
-        encoded = self.transport.readAll(length)
-        self.__rbuf = StringIO(self.sasl.unwrap(encoded))
+        size = self._recv_frame()
+        self.__rbuf = StringIO(self.sasl.unwrap(str(buffer(self._frame, 0, size))))
 
     def close(self):
         self.sasl.dispose()
@@ -210,6 +488,11 @@ def make_sasl_transport_factory(credential_factory):
     def sasl_transport_factory(tsocket, host, port):
         sasl_kwargs = credential_factory(host, port)
         sasl_transport = TSaslClientTransport(tsocket, **sasl_kwargs)
-        return TTransport.TFramedTransport(sasl_transport)
+        return TFramedSocketTransport(sasl_transport)
 
     return sasl_transport_factory
+
+
+# Transports that read a whole message into their buffer at once, which
+# lets replies be decoded directly from that buffer
+_frame_buffering_transports = (TFramedSocketTransport, TTransport.TFramedTransport)
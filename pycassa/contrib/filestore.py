@@ -0,0 +1,256 @@
+"""
+A file-backed Cassandra stand-in for local development and CI.
+
+:class:`LocalPool` is a :class:`~pycassa.pool.ConnectionPool` that is
+served from a file instead of a cluster, so that :class:`.ColumnFamily`,
+:class:`.ColumnFamilyMap` and :class:`~pycassa.batch.Mutator` work
+against it unchanged:
+
+.. code-block:: python
+
+    >>> pool = LocalPool('Keyspace1', 'dev.db')
+    >>> pool.create_column_family('Standard1', comparator_type='LongType')
+    >>> cf = ColumnFamily(pool, 'Standard1')
+    >>> cf.insert('key', {1: 'one', 2: 'two'})
+    >>> pool.dispose()
+
+Requests are answered by a :class:`~pycassa.contrib.server.CassandraServer`
+in the same process, which keeps columns sorted by their comparators, so
+slices and paging behave as they would against a real node. Its data is
+kept in a :class:`FileStore`, a SQLite database of the schema and of the
+packed columns: every write is written to the file as well, and the file
+is read back in bulk when the pool is opened again.
+
+Data can be copied from a cluster with :meth:`LocalPool.import_rows()`,
+which takes the rows yielded by :meth:`.ColumnFamily.get_range()` and
+writes them without going through Thrift:
+
+.. code-block:: python
+
+    >>> remote_cf = ColumnFamily(ConnectionPool('Keyspace1'), 'Standard1')
+    >>> pool.import_rows('Standard1', remote_cf.get_range(include_timestamp=True),
+    ...                  include_timestamp=True)
+
+.. versionadded:: 1.12.0
+"""
+
+from __future__ import with_statement
+
+import itertools
+import operator
+import sqlite3
+import time
+
+from thrift.TSerialization import serialize, deserialize
+
+from pycassa.cassandra.ttypes import Column, CounterColumn, KsDef
+from pycassa.columnfamily import ColumnFamily, gm_timestamp
+from pycassa.contrib.server import CassandraServer
+from pycassa.pool import ConnectionPool
+
+__all__ = ['FileStore', 'LocalPool']
+
+_WITHOUT_ROWID = ' WITHOUT ROWID' if sqlite3.sqlite_version_info >= (3, 8, 2) else ''
+
+_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS keyspaces (name TEXT PRIMARY KEY, ksdef BLOB NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS columns ('
+    ' cf_id INTEGER NOT NULL, key BLOB NOT NULL, super_column BLOB NOT NULL,'
+    ' name BLOB NOT NULL, value, timestamp INTEGER, ttl INTEGER, expires REAL,'
+    ' PRIMARY KEY (cf_id, key, super_column, name))' + _WITHOUT_ROWID,
+]
+
+_PUT, _DELETE = 'put', 'delete'
+
+_STATEMENTS = {
+    _PUT: 'INSERT OR REPLACE INTO columns VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+    _DELETE: 'DELETE FROM columns WHERE cf_id = ? AND key = ? AND super_column = ? '
+             'AND name = ?',
+}
+
+
+class FileStore(object):
+    """
+    Keeps the schema and columns of a
+    :class:`~pycassa.contrib.server.CassandraServer` in the SQLite
+    database at `path`, which is created if it does not exist.
+
+    Columns are rows of a table ordered by column family, key, super
+    column and name. Writes are queued and sent to the database in
+    batches of up to `flush_size` statements, and committed at the end
+    of each request.
+    """
+
+    flush_size = 10000
+
+    def __init__(self, path):
+        self.path = path
+        # Only used while the server's lock is held
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.text_factory = str
+        self._db.execute('PRAGMA journal_mode = WAL')
+        self._db.execute('PRAGMA synchronous = NORMAL')
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+        self._pending = []
+
+    def load(self, store):
+        """ Loads the schema and unexpired columns into `store`. """
+        now = time.time()
+        self._db.execute('DELETE FROM columns WHERE expires <= ?', (now,))
+        self._db.commit()
+        ksdefs = [deserialize(KsDef(), str(ksdef)) for ksdef, in
+                  self._db.execute('SELECT ksdef FROM keyspaces ORDER BY name')]
+        store.restore(ksdefs, self._columns)
+
+    def _columns(self, cfdef):
+        cursor = self._db.execute(
+                'SELECT key, super_column, name, value, timestamp, ttl, expires '
+                'FROM columns WHERE cf_id = ? ORDER BY key, super_column, name',
+                (cfdef.id,))
+        for key, super_column, name, value, timestamp, ttl, expires in cursor:
+            if timestamp is None:
+                column = CounterColumn(str(name), value)
+            else:
+                column = Column(str(name), str(value), timestamp, ttl)
+            yield str(key), str(super_column) or None, column, expires
+
+    def save_schema(self, store):
+        """ Replaces the saved schema with that of `store`. """
+        self._flush()
+        self._db.execute('DELETE FROM keyspaces')
+        ids = []
+        for name, (ksdef, cfs) in store.keyspaces.iteritems():
+            saved = KsDef(ksdef.name, ksdef.strategy_class, ksdef.strategy_options,
+                          ksdef.replication_factor, store.cf_defs(name),
+                          ksdef.durable_writes)
+            self._db.execute('INSERT INTO keyspaces VALUES (?, ?)',
+                             (name, buffer(serialize(saved))))
+            ids.extend(cfdef.id for cfdef in saved.cf_defs)
+        # drop the columns of column families that no longer exist
+        self._db.execute('DELETE FROM columns WHERE cf_id NOT IN (%s)'
+                         % ','.join(str(int(cf_id)) for cf_id in ids))
+        self._db.commit()
+
+    def put(self, cf, key, super_column, column, expires):
+        if isinstance(column, CounterColumn):
+            value, timestamp, ttl = column.value, None, None
+        else:
+            value, timestamp, ttl = buffer(column.value), column.timestamp, column.ttl
+        self._queue(_PUT, (cf.cfdef.id, buffer(key), buffer(super_column or ''),
+                           buffer(column.name), value, timestamp, ttl, expires))
+
+    def delete(self, cf, key, super_column, name):
+        self._queue(_DELETE, (cf.cfdef.id, buffer(key), buffer(super_column or ''),
+                              buffer(name)))
+
+    def truncate(self, cf):
+        self._flush()
+        self._db.execute('DELETE FROM columns WHERE cf_id = ?', (cf.cfdef.id,))
+
+    def _queue(self, operation, args):
+        self._pending.append((operation, args))
+        if len(self._pending) >= self.flush_size:
+            self._flush()
+
+    def _flush(self):
+        pending, self._pending = self._pending, []
+        for operation, group in itertools.groupby(pending, operator.itemgetter(0)):
+            self._db.executemany(_STATEMENTS[operation], [args for _, args in group])
+
+    def commit(self):
+        """ Writes the queued changes and commits them. """
+        self._flush()
+        self._db.commit()
+
+    def close(self):
+        self.commit()
+        self._db.close()
+
+
+class LocalPool(ConnectionPool):
+    """
+    A :class:`~pycassa.pool.ConnectionPool` for `keyspace` that is served
+    from the file at `path` by a
+    :class:`~pycassa.contrib.server.CassandraServer` in this process.
+    The file and the keyspace are created if they do not exist. Other
+    keyword arguments are passed to
+    :class:`~pycassa.pool.ConnectionPool`.
+
+    The server is available as :attr:`local_server`, and is stopped and
+    the file closed by :meth:`dispose()`.
+    """
+
+    def __init__(self, keyspace, path, **kwargs):
+        self.storage = FileStore(path)
+        self.local_server = CassandraServer(storage=self.storage).start()
+        try:
+            self.local_server.create_keyspace(keyspace)
+            super(LocalPool, self).__init__(keyspace, [self.local_server.server], **kwargs)
+        except:
+            self.local_server.stop()
+            self.storage.close()
+            raise
+
+    def create_column_family(self, name, **cfdef_attrs):
+        """
+        Creates the column family `name` in the pool's keyspace, unless
+        it already exists. Other keyword arguments are set on its
+        :class:`~pycassa.cassandra.ttypes.CfDef`.
+        """
+        with self.local_server._store.lock:
+            if name in self.local_server._store.keyspace(self.keyspace)[1]:
+                return
+            self.local_server.create_column_family(self.keyspace, name, **cfdef_attrs)
+
+    def import_rows(self, column_family, rows, timestamp=None, ttl=None,
+                    include_timestamp=False):
+        """
+        Writes `rows`, ``(key, columns)`` pairs such as those yielded by
+        :meth:`.ColumnFamily.get_range()`, to `column_family` without going
+        through Thrift, and returns the number of columns written.
+
+        Names, keys and values are packed according to the column family's
+        schema. Columns are written with `timestamp` and `ttl`, or, if
+        `include_timestamp` is ``True``, each value is a ``(value, timestamp)``
+        pair, as returned by ``get_range(include_timestamp=True)``.
+        """
+        if timestamp is None:
+            timestamp = gm_timestamp()
+        cf = ColumnFamily(self, column_family)
+        counter = 'CounterColumnType' in cf.default_validation_class
+
+        def pack(key, super_column, name, value):
+            if include_timestamp:
+                value, column_timestamp = value
+            else:
+                column_timestamp = timestamp
+            if not counter:
+                value = cf._pack_value(value, name)
+            return (key, super_column, cf._pack_name(name), value, column_timestamp, ttl)
+
+        def columns():
+            for key, row in rows:
+                packed_key = cf._pack_key(key)
+                if not cf.super:
+                    for name, value in row.iteritems():
+                        yield pack(packed_key, None, name, value)
+                    continue
+                for super_column, subcolumns in row.iteritems():
+                    packed_super = cf._pack_name(super_column, is_supercol_name=True)
+                    for name, value in subcolumns.iteritems():
+                        yield pack(packed_key, packed_super, name, value)
+
+        return self.local_server.insert_columns(self.keyspace, column_family, columns())
+
+    def dispose(self):
+        """
+        Closes all checked in connections, stops the server and closes
+        the file.
+        """
+        super(LocalPool, self).dispose()
+        if self.local_server is not None:
+            self.local_server.stop()
+            self.storage.close()
+            self.local_server = None
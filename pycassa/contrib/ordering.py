@@ -0,0 +1,358 @@
+"""
+Ordering of packed column names and keys the way Cassandra's comparators
+order them.
+
+:func:`sort_key_for()` turns a comparator type, such as ``'LongType'`` or
+``'CompositeType(UTF8Type, ReversedType(TimeUUIDType))'``, into a function
+that maps packed bytes to a key which sorts like the comparator would,
+and :class:`SortedDict` keeps its items in that order.
+
+.. versionadded:: 1.12.0
+"""
+
+import bisect
+import itertools
+import struct
+import uuid
+
+from pycassa.marshal import decode_int, unpacker_for
+
+__all__ = ['qualify_type', 'sort_key_for', 'SortedDict']
+
+_MARSHAL_PACKAGE = 'org.apache.cassandra.db.marshal.'
+
+
+class _Reversed(object):
+    """ Wraps a sort key so that it sorts in the opposite order. """
+
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __cmp__(self, other):
+        return cmp(other.key, self.key)
+
+    def __hash__(self):
+        return hash(self.key)
+
+
+def _type_name(typestr):
+    typestr = typestr.strip()
+    paren = typestr.find('(')
+    name = typestr if paren == -1 else typestr[:paren]
+    return name[name.rfind('.') + 1:]
+
+
+def _inner_types(typestr):
+    inner = typestr[typestr.find('(') + 1:typestr.rfind(')')]
+    types = []
+    depth = start = 0
+    for i, char in enumerate(inner):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            types.append(inner[start:i])
+            start = i + 1
+    types.append(inner[start:])
+    return [t.strip() for t in types]
+
+
+def qualify_type(typestr):
+    """
+    Returns `typestr` the way Cassandra describes it, with qualified class
+    names and ``reversed=true`` parameters turned into ``ReversedType``.
+    """
+    if typestr is None:
+        return None
+    typestr = typestr.strip()
+    name = _type_name(typestr)
+    qualified = _MARSHAL_PACKAGE + name if '.' not in typestr.split('(')[0] \
+            else typestr.split('(')[0]
+    if '(' not in typestr:
+        return qualified
+    params = _inner_types(typestr)
+    if name in ('CompositeType', 'ReversedType'):
+        return '%s(%s)' % (qualified, ','.join(map(qualify_type, params)))
+    if name == 'DynamicCompositeType':
+        return '%s(%s)' % (qualified, ','.join(
+                '%s=>%s' % (alias.split('=>')[0], qualify_type(alias.split('=>')[1]))
+                for alias in params))
+    if 'reversed=true' in params:
+        return '%sReversedType(%s)' % (_MARSHAL_PACKAGE, qualified)
+    return qualified
+
+
+def _unpacking(unpack):
+    return lambda b: unpack(b)[0]
+
+
+_signed_bytes = struct.Struct('>8b').unpack
+
+
+def _timeuuid_key(b):
+    # Cassandra breaks timestamp ties by comparing the clock sequence
+    # and node as signed bytes, which convert_time_to_uuid() relies on
+    return (uuid.UUID(bytes=b).time, _signed_bytes(b[8:]))
+
+
+def _uuid_key(b):
+    u = uuid.UUID(bytes=b)
+    if u.version == 1:
+        return (1, u.time, b)
+    return (u.version, b)
+
+
+_SCALAR_KEYS = {
+    'LongType': _unpacking(struct.Struct('>q').unpack),
+    'DateType': _unpacking(struct.Struct('>q').unpack),
+    'TimestampType': _unpacking(struct.Struct('>q').unpack),
+    'Int32Type': _unpacking(struct.Struct('>i').unpack),
+    'DoubleType': _unpacking(struct.Struct('>d').unpack),
+    'FloatType': _unpacking(struct.Struct('>f').unpack),
+    'BooleanType': _unpacking(struct.Struct('>B').unpack),
+    'IntegerType': decode_int,
+    'CounterColumnType': decode_int,
+    'DecimalType': unpacker_for('DecimalType'),
+    'TimeUUIDType': _timeuuid_key,
+    'UUIDType': _uuid_key,
+    # java.util.UUID.compareTo(): the halves compare as signed longs
+    'LexicalUUIDType': struct.Struct('>qq').unpack,
+}
+
+
+def sort_key_for(comparator_type):
+    """
+    Returns a function that maps a packed value of `comparator_type` to
+    a sort key. Empty values sort first, as they do in Cassandra; types
+    that are not recognized sort by their bytes, like ``BytesType``.
+    """
+    if comparator_type is None:
+        return _bytes_key
+    name = _type_name(comparator_type)
+    if name == 'ReversedType':
+        inner = sort_key_for(_inner_types(comparator_type)[0])
+        return lambda b: _Reversed(inner(b))
+    if name == 'CompositeType':
+        return _composite_key([sort_key_for(t) for t in _inner_types(comparator_type)])
+    if name == 'DynamicCompositeType':
+        return _dynamic_composite_key(comparator_type)
+    scalar = _SCALAR_KEYS.get(name)
+    if scalar is None:
+        return _bytes_key
+
+    def key(b):
+        if not b:
+            return (0,)
+        return (1, scalar(b))
+    return key
+
+
+def _bytes_key(b):
+    return b
+
+
+def _composite_key(component_keys):
+    def key(b):
+        # A sequence of (component, end-of-component) pairs; the signed
+        # end-of-component byte of slice bounds decides how they compare
+        # with composites that share their components
+        parts = []
+        offset = i = 0
+        length = len(b)
+        while offset < length:
+            size = ord(b[offset]) << 8 | ord(b[offset + 1])
+            component = b[offset + 2:offset + 2 + size]
+            eoc = ord(b[offset + 2 + size]) if offset + 2 + size < length else 0
+            if eoc > 127:
+                eoc -= 256
+            if i < len(component_keys):
+                component_key = component_keys[i](component)
+            else:
+                component_key = component
+            parts.append((component_key, eoc))
+            offset += size + 3
+            i += 1
+        return tuple(parts)
+    return key
+
+
+def _dynamic_composite_key(comparator_type):
+    aliases = {}
+    if '(' in comparator_type:
+        for alias in _inner_types(comparator_type):
+            if '=>' in alias:
+                alias, typestr = alias.split('=>', 1)
+                aliases[alias.strip()] = typestr.strip()
+    types = {}
+
+    def component_type(header):
+        # An alias whose case is swapped stands for the reversed type
+        if header not in types:
+            typestr = header
+            if len(header) == 1:
+                typestr = aliases.get(header)
+                if typestr is None and header.swapcase() in aliases:
+                    typestr = 'ReversedType(%s)' % aliases[header.swapcase()]
+                if typestr is None:
+                    typestr = 'BytesType'
+            types[header] = (_type_name(typestr), sort_key_for(typestr))
+        return types[header]
+
+    def key(b):
+        # A sequence of (type name, component, end-of-component) triples;
+        # like Cassandra, components of different types are ordered by the
+        # names of their types
+        parts = []
+        offset = 0
+        length = len(b)
+        while offset < length:
+            header = ord(b[offset]) << 8 | ord(b[offset + 1])
+            if header & 0x8000:
+                name, component_key = component_type(b[offset + 1])
+                offset += 2
+            else:
+                name, component_key = component_type(b[offset + 2:offset + 2 + header])
+                offset += 2 + header
+            size = ord(b[offset]) << 8 | ord(b[offset + 1])
+            component = b[offset + 2:offset + 2 + size]
+            eoc = ord(b[offset + 2 + size]) if offset + 2 + size < length else 0
+            if eoc > 127:
+                eoc -= 256
+            parts.append((name, component_key(component), eoc))
+            offset += size + 3
+        return tuple(parts)
+    return key
+
+
+class SortedDict(object):
+    """
+    A dictionary that keeps its keys in the order given by `sort_key`,
+    a function such as one returned by :func:`sort_key_for()`, and can
+    return slices of its items between two keys.
+
+    Like a comparator, `sort_key` also decides which names are the same:
+    setting a name whose sort key equals that of an existing name
+    replaces the existing name and its value.
+    """
+
+    def __init__(self, sort_key=_bytes_key):
+        self.sort_key = sort_key
+        self._sort_keys = []
+        # sort key -> (name, value)
+        self._items = {}
+
+    def __len__(self):
+        return len(self._sort_keys)
+
+    def __contains__(self, name):
+        return self.sort_key(name) in self._items
+
+    def __iter__(self):
+        items = self._items
+        return (items[key][0] for key in self._sort_keys)
+
+    def __getitem__(self, name):
+        return self._items[self.sort_key(name)][1]
+
+    def get(self, name, default=None):
+        item = self._items.get(self.sort_key(name))
+        return default if item is None else item[1]
+
+    def __setitem__(self, name, value):
+        sort_key = self.sort_key(name)
+        if sort_key not in self._items:
+            bisect.insort_left(self._sort_keys, sort_key)
+        self._items[sort_key] = (name, value)
+
+    def __delitem__(self, name):
+        sort_key = self.sort_key(name)
+        del self._items[sort_key]
+        del self._sort_keys[bisect.bisect_left(self._sort_keys, sort_key)]
+
+    def pop(self, name, *default):
+        if name not in self and default:
+            return default[0]
+        value = self[name]
+        del self[name]
+        return value
+
+    def update(self, items):
+        """
+        Sets the ``(name, value)`` pairs of `items`, sorting the names
+        once, which is much faster than setting many items one by one.
+        """
+        sort_key = self.sort_key
+        own = self._items
+        for name, value in items:
+            own[sort_key(name)] = (name, value)
+        self._sort_keys = sorted(own)
+
+    def clear(self):
+        del self._sort_keys[:]
+        self._items.clear()
+
+    def keys(self):
+        items = self._items
+        return [items[key][0] for key in self._sort_keys]
+
+    def items(self):
+        items = self._items
+        return [items[key] for key in self._sort_keys]
+
+    def iteritems(self):
+        items = self._items
+        for key in list(self._sort_keys):
+            item = items.get(key)
+            if item is not None:
+                yield item
+
+    def values(self):
+        items = self._items
+        return [items[key][1] for key in self._sort_keys]
+
+    def slice(self, start='', finish='', reversed=False, count=None):
+        """
+        Returns the ``(name, value)`` pairs from `start` to `finish`,
+        inclusive, in order, or in reverse order from `start` down to
+        `finish` if `reversed` is ``True``. Empty bounds are open, and at
+        most `count` items are returned if it is not ``None``.
+        """
+        items = self.iterslice(start, finish, reversed)
+        if count is not None:
+            return list(itertools.islice(items, max(count, 0)))
+        return list(items)
+
+    def iterslice(self, start='', finish='', reversed=False):
+        """
+        Like :meth:`slice()`, but yields the pairs one at a time. Items
+        may be changed while iterating; the names are those in the slice
+        when iteration started.
+        """
+        sort_key = self.sort_key
+        return self.iterrange(sort_key(start) if start else None,
+                              sort_key(finish) if finish else None, reversed)
+
+    def iterrange(self, start_key=None, finish_key=None, reversed=False):
+        """
+        Like :meth:`iterslice()`, but the bounds are sort keys, or ``None``
+        for open bounds.
+        """
+        if not reversed:
+            lo = 0 if start_key is None else bisect.bisect_left(self._sort_keys, start_key)
+            hi = len(self._sort_keys) if finish_key is None else \
+                    bisect.bisect_right(self._sort_keys, finish_key)
+            keys = self._sort_keys[lo:hi]
+        else:
+            hi = len(self._sort_keys) if start_key is None else \
+                    bisect.bisect_right(self._sort_keys, start_key)
+            lo = 0 if finish_key is None else bisect.bisect_left(self._sort_keys, finish_key)
+            keys = self._sort_keys[lo:hi]
+            keys.reverse()
+        items = self._items
+        for key in keys:
+            item = items.get(key)
+            if item is not None:
+                yield item
@@ -0,0 +1,908 @@
+"""
+An in-process stand-in for a Cassandra node, for tests and benchmarks.
+
+:class:`CassandraServer` serves the Thrift API that pycassa uses over
+a framed transport from a thread per connection, keeping all data in
+memory. Columns are kept sorted by their column family's comparator, so
+slicing and paging behave as they would against a real node, and rows
+are kept in key order, as with the ``ByteOrderedPartitioner``:
+
+.. code-block:: python
+
+    >>> server = CassandraServer()
+    >>> server.create_column_family('Keyspace1', 'Standard1',
+    ...                             comparator_type='LongType')
+    >>> server.start()
+    >>> pool = ConnectionPool('Keyspace1', [server.server])
+    >>> cf = ColumnFamily(pool, 'Standard1')
+    >>> cf.insert('key', {1: 'one', 2: 'two'})
+    >>> server.stop()
+
+Keyspaces and column families may also be created through a
+:class:`~pycassa.system_manager.SystemManager`.
+
+Latency can be added to every request with :attr:`CassandraServer.latency`,
+and requests can be made to fail with
+:meth:`CassandraServer.inject_failure()`, which makes it possible to
+exercise retries, timeouts and failover without a cluster:
+
+.. code-block:: python
+
+    >>> server.latency = 0.005
+    >>> server.inject_failure(TimedOutException(), methods=['batch_mutate'], count=2)
+    >>> server.inject_failure(DISCONNECT, probability=0.01, count=None)
+
+Data is only kept in memory unless the server is given a `storage`, such
+as a :class:`~pycassa.contrib.filestore.FileStore`, that it is loaded
+from and written to.
+
+The stand-in does not keep tombstones, so a write with a timestamp older
+than a deletion is not ignored, and consistency levels, authentication
+and CQL are not supported.
+
+.. versionadded:: 1.12.0
+"""
+
+from __future__ import with_statement
+
+import binascii
+import contextlib
+import itertools
+import operator
+import random
+import socket
+import threading
+import time
+import uuid
+
+from thrift.protocol import TBinaryProtocol
+from thrift.transport import TSocket, TTransport
+
+from pycassa.cassandra import Cassandra
+from pycassa.cassandra.ttypes import (Column, ColumnOrSuperColumn, CounterColumn,
+                                      CounterSuperColumn, SuperColumn, KeySlice,
+                                      KsDef, CfDef, TokenRange, EndpointDetails,
+                                      IndexOperator, InvalidRequestException,
+                                      NotFoundException)
+from pycassa.contrib.ordering import SortedDict, qualify_type, sort_key_for
+from pycassa.logging.pycassa_logger import PycassaLogger
+
+__all__ = ['CassandraServer', 'DISCONNECT']
+
+DISCONNECT = 'disconnect'
+"""
+Passed to :meth:`CassandraServer.inject_failure()` to close the
+connection instead of answering, which the client sees as a
+transport error.
+"""
+
+_PARTITIONER = 'org.apache.cassandra.dht.ByteOrderedPartitioner'
+_SNITCH = 'org.apache.cassandra.locator.SimpleSnitch'
+_API_VERSION = '19.36.0'
+
+
+class _Disconnect(Exception):
+    pass
+
+
+def _invalid(why):
+    return InvalidRequestException(why=why)
+
+
+class _ColumnFamily(object):
+    """ The definition and rows of one column family. """
+
+    def __init__(self, cfdef):
+        self.rows = SortedDict()
+        self.set_cfdef(cfdef)
+
+    def set_cfdef(self, cfdef):
+        if cfdef.column_type is None:
+            cfdef.column_type = 'Standard'
+        # Cassandra keeps caching policies in upper case
+        cfdef.caching = (cfdef.caching or 'KEYS_ONLY').upper()
+        for attr in ('comparator_type', 'default_validation_class',
+                     'key_validation_class'):
+            setattr(cfdef, attr, qualify_type(getattr(cfdef, attr) or 'BytesType'))
+        self.super = cfdef.column_type == 'Super'
+        if self.super:
+            cfdef.subcomparator_type = qualify_type(cfdef.subcomparator_type or 'BytesType')
+        if cfdef.column_metadata is None:
+            cfdef.column_metadata = []
+        for coldef in cfdef.column_metadata:
+            coldef.validation_class = qualify_type(coldef.validation_class)
+        self.cfdef = cfdef
+        self.counter = 'CounterColumnType' in cfdef.default_validation_class
+        self.name_key = sort_key_for(cfdef.comparator_type)
+        self.subname_key = sort_key_for(cfdef.subcomparator_type)
+        self.default_value_key = sort_key_for(cfdef.default_validation_class)
+        self.value_keys = dict((coldef.name, sort_key_for(coldef.validation_class))
+                               for coldef in cfdef.column_metadata)
+
+    def load(self, entries):
+        """
+        Adds ``(key, super_column, column, expires)`` tuples, given in key
+        and super column order, sorting each row once.
+        """
+        for key, row_entries in itertools.groupby(entries, operator.itemgetter(0)):
+            row = self.row(key, create=True)
+            if not self.super:
+                row.update((column.name, (column, expires))
+                           for _, _, column, expires in row_entries)
+                continue
+            for super_column, subentries in itertools.groupby(row_entries,
+                                                              operator.itemgetter(1)):
+                columns = row.get(super_column)
+                if columns is None:
+                    columns = SortedDict(self.subname_key)
+                columns.update((column.name, (column, expires))
+                               for _, _, column, expires in subentries)
+                row[super_column] = columns
+
+    def row(self, key, create=False):
+        row = self.rows.get(key)
+        if row is None and create:
+            row = self.rows[key] = SortedDict(self.name_key)
+        return row
+
+    def value_key(self, name):
+        return self.value_keys.get(name, self.default_value_key)
+
+
+class _Store(object):
+    """
+    The schema and data of the server; every method holds the lock. If
+    `storage` is given, the schema and data are loaded from it, and every
+    change is written to it.
+    """
+
+    def __init__(self, host, storage=None):
+        self.host = host
+        self.lock = threading.RLock()
+        self.keyspaces = {}
+        self.schema_version = str(uuid.uuid4())
+        self._cf_ids = itertools.count(1000)
+        self.storage = storage
+        if storage is not None:
+            storage.load(self)
+
+    def schema_changed(self):
+        self.schema_version = str(uuid.uuid4())
+        if self.storage is not None:
+            self.storage.save_schema(self)
+        return self.schema_version
+
+    @contextlib.contextmanager
+    def writing(self):
+        """ Holds the lock for a write, then commits it to the storage. """
+        with self.lock:
+            try:
+                yield
+            finally:
+                if self.storage is not None:
+                    self.storage.commit()
+
+    def restore(self, ksdefs, read_columns):
+        """
+        Replaces the schema with `ksdefs` and loads the columns of each
+        column family from ``read_columns(cfdef)``, which returns
+        ``(key, super_column, column, expires)`` tuples in key order.
+        """
+        self.keyspaces = {}
+        last_id = 999
+        for ksdef in ksdefs:
+            cfs = {}
+            for cfdef in ksdef.cf_defs or []:
+                cfs[cfdef.name] = cf = _ColumnFamily(cfdef)
+                cf.load(read_columns(cfdef))
+                last_id = max(last_id, cfdef.id)
+            ksdef.cf_defs = []
+            self.keyspaces[ksdef.name] = (ksdef, cfs)
+        self._cf_ids = itertools.count(last_id + 1)
+        self.schema_version = str(uuid.uuid4())
+
+    def cf_defs(self, keyspace):
+        """ The definitions of the column families of `keyspace`, by name. """
+        return [cf.cfdef for _, cf in sorted(self.keyspace(keyspace)[1].iteritems())]
+
+    def keyspace(self, name):
+        try:
+            return self.keyspaces[name]
+        except KeyError:
+            raise _invalid("Keyspace '%s' does not exist" % (name,))
+
+    def column_family(self, keyspace, name):
+        if keyspace is None:
+            raise _invalid('You have not set a keyspace for this session')
+        try:
+            return self.keyspace(keyspace)[1][name]
+        except KeyError:
+            raise _invalid('unconfigured columnfamily %s' % (name,))
+
+    def add_keyspace(self, ksdef):
+        if ksdef.name in self.keyspaces:
+            raise _invalid("Keyspace names must be case-insensitively unique "
+                           "(%s conflicts with %s)" % (ksdef.name, ksdef.name))
+        cf_defs = ksdef.cf_defs or []
+        ksdef.cf_defs = []
+        self.keyspaces[ksdef.name] = (ksdef, {})
+        for cfdef in cf_defs:
+            cfdef.keyspace = ksdef.name
+            self.add_column_family(cfdef)
+        return self.schema_changed()
+
+    def add_column_family(self, cfdef):
+        ksdef, cfs = self.keyspace(cfdef.keyspace)
+        if cfdef.name in cfs:
+            raise _invalid('%s already exists in keyspace %s' % (cfdef.name, cfdef.keyspace))
+        cfdef.id = self._cf_ids.next()
+        cfs[cfdef.name] = _ColumnFamily(cfdef)
+        return self.schema_changed()
+
+    def describe_keyspace(self, name):
+        try:
+            ksdef, cfs = self.keyspaces[name]
+        except KeyError:
+            raise NotFoundException()
+        return KsDef(ksdef.name, ksdef.strategy_class, ksdef.strategy_options,
+                     ksdef.replication_factor, self.cf_defs(name), ksdef.durable_writes)
+
+
+def _live(entry, now):
+    column, expires = entry
+    if expires is not None and expires <= now:
+        return None
+    return column
+
+
+def _slice(columns, predicate, name_key, now):
+    """ The live ``(name, column)`` pairs of `columns` selected by `predicate`. """
+    if predicate.column_names is not None:
+        names = dict((name_key(name), name) for name in predicate.column_names
+                     if name in columns)
+        selected = ((names[key], columns[names[key]]) for key in sorted(names))
+        count = None
+    else:
+        slice_range = predicate.slice_range
+        if slice_range is None:
+            raise _invalid('predicate column_names and slice_range may not both be null')
+        selected = columns.iterslice(slice_range.start, slice_range.finish,
+                                     slice_range.reversed)
+        count = slice_range.count
+        if count is not None and count < 0:
+            raise _invalid('get_slice requires non-negative count')
+
+    result = []
+    for name, value in selected:
+        if count is not None and len(result) >= count:
+            break
+        if isinstance(value, SortedDict):
+            subcolumns = [column for column in
+                          (_live(entry, now) for entry in value.values())
+                          if column is not None]
+            if subcolumns:
+                result.append((name, subcolumns))
+        else:
+            column = _live(value, now)
+            if column is not None:
+                result.append((name, column))
+    return result
+
+
+def _to_cosc(name, value, counter):
+    if isinstance(value, list):
+        if counter:
+            return ColumnOrSuperColumn(counter_super_column=CounterSuperColumn(name, value))
+        return ColumnOrSuperColumn(super_column=SuperColumn(name, value))
+    if counter:
+        return ColumnOrSuperColumn(counter_column=value)
+    return ColumnOrSuperColumn(column=value)
+
+
+_OPERATORS = {
+    IndexOperator.EQ: lambda a, b: a == b,
+    IndexOperator.GTE: lambda a, b: a >= b,
+    IndexOperator.GT: lambda a, b: a > b,
+    IndexOperator.LTE: lambda a, b: a <= b,
+    IndexOperator.LT: lambda a, b: a < b,
+}
+
+
+class _Handler(Cassandra.Iface):
+    """
+    Implements the Thrift API on top of a :class:`_Store`. The keyspace is
+    kept per thread, and so per connection.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._session = threading.local()
+
+    @property
+    def _keyspace(self):
+        return getattr(self._session, 'keyspace', None)
+
+    def _cf(self, name):
+        return self.store.column_family(self._keyspace, name)
+
+    def _columns(self, cf, key, super_column):
+        """ The columns a read of `key` slices: the row or one super column. """
+        row = cf.row(key)
+        if row is None:
+            return None, cf.name_key
+        if super_column is not None:
+            if not cf.super:
+                raise _invalid('supercolumn specified to ColumnFamily %s containing '
+                               'normal columns' % (cf.cfdef.name,))
+            return row.get(super_column), cf.subname_key
+        return row, cf.name_key
+
+    # Sessions
+
+    def login(self, auth_request):
+        pass
+
+    def set_keyspace(self, keyspace):
+        with self.store.lock:
+            self.store.keyspace(keyspace)
+        self._session.keyspace = keyspace
+
+    # Reads
+
+    def get(self, key, column_path, consistency_level):
+        with self.store.lock:
+            cf = self._cf(column_path.column_family)
+            now = time.time()
+            if column_path.column is None:
+                if not cf.super or column_path.super_column is None:
+                    raise _invalid('column parameter is not optional for standard CF %s'
+                                   % (cf.cfdef.name,))
+                row = cf.row(key)
+                columns = row and row.get(column_path.super_column)
+                subcolumns = [c for c in (_live(e, now) for e in columns.values())
+                              if c is not None] if columns else []
+                if not subcolumns:
+                    raise NotFoundException()
+                return _to_cosc(column_path.super_column, subcolumns, cf.counter)
+            columns, name_key = self._columns(cf, key, column_path.super_column)
+            if columns is None or isinstance(columns, SortedDict) and \
+                    cf.super and column_path.super_column is None:
+                raise NotFoundException()
+            entry = columns.get(column_path.column)
+            column = entry and _live(entry, now)
+            if column is None:
+                raise NotFoundException()
+            return _to_cosc(column_path.column, column, cf.counter)
+
+    def _get_slice(self, cf, key, column_parent, predicate, now):
+        columns, name_key = self._columns(cf, key, column_parent.super_column)
+        if not columns:
+            return []
+        return [_to_cosc(name, value, cf.counter)
+                for name, value in _slice(columns, predicate, name_key, now)]
+
+    def get_slice(self, key, column_parent, predicate, consistency_level):
+        with self.store.lock:
+            cf = self._cf(column_parent.column_family)
+            return self._get_slice(cf, key, column_parent, predicate, time.time())
+
+    def get_count(self, key, column_parent, predicate, consistency_level):
+        return len(self.get_slice(key, column_parent, predicate, consistency_level))
+
+    def multiget_slice(self, keys, column_parent, predicate, consistency_level):
+        with self.store.lock:
+            cf = self._cf(column_parent.column_family)
+            now = time.time()
+            return dict((key, self._get_slice(cf, key, column_parent, predicate, now))
+                        for key in keys)
+
+    def multiget_count(self, keys, column_parent, predicate, consistency_level):
+        return dict((key, len(coscs)) for key, coscs in
+                    self.multiget_slice(keys, column_parent, predicate,
+                                        consistency_level).iteritems())
+
+    def _matches(self, cf, row, expressions, now):
+        for expr in expressions:
+            entry = row.get(expr.column_name)
+            column = entry and _live(entry, now)
+            if column is None or isinstance(column, CounterColumn):
+                return False
+            value_key = cf.value_key(expr.column_name)
+            if not _OPERATORS[expr.op](value_key(column.value), value_key(expr.value)):
+                return False
+        return True
+
+    def _key_slices(self, cf, rows, column_parent, predicate, expressions, count, now):
+        result = []
+        for key, row in rows:
+            if len(result) >= count:
+                break
+            if expressions and (cf.super or not self._matches(cf, row, expressions, now)):
+                continue
+            result.append(KeySlice(key, self._get_slice(cf, key, column_parent,
+                                                         predicate, now)))
+        return result
+
+    def get_range_slices(self, column_parent, predicate, range, consistency_level):
+        with self.store.lock:
+            cf = self._cf(column_parent.column_family)
+            if range.start_key is not None:
+                rows = cf.rows.iterslice(range.start_key, range.end_key or '')
+            else:
+                start = binascii.unhexlify(range.start_token or '')
+                finish = binascii.unhexlify(range.end_token or '')
+                rows = cf.rows.iterslice(start, finish)
+                if start:
+                    # token ranges exclude their start
+                    rows = itertools.dropwhile(lambda item: item[0] == start, rows)
+            return self._key_slices(cf, rows, column_parent, predicate,
+                                    range.row_filter, range.count, time.time())
+
+    def get_indexed_slices(self, column_parent, index_clause, column_predicate,
+                           consistency_level):
+        with self.store.lock:
+            cf = self._cf(column_parent.column_family)
+            if not any(expr.op == IndexOperator.EQ for expr in index_clause.expressions):
+                raise _invalid('No indexed columns present in index clause with '
+                               'operator EQ')
+            rows = cf.rows.iterslice(index_clause.start_key or '', '')
+            return self._key_slices(cf, rows, column_parent, column_predicate,
+                                    index_clause.expressions, index_clause.count,
+                                    time.time())
+
+    # Writes
+
+    def _target(self, cf, key, super_column):
+        """ The row, or super column, that a write to `key` goes to. """
+        row = cf.row(key, create=True)
+        if cf.super:
+            if super_column is None:
+                raise _invalid('missing super_column for super column family %s'
+                               % (cf.cfdef.name,))
+            columns = row.get(super_column)
+            if columns is None:
+                columns = row[super_column] = SortedDict(cf.subname_key)
+            return columns
+        if super_column is not None:
+            raise _invalid('supercolumn specified to ColumnFamily %s containing '
+                           'normal columns' % (cf.cfdef.name,))
+        return row
+
+    def _put(self, cf, key, super_column, column):
+        if cf.counter:
+            raise _invalid('invalid operation for commutative columnfamily %s'
+                           % (cf.cfdef.name,))
+        if column.timestamp is None:
+            raise _invalid('Column timestamp is required')
+        columns = self._target(cf, key, super_column)
+        existing = columns.get(column.name)
+        if existing is not None and existing[0].timestamp > column.timestamp:
+            return
+        expires = None
+        if column.ttl:
+            expires = time.time() + column.ttl
+        columns[column.name] = (column, expires)
+        if self.store.storage is not None:
+            self.store.storage.put(cf, key, super_column, column, expires)
+
+    def _add(self, cf, key, super_column, counter):
+        if not cf.counter:
+            raise _invalid('invalid operation for non commutative columnfamily %s'
+                           % (cf.cfdef.name,))
+        columns = self._target(cf, key, super_column)
+        existing = columns.get(counter.name)
+        value = counter.value
+        if existing is not None:
+            value += existing[0].value
+        column = CounterColumn(counter.name, value)
+        columns[counter.name] = (column, None)
+        if self.store.storage is not None:
+            self.store.storage.put(cf, key, super_column, column, None)
+
+    def _delete(self, cf, key, super_column, names, slice_range, timestamp):
+        row = cf.row(key)
+        if row is None:
+            return
+        if cf.super and super_column is None:
+            # deleting super columns
+            targets = [(row, name, None) for name in self._selected(row, names, slice_range)]
+        else:
+            columns = row.get(super_column) if super_column is not None else row
+            if columns is None:
+                return
+            targets = [(columns, name, timestamp)
+                       for name in self._selected(columns, names, slice_range)]
+
+        for columns, name, ts in targets:
+            value = columns[name]
+            if isinstance(value, SortedDict):
+                for subname in value.keys():
+                    self._delete_column(cf, key, name, value, subname, timestamp)
+                if not value:
+                    del columns[name]
+            else:
+                self._delete_column(cf, key, super_column, columns, name, ts)
+        if super_column is not None:
+            columns = row.get(super_column)
+            if columns is not None and not columns:
+                del row[super_column]
+        if not row:
+            del cf.rows[key]
+
+    def _selected(self, columns, names, slice_range):
+        if names is not None:
+            return [name for name in names if name in columns]
+        if slice_range is not None:
+            return [name for name, _ in columns.slice(slice_range.start,
+                                                      slice_range.finish,
+                                                      slice_range.reversed)]
+        return columns.keys()
+
+    def _delete_column(self, cf, key, super_column, columns, name, timestamp):
+        column = columns[name][0]
+        if timestamp is None or getattr(column, 'timestamp', None) is None or \
+                column.timestamp <= timestamp:
+            del columns[name]
+            if self.store.storage is not None:
+                self.store.storage.delete(cf, key, super_column, name)
+
+    def insert(self, key, column_parent, column, consistency_level):
+        with self.store.writing():
+            cf = self._cf(column_parent.column_family)
+            self._put(cf, key, column_parent.super_column, column)
+
+    def add(self, key, column_parent, column, consistency_level):
+        with self.store.writing():
+            cf = self._cf(column_parent.column_family)
+            self._add(cf, key, column_parent.super_column, column)
+
+    def remove(self, key, column_path, timestamp, consistency_level):
+        with self.store.writing():
+            cf = self._cf(column_path.column_family)
+            names = None if column_path.column is None else [column_path.column]
+            if cf.super and column_path.super_column is not None and names is None:
+                self._delete(cf, key, None, [column_path.super_column], None, timestamp)
+            else:
+                self._delete(cf, key, column_path.super_column, names, None, timestamp)
+
+    def remove_counter(self, key, path, consistency_level):
+        self.remove(key, path, None, consistency_level)
+
+    def batch_mutate(self, mutation_map, consistency_level):
+        with self.store.writing():
+            for key, cf_map in mutation_map.iteritems():
+                for cf_name, mutations in cf_map.iteritems():
+                    cf = self._cf(cf_name)
+                    for mutation in mutations:
+                        self._mutate(cf, key, mutation)
+
+    def atomic_batch_mutate(self, mutation_map, consistency_level):
+        self.batch_mutate(mutation_map, consistency_level)
+
+    def _mutate(self, cf, key, mutation):
+        cosc = mutation.column_or_supercolumn
+        deletion = mutation.deletion
+        if cosc is not None:
+            if cosc.column is not None:
+                self._put(cf, key, None, cosc.column)
+            elif cosc.super_column is not None:
+                for column in cosc.super_column.columns:
+                    self._put(cf, key, cosc.super_column.name, column)
+            elif cosc.counter_column is not None:
+                self._add(cf, key, None, cosc.counter_column)
+            elif cosc.counter_super_column is not None:
+                for counter in cosc.counter_super_column.columns:
+                    self._add(cf, key, cosc.counter_super_column.name, counter)
+        elif deletion is not None:
+            predicate = deletion.predicate
+            if predicate is None:
+                names = slice_range = None
+                if deletion.super_column is not None:
+                    names = [deletion.super_column]
+                    self._delete(cf, key, None, names, None, deletion.timestamp)
+                    return
+            else:
+                names, slice_range = predicate.column_names, predicate.slice_range
+            self._delete(cf, key, deletion.super_column, names, slice_range,
+                         deletion.timestamp)
+        else:
+            raise _invalid('Mutation must have either column or deletion')
+
+    def truncate(self, cfname):
+        with self.store.writing():
+            cf = self._cf(cfname)
+            cf.rows.clear()
+            if self.store.storage is not None:
+                self.store.storage.truncate(cf)
+
+    # Describing the cluster and schema
+
+    def describe_schema_versions(self):
+        return {self.store.schema_version: [self.store.host]}
+
+    def describe_keyspaces(self):
+        with self.store.lock:
+            return [self.store.describe_keyspace(name)
+                    for name in sorted(self.store.keyspaces)]
+
+    def describe_keyspace(self, keyspace):
+        with self.store.lock:
+            return self.store.describe_keyspace(keyspace)
+
+    def describe_cluster_name(self):
+        return 'Test Cluster'
+
+    def describe_version(self):
+        return _API_VERSION
+
+    def describe_ring(self, keyspace):
+        with self.store.lock:
+            self.store.keyspace(keyspace)
+        host = self.store.host
+        return [TokenRange('', '', [host], [host],
+                           [EndpointDetails(host, 'datacenter1', 'rack1')])]
+
+    def describe_token_map(self):
+        return {'': self.store.host}
+
+    def describe_partitioner(self):
+        return _PARTITIONER
+
+    def describe_snitch(self):
+        return _SNITCH
+
+    # Changing the schema
+
+    def system_add_keyspace(self, ks_def):
+        with self.store.lock:
+            return self.store.add_keyspace(ks_def)
+
+    def system_update_keyspace(self, ks_def):
+        with self.store.lock:
+            ksdef, cfs = self.store.keyspace(ks_def.name)
+            for attr in ('strategy_class', 'strategy_options', 'replication_factor',
+                         'durable_writes'):
+                setattr(ksdef, attr, getattr(ks_def, attr))
+            return self.store.schema_changed()
+
+    def system_drop_keyspace(self, keyspace):
+        with self.store.lock:
+            self.store.keyspace(keyspace)
+            del self.store.keyspaces[keyspace]
+            return self.store.schema_changed()
+
+    def system_add_column_family(self, cf_def):
+        with self.store.lock:
+            return self.store.add_column_family(cf_def)
+
+    def system_update_column_family(self, cf_def):
+        with self.store.lock:
+            cf = self.store.column_family(cf_def.keyspace, cf_def.name)
+            if cf_def.comparator_type is not None and \
+                    qualify_type(cf_def.comparator_type) != cf.cfdef.comparator_type:
+                raise _invalid('comparators do not match or are not compatible.')
+            cf_def.id = cf.cfdef.id
+            cf.set_cfdef(cf_def)
+            return self.store.schema_changed()
+
+    def system_drop_column_family(self, column_family):
+        with self.store.lock:
+            self._cf(column_family)
+            del self.store.keyspaces[self._keyspace][1][column_family]
+            return self.store.schema_changed()
+
+
+class _FaultInjectingHandler(object):
+    """ Adds the server's latency and injected failures to every call. """
+
+    def __init__(self, server, handler):
+        self._server = server
+        self._handler = handler
+
+    def __getattr__(self, name):
+        method = getattr(self._handler, name)
+        before = self._server._before_call
+
+        def call(*args):
+            before(name)
+            return method(*args)
+        return call
+
+
+class CassandraServer(object):
+    """
+    An in-memory Cassandra stand-in listening on `host` and `port`. If
+    `port` is 0, a free port is picked when the server starts; the
+    address to connect to is then available as :attr:`server`.
+
+    If `storage` is given, the schema and data are loaded from it when
+    the server is created, and every change is written to it.
+    """
+
+    latency = 0
+    """
+    Seconds to wait before answering each request, or a function that
+    takes the name of the Thrift method and returns the number of seconds.
+    """
+
+    # Kept on the class so that they are still around if daemon threads
+    # are serving while the interpreter shuts down
+    _closed_errors = (TTransport.TTransportException, socket.error, EOFError, _Disconnect)
+
+    def __init__(self, host='127.0.0.1', port=0, storage=None):
+        self.host = host
+        self.port = port
+        self._store = _Store(host, storage)
+        self._handler = _Handler(self._store)
+        self._processor = Cassandra.Processor(_FaultInjectingHandler(self, self._handler))
+        self._failures = []
+        self._failures_lock = threading.Lock()
+        self._listener = self._acceptor = None
+        self._clients = set()
+        self._stopped = True
+        self._log = PycassaLogger().add_child_logger('server', self._name_changed)
+
+    def _name_changed(self, new_logger):
+        self._log = new_logger
+
+    @property
+    def server(self):
+        """ The ``'host:port'`` string to give a pool. """
+        return '%s:%d' % (self.host, self.port)
+
+    def create_keyspace(self, name, strategy_options=None, **ksdef_attrs):
+        """ Creates the keyspace `name` if it does not exist yet. """
+        with self._store.lock:
+            if name not in self._store.keyspaces:
+                ksdef = KsDef(name,
+                              strategy_class='org.apache.cassandra.locator.SimpleStrategy',
+                              strategy_options=strategy_options or {'replication_factor': '1'},
+                              cf_defs=[], **ksdef_attrs)
+                self._store.add_keyspace(ksdef)
+
+    def create_column_family(self, keyspace, name, **cfdef_attrs):
+        """
+        Creates the column family `name`, and the keyspace if needed. Any
+        other keyword arguments are set on its
+        :class:`~pycassa.cassandra.ttypes.CfDef`.
+        """
+        self.create_keyspace(keyspace)
+        with self._store.lock:
+            self._store.add_column_family(CfDef(keyspace, name, **cfdef_attrs))
+
+    def insert_columns(self, keyspace, column_family, columns, chunk_size=10000):
+        """
+        Writes packed columns straight to the store, which is much faster
+        than going through Thrift when loading a lot of data. `columns` is
+        an iterable of ``(key, super_column, name, value, timestamp, ttl)``
+        tuples, where `super_column` is ``None`` for standard column
+        families. The values of counter column families are added to the
+        counters. Returns the number of columns written.
+
+        The columns are written in chunks of `chunk_size`, and requests are
+        served between chunks, so `columns` may be read from this server.
+        """
+        columns = iter(columns)
+        count = 0
+        while True:
+            chunk = list(itertools.islice(columns, chunk_size))
+            if not chunk:
+                return count
+            with self._store.writing():
+                cf = self._store.column_family(keyspace, column_family)
+                for key, super_column, name, value, timestamp, ttl in chunk:
+                    if cf.counter:
+                        self._handler._add(cf, key, super_column, CounterColumn(name, value))
+                    else:
+                        self._handler._put(cf, key, super_column,
+                                           Column(name, value, timestamp, ttl))
+            count += len(chunk)
+
+    def inject_failure(self, error, methods=None, count=1, probability=1.0):
+        """
+        Makes calls to the Thrift methods named in `methods`, or to every
+        method if this is ``None``, fail with `error`, an exception such as
+        :exc:`~pycassa.cassandra.ttypes.TimedOutException` or
+        :const:`DISCONNECT`. Each call fails with the given `probability`,
+        until `count` calls have failed; if `count` is ``None``, there is
+        no limit.
+        """
+        if methods is not None:
+            methods = frozenset(methods)
+        with self._failures_lock:
+            self._failures.append([error, methods, count, probability])
+
+    def clear_failures(self):
+        """ Removes every failure added with :meth:`inject_failure()`. """
+        with self._failures_lock:
+            del self._failures[:]
+
+    def _before_call(self, method):
+        latency = self.latency
+        if callable(latency):
+            latency = latency(method)
+        if latency:
+            time.sleep(latency)
+
+        if not self._failures:
+            return
+        error = None
+        with self._failures_lock:
+            for failure in self._failures:
+                fail_with, methods, count, probability = failure
+                if methods is not None and method not in methods:
+                    continue
+                if probability < 1 and random.random() >= probability:
+                    continue
+                if count is not None:
+                    failure[2] -= 1
+                    if failure[2] <= 0:
+                        self._failures.remove(failure)
+                error = fail_with
+                break
+        if error is DISCONNECT:
+            raise _Disconnect()
+        elif error is not None:
+            raise error
+
+    def start(self):
+        """ Starts accepting connections from a daemon thread. """
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind((self.host, self.port))
+        self._listener.listen(128)
+        self.port = self._listener.getsockname()[1]
+        self._stopped = False
+        self._acceptor = threading.Thread(target=self._accept, name='pycassa-server')
+        self._acceptor.daemon = True
+        self._acceptor.start()
+        return self
+
+    def stop(self):
+        """ Stops accepting connections and closes the open ones. """
+        self._stopped = True
+        for sock in [self._listener] + list(self._clients):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+            sock.close()
+        self._acceptor.join(1.0)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _accept(self):
+        while not self._stopped:
+            try:
+                sock, address = self._listener.accept()
+            except self._closed_errors:
+                continue
+            if self._stopped:
+                sock.close()
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._clients.add(sock)
+            thread = threading.Thread(target=self._serve, args=(sock,),
+                                      name='pycassa-server-connection')
+            thread.daemon = True
+            thread.start()
+
+    def _serve(self, sock):
+        client = TSocket.TSocket()
+        client.setHandle(sock)
+        transport = TTransport.TFramedTransport(client)
+        protocol = TBinaryProtocol.TBinaryProtocolAccelerated(transport)
+        try:
+            while not self._stopped:
+                self._processor.process(protocol, protocol)
+        except self._closed_errors:
+            pass
+        except Exception, exc:
+            self._log.exception("Error serving a request: %s", exc)
+        finally:
+            self._clients.discard(sock)
+            transport.close()
@@ -0,0 +1,543 @@
+"""
+A load generator for sizing clusters and comparing pycassa configurations.
+
+:func:`main()` is the ``pycassaStress`` command. It runs a mix of reads,
+writes and scans through :class:`~pycassa.columnfamily.ColumnFamily` and
+:class:`~pycassa.batch.Mutator` from many threads, and optionally many
+processes, and reports throughput and latency percentiles as it goes:
+
+.. code-block:: bash
+
+    $ pycassaStress -s 10.0.0.1:9160 --create --populate \\
+          --mix read=8,write=2,scan=1 --distribution zipf \\
+          -t 32 -d 60 --pool-size 16 --buffer-size 256
+
+Passing ``--local`` runs against an in-process
+:class:`~pycassa.contrib.server.CassandraServer` instead of a cluster.
+
+The operations are:
+
+* ``read``: :meth:`~.ColumnFamily.get()` of one row;
+* ``multiget``: :meth:`~.ColumnFamily.multiget()` of ``--multiget-keys`` rows;
+* ``write``: :meth:`~.ColumnFamily.insert()` of one row;
+* ``batch``: ``--batch-rows`` row inserts through a
+  :meth:`~.ColumnFamily.batch()` with ``--queue-size``;
+* ``scan``: :meth:`~.ColumnFamily.get_range()` of ``--scan-rows`` rows
+  with ``--buffer-size``.
+
+Reads of rows that do not exist are counted as successful.
+
+.. versionadded:: 1.12.0
+"""
+
+from __future__ import with_statement
+
+import bisect
+import itertools
+import multiprocessing
+import optparse
+import Queue
+import random
+import sys
+import threading
+import time
+
+from pycassa.batch import Mutator
+from pycassa.cassandra.ttypes import NotFoundException
+from pycassa.columnfamily import ColumnFamily
+from pycassa.metrics import LatencyHistogram
+from pycassa.pool import ConnectionPool
+
+__all__ = ['main', 'parse_args', 'run', 'KeyChooser', 'Recorder', 'OPERATIONS']
+
+OPERATIONS = ('read', 'multiget', 'write', 'batch', 'scan')
+
+KEY_FORMAT = 'key%010d'
+COLUMN_FORMAT = 'C%05d'
+
+
+class KeyChooser(object):
+    """
+    Picks indexes of keys between 0 and `keys` - 1, either uniformly or
+    following a Zipf distribution with exponent `exponent`, in which the
+    key of rank ``n`` is picked with a probability proportional to
+    ``1 / n ** exponent``.
+    """
+
+    def __init__(self, keys, distribution='uniform', exponent=1.0, rand=None):
+        if distribution not in ('uniform', 'zipf'):
+            raise ValueError("Unknown key distribution '%s'" % (distribution,))
+        self.keys = keys
+        self.distribution = distribution
+        self.random = rand or random.Random()
+        if distribution == 'zipf':
+            cumulative = []
+            total = 0.0
+            for rank in xrange(1, keys + 1):
+                total += 1.0 / rank ** exponent
+                cumulative.append(total)
+            self._cumulative = cumulative
+            self._total = total
+
+    def next(self):
+        if self.distribution == 'uniform':
+            return self.random.randrange(self.keys)
+        index = bisect.bisect_left(self._cumulative, self.random.random() * self._total)
+        return min(index, self.keys - 1)
+
+    def next_key(self):
+        return KEY_FORMAT % self.next()
+
+
+class Recorder(object):
+    """
+    Latencies and error counts for each operation. Workers record into
+    it from several threads; :meth:`drain()` takes what was recorded since
+    the last call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, operation, latency, failed=False):
+        with self._lock:
+            stats = self._stats.get(operation)
+            if stats is None:
+                stats = self._stats[operation] = [LatencyHistogram(), 0]
+            stats[0].record(latency)
+            if failed:
+                stats[1] += 1
+
+    def drain(self):
+        """ Returns ``{operation: (histogram, errors)}`` and starts over. """
+        with self._lock:
+            stats, self._stats = self._stats, {}
+        return dict((op, tuple(s)) for op, s in stats.iteritems())
+
+    def merge(self, stats):
+        """ Adds the result of another recorder's :meth:`drain()`. """
+        with self._lock:
+            for op, (histogram, errors) in stats.iteritems():
+                mine = self._stats.get(op)
+                if mine is None:
+                    mine = self._stats[op] = [LatencyHistogram(), 0]
+                mine[0].merge(histogram)
+                mine[1] += errors
+
+
+def _parse_mix(option, opt, value, parser):
+    mix = []
+    for part in value.split(','):
+        name, sep, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise optparse.OptionValueError(
+                    "option %s: unknown operation '%s' (choose from %s)"
+                    % (opt, name, ', '.join(OPERATIONS)))
+        try:
+            weight = float(weight) if sep else 1.0
+        except ValueError:
+            raise optparse.OptionValueError("option %s: invalid weight '%s'" % (opt, weight))
+        if weight > 0:
+            mix.append((name, weight))
+    if not mix:
+        raise optparse.OptionValueError('option %s: no operations to run' % (opt,))
+    setattr(parser.values, option.dest, mix)
+
+
+def _make_parser():
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-s', '--server', action='append', dest='servers',
+                      help="server to connect to as host:port; may be given more "
+                           "than once (default: localhost:9160)")
+    parser.add_option('--local', action='store_true',
+                      help='run against an in-process CassandraServer')
+    parser.add_option('--local-latency', type='float', default=0.0, metavar='MS',
+                      help='milliseconds the local server waits before each reply')
+    parser.add_option('-k', '--keyspace', default='PycassaStress')
+    parser.add_option('-c', '--column-family', default='Standard1')
+    parser.add_option('--create', action='store_true',
+                      help='create the keyspace and column family if they are missing')
+    parser.add_option('--replication-factor', type='int', default=1)
+    parser.add_option('--populate', action='store_true',
+                      help='write every key before starting')
+
+    group = optparse.OptionGroup(parser, 'Workload')
+    group.add_option('-m', '--mix', type='string', action='callback',
+                     callback=_parse_mix, default=[('read', 1.0), ('write', 1.0)],
+                     help='operations and weights, such as read=8,write=2,scan=1 '
+                          '(default: read=1,write=1)')
+    group.add_option('-n', '--operations', type='int',
+                     help='total number of operations to run')
+    group.add_option('-d', '--duration', type='float',
+                     help='seconds to run for (default: 30 if -n is not given)')
+    group.add_option('-t', '--threads', type='int', default=10,
+                     help='threads per process')
+    group.add_option('-p', '--processes', type='int', default=1)
+    group.add_option('--keys', type='int', default=100000,
+                     help='number of distinct keys')
+    group.add_option('--distribution', choices=('uniform', 'zipf'), default='uniform')
+    group.add_option('--zipf-exponent', type='float', default=1.0)
+    group.add_option('--columns', type='int', default=5, help='columns per row')
+    group.add_option('--value-size', type='int', default=34, help='bytes per value')
+    group.add_option('--multiget-keys', type='int', default=10)
+    group.add_option('--batch-rows', type='int', default=50)
+    group.add_option('--scan-rows', type='int', default=100)
+    group.add_option('--seed', type='int', help='seed for the random choices')
+    parser.add_option_group(group)
+
+    group = optparse.OptionGroup(parser, 'pycassa configuration')
+    group.add_option('--pool-size', type='int', default=5)
+    group.add_option('--max-overflow', type='int', default=0)
+    group.add_option('--pool-timeout', type='float', default=30)
+    group.add_option('--timeout', type='float', default=10,
+                     help='socket timeout in seconds')
+    group.add_option('--max-retries', type='int', default=5)
+    group.add_option('--buffer-size', type='int', default=1024)
+    group.add_option('--queue-size', type='int', default=100)
+    parser.add_option_group(group)
+
+    parser.add_option('-i', '--interval', type='float', default=1.0,
+                      help='seconds between reports')
+    return parser
+
+
+def parse_args(argv=None):
+    """ Parses command line arguments into options for :func:`run()`. """
+    parser = _make_parser()
+    options, args = parser.parse_args(argv)
+    if args:
+        parser.error('unexpected arguments: %s' % ' '.join(args))
+    if options.operations is None and options.duration is None:
+        options.duration = 30.0
+    if options.local and options.servers:
+        parser.error('--local and --server can not be used together')
+    if not options.servers:
+        options.servers = ['localhost:9160']
+    return options
+
+
+def _make_pool(options):
+    return ConnectionPool(options.keyspace, options.servers,
+                          pool_size=options.pool_size,
+                          max_overflow=options.max_overflow,
+                          pool_timeout=options.pool_timeout,
+                          timeout=options.timeout,
+                          max_retries=options.max_retries,
+                          prefill=False)
+
+
+def _make_row(options, rand):
+    value = ''.join(chr(rand.randrange(256)) for i in xrange(options.value_size))
+    return dict((COLUMN_FORMAT % i, value) for i in xrange(options.columns))
+
+
+class _Worker(object):
+
+    def __init__(self, options, cf, recorder, seed):
+        self.options = options
+        self.cf = cf
+        self.recorder = recorder
+        self.random = random.Random(seed)
+        self.keys = KeyChooser(options.keys, options.distribution,
+                               options.zipf_exponent, self.random)
+        self.row = _make_row(options, self.random)
+        cumulative = []
+        total = 0.0
+        for name, weight in options.mix:
+            total += weight
+            cumulative.append(total)
+        self._operations = [getattr(self, '_' + name) for name, weight in options.mix]
+        self._names = [name for name, weight in options.mix]
+        self._cumulative = cumulative
+        self._total = total
+
+    def _read(self):
+        try:
+            self.cf.get(self.keys.next_key(), column_count=self.options.columns)
+        except NotFoundException:
+            pass
+
+    def _multiget(self):
+        self.cf.multiget([self.keys.next_key() for i in xrange(self.options.multiget_keys)],
+                         column_count=self.options.columns)
+
+    def _write(self):
+        self.cf.insert(self.keys.next_key(), self.row)
+
+    def _batch(self):
+        batch = Mutator(self.cf.pool, queue_size=self.options.queue_size)
+        for i in xrange(self.options.batch_rows):
+            batch.insert(self.cf, self.keys.next_key(), self.row)
+        batch.send()
+
+    def _scan(self):
+        rows = self.cf.get_range(start=self.keys.next_key(),
+                                 row_count=self.options.scan_rows,
+                                 column_count=self.options.columns)
+        for row in rows:
+            pass
+
+    def run(self, count, stop):
+        for i in itertools.repeat(None) if count is None else xrange(count):
+            if stop.is_set():
+                return
+            index = bisect.bisect_right(self._cumulative, self.random.random() * self._total)
+            index = min(index, len(self._operations) - 1)
+            start = time.time()
+            failed = False
+            try:
+                self._operations[index]()
+            except Exception:
+                failed = True
+            self.recorder.record(self._names[index], time.time() - start, failed)
+
+
+def _split(total, parts):
+    if total is None:
+        return [None] * parts
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def _run_threads(options, counts, recorder, stop, seed):
+    pool = _make_pool(options)
+    cf = ColumnFamily(pool, options.column_family, buffer_size=options.buffer_size)
+    workers = []
+    for i, count in enumerate(counts):
+        worker = _Worker(options, cf, recorder, seed + i)
+        thread = threading.Thread(target=worker.run, args=(count, stop))
+        thread.daemon = True
+        thread.start()
+        workers.append(thread)
+    return pool, workers
+
+
+def _run_process(options, counts, results, stop, seed):
+    # Sends what was recorded every interval, then None when done or
+    # the reason the process could not run
+    try:
+        recorder = Recorder()
+        pool, workers = _run_threads(options, counts, recorder, stop, seed)
+    except Exception, exc:
+        results.put('%s: %s' % (exc.__class__.__name__, exc))
+        return
+    while _join(workers, options.interval):
+        results.put(recorder.drain())
+    results.put(recorder.drain())
+    results.put(None)
+    pool.dispose()
+
+
+def _join(threads, timeout):
+    """ Waits up to `timeout` seconds for `threads`; returns whether any are alive. """
+    until = time.time() + timeout
+    for thread in threads:
+        thread.join(max(until - time.time(), 0))
+    return any(thread.is_alive() for thread in threads)
+
+
+def _populate(options):
+    pool = _make_pool(options)
+    cf = ColumnFamily(pool, options.column_family)
+    row = _make_row(options, random.Random(options.seed))
+    batch = Mutator(pool, queue_size=options.queue_size)
+    for i in xrange(options.keys):
+        batch.insert(cf, KEY_FORMAT % i, row)
+    batch.send()
+    pool.dispose()
+
+
+def _create_schema(options):
+    from pycassa.system_manager import SystemManager, SIMPLE_STRATEGY
+    sys_manager = SystemManager(options.servers[0], timeout=options.timeout)
+    try:
+        keyspaces = sys_manager.list_keyspaces()
+        if options.keyspace not in keyspaces:
+            sys_manager.create_keyspace(
+                    options.keyspace, SIMPLE_STRATEGY,
+                    {'replication_factor': str(options.replication_factor)})
+        if options.column_family not in \
+                sys_manager.get_keyspace_column_families(options.keyspace):
+            sys_manager.create_column_family(options.keyspace, options.column_family)
+    finally:
+        sys_manager.close()
+
+
+def _format_ms(seconds):
+    if seconds is None:
+        return '-'
+    return '%.2f' % (seconds * 1000)
+
+
+_HEADER = '%8s %10s %9s %7s %8s %8s %8s %8s %8s' % (
+        'time', 'ops', 'op/s', 'errors', 'mean ms', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms')
+
+
+def _line(label, histogram, errors, elapsed):
+    rate = histogram.count / elapsed if elapsed > 0 else 0.0
+    mean = histogram.total / histogram.count if histogram.count else None
+    return '%8s %10d %9.0f %7d %8s %8s %8s %8s %8s' % (
+            label, histogram.count, rate, errors, _format_ms(mean),
+            _format_ms(histogram.percentile(50)), _format_ms(histogram.percentile(95)),
+            _format_ms(histogram.percentile(99)),
+            _format_ms(histogram.max if histogram.count else None))
+
+
+def _combine(stats):
+    histogram = LatencyHistogram()
+    errors = 0
+    for op_histogram, op_errors in stats.itervalues():
+        histogram.merge(op_histogram)
+        errors += op_errors
+    return histogram, errors
+
+
+def run(options, out=None):
+    """
+    Runs the workload described by `options`, as returned by
+    :func:`parse_args()`, writing reports to `out`, which defaults to
+    standard output. Returns ``{operation: (histogram, errors)}`` with the
+    latencies of the whole run.
+    """
+    if out is None:
+        out = sys.stdout
+    server = None
+    if options.local:
+        from pycassa.contrib.server import CassandraServer
+        server = CassandraServer().start()
+        server.create_column_family(options.keyspace, options.column_family)
+        if options.local_latency:
+            server.latency = options.local_latency / 1000.0
+        options.servers = [server.server]
+    elif options.create:
+        _create_schema(options)
+
+    try:
+        if options.populate:
+            start = time.time()
+            _populate(options)
+            out.write('populated %d keys in %.1fs\n' % (options.keys, time.time() - start))
+
+        return _run(options, out)
+    finally:
+        if server is not None:
+            server.stop()
+
+
+def _run(options, out):
+    seed = options.seed if options.seed is not None else random.randrange(2 ** 30)
+    workers = options.threads * options.processes
+    counts = _split(options.operations, workers)
+    out.write('%s: %s on %s/%s, %d processes x %d threads, %s keys %d\n' % (
+            ', '.join('%s=%g' % op for op in options.mix),
+            '%d operations' % options.operations if options.operations is not None
+            else '%gs' % options.duration,
+            ','.join(options.servers), options.column_family, options.processes,
+            options.threads, options.distribution, options.keys))
+    out.write(_HEADER + '\n')
+    out.flush()
+
+    stop = threading.Event() if options.processes == 1 else multiprocessing.Event()
+    interval = Recorder()
+    total = Recorder()
+    start = last = time.time()
+    deadline = start + options.duration if options.duration is not None else None
+
+    if options.processes == 1:
+        pool, threads = _run_threads(options, counts, interval, stop, seed)
+        alive = lambda: any(t.is_alive() for t in threads)
+        collect = lambda timeout: _join(threads, timeout)
+    else:
+        results = multiprocessing.Queue()
+        processes = []
+        for i in range(options.processes):
+            chunk = counts[i * options.threads:(i + 1) * options.threads]
+            process = multiprocessing.Process(
+                    target=_run_process,
+                    args=(options, chunk, results, stop, seed + i * options.threads))
+            process.daemon = True
+            process.start()
+            processes.append(process)
+        finished = [0]
+        failures = []
+
+        def alive():
+            return finished[0] < len(processes)
+
+        def collect(timeout):
+            until = time.time() + timeout
+            while alive():
+                try:
+                    stats = results.get(timeout=max(until - time.time(), 0.001))
+                except Queue.Empty:
+                    return
+                if isinstance(stats, basestring):
+                    failures.append(stats)
+                    finished[0] += 1
+                elif stats is None:
+                    finished[0] += 1
+                else:
+                    interval.merge(stats)
+
+    def report(now, last):
+        # Returns when the line was reported, if there was anything to report
+        stats = interval.drain()
+        total.merge(stats)
+        histogram, errors = _combine(stats)
+        if not histogram.count:
+            return last
+        out.write(_line('%.1f' % (now - start), histogram, errors, now - last) + '\n')
+        out.flush()
+        return now
+
+    next_report = start
+    try:
+        while alive():
+            next_report += options.interval
+            if deadline is not None:
+                next_report = min(next_report, deadline)
+            collect(max(next_report - time.time(), 0))
+            now = time.time()
+            if deadline is not None and now >= deadline:
+                break
+            last = report(now, last)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        collect(options.timeout)
+        if options.processes > 1:
+            for process in processes:
+                process.join(options.timeout)
+        else:
+            pool.dispose()
+    report(time.time(), last)
+    if options.processes > 1 and failures:
+        raise RuntimeError('%d of %d processes failed: %s'
+                           % (len(failures), options.processes, failures[0]))
+
+    elapsed = time.time() - start
+    stats = total.drain()
+
+    out.write('\n%-8s %10s %9s %7s %8s %8s %8s %8s %8s\n' % (
+            'op', 'ops', 'op/s', 'errors', 'mean ms', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms'))
+    for name, weight in options.mix:
+        if name in stats:
+            out.write(_line(name.ljust(8), stats[name][0], stats[name][1], elapsed) + '\n')
+    histogram, errors = _combine(stats)
+    out.write(_line('total'.ljust(8), histogram, errors, elapsed) + '\n')
+    out.flush()
+    return stats
+
+
+def main(argv=None):
+    """ The ``pycassaStress`` command. """
+    options = parse_args(argv)
+    try:
+        stats = run(options)
+    except Exception, exc:
+        sys.stderr.write('pycassaStress: error: %s: %s\n' % (exc.__class__.__name__, exc))
+        return 1
+    histogram, errors = _combine(stats)
+    return 1 if errors and errors == histogram.count else 0
@@ -4,45 +4,34 @@ Projects that use pycassa and need to run an automated unit test suite on a
 system like Jenkins can use these stubs to emulate interactions with Cassandra
 without spinning up a cluster locally.
 
+:class:`ColumnFamilyStub` keeps its rows in memory in the order Cassandra
+would keep them: columns are sorted by their packed names the way the
+column family's comparator sorts them, so slices are found by bisection
+instead of by sorting the row, and rows are sorted by their packed keys,
+as with the ``ByteOrderedPartitioner``.
+
 """
 
+import binascii
+import datetime
+import decimal
+import itertools
 import operator
-from uuid import UUID
+import struct
+import time
+import uuid
 
-from collections import MutableMapping
 from pycassa import NotFoundException
 from pycassa.util import OrderedDict
 from pycassa.columnfamily import gm_timestamp
+from pycassa.contrib.ordering import SortedDict, qualify_type, sort_key_for
 from pycassa.index import EQ, GT, GTE, LT, LTE
+from pycassa.marshal import packer_for
 
 
 __all__ = ['ConnectionPoolStub', 'ColumnFamilyStub', 'SystemManagerStub']
 
 
-class DictWithTime(MutableMapping):
-    def __init__(self, *args, **kwargs):
-        self.__timestamp = kwargs.pop('timestamp', None)
-        self.store = dict()
-        self.update(dict(*args, **kwargs))
-
-    def __getitem__(self, key):
-        return self.store[key]
-
-    def __setitem__(self, key, value, timestamp=None):
-        if timestamp is None:
-            timestamp = self.__timestamp or gm_timestamp()
-
-        self.store[key] = (value, timestamp)
-
-    def __delitem__(self, key):
-        del self.store[key]
-
-    def __iter__(self):
-        return iter(self.store)
-
-    def __len__(self):
-        return len(self.store)
-
 operator_dict = {
     EQ: operator.eq,
     GT: operator.gt,
@@ -113,21 +102,190 @@ class SystemManagerStub(object):
         return {self._schema(): ['1.1.1.1']}
 
 
+def _infer_type(value):
+    """ Guesses the type of an unpacked name, key or value. """
+    if isinstance(value, bool):
+        return 'BooleanType'
+    if isinstance(value, (int, long)):
+        return 'IntegerType'
+    if isinstance(value, float):
+        return 'DoubleType'
+    if isinstance(value, basestring):
+        return 'UTF8Type'
+    if isinstance(value, uuid.UUID):
+        return 'UUIDType'
+    if isinstance(value, datetime.date):
+        return 'DateType'
+    if isinstance(value, decimal.Decimal):
+        return 'DecimalType'
+    if isinstance(value, tuple):
+        types = map(_infer_type, value)
+        if None not in types:
+            return 'CompositeType(%s)' % ', '.join(types)
+    return None
+
+
+# Inferred types whose values are ordered by value, like Python numbers
+_NUMBER_TYPES = frozenset(['BooleanType', 'IntegerType', 'DoubleType', 'DecimalType'])
+
+
+class _Ordering(object):
+    """
+    Orders unpacked names the way Cassandra orders them once packed as
+    `data_type`.
+
+    If `data_type` is ``None``, the type of each name is inferred on its
+    own, so names of different types may be mixed: numbers are ordered by
+    value, other names of a known type are grouped by type and ordered as
+    that type, and names of no known type keep their natural order.
+
+    With `bytewise`, names are ordered by their packed bytes whatever the
+    type, the way the ``ByteOrderedPartitioner`` orders keys.
+    """
+
+    def __init__(self, data_type=None, bytewise=False):
+        self.bytewise = bytewise
+        self._codecs = {}
+        self._fixed = None
+        if data_type is not None:
+            self._fixed = self._codecs_for(qualify_type(str(data_type)))
+
+    def _codecs_for(self, typestr):
+        codecs = self._codecs.get(typestr)
+        if codecs is None:
+            if typestr is None:
+                pack = lambda value, slice_start=None: str(value)
+                sort = None
+            else:
+                pack = packer_for(typestr)
+                sort = sort_key_for(typestr)
+            if self.bytewise:
+                sort = lambda packed: packed
+            codecs = self._codecs[typestr] = (pack, sort)
+        return codecs
+
+    def pack(self, value, slice_start=None):
+        pack, sort = self._fixed or self._codecs_for(_infer_type(value))
+        return pack(value, slice_start)
+
+    def key(self, value, slice_start=None):
+        if self._fixed is not None:
+            pack, sort = self._fixed
+            return sort(pack(value, slice_start))
+        typestr = _infer_type(value)
+        pack, sort = self._codecs_for(typestr)
+        if self.bytewise:
+            return pack(value, slice_start)
+        if typestr in _NUMBER_TYPES:
+            return (None, value)
+        if sort is None:
+            return ('', value)
+        return (typestr, sort(pack(value, slice_start)))
+
+
+class _Column(object):
+    """ A column value; counters have no `timestamp`. """
+
+    __slots__ = ('value', 'timestamp', 'ttl', 'expires')
+
+    def __init__(self, value, timestamp, ttl=None):
+        self.value = value
+        self.timestamp = timestamp
+        self.ttl = ttl
+        self.expires = time.time() + ttl if ttl else None
+
+
+def _is_expired(entry, now):
+    if isinstance(entry, SortedDict):
+        for name, column in entry.items():
+            if column.expires is not None and column.expires <= now:
+                del entry[name]
+        return not entry
+    return entry.expires is not None and entry.expires <= now
+
+
+class _CfMutatorStub(object):
+    """
+    Queues inserts and removals for a :class:`ColumnFamilyStub` like a
+    :class:`~pycassa.batch.CfMutator`, applying them when it is sent.
+    """
+
+    def __init__(self, column_family, queue_size=100):
+        self._column_family = column_family
+        self._queue_size = queue_size
+        self._queue = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.send()
+
+    def _enqueue(self, method, *args):
+        self._queue.append((method, args))
+        if len(self._queue) >= self._queue_size:
+            self.send()
+        return self
+
+    def insert(self, key, columns, timestamp=None, ttl=None):
+        if timestamp is None:
+            timestamp = self._column_family.timestamp()
+        return self._enqueue(self._column_family.insert, key, columns, timestamp, ttl)
+
+    def remove(self, key, columns=None, super_column=None, timestamp=None):
+        if timestamp is None:
+            timestamp = self._column_family.timestamp()
+        return self._enqueue(self._column_family.remove, key, columns, super_column,
+                             None, timestamp)
+
+    def send(self, write_consistency_level=None, atomic=None):
+        queue, self._queue = self._queue, []
+        for method, args in queue:
+            method(*args)
+
+
 class ColumnFamilyStub(object):
     """Functional ColumnFamily stub object.
 
-    Acts very similar to a remote column family, supporting a basic version of
-    the API. When instantiated, it registers itself with the supplied (stub)
-    connection pool.
+    Acts very similar to a remote column family, supporting the same API.
+    When instantiated, it registers itself with the supplied (stub)
+    connection pool, and inserts `rows`, a dictionary of the form
+    ``{key: {column: value}}``, if it is given.
+
+    Columns are sorted by `comparator_type` (and `subcomparator_type` for
+    super column families, which are made with ``super=True``), given as
+    type names such as ``'LongType'`` or as
+    :class:`~pycassa.types.CassandraType` instances. Types that are not
+    given are inferred from the first column inserted, so that integer
+    names sort like ``IntegerType``, :class:`~uuid.UUID` names like
+    ``UUIDType``, tuples like ``CompositeType`` and strings like
+    ``UTF8Type``; they are inferred again whenever the column family is
+    empty. Rows are sorted by their keys packed as
+    `key_validation_class`, as with the ``ByteOrderedPartitioner``, and
+    the tokens of :meth:`get_range()` are the hex strings of packed keys.
+
+    Columns inserted with a `ttl` are dropped once it has passed.
+    Removals leave no tombstones, so a removed column can be inserted
+    again with an older timestamp.
 
     """
 
+    MAX_COUNT = 2 ** 31 - 1
+
     def __init__(self, pool=None, column_family=None, rows=None, **kwargs):
-        rows = rows or OrderedDict()
-        for r in rows.itervalues():
-            if not isinstance(r, DictWithTime):
-                r = DictWithTime(r)
-        self.rows = rows
+        self.column_family = column_family
+        self.super = kwargs.get('super', False)
+        self.dict_class = kwargs.get('dict_class', OrderedDict)
+        self.timestamp = kwargs.get('timestamp', gm_timestamp)
+
+        self._keys = _Ordering(kwargs.get('key_validation_class'), bytewise=True)
+        self._names = _Ordering(kwargs.get('comparator_type'))
+        self._subnames = _Ordering(kwargs.get('subcomparator_type'))
+        self.rows = SortedDict(self._keys.key)
+
+        if rows:
+            for key, columns in rows.iteritems():
+                self.insert(key, columns)
 
         if pool is not None:
             pool._register_mock_cf(column_family, self)
@@ -138,117 +296,336 @@ class ColumnFamilyStub(object):
     def __contains__(self, obj):
         return self.rows.__contains__(obj)
 
-    def get(self, key, columns=None, column_start=None, column_finish=None,
-            column_reversed=False, column_count=100, include_timestamp=False, **kwargs):
-        """Get a value from the column family stub."""
-
-        my_columns = self.rows.get(key)
-        if include_timestamp:
-            get_value = lambda x: x
+    def _container(self, key, super_column):
+        """ The columns to read in a row and their ordering, or ``None``. """
+        row = self.rows.get(key)
+        if row is None:
+            return None, None
+        if super_column is None:
+            return row, self._names
+        return row.get(super_column), self._subnames
+
+    def _items(self, container, ordering, columns, column_start, column_finish,
+               column_reversed, now):
+        """ Yields the live ``(name, entry)`` pairs selected from `container`. """
+        if columns is not None:
+            names = sorted((name for name in set(columns) if name in container),
+                           key=ordering.key, reverse=column_reversed)
+            items = [(name, container[name]) for name in names]
         else:
-            get_value = lambda x: x[0]
-        if not my_columns:
-            raise NotFoundException()
+            start = finish = None
+            if column_start not in ("", None):
+                start = ordering.key(column_start, not column_reversed)
+            if column_finish not in ("", None):
+                finish = ordering.key(column_finish, column_reversed)
+            items = container.iterrange(start, finish, column_reversed)
+        for name, entry in items:
+            if _is_expired(entry, now):
+                container.pop(name, None)
+            else:
+                yield name, entry
+
+    def _format(self, entry, include_timestamp, include_ttl, now):
+        if isinstance(entry, SortedDict):
+            return self.dict_class(
+                    (name, self._format(column, include_timestamp, include_ttl, now))
+                    for name, column in entry.iteritems()
+                    if not _is_expired(column, now))
+        if entry.timestamp is None or not (include_timestamp or include_ttl):
+            return entry.value
+        if include_timestamp and include_ttl:
+            return (entry.value, entry.timestamp, entry.ttl)
+        if include_timestamp:
+            return (entry.value, entry.timestamp)
+        return (entry.value, entry.ttl)
+
+    def _slice(self, key, columns, column_start, column_finish, column_reversed,
+               column_count, include_timestamp, super_column, include_ttl):
+        container, ordering = self._container(key, super_column)
+        result = self.dict_class()
+        if not container:
+            return result
+        now = time.time()
+        items = self._items(container, ordering, columns, column_start, column_finish,
+                            column_reversed, now)
+        if column_count is not None:
+            items = itertools.islice(items, max(column_count, 0))
+        for name, entry in items:
+            result[name] = self._format(entry, include_timestamp, include_ttl, now)
+        self._drop_if_empty(key)
+        return result
+
+    def _drop_if_empty(self, key):
+        row = self.rows.get(key)
+        if row is not None and not row:
+            del self.rows[key]
 
-        items = my_columns.items()
-        if isinstance(items[0], UUID) and items[0].version == 1:
-            items.sort(key=lambda uuid: uuid.time)
-        elif isinstance(items[0], tuple) and any(isinstance(x, UUID) for x in items[0]):
-            are_components_uuids = [isinstance(x, UUID) and x.version == 1 for x in items[0]]
+    def get(self, key, columns=None, column_start="", column_finish="",
+            column_reversed=False, column_count=100, include_timestamp=False,
+            super_column=None, read_consistency_level=None, include_ttl=False,
+            timeout_budget=None):
+        """Get a slice of a row from the column family stub.
 
-            def sortuuid(tup):
-                return [x.time if is_uuid else x for x, is_uuid in zip(tup, are_components_uuids)]
-            items.sort(key=sortuuid)
-        else:
-            items.sort()
-
-        if column_reversed:
-            items.reverse()
-
-        sliced_items = [(k, get_value(v)) for (k, v) in items
-                        if self._is_column_in_range(k, columns,
-                                                    column_start, column_finish, column_reversed)][:column_count]
-
-        return OrderedDict(sliced_items)
-
-    def _is_column_in_range(self, k, columns, column_start, column_finish, column_reversed):
-        lower_bound = column_start if not column_reversed else column_finish
-        upper_bound = column_finish if not column_reversed else column_start
-
-        if columns:
-            return k in columns
-        return (not lower_bound or k >= lower_bound) and (not upper_bound or k <= upper_bound)
-
-    def multiget(self, keys, columns=None, column_start=None, column_finish=None,
-                 column_reversed=False, column_count=100, include_timestamp=False, **kwargs):
-        """Get multiple key values from the column family stub."""
-
-        return OrderedDict(
-            (key, self.get(
-                key,
-                columns=columns,
-                column_start=column_start,
-                column_finish=column_finish,
-                column_reversed=column_reversed,
-                column_count=column_count,
-                include_timestamp=include_timestamp,
-            )) for key in keys if key in self.rows)
-
-    def batch(self, **kwargs):
-        """Returns itself."""
-        return self
+        Raises :exc:`~pycassa.cassandra.ttypes.NotFoundException` if the
+        slice is empty."""
 
-    def send(self):
-        pass
-
-    def insert(self, key, columns, timestamp=None, **kwargs):
-        """Insert data to the column family stub."""
+        result = self._slice(key, columns, column_start, column_finish, column_reversed,
+                             column_count, include_timestamp, super_column, include_ttl)
+        if not result:
+            raise NotFoundException()
+        return result
+
+    def xget(self, key, column_start="", column_finish="", column_reversed=False,
+             column_count=None, include_timestamp=False, read_consistency_level=None,
+             buffer_size=None, include_ttl=False, timeout_budget=None):
+        """Like :meth:`get()`, but yields ``(name, value)`` pairs."""
+
+        container, ordering = self._container(key, None)
+        if not container:
+            return
+        now = time.time()
+        items = self._items(container, ordering, None, column_start, column_finish,
+                            column_reversed, now)
+        if column_count is not None:
+            items = itertools.islice(items, max(column_count, 0))
+        for name, entry in items:
+            yield name, self._format(entry, include_timestamp, include_ttl, now)
+
+    def multiget(self, keys, columns=None, column_start="", column_finish="",
+                 column_reversed=False, column_count=100, include_timestamp=False,
+                 super_column=None, read_consistency_level=None, buffer_size=None,
+                 include_ttl=False, timeout_budget=None):
+        """Get slices of multiple rows from the column family stub.
+
+        Rows with empty slices are left out."""
+
+        result = self.dict_class()
+        for key in keys:
+            row = self._slice(key, columns, column_start, column_finish, column_reversed,
+                              column_count, include_timestamp, super_column, include_ttl)
+            if row:
+                result[key] = row
+        return result
+
+    def get_count(self, key, super_column=None, read_consistency_level=None,
+                  columns=None, column_start="", column_finish="",
+                  column_reversed=False, max_count=None, timeout_budget=None):
+        """Count the columns in a slice of a row."""
+
+        if max_count is None:
+            max_count = self.MAX_COUNT
+        container, ordering = self._container(key, super_column)
+        if not container:
+            return 0
+        items = self._items(container, ordering, columns, column_start, column_finish,
+                            column_reversed, time.time())
+        count = sum(1 for item in itertools.islice(items, max(max_count, 0)))
+        self._drop_if_empty(key)
+        return count
+
+    def multiget_count(self, keys, super_column=None, read_consistency_level=None,
+                       columns=None, column_start="", column_finish="", buffer_size=None,
+                       column_reversed=False, max_count=None, timeout_budget=None):
+        """Count the columns in slices of multiple rows."""
+
+        return self.dict_class(
+                (key, self.get_count(key, super_column, columns=columns,
+                                     column_start=column_start,
+                                     column_finish=column_finish,
+                                     column_reversed=column_reversed,
+                                     max_count=max_count))
+                for key in keys)
+
+    def get_range(self, start="", finish="", columns=None, column_start="",
+                  column_finish="", column_reversed=False, column_count=100,
+                  row_count=None, include_timestamp=False, super_column=None,
+                  read_consistency_level=None, buffer_size=None, filter_empty=True,
+                  include_ttl=False, start_token=None, finish_token=None,
+                  timeout_budget=None):
+        """Yields ``(key, slice)`` pairs for a range of rows, in key order.
+
+        `start_token` is exclusive and `finish_token` inclusive, as they
+        are in Cassandra."""
+
+        if start_token is not None and (start not in ("", None) or finish not in ("", None)):
+            raise ValueError(
+                "ColumnFamily.get_range() received incompatible arguments: "
+                "'start_token' may not be used with 'start' or 'finish'")
+        if finish_token is not None and finish not in ("", None):
+            raise ValueError(
+                "ColumnFamily.get_range() received incompatible arguments: "
+                "'finish_token' may not be used with 'finish'")
+
+        lo = hi = skip = None
+        if start_token:
+            lo = skip = binascii.unhexlify(start_token)
+        elif start not in ("", None):
+            lo = self._keys.key(start)
+        if finish_token:
+            hi = binascii.unhexlify(finish_token)
+        elif finish not in ("", None):
+            hi = self._keys.key(finish)
+
+        if not self.rows:
+            return
+        count = 0
+        for key, row in self.rows.iterrange(lo, hi):
+            if skip is not None and self._keys.key(key) == skip:
+                continue
+            if row_count is not None and count >= row_count:
+                return
+            columns_slice = self._slice(key, columns, column_start, column_finish,
+                                        column_reversed, column_count, include_timestamp,
+                                        super_column, include_ttl)
+            if filter_empty and not columns_slice:
+                continue
+            count += 1
+            yield key, columns_slice
+
+    def get_indexed_slices(self, index_clause, columns=None, column_start="",
+                           column_finish="", column_reversed=False, column_count=100,
+                           include_timestamp=False, read_consistency_level=None,
+                           buffer_size=None, include_ttl=False, timeout_budget=None):
+        """Yields ``(key, slice)`` pairs for the rows that match a pycassa
+        index clause, in key order.
 
-        if key not in self.rows:
-            self.rows[key] = DictWithTime([], timestamp=timestamp)
+        See :meth:`pycassa.index.create_index_clause()` for creating such an
+        index clause."""
 
-        for column in columns:
-            self.rows[key].__setitem__(column, columns[column], timestamp)
+        expressions = [(expr.column_name, operator_dict[expr.op],
+                        _Ordering(_infer_type(expr.value)).key, expr.value)
+                       for expr in index_clause.expressions]
+        lo = None
+        if index_clause.start_key not in ("", None):
+            lo = self._keys.key(index_clause.start_key)
+        if not self.rows:
+            return
+        count = 0
+        now = time.time()
+        for key, row in self.rows.iterrange(lo):
+            if index_clause.count is not None and count >= index_clause.count:
+                return
+            if not all(self._matches(row, name, op, value_key, value, now)
+                       for name, op, value_key, value in expressions):
+                continue
+            count += 1
+            yield key, self._slice(key, columns, column_start, column_finish,
+                                   column_reversed, column_count, include_timestamp,
+                                   None, include_ttl)
+
+    def _matches(self, row, name, op, value_key, value, now):
+        entry = row.get(name)
+        if entry is None or _is_expired(entry, now):
+            return False
+        try:
+            return op(value_key(entry.value), value_key(value))
+        except (TypeError, ValueError, struct.error):
+            return False
+
+    def _write_container(self, key, super_column):
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = SortedDict(self._names.key)
+        if super_column is None:
+            return row
+        container = row.get(super_column)
+        if container is None:
+            container = row[super_column] = SortedDict(self._subnames.key)
+        return container
+
+    def _write(self, container, columns, timestamp, ttl):
+        for name, value in columns.iteritems():
+            existing = container.get(name)
+            if existing is None or existing.timestamp <= timestamp:
+                container[name] = _Column(value, timestamp, ttl)
+
+    def insert(self, key, columns, timestamp=None, ttl=None,
+               write_consistency_level=None, timeout_budget=None):
+        """Insert columns into a row of the column family stub.
+
+        A column is only overwritten by a write with the same or a newer
+        timestamp. Returns the timestamp used."""
 
-        return self.rows[key][columns.keys()[0]][1]
+        if timestamp is None:
+            timestamp = self.timestamp()
+        if self.super:
+            for super_column, subcolumns in columns.iteritems():
+                self._write(self._write_container(key, super_column), subcolumns,
+                            timestamp, ttl)
+        else:
+            self._write(self._write_container(key, None), columns, timestamp, ttl)
+        return timestamp
 
-    def get_indexed_slices(self, index_clause, **kwargs):
-        """Grabs rows that match a pycassa index clause.
+    def batch_insert(self, rows, timestamp=None, ttl=None,
+                     write_consistency_level=None, timeout_budget=None):
+        """Insert columns into multiple rows of the column family stub."""
 
-        See :meth:`pycassa.index.create_index_clause()` for creating such an
-        index clause."""
+        if timestamp is None:
+            timestamp = self.timestamp()
+        for key, columns in rows.iteritems():
+            self.insert(key, columns, timestamp, ttl)
+        return timestamp
+
+    def add(self, key, column, value=1, super_column=None,
+            write_consistency_level=None, timeout_budget=None):
+        """Increment a counter column."""
+
+        container = self._write_container(key, super_column)
+        entry = container.get(column)
+        if entry is None:
+            container[column] = _Column(value, None)
+        else:
+            entry.value += value
+
+    def _delete(self, container, names, timestamp):
+        for name in names:
+            entry = container.get(name)
+            if entry is None:
+                continue
+            if isinstance(entry, SortedDict):
+                self._delete(entry, entry.keys(), timestamp)
+                if not entry:
+                    del container[name]
+            elif entry.timestamp is None or entry.timestamp <= timestamp:
+                del container[name]
+
+    def remove(self, key, columns=None, super_column=None,
+               write_consistency_level=None, timestamp=None, counter=None,
+               timeout_budget=None):
+        """Remove columns, a super column or a whole row from the column
+        family stub.
+
+        Only columns with the same or an older timestamp are removed.
+        Returns the timestamp used."""
 
-        keys = []
-        for key, row in self.rows.iteritems():
-            for expr in index_clause.expressions:
-                if (
-                    expr.column_name in row and
-                    operator_dict[expr.op](row[expr.column_name][0], expr.value)
-                ):
-                    keys.append(key)
-
-        data = self.multiget(keys, **kwargs).items()
-        return data
-
-    def remove(self, key, columns=None):
-        """Remove a key from the column family stub."""
-        if key not in self.rows:
-            raise NotFoundException()
-        if columns is None:
-            del self.rows[key]
+        if timestamp is None:
+            timestamp = self.timestamp()
+        row = self.rows.get(key)
+        if row is None:
+            return timestamp
+        if super_column is None:
+            self._delete(row, row.keys() if columns is None else columns, timestamp)
         else:
-            for c in columns:
-                if c in self.rows[key]:
-                    del self.rows[key][c]
-            if not self.rows[key]:
-                del self.rows[key]
-        return gm_timestamp()
-
-    def get_range(self, include_timestamp=False, columns=None, **kwargs):
-        """Currently just gets all values from the column family."""
-
-        return [(key, self.get(key, columns, include_timestamp))
-                for key in self.rows]
+            container = row.get(super_column)
+            if container is not None:
+                self._delete(container, container.keys() if columns is None else columns,
+                             timestamp)
+                if not container:
+                    del row[super_column]
+        self._drop_if_empty(key)
+        return timestamp
+
+    def remove_counter(self, key, column, super_column=None,
+                       write_consistency_level=None, timeout_budget=None):
+        """Remove a counter column."""
+
+        self.remove(key, [column], super_column)
+
+    def batch(self, queue_size=100, write_consistency_level=None, atomic=None):
+        """Returns a stub of :class:`~pycassa.batch.CfMutator` that applies
+        its queued writes when sent."""
+
+        return _CfMutatorStub(self, queue_size)
 
     def truncate(self):
         """Clears all data from the column family stub."""
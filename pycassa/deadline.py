@@ -0,0 +1,97 @@
+"""
+End-to-end time limits for operations.
+
+The `timeout` of a :class:`~pycassa.pool.ConnectionPool` applies to each
+socket operation separately, so a call which waits for a connection,
+retries a few times or fetches many pages can take much longer than that.
+Most :class:`~pycassa.columnfamily.ColumnFamily` methods and
+:meth:`.Mutator.send()` accept a `timeout_budget` in seconds which covers
+the whole call: waiting for a connection, every attempt and the delays
+between retries, and, for methods such as :meth:`~.ColumnFamily.get_range()`
+and :meth:`~.ColumnFamily.xget()`, every page that is fetched. Socket
+timeouts are shortened to fit in whatever remains of the budget, and
+:exc:`DeadlineExceeded` is raised as soon as it runs out:
+
+.. code-block:: python
+
+    >>> try:
+    ...     rows = list(cf.get_range(timeout_budget=0.25))
+    ... except DeadlineExceeded:
+    ...     rows = None
+
+For a generator, the budget starts when iteration begins, since that is
+when the first page is fetched.
+
+.. versionadded:: 1.12.0
+"""
+
+import time
+
+__all__ = ['Deadline', 'DeadlineExceeded']
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when an operation's `timeout_budget` runs out before it
+    completes.
+
+    If the budget ran out while the operation was failing, `last_failure`
+    is the most recent exception that it failed with; otherwise it
+    is ``None``.
+    """
+
+    def __init__(self, message, last_failure=None):
+        Exception.__init__(self, message)
+        self.last_failure = last_failure
+
+
+class Deadline(object):
+    """
+    The point in time by which an operation with a `timeout_budget`
+    must complete.
+    """
+
+    def __init__(self, timeout_budget):
+        self.timeout_budget = timeout_budget
+        self.expires_at = time.time() + timeout_budget
+
+    @classmethod
+    def start(cls, timeout_budget):
+        """
+        Returns a :class:`Deadline` `timeout_budget` seconds from now, or
+        ``None`` if `timeout_budget` is ``None``. If `timeout_budget` is
+        already a :class:`Deadline`, it is returned as is, which lets one
+        budget be shared by several calls.
+        """
+        if timeout_budget is None or isinstance(timeout_budget, Deadline):
+            return timeout_budget
+        return cls(timeout_budget)
+
+    def remaining(self):
+        """ Returns the number of seconds left, which may be negative. """
+        return self.expires_at - time.time()
+
+    def expired(self):
+        """ Whether the deadline has passed. """
+        return time.time() >= self.expires_at
+
+    def exceeded(self, last_failure=None):
+        """ Returns a :exc:`DeadlineExceeded` to be raised. """
+        message = "Timeout budget of %.3f seconds exceeded" % (self.timeout_budget,)
+        if last_failure is not None:
+            message += ". Last failure was %s: %s" % (
+                    last_failure.__class__.__name__, last_failure)
+        return DeadlineExceeded(message, last_failure)
+
+    def socket_timeout(self, timeout):
+        """
+        Returns `timeout`, a socket timeout in seconds or ``None``, shortened
+        to the time that remains. Raises :exc:`DeadlineExceeded` if no time
+        remains.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise self.exceeded()
+        if timeout is None or remaining < timeout:
+            return remaining
+        return timeout
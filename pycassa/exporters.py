@@ -0,0 +1,380 @@
+"""
+Publishing pool gauges and operation metrics to monitoring systems.
+
+An exporter periodically reads the gauges of one or more pools
+(:meth:`~.ConnectionPool.checkedin`, :meth:`~.ConnectionPool.checkedout`,
+:meth:`~.ConnectionPool.overflow` and the number of connections opened)
+and takes a snapshot of a :class:`~pycassa.metrics.Metrics` object, then
+publishes them from a background thread, so that exporting never happens
+on the path of a request:
+
+.. code-block:: python
+
+    >>> metrics = Metrics()
+    >>> pool = ConnectionPool('Keyspace1', metrics=metrics)
+    >>> exporter = StatsdExporter({'main': pool}, metrics, host='statsd.local')
+    >>> exporter.start()
+    >>> ...
+    >>> exporter.stop()
+
+:class:`PrometheusExporter` renders the Prometheus text exposition format,
+which can be served over HTTP or written to a file for the node exporter's
+textfile collector. :class:`StatsdExporter` sends StatsD gauges and
+counters over UDP, batching as many lines into each packet as fit.
+
+Exporters reset the :class:`~pycassa.metrics.Metrics` they read, so that
+each interval's latency percentiles only cover that interval; a
+:class:`~pycassa.metrics.Metrics` object should therefore only be read
+by one exporter.
+
+.. versionadded:: 1.12.0
+"""
+
+import os
+import socket
+import threading
+import BaseHTTPServer
+
+from pycassa.logging.pycassa_logger import PycassaLogger
+from pycassa.metrics import _percentile_name
+
+__all__ = ['Exporter', 'PrometheusExporter', 'StatsdExporter']
+
+_POOL_GAUGES = [
+    ('pool_size', 'The number of connections the pool keeps open.',
+     lambda pool: pool.size()),
+    ('pool_checkedin', 'The number of idle connections in the pool.',
+     lambda pool: pool.checkedin()),
+    ('pool_checkedout', 'The number of connections checked out of the pool.',
+     lambda pool: pool.checkedout()),
+    ('pool_overflow', 'The number of overflow connections that are open.',
+     lambda pool: pool.overflow()),
+    ('pool_opened', 'The number of connections the pool has open.',
+     lambda pool: pool.checkedin() + pool.checkedout()),
+]
+
+# The groups in a Metrics snapshot, and the label that names each entry
+_GROUPS = [('methods', 'method'),
+           ('column_families', 'column_family'),
+           ('servers', 'server')]
+
+
+def _families():
+    families = {}
+    for name, help, getter in _POOL_GAUGES:
+        families[name] = ('gauge', help)
+    for group, label in _GROUPS:
+        kind = label.replace('_', ' ')
+        families[label + '_latency_seconds'] = (
+                'summary', 'Latency of attempts at operations by %s.' % kind)
+        families[label + '_failures_total'] = (
+                'counter', 'Failed attempts at operations by %s.' % kind)
+        families[label + '_bytes_sent_total'] = (
+                'counter', 'Bytes sent by %s.' % kind)
+        families[label + '_bytes_received_total'] = (
+                'counter', 'Bytes received by %s.' % kind)
+    families['checkout_wait_seconds'] = (
+            'summary', 'Time spent checking connections out of pools.')
+    return families
+
+_FAMILIES = _families()
+
+
+class Exporter(object):
+    """
+    The base class for exporters, which publishes the gauges of `pools`
+    and the contents of `metrics` every `interval` seconds once
+    :meth:`start()` is called.
+
+    `pools` is a dictionary of pools by the name to publish them under, or
+    a list of pools, which are then named after their keyspaces. `metrics`
+    is a :class:`~pycassa.metrics.Metrics` object, or ``None``.
+
+    Subclasses implement :meth:`publish()`.
+    """
+
+    interval = 10
+    """ The number of seconds between exports. """
+
+    def __init__(self, pools=(), metrics=None, interval=None, prefix='pycassa'):
+        if not isinstance(pools, dict):
+            pools = dict((pool.keyspace, pool) for pool in pools)
+        self.pools = pools
+        self.metrics = metrics
+        if interval is not None:
+            self.interval = interval
+        self.prefix = prefix
+        self._thread = None
+        self._stopped = threading.Event()
+        self._log = PycassaLogger().add_child_logger('exporters', self._name_changed)
+
+    def _name_changed(self, new_logger):
+        self._log = new_logger
+
+    def collect(self):
+        """
+        Returns the current samples as a list of ``(family, suffix, labels,
+        value)`` tuples, where `labels` is a tuple of ``(name, value)`` pairs.
+
+        Gauges and latency percentiles have an empty `suffix`. Counters,
+        and the ``_count`` and ``_sum`` of latency summaries, hold the
+        increase since the previous call.
+        """
+        samples = []
+        for pool_name, pool in sorted(self.pools.iteritems()):
+            labels = (('pool', pool_name),)
+            for family, help, getter in _POOL_GAUGES:
+                samples.append((family, '', labels, getter(pool)))
+
+        if self.metrics is None:
+            return samples
+        snapshot = self.metrics.snapshot(reset=True)
+        percentiles = self.metrics.percentiles
+        for group, label in _GROUPS:
+            for name, stats in sorted(snapshot[group].iteritems()):
+                labels = ((label, name),)
+                samples.extend(_latency_samples(label + '_latency_seconds', labels,
+                                                stats['latency'], percentiles))
+                samples.append((label + '_failures_total', '', labels,
+                                stats['failures']))
+                samples.append((label + '_bytes_sent_total', '', labels,
+                                stats['bytes_sent']))
+                samples.append((label + '_bytes_received_total', '', labels,
+                                stats['bytes_received']))
+        samples.extend(_latency_samples('checkout_wait_seconds', (),
+                                        snapshot['checkout_wait'], percentiles))
+        return samples
+
+    def publish(self, samples):
+        """ Publishes `samples`, as returned by :meth:`collect()`. """
+        raise NotImplementedError()
+
+    def export(self):
+        """ Collects and publishes the current samples right away. """
+        self.publish(self.collect())
+
+    def start(self):
+        """ Starts exporting every :attr:`interval` seconds from a daemon thread. """
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='pycassa-exporter')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread after a last export, so that nothing
+        recorded before the call is lost.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            # wait() only returns the flag from Python 2.7
+            self._stopped.wait(self.interval)
+            stopped = self._stopped.is_set()
+            try:
+                self.export()
+            except Exception, exc:
+                self._log.warn("Error exporting metrics: %s", exc)
+            if stopped:
+                return
+
+
+def _latency_samples(family, labels, summary, percentiles):
+    samples = []
+    if not summary['count']:
+        return [(family, '_count', labels, 0), (family, '_sum', labels, 0.0)]
+    for percent in percentiles:
+        quantile = (('quantile', '%g' % (percent / 100.0)),)
+        samples.append((family, '', labels + quantile,
+                        summary[_percentile_name(percent)]))
+    samples.append((family, '_count', labels, summary['count']))
+    samples.append((family, '_sum', labels, summary['mean'] * summary['count']))
+    return samples
+
+
+class PrometheusExporter(Exporter):
+    """
+    Keeps the latest samples in the Prometheus text exposition format.
+
+    Counters and the counts and sums of latency summaries accumulate over
+    the life of the exporter, while percentiles only cover the latest
+    interval. The text is available from :meth:`render()`; if `path` is
+    set, it is also written there after each export, replacing the file
+    atomically, which suits the node exporter's textfile collector.
+    :meth:`serve()` makes it available over HTTP.
+    """
+
+    def __init__(self, pools=(), metrics=None, interval=None, prefix='pycassa',
+                 path=None):
+        Exporter.__init__(self, pools, metrics, interval, prefix)
+        self.path = path
+        self._totals = {}
+        self._text = ''
+        self._lock = threading.Lock()
+        self._server = None
+
+    def publish(self, samples):
+        current = {}
+        for family, suffix, labels, value in samples:
+            key = (family, suffix, labels)
+            if suffix or _FAMILIES[family][0] == 'counter':
+                self._totals[key] = self._totals.get(key, 0) + value
+            else:
+                current[key] = value
+        current.update(self._totals)
+        text = self._format(current)
+        with self._lock:
+            self._text = text
+        if self.path is not None:
+            tmp_path = '%s.%d.tmp' % (self.path, os.getpid())
+            with open(tmp_path, 'w') as f:
+                f.write(text)
+            os.rename(tmp_path, self.path)
+
+    def _format(self, samples):
+        by_family = {}
+        for key, value in samples.iteritems():
+            by_family.setdefault(key[0], []).append((key, value))
+        lines = []
+        for family in sorted(by_family):
+            kind, help = _FAMILIES[family]
+            name = '%s_%s' % (self.prefix, family)
+            lines.append('# HELP %s %s' % (name, help))
+            lines.append('# TYPE %s %s' % (name, kind))
+            for (family, suffix, labels), value in sorted(by_family[family]):
+                if labels:
+                    labels = '{%s}' % ','.join('%s="%s"' % (label, _escape(label_value))
+                                              for label, label_value in labels)
+                else:
+                    labels = ''
+                lines.append('%s%s%s %s' % (name, suffix, labels, _number(value)))
+        return '\n'.join(lines) + '\n'
+
+    def render(self):
+        """ Returns the samples from the latest export as text. """
+        with self._lock:
+            return self._text
+
+    def serve(self, port, host=''):
+        """
+        Serves the text from :meth:`render()` over HTTP on `port` from
+        a daemon thread. Requests never touch the pools or the metrics.
+        """
+        exporter = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                body = exporter.render()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = BaseHTTPServer.HTTPServer((host, port), Handler)
+        thread = threading.Thread(target=self._server.serve_forever,
+                                  name='pycassa-exporter-http')
+        thread.daemon = True
+        thread.start()
+        return self._server.server_address[1]
+
+    def stop(self):
+        Exporter.stop(self)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    if value is None:
+        return 'NaN'
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+class StatsdExporter(Exporter):
+    """
+    Sends samples to a StatsD server at `host` and `port` over UDP.
+
+    Each sample becomes a stat named after the family and its labels'
+    values, such as ``pycassa.method_latency_seconds.get_slice.p99`` or
+    ``pycassa.pool_checkedout.main``. Gauges and latency percentiles are
+    sent as gauges, with latencies in milliseconds, and counters as the
+    increase since the previous export. Lines are batched into packets of
+    at most `max_packet_size` bytes.
+    """
+
+    def __init__(self, pools=(), metrics=None, interval=None, prefix='pycassa',
+                 host='localhost', port=8125, max_packet_size=1432):
+        Exporter.__init__(self, pools, metrics, interval, prefix)
+        self.address = (host, port)
+        self.max_packet_size = max_packet_size
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def format(self, samples):
+        """ Returns the StatsD lines for `samples`. """
+        lines = []
+        for family, suffix, labels, value in samples:
+            if value is None or suffix == '_sum':
+                continue
+            parts = [self.prefix, family]
+            quantile = None
+            for label, label_value in labels:
+                if label == 'quantile':
+                    quantile = _percentile_name(float(label_value) * 100)
+                else:
+                    parts.append(_stat_part(label_value))
+            if quantile is not None:
+                parts.append(quantile)
+            elif suffix:
+                parts.append(suffix[1:])
+
+            if suffix == '_count' or _FAMILIES[family][0] == 'counter':
+                if value:
+                    lines.append('%s:%d|c' % ('.'.join(parts), value))
+            elif family.endswith('_seconds'):
+                lines.append('%s:%.3f|g' % ('.'.join(parts), value * 1000))
+            else:
+                lines.append('%s:%s|g' % ('.'.join(parts), value))
+        return lines
+
+    def publish(self, samples):
+        for packet in self._batch(self.format(samples)):
+            self._socket.sendto(packet, self.address)
+
+    def _batch(self, lines):
+        packets = []
+        packet = ''
+        for line in lines:
+            if packet and len(packet) + 1 + len(line) > self.max_packet_size:
+                packets.append(packet)
+                packet = ''
+            packet = packet + '\n' + line if packet else line
+        if packet:
+            packets.append(packet)
+        return packets
+
+    def stop(self):
+        Exporter.stop(self)
+        self._socket.close()
+
+
+def _stat_part(value):
+    value = str(value)
+    for char in '.:|@ ':
+        value = value.replace(char, '_')
+    return value
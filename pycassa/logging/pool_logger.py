@@ -10,6 +10,9 @@ class PoolLogger(object):
     def name_changed(self, new_logger):
         self.logger = new_logger
 
+    def debug_enabled(self):
+        return self.logger.isEnabledFor(logging.DEBUG)
+
     def connection_created(self, dic):
         level = pycassa_logger.levels[dic.get('level', 'info')]
         conn = dic.get('connection')
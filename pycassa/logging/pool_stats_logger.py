@@ -42,7 +42,14 @@ class StatsLogger(object):
          'failed': 1,
          'list': 0,
          'opened': {'current': 2, 'max': 2},
-         'recycled': 0}
+         'recycled': 0,
+         'traffic_classes': {}}
+
+    If the pool has traffic classes, ``stats['traffic_classes']`` holds
+    the checkouts, checkins and failed checkouts for each of them::
+
+        {'batch': {'at_max': 3, 'checked_in': 250, 'checked_out': 251},
+         'interactive': {'at_max': 0, 'checked_in': 150, 'checked_out': 152}}
 
 
     Get your stats as ``stats_logger.stats`` and push them to your metrics
@@ -75,9 +82,20 @@ class StatsLogger(object):
             'recycled': 0,
             'failed': 0,
             'list': 0,
-            'at_max': 0
+            'at_max': 0,
+            'traffic_classes': {}
         }
 
+    def _class_stats(self, dic):
+        name = dic.get('traffic_class')
+        if name is None:
+            return None
+        stats = self._stats['traffic_classes'].get(name)
+        if stats is None:
+            stats = self._stats['traffic_classes'][name] = \
+                    {'checked_out': 0, 'checked_in': 0, 'at_max': 0}
+        return stats
+
 
     def name_changed(self, new_logger):
         self.logger = new_logger
@@ -94,11 +112,17 @@ class StatsLogger(object):
     def connection_checked_out(self, dic):
         self._stats['checked_out'] += 1
         self._update_opened(1)
+        class_stats = self._class_stats(dic)
+        if class_stats is not None:
+            class_stats['checked_out'] += 1
 
     @sync('lock')
     def connection_checked_in(self, dic):
         self._stats['checked_in'] += 1
         self._update_opened(-1)
+        class_stats = self._class_stats(dic)
+        if class_stats is not None:
+            class_stats['checked_in'] += 1
 
     def _update_opened(self, value):
         self._stats['opened']['current'] += value
@@ -132,6 +156,9 @@ class StatsLogger(object):
     @sync('lock')
     def pool_at_max(self, dic):
         self._stats['at_max'] += 1
+        class_stats = self._class_stats(dic)
+        if class_stats is not None:
+            class_stats['at_max'] += 1
 
     @property
     def stats(self):
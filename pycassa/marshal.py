@@ -5,6 +5,7 @@ in Cassandra.
 
 import uuid
 import struct
+from binascii import hexlify, unhexlify
 import calendar
 from datetime import datetime
 from decimal import Decimal
@@ -24,6 +25,12 @@ _long_packer = make_packer('>q')
 _int_packer = make_packer('>i')
 _short_packer = make_packer('>H')
 
+# Encoded widths of the types whose values are always the same size
+_FIXED_WIDTHS = {'LongType': 8, 'Int32Type': 4, 'DoubleType': 8,
+                 'FloatType': 4, 'BooleanType': 1, 'DateType': 8,
+                 'TimestampType': 8, 'UUIDType': 16, 'TimeUUIDType': 16,
+                 'LexicalUUIDType': 16}
+
 _BASIC_TYPES = ('BytesType', 'LongType', 'IntegerType', 'UTF8Type',
                 'AsciiType', 'LexicalUUIDType', 'TimeUUIDType',
                 'CounterColumnType', 'FloatType', 'DoubleType',
@@ -91,7 +98,7 @@ def get_composite_packer(typestr=None, composite_type=None):
 
     def pack_composite(items, slice_start=None):
         last_index = len(items) - 1
-        s = ''
+        parts = []
         for i, (item, packer) in enumerate(zip(items, packers)):
             eoc = '\x00'
             if isinstance(item, tuple):
@@ -113,8 +120,10 @@ def get_composite_packer(typestr=None, composite_type=None):
                     eoc = '\x01'
 
             packed = packer(item)
-            s += ''.join((len_packer(len(packed)), packed, eoc))
-        return s
+            parts.append(len_packer(len(packed)))
+            parts.append(packed)
+            parts.append(eoc)
+        return ''.join(parts)
 
     return pack_composite
 
@@ -122,38 +131,57 @@ def get_composite_unpacker(typestr=None, composite_type=None):
     assert (typestr or composite_type), "Must provide typestr or " + \
             "CompositeType instance"
     if typestr:
-        unpackers = map(unpacker_for, _get_inner_types(typestr))
+        type_names = map(_normalize_type, _get_inner_types(typestr))
+        unpackers = map(unpacker_for, type_names)
     elif composite_type:
+        type_names = [c.__class__.__name__ for c in composite_type.components]
         unpackers = [c.unpack for c in composite_type.components]
 
-    len_unpacker = lambda v: _short_packer.unpack(v)[0]
+    # If every component is a fixed width type with the standard unpacker,
+    # a complete name can be split up with a single struct call.
+    widths = tuple(_FIXED_WIDTHS.get(name) for name in type_names)
+    if None not in widths and \
+            all(u is unpacker_for(name) for u, name in zip(unpackers, type_names)):
+        fixed_struct = make_packer('>' + ''.join('H%dsx' % w for w in widths))
+    else:
+        fixed_struct = None
+
+    len_unpacker = _short_packer.unpack_from
 
     def unpack_composite(bytestr):
         # The composite format for each component is:
         #   <len>   <value>   <eoc>
         # 2 bytes | ? bytes | 1 byte
+        end = len(bytestr)
+        if fixed_struct is not None and end == fixed_struct.size:
+            values = fixed_struct.unpack(bytestr)
+            if values[::2] == widths:
+                return tuple([u(v) for u, v in zip(unpackers, values[1::2])])
+
         components = []
         i = iter(unpackers)
-        while bytestr:
+        offset = 0
+        while offset < end:
             unpacker = i.next()
-            length = len_unpacker(bytestr[:2])
-            components.append(unpacker(bytestr[2:2 + length]))
-            bytestr = bytestr[3 + length:]
+            length = len_unpacker(bytestr, offset)[0]
+            offset += 2
+            components.append(unpacker(bytestr[offset:offset + length]))
+            offset += length + 1
         return tuple(components)
 
     return unpack_composite
 
 def get_dynamic_composite_packer(typestr):
-    cassandra_types = {}
+    alias_packers = {}
     for inner_type in _get_inner_types(typestr):
         alias, cassandra_type = inner_type.split('=>')
-        cassandra_types[alias] = cassandra_type
+        alias_packers[alias] = packer_for(cassandra_type)
 
     len_packer = _short_packer.pack
 
     def pack_dynamic_composite(items, slice_start=None):
         last_index = len(items) - 1
-        s = ''
+        parts = []
         i = 0
         for (alias, item) in items:
             eoc = '\x00'
@@ -177,7 +205,7 @@ def get_dynamic_composite_packer(typestr):
                     eoc = '\x01'
             if isinstance(alias, str) and len(alias) == 1:
                 header = '\x80' + alias
-                packer = packer_for(cassandra_types[alias])
+                packer = alias_packers[alias]
             else:
                 cassandra_type = str(alias).split('(')[0]
                 header = len_packer(len(cassandra_type)) + cassandra_type
@@ -185,18 +213,21 @@ def get_dynamic_composite_packer(typestr):
             i += 1
 
             packed = packer(item)
-            s += ''.join((header, len_packer(len(packed)), packed, eoc))
-        return s
+            parts.append(header)
+            parts.append(len_packer(len(packed)))
+            parts.append(packed)
+            parts.append(eoc)
+        return ''.join(parts)
 
     return pack_dynamic_composite
 
 def get_dynamic_composite_unpacker(typestr):
-    cassandra_types = {}
+    alias_unpackers = {}
     for inner_type in _get_inner_types(typestr):
         alias, cassandra_type = inner_type.split('=>')
-        cassandra_types[alias] = cassandra_type
+        alias_unpackers[alias] = unpacker_for(cassandra_type)
 
-    len_unpacker = lambda v: _short_packer.unpack(v)[0]
+    len_unpacker = _short_packer.unpack_from
 
     def unpack_dynamic_composite(bytestr):
         # The composite format for each component is:
@@ -204,26 +235,88 @@ def get_dynamic_composite_unpacker(typestr):
         # ? bytes  |  2 bytes  |  ? bytes  |  1 byte
         types = []
         components = []
-        while bytestr:
-            header = len_unpacker(bytestr[:2])
+        end = len(bytestr)
+        offset = 0
+        while offset < end:
+            header = len_unpacker(bytestr, offset)[0]
             if header & 0x8000:
-                alias = bytestr[1]
+                alias = bytestr[offset + 1]
                 types.append(alias)
-                unpacker = unpacker_for(cassandra_types[alias])
-                bytestr = bytestr[2:]
+                unpacker = alias_unpackers[alias]
+                offset += 2
             else:
-                cassandra_type = bytestr[2:2 + header]
+                offset += 2
+                cassandra_type = bytestr[offset:offset + header]
                 types.append(cassandra_type)
                 unpacker = unpacker_for(cassandra_type)
-                bytestr = bytestr[2 + header:]
-            length = len_unpacker(bytestr[:2])
-            components.append(unpacker(bytestr[2:2 + length]))
-            bytestr = bytestr[3 + length:]
+                offset += header
+            length = len_unpacker(bytestr, offset)[0]
+            offset += 2
+            components.append(unpacker(bytestr[offset:offset + length]))
+            offset += length + 1
         return tuple(zip(types, components))
 
     return unpack_dynamic_composite
 
+_packer_cache = {}
+_unpacker_cache = {}
+
+def _normalize_type(typestr):
+    """ Given a str like 'org.apache...ReversedType(org.apache...LongType)',
+    return the canonical cache key for it, like 'LongType' """
+    if typestr is None:
+        return None
+
+    if "DynamicCompositeType" in typestr:
+        aliases = []
+        for inner_type in _get_inner_types(typestr):
+            alias, cassandra_type = inner_type.split('=>')
+            aliases.append(alias.strip() + '=>' + _normalize_type(cassandra_type))
+        return "DynamicCompositeType(" + ",".join(aliases) + ")"
+
+    if "CompositeType" in typestr:
+        types = map(_normalize_type, _get_inner_types(typestr))
+        return "CompositeType(" + ",".join(types) + ")"
+
+    if "ReversedType" in typestr:
+        return _normalize_type(_get_inner_type(typestr))
+
+    return extract_type_name(typestr.strip())
+
+def clear_codec_cache():
+    """ Empties the process-wide packer and unpacker caches. """
+    _packer_cache.clear()
+    _unpacker_cache.clear()
+
 def packer_for(typestr):
+    try:
+        return _packer_cache[typestr]
+    except KeyError:
+        pass
+
+    key = _normalize_type(typestr)
+    packer = _packer_cache.get(key)
+    if packer is None:
+        packer = _make_packer(key)
+        _packer_cache[key] = packer
+    _packer_cache[typestr] = packer
+    return packer
+
+def unpacker_for(typestr):
+    try:
+        return _unpacker_cache[typestr]
+    except KeyError:
+        pass
+
+    key = _normalize_type(typestr)
+    unpacker = _unpacker_cache.get(key)
+    if unpacker is None:
+        unpacker = _make_unpacker(key)
+        _unpacker_cache[key] = unpacker
+    _unpacker_cache[typestr] = unpacker
+    return unpacker
+
+def _make_packer(typestr):
     if typestr is None:
         return lambda v: v
 
@@ -233,9 +326,6 @@ def packer_for(typestr):
     if "CompositeType" in typestr:
         return get_composite_packer(typestr)
 
-    if "ReversedType" in typestr:
-        return packer_for(_get_inner_type(typestr))
-
     data_type = extract_type_name(typestr)
 
     if data_type in ('DateType', 'TimestampType'):
@@ -293,6 +383,9 @@ def packer_for(typestr):
 
     elif 'UUIDType' in data_type:
         def pack_uuid(value, slice_start=None):
+            if isinstance(value, str) and len(value) == 16:
+                # already packed, e.g. by util.TimeUUIDGenerator
+                return value
             if slice_start is None:
                 value = util.convert_time_to_uuid(value,
                         randomize=True)
@@ -320,7 +413,7 @@ def packer_for(typestr):
             return v
         return pack_bytes
 
-def unpacker_for(typestr):
+def _make_unpacker(typestr):
     if typestr is None:
         return lambda v: v
 
@@ -330,9 +423,6 @@ def unpacker_for(typestr):
     if "CompositeType" in typestr:
         return get_composite_unpacker(typestr)
 
-    if "ReversedType" in typestr:
-        return unpacker_for(_get_inner_type(typestr))
-
     data_type = extract_type_name(typestr)
 
     if data_type == 'BytesType':
@@ -376,31 +466,49 @@ def unpacker_for(typestr):
     else:
         return lambda v: v
 
+# Single byte encodings of -128 to 127, and the reverse mapping
+_small_int_bytes = dict((i, chr(i & 0xff)) for i in xrange(-128, 128))
+_small_int_values = dict((b, i) for i, b in _small_int_bytes.iteritems())
+
+# Struct codecs for the encoded lengths that have one
+_sized_int_packers = {2: make_packer('>h'), 4: make_packer('>i'),
+                      8: make_packer('>q')}
+
 def encode_int(x, *args):
-    if x >= 0:
-        out = []
-        while x >= 256:
-            out.append(struct.pack('B', 0xff & x))
-            x >>= 8
-        out.append(struct.pack('B', 0xff & x))
-        if x > 127:
-            out.append('\x00')
-    else:
-        x = -1 - x
-        out = []
-        while x >= 256:
-            out.append(struct.pack('B', 0xff & ~x))
-            x >>= 8
-        if x <= 127:
-            out.append(struct.pack('B', 0xff & ~x))
-        else:
-            out.append(struct.pack('>H', 0xffff & ~x))
-
-    return ''.join(reversed(out))
+    small = _small_int_bytes.get(x)
+    if small is not None:
+        return small
+
+    # The shortest two's complement encoding needs one bit more than the
+    # magnitude for the sign: a byte more when the magnitude's top bit is
+    # set. Counted in hex digits, as Python 2.6 has no int.bit_length()
+    digits = '%x' % (x if x >= 0 else ~x)
+    length = (len(digits) + (2 if digits[0] >= '8' else 1)) >> 1
+
+    packer = _sized_int_packers.get(length)
+    if packer is not None:
+        return packer.pack(x)
+    return unhexlify('%0*x' % (length * 2, x & ((1 << (length * 8)) - 1)))
 
 def decode_int(term, *args):
+    length = len(term)
+    if length == 1:
+        return _small_int_values[term]
+
+    packer = _sized_int_packers.get(length)
+    if packer is not None:
+        return packer.unpack(term)[0]
+
     if term != "":
-        val = int(term.encode('hex'), 16)
+        val = int(hexlify(term), 16)
         if (ord(term[0]) & 128) != 0:
-            val = val - (1 << (len(term) * 8))
+            val = val - (1 << (length * 8))
         return val
+
+def encode_ints(values):
+    """ Encodes each integer in `values` as an IntegerType value. """
+    return [encode_int(x) for x in values]
+
+def decode_ints(terms):
+    """ Decodes each IntegerType value in `terms`. """
+    return [decode_int(term) for term in terms]
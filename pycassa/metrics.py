@@ -0,0 +1,244 @@
+"""
+Latency histograms and throughput counters for operations.
+
+Instrumentation is off by default. It is turned on for a pool by setting
+its :attr:`~.ConnectionPool.metrics` to a :class:`Metrics` object, which
+may be shared by several pools:
+
+.. code-block:: python
+
+    >>> metrics = Metrics()
+    >>> pool = ConnectionPool('Keyspace1', metrics=metrics)
+    >>> ...
+    >>> snapshot = metrics.snapshot(reset=True)
+    >>> snapshot['methods']['multiget_slice']['latency']['p99']
+    0.0123
+
+Every attempt at an operation, including retries, is recorded three
+times: by Thrift method, by column family and by server. Each record
+holds the number of attempts and failures, the bytes sent and received,
+and a histogram of latencies. The time spent waiting to check a
+connection out of the pool is recorded separately.
+
+While :attr:`~.ConnectionPool.metrics` is ``None``, the only cost is
+checking that it is ``None``.
+
+.. versionadded:: 1.12.0
+"""
+
+import math
+import threading
+
+__all__ = ['LatencyHistogram', 'OperationStats', 'Metrics']
+
+
+class LatencyHistogram(object):
+    """
+    A histogram of durations in seconds with logarithmically sized buckets,
+    so that percentiles are accurate to within a few percent from
+    microseconds to minutes while using a fixed amount of memory.
+
+    Histograms are not thread-safe; :class:`Metrics` serializes access
+    to the ones it holds.
+    """
+
+    min_value = 1e-6
+    """ Durations shorter than this many seconds share the first bucket. """
+
+    buckets_per_doubling = 8
+    """
+    The number of buckets for each doubling of duration, which bounds
+    the relative error of percentiles to about 4%.
+    """
+
+    num_buckets = 256
+    """ The number of buckets, which covers up to about 4000 seconds. """
+
+    def __init__(self):
+        self._scale = self.buckets_per_doubling / math.log(2)
+        self._growth = 2 ** (1.0 / self.buckets_per_doubling)
+        self.reset()
+
+    def reset(self):
+        """ Removes all recorded durations. """
+        self.counts = [0] * self.num_buckets
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        """ Records a duration of `value` seconds. """
+        if value > self.min_value:
+            index = int(math.log(value / self.min_value) * self._scale)
+            if index >= self.num_buckets:
+                index = self.num_buckets - 1
+        else:
+            index = 0
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """
+        Returns the duration that `percent` percent of the recorded
+        durations are shorter than, or ``None`` if nothing was recorded.
+        """
+        if not self.count:
+            return None
+        rank = self.count * percent / 100.0
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                # the geometric middle of the bucket, but never more
+                # than the longest duration seen
+                value = self.min_value * self._growth ** (index + 0.5)
+                return min(value, self.max)
+        return self.max
+
+    def merge(self, other):
+        """ Adds the durations recorded by `other` to this histogram. """
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def summary(self, percentiles=(50, 90, 99, 99.9)):
+        """
+        Returns a dictionary with the `count`, `mean` and `max` of the
+        recorded durations and a ``pNN`` entry for each of `percentiles`,
+        such as ``p50`` and ``p999`` for the 99.9th percentile.
+        """
+        summary = {'count': self.count,
+                   'mean': self.total / self.count if self.count else None,
+                   'max': self.max if self.count else None}
+        for percent in percentiles:
+            summary[_percentile_name(percent)] = self.percentile(percent)
+        return summary
+
+
+def _percentile_name(percent):
+    return 'p' + ('%g' % percent).replace('.', '')
+
+
+class OperationStats(object):
+    """ Counters and a :class:`LatencyHistogram` for one kind of operation. """
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.reset()
+
+    def reset(self):
+        self.latency.reset()
+        self.failures = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def record(self, latency, bytes_sent, bytes_received, failed):
+        self.latency.record(latency)
+        if failed:
+            self.failures += 1
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+
+    def summary(self, percentiles):
+        return {'count': self.latency.count,
+                'failures': self.failures,
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+                'latency': self.latency.summary(percentiles)}
+
+
+class Metrics(object):
+    """
+    Collects :class:`OperationStats` by Thrift method, column family and
+    server, and a :class:`LatencyHistogram` of checkout waits. This is
+    thread-safe.
+
+    `percentiles` are the percentiles included in snapshots.
+    """
+
+    def __init__(self, percentiles=(50, 90, 99, 99.9)):
+        self.percentiles = percentiles
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """ Discards everything recorded so far. """
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._methods = {}
+        self._column_families = {}
+        self._servers = {}
+        self._checkout_wait = LatencyHistogram()
+
+    def record_operation(self, method, column_family, server, latency,
+                         bytes_sent=0, bytes_received=0, failure=None):
+        """
+        Records one attempt at calling the Thrift method `method` that took
+        `latency` seconds. `column_family` may be ``None`` if the attempt
+        was not made on behalf of a single column family. `failure` is the
+        exception the attempt failed with, if any.
+        """
+        failed = failure is not None
+        with self._lock:
+            stats = self._methods.get(method)
+            if stats is None:
+                stats = self._methods[method] = OperationStats()
+            stats.record(latency, bytes_sent, bytes_received, failed)
+
+            if column_family is not None:
+                stats = self._column_families.get(column_family)
+                if stats is None:
+                    stats = self._column_families[column_family] = OperationStats()
+                stats.record(latency, bytes_sent, bytes_received, failed)
+
+            stats = self._servers.get(server)
+            if stats is None:
+                stats = self._servers[server] = OperationStats()
+            stats.record(latency, bytes_sent, bytes_received, failed)
+
+    def record_checkout(self, wait):
+        """ Records that checking out a connection took `wait` seconds. """
+        with self._lock:
+            self._checkout_wait.record(wait)
+
+    def snapshot(self, reset=False):
+        """
+        Returns everything recorded so far as a dictionary of the form::
+
+            {'methods': {method: stats},
+             'column_families': {column_family: stats},
+             'servers': {server: stats},
+             'checkout_wait': latency}
+
+        where each `stats` is a dictionary with the ``count`` of attempts,
+        ``failures``, ``bytes_sent``, ``bytes_received`` and ``latency``,
+        and each `latency` is a summary from
+        :meth:`LatencyHistogram.summary()`.
+
+        If `reset` is ``True``, the recorded data is discarded in the same
+        step, so that no operation is missed or counted twice between
+        successive snapshots.
+        """
+        with self._lock:
+            percentiles = self.percentiles
+            snapshot = {
+                'methods': _summarize(self._methods, percentiles),
+                'column_families': _summarize(self._column_families, percentiles),
+                'servers': _summarize(self._servers, percentiles),
+                'checkout_wait': self._checkout_wait.summary(percentiles),
+            }
+            if reset:
+                self._clear()
+        return snapshot
+
+
+def _summarize(stats_by_name, percentiles):
+    return dict((name, stats.summary(percentiles))
+                for name, stats in stats_by_name.iteritems())
@@ -2,16 +2,11 @@
 
 from __future__ import with_statement
 
+import os
 import time
 import threading
 import random
 import socket
-import sys
-
-if 'gevent.monkey' in sys.modules:
-    from gevent import queue as Queue
-else:
-    import Queue  # noqa
 
 from thrift import Thrift
 from thrift.transport.TTransport import TTransportException
@@ -20,11 +15,48 @@ from connection import (Connection, default_socket_factory,
 from logging.pool_logger import PoolLogger
 from util import as_interface
 from cassandra.ttypes import TimedOutException, UnavailableException
+from retry import RetryPolicy
+
+# Returned instead of a connection when waiting for one times out
+_EXHAUSTED = object()
+
+# Incremented whenever a SystemManager in this process changes the schema,
+# which lets pools notice without checking the schema versions
+_schema_generation = 0
+
+
+def _note_schema_change():
+    global _schema_generation
+    _schema_generation += 1
+
+# Serializes resetting pools in a child process, in case several of its
+# threads notice the fork at once
+_fork_lock = threading.Lock()
+
 
-_BASE_BACKOFF = 0.01
+def _acquire_throttles(throttles, deadline):
+    """
+    Acquires each of `throttles` in turn, releasing the ones already
+    acquired if one fails, and returns the list of acquired throttles.
+    """
+    acquired = []
+    try:
+        for throttle in throttles:
+            throttle.acquire(deadline)
+            acquired.append(throttle)
+    except:
+        _release_throttles(acquired)
+        raise
+    return acquired
+
+
+def _release_throttles(acquired):
+    """ Releases throttles that were acquired for an attempt that never started. """
+    for throttle in acquired:
+        throttle.release(0, 0, None)
 
 __all__ = ['QueuePool', 'ConnectionPool', 'PoolListener',
-           'ConnectionWrapper', 'AllServersUnavailable',
+           'ConnectionWrapper', 'TrafficClass', 'AllServersUnavailable',
            'MaximumRetryException', 'NoConnectionAvailable',
            'InvalidRequestError']
 
@@ -45,6 +77,9 @@ class ConnectionWrapper(Connection):
     _CHECKED_OUT = 1
     _DISPOSED = 2
 
+    # The name of the traffic class the connection is checked out for
+    _traffic_class = None
+
     def __init__(self, pool, max_retries, *args, **kwargs):
         self._pool = pool
         self._retry_count = 0
@@ -53,6 +88,7 @@ class ConnectionWrapper(Connection):
         self.starttime = time.time()
         self.operation_count = 0
         self._state = ConnectionWrapper._CHECKED_OUT
+        self._pid = pool._pid
         Connection.__init__(self, *args, **kwargs)
         self._pool._notify_on_connect(self)
 
@@ -106,55 +142,157 @@ class ConnectionWrapper(Connection):
         """
         self.server = new_conn_wrapper.server
         self.transport = new_conn_wrapper.transport
+        self._socket = new_conn_wrapper._socket
         self._iprot = new_conn_wrapper._iprot
         self._oprot = new_conn_wrapper._oprot
         self.info = new_conn_wrapper.info
         self.starttime = new_conn_wrapper.starttime
         self.operation_count = new_conn_wrapper.operation_count
+        self._pid = new_conn_wrapper._pid
+        self._traffic_class = new_conn_wrapper._traffic_class
         self._state = ConnectionWrapper._CHECKED_OUT
         self._should_fail = new_conn_wrapper._should_fail
 
     @classmethod
     def _retry(cls, f):
+        # The Thrift method, as reported in metrics
+        method = f.__name__
+        if method.endswith('_decoded'):
+            method = method[:-len('_decoded')]
+
         def new_f(self, *args, **kwargs):
-            self.operation_count += 1
-            self.info['request'] = {'method': f.__name__, 'args': args, 'kwargs': kwargs}
+            allow_retries = kwargs.pop('allow_retries', True)
+            policy = kwargs.pop('retry_policy', None) or self._pool.retry_policy
+            deadline = kwargs.pop('deadline', None)
+            throttles = kwargs.pop('throttles', None)
+            if throttles is None:
+                throttles = self._pool.throttles
+            # Throttles that the caller waited on before checking out
+            # this connection, for the first attempt
+            acquired = kwargs.pop('acquired_throttles', None)
+            column_family = kwargs.pop('column_family', None)
+            slow_log = self._pool.slow_log
+            trace = None
+            if slow_log is not None:
+                trace = slow_log.trace()
+            measure = bool(throttles) or trace is not None or \
+                    self._pool.metrics is not None
+            request = {'method': f.__name__, 'args': args, 'kwargs': kwargs}
+            self.info['request'] = request
+            policy.started()
+
+            delay = 0
+            reset = False
+            failure = None
             try:
-                allow_retries = kwargs.pop('allow_retries', True)
-                if kwargs.pop('reset', False):
-                    self._pool._replace_wrapper() # puts a new wrapper in the queue
-                    self._replace(self._pool.get()) # swaps out transport
-                result = f(self, *args, **kwargs)
-                self._retry_count = 0 # reset the count after a success
-                return result
-            except Thrift.TApplicationException:
-                self.close()
-                self._pool._decrement_overflow()
-                self._pool._clear_current()
+                while True:
+                    self.operation_count += 1
+                    attempt = None
+                    try:
+                        if reset:
+                            self._pool._replace_wrapper() # puts a new wrapper in the queue
+                            # Wait on the throttles before taking a connection,
+                            # so that it is not held while waiting
+                            if throttles:
+                                acquired = _acquire_throttles(throttles, deadline)
+                            # swaps out transport
+                            self._replace(self._pool.get(deadline, self._traffic_class))
+                            # which replaces our info as well
+                            self.info['request'] = request
+                        if measure:
+                            attempt = self._start_attempt(throttles, deadline, acquired)
+                            acquired = None
+                        if deadline is not None:
+                            self.set_timeout(deadline.socket_timeout(self._pool.timeout))
+                        result = f(self, *args, **kwargs)
+                        self._retry_count = 0 # reset the count after a success
+                        return result
+                    except Thrift.TApplicationException, exc:
+                        if attempt is not None:
+                            self._end_attempt(attempt, method, column_family, exc, trace)
+                            attempt = None
+                        self.close()
+                        self._pool._decrement_overflow(self._traffic_class)
+                        self._pool._clear_current()
+                        raise
+                    except (TimedOutException, UnavailableException,
+                            TTransportException,
+                            socket.error, IOError, EOFError), exc:
+                        if attempt is not None:
+                            self._end_attempt(attempt, method, column_family, exc, trace)
+                            attempt = None
+                        if acquired:
+                            # no connection to attempt with was found
+                            _release_throttles(acquired)
+                            acquired = None
+                        self._pool._notify_on_failure(exc, server=self.server, connection=self)
+
+                        self.close()
+                        self._pool._decrement_overflow(self._traffic_class)
+                        self._pool._clear_current()
+
+                        self._retry_count += 1
+                        if deadline is not None and deadline.expired():
+                            raise deadline.exceeded(exc)
+                        max_retries = policy.max_retries
+                        if max_retries is None:
+                            max_retries = self.max_retries
+                        if allow_retries and (max_retries == -1 or self._retry_count <= max_retries):
+                            delay = policy.retry_delay(exc, self._retry_count, delay)
+                        else:
+                            delay = None
+                        if delay is None:
+                            raise MaximumRetryException('Retried %d times. Last failure was %s: %s' %
+                                                        (self._retry_count, exc.__class__.__name__, exc))
+                        if delay > 0:
+                            if deadline is not None and delay >= deadline.remaining():
+                                raise deadline.exceeded(exc)
+                            if trace is not None:
+                                trace.backoff += delay
+                            time.sleep(delay)
+                        reset = True
+                    finally:
+                        if attempt is not None:
+                            self._end_attempt(attempt, method, column_family, None, trace)
+                        if deadline is not None:
+                            self.set_timeout(self._pool.timeout)
+            except Exception, failure:
                 raise
-            except (TimedOutException, UnavailableException,
-                    TTransportException,
-                    socket.error, IOError, EOFError), exc:
-                self._pool._notify_on_failure(exc, server=self.server, connection=self)
-
-                self.close()
-                self._pool._decrement_overflow()
-                self._pool._clear_current()
-
-                self._retry_count += 1
-                if (not allow_retries or
-                    (self.max_retries != -1 and self._retry_count > self.max_retries)):
-                    raise MaximumRetryException('Retried %d times. Last failure was %s: %s' %
-                                                (self._retry_count, exc.__class__.__name__, exc))
-                # Exponential backoff
-                time.sleep(_BASE_BACKOFF * (2 ** self._retry_count))
-
-                kwargs['reset'] = True
-                return new_f(self, *args, **kwargs)
+            finally:
+                if acquired:
+                    _release_throttles(acquired)
+                if trace is not None:
+                    slow_log.finish(trace, method, column_family, args, failure)
 
         new_f.__name__ = f.__name__
         return new_f
 
+    def _start_attempt(self, throttles, deadline, acquired=None):
+        """
+        Acquires `throttles`, unless they were `acquired` already, and notes
+        what :meth:`_end_attempt()` needs to measure the attempt that follows.
+        """
+        if acquired is None:
+            acquired = _acquire_throttles(throttles, deadline)
+        transport = self.transport
+        return (acquired, time.time(), getattr(transport, 'bytes_sent', 0),
+                getattr(transport, 'bytes_received', 0))
+
+    def _end_attempt(self, attempt, method, column_family, failure, trace):
+        acquired, start, sent, received = attempt
+        latency = time.time() - start
+        transport = self.transport
+        sent = getattr(transport, 'bytes_sent', 0) - sent
+        received = getattr(transport, 'bytes_received', 0) - received
+        for throttle in acquired:
+            throttle.release(latency, sent + received, failure)
+        metrics = self._pool.metrics
+        if metrics is not None:
+            metrics.record_operation(method, column_family, self.server, latency,
+                                     sent, received, failure)
+        if trace is not None:
+            trace.attempts.append((self.server, latency, sent, received, failure))
+
     def _fail_once(self, *args, **kwargs):
         if self._should_fail:
             self._should_fail = False
@@ -193,11 +331,41 @@ class ConnectionWrapper(Connection):
 retryable = ('get', 'get_slice', 'multiget_slice', 'get_count', 'multiget_count',
              'get_range_slices', 'get_indexed_slices', 'batch_mutate', 'add',
              'insert', 'remove', 'remove_counter', 'truncate', 'describe_keyspace',
-             'atomic_batch_mutate')
+             'atomic_batch_mutate', 'get_slice_decoded', 'multiget_slice_decoded',
+             'get_range_slices_decoded', 'get_indexed_slices_decoded')
 for fname in retryable:
     new_f = ConnectionWrapper._retry(getattr(Connection, fname))
     setattr(ConnectionWrapper, fname, new_f)
 
+class TrafficClass(object):
+    """
+    A named class of requests, such as interactive requests or background
+    jobs, that share a :class:`ConnectionPool` with other classes.
+
+    `reserved` connections are held back for this class: other classes
+    may not check out a connection if that would leave fewer than
+    `reserved` connections for this class, counting the ones it already
+    has checked out. If `limit` is set, this class may not have more than
+    `limit` connections checked out at once; limits may be used to give
+    each class a share of the pool.
+
+    When threads have to wait for a connection, those waiting for a class
+    with a higher `priority` are served first.
+
+    .. versionadded:: 1.12.0
+    """
+
+    def __init__(self, name, reserved=0, limit=None, priority=0):
+        self.name = name
+        self.reserved = reserved
+        self.limit = limit
+        self.priority = priority
+
+    def __repr__(self):
+        return "TrafficClass(%r, reserved=%d, limit=%r, priority=%d)" % (
+                self.name, self.reserved, self.limit, self.priority)
+
+
 class ConnectionPool(object):
     """A pool that maintains a queue of open connections."""
 
@@ -245,6 +413,54 @@ class ConnectionPool(object):
     Setting this to 0 disables retries and setting to -1 allows unlimited retries.
     The default value is 5. """
 
+    retry_policy = None
+    """ The :class:`~pycassa.retry.RetryPolicy` that decides whether failed
+    operations are retried and how long to wait before each retry. It may
+    be overridden for a column family with :attr:`.ColumnFamily.retry_policy`.
+    By default, a :class:`~pycassa.retry.RetryPolicy` with default settings is
+    used, which allows up to :attr:`max_retries` retries.
+
+    .. versionadded:: 1.12.0
+    """
+
+    metrics = None
+    """ A :class:`~pycassa.metrics.Metrics` object that records latency
+    histograms and byte counts for every attempt at an operation and the
+    time spent waiting for connections. If this is ``None``, nothing is
+    recorded. By default, this is ``None``.
+
+    .. versionadded:: 1.12.0
+    """
+
+    slow_log = None
+    """ A :class:`~pycassa.slowlog.SlowOperationLog` that describes every
+    operation which takes longer than its threshold, including retries
+    and the time spent waiting for replacement connections. By default,
+    this is ``None``.
+
+    .. versionadded:: 1.12.0
+    """
+
+    throttles = ()
+    """ A list of :class:`~pycassa.throttle.Throttle` objects, such as a
+    :class:`~pycassa.throttle.RateLimiter` or an
+    :class:`~pycassa.throttle.AdaptiveConcurrencyLimiter`, that every attempt
+    at an operation, including retries, must pass through. It may be
+    overridden for a column family with :attr:`.ColumnFamily.throttles`.
+    By default, this is empty.
+
+    .. versionadded:: 1.12.0
+    """
+
+    default_traffic_class = 'default'
+    """ The name of the :class:`TrafficClass` that connections are checked
+    out for when no class is requested. If the pool has traffic classes and
+    none of them has this name, an unreserved class with the lowest priority
+    is added for it. The default value is ``'default'``.
+
+    .. versionadded:: 1.12.0
+    """
+
     logging_name = None
     """ By default, each pool identifies itself in the logs using ``id(self)``.
     If multiple pools are in use for different purposes, setting `logging_name` will
@@ -267,6 +483,18 @@ class ConnectionPool(object):
     By default, this is function is :func:`~connection.default_transport_factory`.
     """
 
+    schema_check_interval = 10
+    """ The pool caches the description of its keyspace that column families
+    load their schema from; see :meth:`get_keyspace_description()`. While the
+    cache is in use, the cluster's schema versions are checked at most once
+    every `schema_check_interval` seconds, and the description is fetched
+    again if they have changed. This may be set to 0 to check the schema
+    versions every time the cache is used or to -1 to only refresh the
+    cache on demand. The default value is 10.
+
+    .. versionadded:: 1.12.0
+    """
+
     def __init__(self, keyspace,
                  server_list=['localhost:9160'],
                  credentials=None,
@@ -319,6 +547,27 @@ class ConnectionPool(object):
         If `prefill` is set to ``True``, `pool_size` connections will be opened
         when the pool is created.
 
+        Requests of different kinds may be kept from crowding each other out
+        by passing a list of :class:`TrafficClass` objects as the
+        `traffic_classes` keyword argument. The class that connections
+        are checked out for may be chosen with :meth:`get()` and
+        :meth:`execute()`, :attr:`.ColumnFamily.traffic_class` or
+        :class:`~pycassa.batch.Mutator`; the :attr:`default_traffic_class`
+        is used otherwise:
+
+        .. code-block:: python
+
+            >>> pool = pycassa.ConnectionPool('Keyspace1', pool_size=10,
+            ...     traffic_classes=[TrafficClass('interactive', reserved=4, priority=1),
+            ...                      TrafficClass('batch', limit=6)],
+            ...     default_traffic_class='interactive')
+            >>> jobs_cf = pycassa.ColumnFamily(pool, 'Standard1', traffic_class='batch')
+
+        The pool notices when it is used in a process that was forked after
+        it was created. Connections inherited from the parent process are
+        abandoned, without being closed, and new connections are opened as
+        the child process needs them; see :ref:`using_with_multiprocessing`.
+
         Example Usage:
 
         .. code-block:: python
@@ -330,6 +579,7 @@ class ConnectionPool(object):
 
         """
 
+        self._pid = os.getpid()
         self._pool_threadlocal = use_threadlocal
         self.keyspace = keyspace
         self.credentials = credentials
@@ -340,15 +590,25 @@ class ConnectionPool(object):
             self._tlocal = threading.local()
 
         self._pool_size = pool_size
-        self._q = Queue.Queue(pool_size)
         self._pool_lock = threading.Lock()
+        self._set_traffic_classes(kwargs.get('traffic_classes', ()),
+                                  kwargs.get('default_traffic_class'))
+        self._init_idle()
         self._current_conns = 0
 
+        self._schema_lock = threading.Lock()
+        self._keyspace_description = None
+        self._schema_versions = None
+        self._schema_checked_at = 0
+        self._schema_generation = None
+
         # Listener groups
         self.listeners = []
         self._on_connect = []
         self._on_checkout = []
         self._on_checkin = []
+        # PoolLoggers, which only log checkouts and checkins at the debug level
+        self._checkout_loggers = []
         self._on_dispose = []
         self._on_recycle = []
         self._on_failure = []
@@ -370,11 +630,21 @@ class ConnectionPool(object):
         if "max_overflow" not in kwargs:
             self._set_max_overflow(0)
 
-        recognized_kwargs = ["pool_timeout", "recycle", "max_retries", "max_overflow"]
+        self.retry_policy = RetryPolicy()
+
+        recognized_kwargs = ["pool_timeout", "recycle", "max_retries", "max_overflow",
+                             "schema_check_interval", "retry_policy", "throttles",
+                             "metrics", "slow_log"]
         for kw in recognized_kwargs:
             if kw in kwargs:
                 setattr(self, kw, kwargs[kw])
 
+        reserved = sum(tclass.reserved for tclass in self._traffic_classes.values())
+        if reserved > self._max_conns:
+            raise InvalidRequestError("The traffic classes reserve %d connections, "
+                                      "but the pool may only open %d"
+                                      % (reserved, self._max_conns))
+
         self.set_server_list(server_list)
 
         self._prefill = prefill
@@ -437,12 +707,106 @@ class ConnectionPool(object):
 
         .. versionadded:: 1.2.0
         """
+        if self._pid != os.getpid():
+            self._after_fork()
         with self._pool_lock:
             while self._current_conns < self._pool_size:
                 conn = self._create_connection()
                 conn._checkin()
-                self._q.put(conn, False)
+                self._idle.append(conn)
                 self._current_conns += 1
+            if self._waiters:
+                self._idle_available.notifyAll()
+
+    def _init_idle(self):
+        # Checked in connections are kept in a stack so that the most
+        # recently used, warmest connections are handed out first.
+        # Both the stack and the connection count are guarded by
+        # _pool_lock, which threads waiting for a connection wait on.
+        self._idle = []
+        self._idle_available = threading.Condition(self._pool_lock)
+        self._waiters = 0
+        self._class_checkouts = dict.fromkeys(self._traffic_classes, 0)
+        self._class_waiters = dict.fromkeys(self._traffic_classes, 0)
+
+    def _set_traffic_classes(self, traffic_classes, default=None):
+        if default is not None:
+            self.default_traffic_class = default
+        self._traffic_classes = {}
+        for tclass in traffic_classes:
+            self._traffic_classes[tclass.name] = tclass
+        if self._traffic_classes and self.default_traffic_class not in self._traffic_classes:
+            lowest = min(tclass.priority for tclass in self._traffic_classes.values())
+            self._traffic_classes[self.default_traffic_class] = \
+                    TrafficClass(self.default_traffic_class, priority=lowest)
+        self._classes_by_priority = sorted(self._traffic_classes.values(),
+                                           key=lambda tclass: -tclass.priority)
+        self._reserving_classes = [tclass for tclass in self._classes_by_priority
+                                   if tclass.reserved]
+
+    def _get_traffic_class(self, name):
+        if name is None:
+            name = self.default_traffic_class
+        try:
+            return self._traffic_classes[name]
+        except KeyError:
+            raise InvalidRequestError("Unknown traffic class %r" % (name,))
+
+    def _may_take(self, tclass):
+        """
+        Whether a connection may be checked out for `tclass` right now.
+        Must be called with `_pool_lock` held.
+        """
+        idle = len(self._idle)
+        if not idle and self._current_conns >= self._max_conns:
+            return False
+
+        checkouts = self._class_checkouts
+        if tclass.limit is not None and checkouts[tclass.name] >= tclass.limit:
+            return False
+
+        # Leave enough connections for the unused reservations of other classes
+        held_back = 0
+        for other in self._reserving_classes:
+            if other is not tclass:
+                held_back += max(other.reserved - checkouts[other.name], 0)
+        if held_back and idle + self._max_conns - self._current_conns <= held_back:
+            return False
+
+        # Let waiting threads of classes with a higher priority go first
+        for other in self._classes_by_priority:
+            if other.priority <= tclass.priority:
+                break
+            if self._class_waiters[other.name] and \
+                    (other.limit is None or checkouts[other.name] < other.limit):
+                return False
+        return True
+
+    def _wake_waiters(self):
+        # Must be called with _pool_lock held. With traffic classes, the
+        # next waiter may not be one that is allowed to take a connection.
+        if self._traffic_classes:
+            self._idle_available.notifyAll()
+        else:
+            self._idle_available.notify()
+
+    def _after_fork(self):
+        with _fork_lock:
+            if self._pid == os.getpid():
+                return  # another thread got here first
+
+            # Everything inherited from the parent is replaced without
+            # being touched: the locks may have been held by threads that
+            # do not exist in this process, and the parent is still using
+            # the inherited connections. Dropping them only closes this
+            # process's copies of their sockets.
+            self._pool_lock = threading.Lock()
+            self._schema_lock = threading.Lock()
+            self._init_idle()
+            self._current_conns = 0
+            if self._pool_threadlocal:
+                self._tlocal = threading.local()
+            self._pid = os.getpid()
 
     def _get_new_wrapper(self, server):
         return ConnectionWrapper(self, self.max_retries,
@@ -454,17 +818,19 @@ class ConnectionPool(object):
 
     def _replace_wrapper(self):
         """Try to replace the connection."""
-        if not self._q.full():
+        if len(self._idle) < self._pool_size:
             conn = self._create_connection()
             conn._checkin()
 
-            try:
-                self._q.put(conn, False)
-            except Queue.Full:
-                conn._dispose_wrapper(reason="pool is already full")
-            else:
-                with self._pool_lock:
+            with self._pool_lock:
+                full = len(self._idle) >= self._pool_size
+                if not full:
+                    self._idle.append(conn)
                     self._current_conns += 1
+                    if self._waiters:
+                        self._wake_waiters()
+            if full:
+                conn._dispose_wrapper(reason="pool is already full")
 
     def _clear_current(self):
         """ If using threadlocal, clear our threadlocal current conn. """
@@ -473,6 +839,11 @@ class ConnectionPool(object):
 
     def put(self, conn):
         """ Returns a connection to the pool. """
+        if self._pid != os.getpid():
+            self._after_fork()
+        if conn._pid != self._pid:
+            return  # inherited from the parent process
+
         if not conn.transport.isOpen():
             return
 
@@ -487,108 +858,251 @@ class ConnectionPool(object):
             if conn._is_in_queue_or_disposed():
                 raise InvalidRequestError("Connection was already checked in or disposed")
 
+            tclass = conn._traffic_class
             if self.recycle > -1 and conn.operation_count > self.recycle:
                 new_conn = self._create_connection()
                 self._notify_on_recycle(conn, new_conn)
                 conn._dispose_wrapper(reason="recyling connection")
                 conn = new_conn
             conn._checkin()
-            self._notify_on_checkin(conn)
+            if self._on_checkin or self._checkout_loggers:
+                self._notify_on_checkin(conn, tclass)
 
-            try:
-                self._q.put_nowait(conn)
-            except Queue.Full:
+            with self._pool_lock:
+                full = len(self._idle) >= self._pool_size
+                if full:
+                    self._current_conns -= 1
+                else:
+                    self._idle.append(conn)
+                if tclass is not None:
+                    self._class_checkouts[tclass] -= 1
+                if self._waiters:
+                    self._wake_waiters()
+            if full:
                 conn._dispose_wrapper(reason="pool is already full")
-                self._decrement_overflow()
     return_conn = put
 
-    def _decrement_overflow(self):
+    def _decrement_overflow(self, traffic_class=None):
         with self._pool_lock:
             self._current_conns -= 1
+            if traffic_class is not None:
+                self._class_checkouts[traffic_class] -= 1
+            if self._waiters:
+                self._wake_waiters()
+
+    def get(self, deadline=None, traffic_class=None):
+        """
+        Gets a connection from the pool.
+
+        If `deadline`, a :class:`~pycassa.deadline.Deadline`, is given, a
+        :exc:`~pycassa.deadline.DeadlineExceeded` is raised if it passes
+        before a connection is available.
+
+        If the pool has traffic classes, the connection is checked out
+        for the one named `traffic_class`, or for the
+        :attr:`default_traffic_class` if this is ``None``.
+
+        .. versionchanged:: 1.12.0
+            The `deadline` and `traffic_class` parameters were added.
+        """
+        if self._pid != os.getpid():
+            self._after_fork()
+
+        if self._pool_threadlocal:
+            conn = getattr(self._tlocal, 'current', None)
+            if conn:
+                return conn
+
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.time()
+
+        tclass = None
+        if self._traffic_classes:
+            tclass = self._get_traffic_class(traffic_class)
 
-    def _new_if_required(self, max_conns, check_empty_queue=False):
-        """ Creates new connection if there is room """
         with self._pool_lock:
-            if (not check_empty_queue or self._q.empty()) and self._current_conns < max_conns:
-                new_conn = True
+            if tclass is not None and not self._may_take(tclass):
+                conn = self._wait_for_connection(deadline, tclass)
+            elif self._idle:
+                conn = self._idle.pop()
+            elif self._current_conns < self._max_conns:
+                # reserve room for a new connection
                 self._current_conns += 1
+                conn = None
             else:
-                new_conn = False
+                conn = self._wait_for_connection(deadline)
+            if tclass is not None and conn is not _EXHAUSTED:
+                self._class_checkouts[tclass.name] += 1
 
-        if new_conn:
+        if conn is None:
             try:
-                return self._create_connection()
+                conn = self._create_connection()
             except:
-                with self._pool_lock:
-                    self._current_conns -= 1
+                self._decrement_overflow(tclass and tclass.name)
                 raise
-        return None
-
-    def get(self):
-        """ Gets a connection from the pool. """
-        conn = None
-        if self._pool_threadlocal:
-            try:
-                if self._tlocal.current:
-                    conn = self._tlocal.current
-                if conn:
-                    return conn
-            except AttributeError:
-                pass
-
-        conn = self._new_if_required(self._pool_size)
-        if not conn:
-            # if queue is empty and max_overflow is not reached, create new conn
-            conn = self._new_if_required(self._max_conns, check_empty_queue=True)
-
-        if not conn:
-            # We will have to fetch from the queue, and maybe block
-            timeout = self.pool_timeout
-            if timeout == -1:
-                timeout = None
-
-            try:
-                conn = self._q.get(timeout=timeout)
-            except Queue.Empty:
-                self._notify_on_pool_max(pool_max=self._max_conns)
-                size_msg = "size %d" % (self._pool_size, )
-                if self._overflow_enabled:
-                    size_msg += "overflow %d" % (self._max_overflow)
-                message = "ConnectionPool limit of %s reached, unable to obtain connection after %d seconds" \
-                          % (size_msg, self.pool_timeout)
-                raise NoConnectionAvailable(message)
-            else:
-                conn._checkout()
+        elif conn is _EXHAUSTED:
+            self._notify_on_pool_max(self._max_conns, tclass and tclass.name)
+            if deadline is not None and deadline.expired():
+                raise deadline.exceeded()
+            size_msg = "size %d" % (self._pool_size, )
+            if self._overflow_enabled:
+                size_msg += "overflow %d" % (self._max_overflow)
+            if tclass is not None:
+                size_msg += " for traffic class %s" % (tclass.name,)
+            message = "ConnectionPool limit of %s reached, unable to obtain connection after %d seconds" \
+                      % (size_msg, self.pool_timeout)
+            raise NoConnectionAvailable(message)
+        else:
+            conn._checkout()
+        conn._traffic_class = tclass and tclass.name
+        if metrics is not None:
+            metrics.record_checkout(time.time() - start)
 
         if self._pool_threadlocal:
             self._tlocal.current = conn
-        self._notify_on_checkout(conn)
+        if self._on_checkout or self._checkout_loggers:
+            self._notify_on_checkout(conn)
         return conn
 
+    def _wait_for_connection(self, deadline=None, tclass=None):
+        """
+        Waits until a connection is checked in or room is made for a new
+        one, and, if `tclass` is given, until the traffic class may take it.
+        Must be called with `_pool_lock` held. Returns the connection,
+        ``None`` if room for a new connection was reserved, or `_EXHAUSTED`
+        after waiting for `pool_timeout` seconds or until `deadline`.
+        """
+        timeout = self.pool_timeout
+        if deadline is not None:
+            remaining = max(deadline.remaining(), 0)
+            if timeout == -1 or remaining < timeout:
+                timeout = remaining
+        if timeout != -1:
+            expires = time.time() + timeout
+        self._waiters += 1
+        if tclass is not None:
+            self._class_waiters[tclass.name] += 1
+        try:
+            while True:
+                if tclass is not None and not self._may_take(tclass):
+                    pass
+                elif self._idle:
+                    return self._idle.pop()
+                elif self._current_conns < self._max_conns:
+                    self._current_conns += 1
+                    return None
+
+                if timeout == -1:
+                    self._idle_available.wait()
+                else:
+                    remaining = expires - time.time()
+                    if remaining <= 0:
+                        return _EXHAUSTED
+                    self._idle_available.wait(remaining)
+        finally:
+            self._waiters -= 1
+            if tclass is not None:
+                self._class_waiters[tclass.name] -= 1
+                # Waiters of lower priority may have been held back for this one
+                if self._waiters:
+                    self._idle_available.notifyAll()
+
     def execute(self, f, *args, **kwargs):
         """
         Get a connection from the pool, execute
         `f` on it with `*args` and `**kwargs`, return the
         connection to the pool, and return the result of `f`.
+
+        If a :class:`~pycassa.deadline.Deadline` is passed as the `deadline`
+        keyword argument, it limits both the wait for a connection and
+        the execution of `f`, including any retries. A `traffic_class`
+        keyword argument is passed on to :meth:`get()`.
+
+        The :attr:`throttles`, or those passed as the `throttles` keyword
+        argument, are waited on before a connection is checked out, so
+        that a throttled operation does not hold one while it waits.
+
+        .. versionchanged:: 1.12.0
+            The `deadline` and `traffic_class` keyword arguments are recognized.
         """
+        throttles = kwargs.get('throttles')
+        if throttles is None:
+            throttles = self.throttles
+        acquired = None
+        if throttles and f in retryable:
+            acquired = _acquire_throttles(throttles, kwargs.get('deadline'))
+            kwargs['acquired_throttles'] = acquired
         conn = None
         try:
-            conn = self.get()
+            conn = self.get(kwargs.get('deadline'), kwargs.pop('traffic_class', None))
             return getattr(conn, f)(*args, **kwargs)
+        except:
+            # otherwise the connection's method released them
+            if conn is None and acquired:
+                _release_throttles(acquired)
+            raise
         finally:
             if conn:
                 conn.return_to_pool()
 
+    def get_keyspace_description(self, refresh=False):
+        """
+        Returns a description of the pool's keyspace in the form
+        ``{column_family_name: CfDef}``, with the column metadata of each
+        :class:`~pycassa.cassandra.ttypes.CfDef` stored as a dictionary.
+
+        The description is fetched once and cached by the pool, so that any
+        number of :class:`~pycassa.columnfamily.ColumnFamily` and
+        :class:`~pycassa.columnfamilymap.ColumnFamilyMap` instances can be
+        created without a round trip to Cassandra each. It is fetched again
+        if `refresh` is ``True`` or if the cluster's schema versions have
+        changed; see :attr:`schema_check_interval`. Changes made through a
+        :class:`~pycassa.system_manager.SystemManager` in the same process
+        are noticed immediately. The returned dictionary is shared and
+        should not be modified.
+
+        .. versionadded:: 1.12.0
+        """
+        with self._schema_lock:
+            if (refresh or self._keyspace_description is None or
+                    self._schema_generation != _schema_generation):
+                self._fetch_keyspace_description()
+            elif self.schema_check_interval != -1:
+                now = time.time()
+                if now - self._schema_checked_at >= self.schema_check_interval:
+                    versions = self._describe_schema_versions()
+                    self._schema_checked_at = now
+                    if versions != self._schema_versions:
+                        self._fetch_keyspace_description(versions)
+            return self._keyspace_description
+
+    def _describe_schema_versions(self):
+        return frozenset(self.execute('describe_schema_versions'))
+
+    def _fetch_keyspace_description(self, versions=None):
+        # Fetch the versions first so that a change made in between is
+        # caught by the next check
+        self._schema_generation = _schema_generation
+        if versions is None:
+            versions = self._describe_schema_versions()
+        self._schema_versions = versions
+        self._schema_checked_at = time.time()
+        self._keyspace_description = self.execute('get_keyspace_description',
+                                                  use_dict_for_col_metadata=True)
+
     def dispose(self):
         """ Closes all checked in connections in the pool. """
-        while True:
-            try:
-                conn = self._q.get(False)
-                conn._dispose_wrapper(
-                        reason="Pool %s is being disposed" % id(self))
-                self._decrement_overflow()
-            except Queue.Empty:
-                break
+        if self._pid != os.getpid():
+            self._after_fork()
+        with self._pool_lock:
+            idle, self._idle = self._idle, []
+            self._current_conns -= len(idle)
+            if self._waiters:
+                self._idle_available.notifyAll()
+        for conn in idle:
+            conn._dispose_wrapper(
+                    reason="Pool %s is being disposed" % id(self))
 
         self._notify_on_pool_dispose()
 
@@ -598,7 +1112,7 @@ class ConnectionPool(object):
 
     def checkedin(self):
         """ Returns the number of connections currently in the pool. """
-        return self._q.qsize()
+        return len(self._idle)
 
     def overflow(self):
         """ Returns the number of overflow connections that are currently open. """
@@ -615,7 +1129,6 @@ class ConnectionPool(object):
         `listener` may be an object that implements some or all of
         :class:`PoolListener`, or a dictionary of callables containing implementations
         of some or all of the named methods in :class:`PoolListener`.
-
         """
 
         listener = as_interface(listener,
@@ -625,12 +1138,18 @@ class ConnectionPool(object):
                      'obtained_server_list', 'pool_disposed',
                      'pool_at_max'))
 
+        # Checkouts and checkins are only logged at the debug level, so
+        # loggers are only called for them while it is enabled
+        checkouts = not isinstance(listener, PoolLogger)
+        if not checkouts:
+            self._checkout_loggers.append(listener)
+
         self.listeners.append(listener)
         if hasattr(listener, 'connection_created'):
             self._on_connect.append(listener)
-        if hasattr(listener, 'connection_checked_out'):
+        if checkouts and hasattr(listener, 'connection_checked_out'):
             self._on_checkout.append(listener)
-        if hasattr(listener, 'connection_checked_in'):
+        if checkouts and hasattr(listener, 'connection_checked_in'):
             self._on_checkin.append(listener)
         if hasattr(listener, 'connection_disposed'):
             self._on_dispose.append(listener)
@@ -652,11 +1171,12 @@ class ConnectionPool(object):
             for l in self._on_pool_dispose:
                 l.pool_disposed(dic)
 
-    def _notify_on_pool_max(self, pool_max):
+    def _notify_on_pool_max(self, pool_max, traffic_class=None):
         if self._on_pool_max:
             dic = {'pool_id': self.logging_name,
                    'level': 'info',
-                   'pool_max': pool_max}
+                   'pool_max': pool_max,
+                   'traffic_class': traffic_class}
             for l in self._on_pool_max:
                 l.pool_at_max(dic)
 
@@ -700,20 +1220,28 @@ class ConnectionPool(object):
             for l in self._on_connect:
                 l.connection_created(dic)
 
-    def _notify_on_checkin(self, conn_record):
-        if self._on_checkin:
+    def _debug_loggers(self, listeners):
+        loggers = [l for l in self._checkout_loggers if l.debug_enabled()]
+        return loggers + listeners if loggers else listeners
+
+    def _notify_on_checkin(self, conn_record, traffic_class=None):
+        listeners = self._debug_loggers(self._on_checkin)
+        if listeners:
             dic = {'pool_id': self.logging_name,
                    'level': 'debug',
-                   'connection': conn_record}
-            for l in self._on_checkin:
+                   'connection': conn_record,
+                   'traffic_class': traffic_class}
+            for l in listeners:
                 l.connection_checked_in(dic)
 
     def _notify_on_checkout(self, conn_record):
-        if self._on_checkout:
+        listeners = self._debug_loggers(self._on_checkout)
+        if listeners:
             dic = {'pool_id': self.logging_name,
                    'level': 'debug',
-                   'connection': conn_record}
-            for l in self._on_checkout:
+                   'connection': conn_record,
+                   'traffic_class': conn_record._traffic_class}
+            for l in listeners:
                 l.connection_checked_out(dic)
 
     def _notify_on_failure(self, error, server, connection=None):
@@ -788,13 +1316,19 @@ class PoolListener(object):
     def connection_checked_out(self, dic):
         """Called when a connection is retrieved from the Pool.
 
-        Fields: `pool_id`, `level`, and `connection`.
+        ``dic['traffic_class']``: The name of the :class:`TrafficClass` the
+        connection was checked out for, or ``None`` if the pool has none.
+
+        Fields: `pool_id`, `level`, `connection`, and `traffic_class`.
         """
 
     def connection_checked_in(self, dic):
         """Called when a connection returns to the pool.
 
-        Fields: `pool_id`, `level`, and `connection`.
+        ``dic['traffic_class']``: The name of the :class:`TrafficClass` the
+        connection was checked out for, or ``None`` if the pool has none.
+
+        Fields: `pool_id`, `level`, `connection`, and `traffic_class`.
         """
 
     def connection_disposed(self, dic):
@@ -845,7 +1379,12 @@ class PoolListener(object):
         ``dic['pool_max']``: The max number of connections the pool will
         keep open at one time.
 
-        Fields: `pool_id`, `pool_max`, and `level`.
+        ``dic['traffic_class']``: The name of the :class:`TrafficClass` that
+        the connection was requested for, or ``None`` if the pool has none.
+        The pool may not be at its max size if the class was held back by
+        its `limit` or by other classes' reservations.
+
+        Fields: `pool_id`, `pool_max`, `traffic_class`, and `level`.
         """
 
 
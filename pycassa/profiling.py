@@ -0,0 +1,332 @@
+"""
+Profiling of where the time in :class:`~pycassa.columnfamily.ColumnFamily`
+operations goes.
+
+Each operation is split into three phases:
+
+* ``pack``: packing keys, names and values and building the request,
+  from the start of the call until the request is handed to the pool;
+* ``network``: checking out a connection, sending the request, waiting
+  for the reply and any retries;
+* ``unpack``: decoding the reply and unpacking keys, names and values.
+
+For every operation and column family, a :class:`Profile` adds up the
+time spent in each phase and the number of objects allocated in it, and
+:meth:`Profile.table()` shows whether codec work or network work is
+worth tuning:
+
+.. code-block:: python
+
+    >>> with profiling.profile() as prof:
+    ...     for key in keys:
+    ...         cf.get(key)
+    >>> print prof.table()
+    operation  column_family  calls  pack ms  network ms  unpack ms  codec %  pack allocs  unpack allocs
+    get        Standard1       1000    0.021       0.412      0.058     16.1          9.0           31.0
+
+Profiling can also be switched on for the whole process with
+:func:`enable()`, which collects into :data:`default_profile` until
+:func:`disable()` is called.
+
+Hooks are only installed in :class:`~pycassa.columnfamily.ColumnFamily`,
+:class:`~pycassa.columnfamilymap.ColumnFamilyMap` and
+:class:`~pycassa.batch.Mutator` while profiling is on, so it costs
+nothing otherwise. For generators such as
+:meth:`~.ColumnFamily.get_range()`, time spent by the caller between
+items is left out.
+
+Allocations are counted with :func:`gc.get_count()`, so they only
+include objects tracked by the garbage collector, net of those freed.
+
+.. versionadded:: 1.12.0
+"""
+
+from __future__ import with_statement
+
+import contextlib
+import gc
+import inspect
+import threading
+import time
+
+__all__ = ['Profile', 'profile', 'enable', 'disable', 'default_profile']
+
+PHASES = ('pack', 'network', 'unpack')
+PACK, NETWORK, UNPACK = range(len(PHASES))
+
+_local = threading.local()
+
+
+class _Operation(object):
+
+    __slots__ = ('name', 'column_family', 'phase', 'mark', 'alloc_mark',
+                 'times', 'allocs')
+
+    def __init__(self, name, column_family):
+        self.name = name
+        self.column_family = column_family
+        self.times = [0.0] * len(PHASES)
+        self.allocs = [0] * len(PHASES)
+        self.phase = PACK
+        self.resume()
+
+    def resume(self):
+        self.mark = time.time()
+        self.alloc_mark = gc.get_count()[0]
+
+    def switch(self, phase):
+        now = time.time()
+        allocs = gc.get_count()[0]
+        self.times[self.phase] += now - self.mark
+        if allocs >= self.alloc_mark:
+            self.allocs[self.phase] += allocs - self.alloc_mark
+        else:
+            # a collection reset the count part way through
+            self.allocs[self.phase] += allocs
+        self.phase = phase
+        self.mark = now
+        self.alloc_mark = allocs
+
+    def finish(self):
+        for profile in _profiles:
+            profile.record(self.name, self.column_family, self.times, self.allocs)
+
+
+def _switch(phase):
+    operation = getattr(_local, 'operation', None)
+    if operation is not None:
+        operation.switch(phase)
+
+
+class Profile(object):
+    """
+    Time and allocations per phase, aggregated by operation and column
+    family. This is thread-safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """ Discards everything recorded so far. """
+        with self._lock:
+            self._stats = {}
+
+    def record(self, operation, column_family, times, allocs):
+        """
+        Adds one call of `operation` on `column_family`, with the seconds
+        and allocations spent in each phase as lists in the order of
+        :data:`PHASES`.
+        """
+        key = (operation, column_family)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = [0, [0.0] * len(PHASES), [0] * len(PHASES)]
+            stats[0] += 1
+            for i in range(len(PHASES)):
+                stats[1][i] += times[i]
+                stats[2][i] += allocs[i]
+
+    def stats(self):
+        """
+        Returns a dictionary of the form::
+
+            {(operation, column_family): {'calls': calls,
+                                          'seconds': {phase: seconds},
+                                          'allocations': {phase: allocations}}}
+
+        with totals over all calls.
+        """
+        with self._lock:
+            return dict((key, {'calls': calls,
+                               'seconds': dict(zip(PHASES, times)),
+                               'allocations': dict(zip(PHASES, allocs))})
+                        for key, (calls, times, allocs) in self._stats.iteritems())
+
+    def table(self):
+        """
+        Returns the statistics as a text table with a row per operation and
+        column family, sorted by total time. Times and allocations are
+        averages per call; ``codec %`` is the share of the time spent
+        packing and unpacking.
+        """
+        header = ('operation', 'column_family', 'calls', 'pack ms', 'network ms',
+                  'unpack ms', 'codec %', 'pack allocs', 'unpack allocs')
+        rows = []
+        stats = self.stats()
+        order = sorted(stats, key=lambda key: -sum(stats[key]['seconds'].values()))
+        for key in order:
+            calls = stats[key]['calls']
+            seconds = stats[key]['seconds']
+            allocs = stats[key]['allocations']
+            total = sum(seconds.values())
+            codec = seconds['pack'] + seconds['unpack']
+            rows.append((key[0], str(key[1]), str(calls),
+                         '%.3f' % (seconds['pack'] * 1000 / calls),
+                         '%.3f' % (seconds['network'] * 1000 / calls),
+                         '%.3f' % (seconds['unpack'] * 1000 / calls),
+                         '%.1f' % (codec * 100 / total if total else 0),
+                         '%.1f' % (float(allocs['pack']) / calls),
+                         '%.1f' % (float(allocs['unpack']) / calls)))
+
+        widths = [max(len(row[i]) for row in [header] + rows)
+                  for i in range(len(header))]
+        lines = []
+        for row in [header] + rows:
+            cells = [row[0].ljust(widths[0]), row[1].ljust(widths[1])]
+            cells.extend(cell.rjust(width) for cell, width in zip(row[2:], widths[2:]))
+            lines.append('  '.join(cells).rstrip())
+        return '\n'.join(lines)
+
+
+default_profile = Profile()
+""" The :class:`Profile` that :func:`enable()` collects into by default. """
+
+# The profiles currently collecting, and the methods replaced by hooks
+_profiles = []
+_originals = []
+_install_lock = threading.Lock()
+
+
+def enable(profile=None):
+    """
+    Starts collecting into `profile`, or into :data:`default_profile` if
+    it is ``None``, installing the hooks if no other profile is collecting.
+    """
+    if profile is None:
+        profile = default_profile
+    with _install_lock:
+        if not _profiles:
+            _install()
+        _profiles.append(profile)
+
+
+def disable(profile=None):
+    """
+    Stops collecting into `profile`, or into :data:`default_profile` if it
+    is ``None``, removing the hooks once no profile is collecting.
+    """
+    if profile is None:
+        profile = default_profile
+    with _install_lock:
+        _profiles.remove(profile)
+        if not _profiles:
+            _uninstall()
+
+
+@contextlib.contextmanager
+def profile():
+    """
+    A context manager that collects into a new :class:`Profile`, which
+    it returns, for as long as it is active.
+    """
+    prof = Profile()
+    enable(prof)
+    try:
+        yield prof
+    finally:
+        disable(prof)
+
+
+def _hook_operation(name, f):
+    def profiled(self, *args, **kwargs):
+        if getattr(_local, 'operation', None) is not None:
+            # part of an operation that is already being profiled
+            return f(self, *args, **kwargs)
+        operation = _local.operation = _Operation(name, self.column_family)
+        try:
+            result = f(self, *args, **kwargs)
+        finally:
+            operation.switch(operation.phase)
+            _local.operation = None
+        if inspect.isgenerator(result):
+            return _profiled_generator(result, operation)
+        operation.finish()
+        return result
+    profiled.__name__ = f.__name__
+    profiled.__doc__ = f.__doc__
+    return profiled
+
+
+def _profiled_generator(generator, operation):
+    try:
+        while True:
+            _local.operation = operation
+            operation.resume()
+            try:
+                item = generator.next()
+            except StopIteration:
+                return
+            finally:
+                operation.switch(operation.phase)
+                _local.operation = None
+            yield item
+    finally:
+        operation.finish()
+
+
+def _hook_execute(f):
+    def profiled(self, *args, **kwargs):
+        _switch(NETWORK)
+        try:
+            return f(self, *args, **kwargs)
+        finally:
+            _switch(UNPACK)
+    profiled.__name__ = f.__name__
+    return profiled
+
+
+def _hook_encode(f):
+    # Encoding a batch is packing, although it happens once the batch
+    # is being sent
+    def profiled(*args, **kwargs):
+        _switch(PACK)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            _switch(NETWORK)
+    profiled.__name__ = f.__name__
+    return profiled
+
+
+def _hook_decode(f):
+    def profiled(self, data):
+        _switch(UNPACK)
+        return f(self, data)
+    profiled.__name__ = f.__name__
+    return profiled
+
+
+_OPERATIONS = ('get', 'xget', 'multiget', 'get_count', 'multiget_count',
+               'get_range', 'get_indexed_slices', 'insert', 'batch_insert',
+               'add', 'remove', 'remove_counter', 'truncate')
+
+
+def _install():
+    from pycassa import batch
+    from pycassa.columnfamily import ColumnFamily
+    from pycassa.columnfamilymap import ColumnFamilyMap
+    from pycassa.wire import SliceDecoder
+
+    def replace(cls, name, hooked):
+        _originals.append((cls, name, cls.__dict__[name]))
+        setattr(cls, name, hooked)
+
+    for cls in (ColumnFamily, ColumnFamilyMap):
+        for name in _OPERATIONS:
+            if name in cls.__dict__:
+                replace(cls, name, _hook_operation(name, cls.__dict__[name]))
+    replace(ColumnFamily, '_execute', _hook_execute(ColumnFamily._execute.im_func))
+    # Operations such as remove() go through a batch instead of _execute()
+    replace(batch.Mutator, 'send', _hook_execute(batch.Mutator.send.im_func))
+    replace(batch, 'encode_mutation_map', _hook_encode(batch.encode_mutation_map))
+    for name in ('decode_slice', 'decode_multiget_slice', 'decode_key_slices'):
+        replace(SliceDecoder, name, _hook_decode(SliceDecoder.__dict__[name]))
+
+
+def _uninstall():
+    while _originals:
+        cls, name, original = _originals.pop()
+        setattr(cls, name, original)
@@ -0,0 +1,159 @@
+"""
+Policies that decide whether, and when, failed operations are retried.
+
+When an operation fails with a :exc:`~pycassa.cassandra.ttypes.TimedOutException`,
+an :exc:`~pycassa.cassandra.ttypes.UnavailableException` or a transport
+error, the :class:`~pycassa.pool.ConnectionPool` replaces the connection
+and asks a :class:`RetryPolicy` whether to try again. A policy may be set
+for a whole pool with :attr:`.ConnectionPool.retry_policy` or for
+a single column family with :attr:`.ColumnFamily.retry_policy`:
+
+.. code-block:: python
+
+    >>> budget = RetryBudget(ratio=0.1)
+    >>> pool = ConnectionPool('Keyspace1', retry_policy=RetryPolicy(budget=budget))
+    >>> cf = ColumnFamily(pool, 'Standard1')
+    >>> cf.retry_policy = RetryPolicy(max_retries=1, retry_timeouts=False)
+
+.. versionadded:: 1.12.0
+"""
+
+import random
+import threading
+import time
+
+from pycassa.cassandra.ttypes import TimedOutException, UnavailableException
+
+__all__ = ['RetryPolicy', 'RetryBudget']
+
+
+class RetryBudget(object):
+    """
+    Limits retries to a fraction of all operations, so that clients do not
+    multiply the load on a struggling cluster by retrying everything.
+    Budgets are thread-safe, and one budget is typically shared by all of
+    the policies and pools that talk to the same cluster.
+
+    Retries are allowed while they make up less than `ratio` of the
+    operations started in the last `ttl` seconds. On top of that,
+    `min_retries_per_second` retries are always allowed, so that failures
+    at a low rate of traffic can still be retried.
+    """
+
+    def __init__(self, ratio=0.1, min_retries_per_second=10, ttl=10):
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.ttl = float(ttl)
+        self._lock = threading.Lock()
+
+        # Counts for the current and previous windows of `ttl` seconds;
+        # the previous one is weighted by how much of it overlaps the
+        # last `ttl` seconds
+        self._window_start = time.time()
+        self._operations = self._retries = 0
+        self._last_operations = self._last_retries = 0
+
+    def _advance(self, now):
+        elapsed = now - self._window_start
+        if elapsed >= self.ttl:
+            if elapsed >= 2 * self.ttl:
+                self._last_operations = self._last_retries = 0
+            else:
+                self._last_operations = self._operations
+                self._last_retries = self._retries
+            self._operations = self._retries = 0
+            self._window_start = now - elapsed % self.ttl
+
+    def deposit(self):
+        """ Records that an operation was started. """
+        with self._lock:
+            self._advance(time.time())
+            self._operations += 1
+
+    def withdraw(self):
+        """
+        Returns ``True`` and records a retry if the budget allows one,
+        otherwise returns ``False``.
+        """
+        with self._lock:
+            now = time.time()
+            self._advance(now)
+            overlap = 1.0 - (now - self._window_start) / self.ttl
+            operations = self._operations + self._last_operations * overlap
+            retries = self._retries + self._last_retries * overlap
+            allowed = operations * self.ratio + self.min_retries_per_second * self.ttl
+            if retries + 1 > allowed:
+                return False
+            self._retries += 1
+            return True
+
+
+class RetryPolicy(object):
+    """
+    Decides whether a failed operation is retried and how long to wait
+    before doing so.
+
+    Delays follow "decorrelated jitter": each one is picked at random
+    between `base_delay` and three times the previous delay, and is capped
+    at `max_delay`. Compared with plain exponential backoff, this keeps
+    many clients that failed at the same moment from retrying in lockstep.
+
+    The kinds of failures are treated differently. A transport error means
+    that the connection to one node was lost, so the first retry, which
+    uses a new connection, is made immediately. Timeouts and unavailable
+    errors come from a coordinator that could not reach enough replicas,
+    so they are always retried after a delay. Each of the three kinds can
+    be excluded from retries with `retry_timeouts`,
+    `retry_unavailable` and `retry_transport_errors`.
+
+    At most `max_retries` retries are made; if this is ``None``, the pool's
+    :attr:`~.ConnectionPool.max_retries` is used. If a :class:`RetryBudget`
+    is given as `budget`, retries are also limited by it.
+
+    Subclasses may override :meth:`should_retry()` and :meth:`backoff()`.
+    """
+
+    def __init__(self, max_retries=None, base_delay=0.01, max_delay=2.0,
+                 budget=None, retry_timeouts=True, retry_unavailable=True,
+                 retry_transport_errors=True):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.retry_timeouts = retry_timeouts
+        self.retry_unavailable = retry_unavailable
+        self.retry_transport_errors = retry_transport_errors
+
+    def started(self):
+        """ Called once at the start of each operation. """
+        if self.budget is not None:
+            self.budget.deposit()
+
+    def retry_delay(self, exc, attempt, last_delay):
+        """
+        Returns how many seconds to wait before retrying an operation
+        that has failed `attempt` times, most recently with `exc`, or
+        ``None`` if it should not be retried. `last_delay` is the delay
+        returned for the previous attempt, or 0.
+        """
+        if not self.should_retry(exc):
+            return None
+        if self.budget is not None and not self.budget.withdraw():
+            return None
+        return self.backoff(exc, attempt, last_delay)
+
+    def should_retry(self, exc):
+        """ Whether operations that fail with `exc` may be retried. """
+        if isinstance(exc, TimedOutException):
+            return self.retry_timeouts
+        elif isinstance(exc, UnavailableException):
+            return self.retry_unavailable
+        else:
+            return self.retry_transport_errors
+
+    def backoff(self, exc, attempt, last_delay):
+        """ Returns the delay before the retry after failure `attempt`. """
+        if attempt == 1 and not isinstance(exc, (TimedOutException, UnavailableException)):
+            return 0
+        upper = max(last_delay, self.base_delay) * 3
+        return min(self.max_delay, random.uniform(self.base_delay, upper))
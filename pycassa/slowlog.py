@@ -0,0 +1,219 @@
+"""
+A log of slow operations, with enough detail to tell what they were.
+
+When a :class:`SlowOperationLog` is set as a pool's
+:attr:`~.ConnectionPool.slow_log`, every operation that takes longer than
+its `threshold`, including retries and the time spent waiting for
+replacement connections, is described and kept in a ring buffer:
+
+.. code-block:: python
+
+    >>> slow_log = SlowOperationLog(threshold=0.5, sample_rate=0.1)
+    >>> pool = ConnectionPool('Keyspace1', slow_log=slow_log)
+    >>> ...
+    >>> for entry in slow_log.entries():
+    ...     print entry['method'], entry['column_family'], entry['duration']
+    get_range_slices Standard1 3.0112
+
+Each entry is also logged by the ``slowlog`` child of the
+:class:`~pycassa.logging.pycassa_logger.PycassaLogger`.
+
+Operations that finish under the threshold only cost a few timestamps;
+the request is not inspected unless the operation is slow.
+
+.. versionadded:: 1.12.0
+"""
+
+import collections
+import random
+import threading
+import time
+
+from pycassa.cassandra.ttypes import (ColumnParent, ColumnPath, SlicePredicate,
+                                      KeyRange, IndexClause, Column,
+                                      CounterColumn, ConsistencyLevel)
+from pycassa.logging.pycassa_logger import PycassaLogger, levels
+from pycassa.wire import EncodedMutationMap
+
+__all__ = ['SlowOperationLog', 'OperationTrace', 'describe_request']
+
+# Keys and column names longer than this are cut short in entries
+_MAX_NAME_LENGTH = 64
+
+
+class OperationTrace(object):
+    """
+    What a pool notes about an operation while it is in progress: when it
+    started, a ``(server, latency, bytes_sent, bytes_received, failure)``
+    tuple for each attempt and the number of seconds spent in backoff
+    between attempts.
+    """
+
+    __slots__ = ('start', 'attempts', 'backoff')
+
+    def __init__(self):
+        self.start = time.time()
+        self.attempts = []
+        self.backoff = 0.0
+
+
+class SlowOperationLog(object):
+    """
+    Keeps the last `size` operations that took longer than `threshold`
+    seconds. If `sample_rate` is less than 1, only that fraction of slow
+    operations is kept. Entries are logged at `level`, one of the
+    :class:`~pycassa.logging.pycassa_logger.PycassaLogger` levels.
+
+    This is thread-safe and may be shared by several pools.
+    """
+
+    def __init__(self, threshold=1.0, sample_rate=1.0, size=100, level='warn'):
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.level = level
+        self._entries = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._log = PycassaLogger().add_child_logger('slowlog', self._name_changed)
+
+    def _name_changed(self, new_logger):
+        self._log = new_logger
+
+    def trace(self):
+        """ Returns an :class:`OperationTrace` for an operation that is starting. """
+        return OperationTrace()
+
+    def finish(self, trace, method, column_family, args, failure=None):
+        """
+        Records the operation traced by `trace` if it was slow. `method` is
+        the Thrift method, `args` are its arguments and `failure` is the
+        exception the operation failed with, if any.
+        """
+        duration = time.time() - trace.start
+        if duration < self.threshold:
+            return
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+
+        attempts = []
+        sent = received = 0
+        for server, latency, bytes_sent, bytes_received, attempt_failure in trace.attempts:
+            attempts.append({'server': server, 'latency': latency,
+                             'failure': _describe_failure(attempt_failure)})
+            sent += bytes_sent
+            received += bytes_received
+        attempted = sum(attempt['latency'] for attempt in attempts)
+        entry = {
+            'time': trace.start,
+            'method': method,
+            'column_family': column_family,
+            'request': describe_request(args),
+            'duration': duration,
+            'attempts': attempts,
+            'retries': max(len(attempts) - 1, 0),
+            'server': attempts[-1]['server'] if attempts else None,
+            'bytes_sent': sent,
+            'bytes_received': received,
+            'backoff': trace.backoff,
+            'waiting': max(duration - attempted - trace.backoff, 0.0),
+            'failure': _describe_failure(failure),
+        }
+        with self._lock:
+            self._entries.append(entry)
+        self._log.log(levels[self.level],
+                      "Slow %s on %s took %.3fs (%d retries, server %s): %s",
+                      method, column_family, duration, entry['retries'],
+                      entry['server'], entry['request'])
+
+    def entries(self):
+        """ Returns the entries in the ring buffer, oldest first. """
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        """ Empties the ring buffer. """
+        with self._lock:
+            self._entries.clear()
+
+
+def _describe_failure(failure):
+    if failure is None:
+        return None
+    return '%s: %s' % (failure.__class__.__name__, failure)
+
+
+def _name(name):
+    if name is None:
+        return None
+    if len(name) > _MAX_NAME_LENGTH:
+        return repr(name[:_MAX_NAME_LENGTH]) + '...'
+    return repr(name)
+
+
+def describe_request(args):
+    """
+    Returns a dictionary that describes the shape of a request from the
+    arguments of a Thrift call: the key, or the number of keys or rows, the
+    key range, the predicate and the consistency level. Values are left out
+    and long keys and names are shortened.
+    """
+    description = {}
+    for arg in args:
+        if isinstance(arg, EncodedMutationMap):
+            description['rows'] = _encoded_row_count(arg)
+            description['mutation_bytes'] = len(arg)
+        elif isinstance(arg, basestring):
+            description['key'] = _name(arg)
+        elif isinstance(arg, dict):
+            description['rows'] = len(arg)
+            description['mutations'] = sum(len(mutations)
+                                           for cf_map in arg.itervalues()
+                                           for mutations in cf_map.itervalues())
+        elif isinstance(arg, (list, tuple)):
+            description['keys'] = len(arg)
+        elif isinstance(arg, (ColumnParent, ColumnPath)):
+            if arg.super_column is not None:
+                description['super_column'] = _name(arg.super_column)
+            if getattr(arg, 'column', None) is not None:
+                description['column'] = _name(arg.column)
+        elif isinstance(arg, SlicePredicate):
+            description['predicate'] = _describe_predicate(arg)
+        elif isinstance(arg, KeyRange):
+            description['range'] = _describe_range(arg)
+        elif isinstance(arg, IndexClause):
+            description['index_clause'] = {'expressions': len(arg.expressions),
+                                           'start_key': _name(arg.start_key),
+                                           'count': arg.count}
+        elif isinstance(arg, (Column, CounterColumn)):
+            description['column'] = _name(arg.name)
+        elif isinstance(arg, (int, long)) and arg in ConsistencyLevel._VALUES_TO_NAMES:
+            description['consistency_level'] = ConsistencyLevel._VALUES_TO_NAMES[arg]
+    return description
+
+
+def _encoded_row_count(mutation_map):
+    # The map header is the key and value types followed by the size
+    if len(mutation_map) < 6:
+        return None
+    return (ord(mutation_map[2]) << 24 | ord(mutation_map[3]) << 16 |
+            ord(mutation_map[4]) << 8 | ord(mutation_map[5]))
+
+
+def _describe_predicate(predicate):
+    if predicate.column_names is not None:
+        return {'column_names': len(predicate.column_names)}
+    slice_range = predicate.slice_range
+    if slice_range is None:
+        return {}
+    return {'start': _name(slice_range.start), 'finish': _name(slice_range.finish),
+            'reversed': slice_range.reversed, 'count': slice_range.count}
+
+
+def _describe_range(key_range):
+    description = {'count': key_range.count}
+    for attr in ('start_key', 'end_key', 'start_token', 'end_token'):
+        value = getattr(key_range, attr)
+        if value is not None:
+            description[attr] = _name(value)
+    if key_range.row_filter:
+        description['row_filter'] = len(key_range.row_filter)
+    return description
@@ -0,0 +1,235 @@
+"""
+Offline snapshots of a keyspace's schema.
+
+A :class:`~pycassa.columnfamily.ColumnFamily` normally needs the
+description of its keyspace from Cassandra before it can pack and unpack
+anything. A :class:`SchemaSnapshot` captures the parts of that description
+that pycassa uses -- comparators, validators and key classes -- and can be
+saved to a file ahead of time, so that a freshly started process can build
+its column families without any round trips:
+
+.. code-block:: python
+
+    >>> # ahead of time, e.g. while deploying
+    >>> SchemaSnapshot.capture(pool).save('schema.json')
+    >>>
+    >>> # at startup
+    >>> snapshot = SchemaSnapshot.load('schema.json')
+    >>> cf = ColumnFamily(pool, 'Standard1', schema_snapshot=snapshot)
+    >>> snapshot.verify_in_background(pool)
+
+.. versionadded:: 1.12.0
+"""
+
+import binascii
+import json
+import threading
+import time
+
+from pycassa.cassandra.ttypes import CfDef, ColumnDef, NotFoundException
+from pycassa.logging.pycassa_logger import PycassaLogger
+
+__all__ = ['SchemaSnapshot']
+
+_FORMAT_NAME = 'pycassa-schema-snapshot'
+
+_CFDEF_FIELDS = ('column_type', 'comparator_type', 'subcomparator_type',
+                 'default_validation_class', 'key_validation_class')
+
+_COLDEF_FIELDS = ('validation_class', 'index_type', 'index_name')
+
+
+class _SnapshotLogger(object):
+
+    def __init__(self):
+        self.logger = PycassaLogger().add_child_logger('schema', self.name_changed)
+
+    def name_changed(self, new_logger):
+        self.logger = new_logger
+
+_log = _SnapshotLogger()
+
+
+def _str(value):
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return value
+
+
+class SchemaSnapshot(object):
+    """
+    The column family definitions of a keyspace at some point in time,
+    along with the schema versions the cluster reported when they
+    were captured.
+    """
+
+    format_version = 1
+    """ The version of the file format written by :meth:`save()`.
+    Files written with a newer version can not be loaded. """
+
+    def __init__(self, keyspace, column_families, schema_versions=(),
+                 created_at=None):
+        """
+        `column_families` should be a dictionary of the form
+        ``{column_family_name: CfDef}``, as returned by
+        :meth:`.SystemManager.get_keyspace_column_families()` or
+        :meth:`.ConnectionPool.get_keyspace_description()`.
+
+        `schema_versions` are the schema versions the cluster reported
+        for these definitions, which :meth:`verify()` compares against.
+        """
+        self.keyspace = keyspace
+        self.column_families = {}
+        for name, cfdef in column_families.iteritems():
+            self.column_families[name] = self._copy_cfdef(cfdef)
+        self.schema_versions = frozenset(schema_versions)
+        if created_at is None:
+            created_at = time.time()
+        self.created_at = created_at
+
+    @classmethod
+    def capture(cls, pool):
+        """
+        Fetches the current schema of the keyspace that `pool`,
+        a :class:`~pycassa.pool.ConnectionPool`, is connected to.
+        """
+        # Fetch the versions first so that a change made in between
+        # is caught by verify()
+        versions = pool.execute('describe_schema_versions')
+        cfdefs = pool.execute('get_keyspace_description',
+                              use_dict_for_col_metadata=True)
+        return cls(pool.keyspace, cfdefs, versions)
+
+    def get_cfdef(self, column_family):
+        """
+        Returns the :class:`~pycassa.cassandra.ttypes.CfDef` for
+        `column_family`, raising a
+        :exc:`~pycassa.cassandra.ttypes.NotFoundException` if
+        the snapshot does not have one. Its column metadata is
+        stored as a dictionary.
+        """
+        try:
+            return self.column_families[column_family]
+        except KeyError:
+            nfe = NotFoundException()
+            nfe.why = 'Column family %s not found in the schema snapshot.' % column_family
+            raise nfe
+
+    def verify(self, pool):
+        """
+        Compares the schema versions in the snapshot against the ones
+        currently reported by the cluster that `pool` is connected to.
+        Returns ``True`` if they are the same.
+        """
+        live = frozenset(pool.execute('describe_schema_versions'))
+        return live == self.schema_versions
+
+    def verify_in_background(self, pool, callback=None):
+        """
+        Runs :meth:`verify()` in a daemon thread, so that a process which
+        starts from a snapshot can still notice a stale one without
+        delaying its startup.
+
+        If the snapshot does not match the cluster's schema, a warning is
+        logged and, if it was given, `callback` is called with the snapshot
+        and the pool as arguments; it might, for example, reload the schema
+        of the affected column families with
+        :meth:`.ColumnFamily.load_schema()`.
+
+        The thread is returned.
+        """
+        def check():
+            try:
+                if self.verify(pool):
+                    return
+            except Exception, exc:
+                _log.logger.warning(
+                        "Unable to verify the schema snapshot for keyspace %s: %s",
+                        self.keyspace, exc)
+                return
+
+            _log.logger.warning(
+                    "The schema snapshot for keyspace %s from %s does not "
+                    "match the cluster's schema versions",
+                    self.keyspace, time.ctime(self.created_at))
+            if callback is not None:
+                callback(self, pool)
+
+        thread = threading.Thread(target=check)
+        thread.setDaemon(True)
+        thread.start()
+        return thread
+
+    def to_dict(self):
+        """
+        Returns the snapshot as a JSON-serializable dictionary.
+        Column names are hex encoded.
+        """
+        cfs = {}
+        for name, cfdef in self.column_families.iteritems():
+            cf = dict((field, getattr(cfdef, field)) for field in _CFDEF_FIELDS)
+            metadata = []
+            for col_name, coldef in sorted(cfdef.column_metadata.items()):
+                col = dict((field, getattr(coldef, field)) for field in _COLDEF_FIELDS)
+                col['name'] = binascii.hexlify(col_name)
+                metadata.append(col)
+            cf['column_metadata'] = metadata
+            cfs[name] = cf
+
+        return {'format': _FORMAT_NAME,
+                'version': self.format_version,
+                'keyspace': self.keyspace,
+                'created_at': self.created_at,
+                'schema_versions': sorted(self.schema_versions),
+                'column_families': cfs}
+
+    @classmethod
+    def from_dict(cls, d):
+        """ Creates a snapshot from the output of :meth:`to_dict()`. """
+        if d.get('format') != _FORMAT_NAME:
+            raise ValueError("Not a pycassa schema snapshot")
+        if d.get('version', 0) > cls.format_version:
+            raise ValueError("Unsupported schema snapshot version %s" % (d['version'],))
+
+        keyspace = _str(d['keyspace'])
+        cfdefs = {}
+        for name, cf in d['column_families'].iteritems():
+            name = _str(name)
+            cfdef = CfDef(keyspace=keyspace, name=name)
+            for field in _CFDEF_FIELDS:
+                setattr(cfdef, field, _str(cf.get(field)))
+            metadata = {}
+            for col in cf.get('column_metadata', ()):
+                col_name = binascii.unhexlify(col['name'])
+                coldef = ColumnDef(name=col_name)
+                for field in _COLDEF_FIELDS:
+                    setattr(coldef, field, _str(col.get(field)))
+                metadata[col_name] = coldef
+            cfdef.column_metadata = metadata
+            cfdefs[name] = cfdef
+
+        return cls(keyspace, cfdefs, map(_str, d.get('schema_versions', ())),
+                   d.get('created_at'))
+
+    def save(self, path):
+        """ Writes the snapshot to the file at `path` as JSON. """
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, sort_keys=True)
+
+    @classmethod
+    def load(cls, path):
+        """ Reads a snapshot written by :meth:`save()`. """
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    @staticmethod
+    def _copy_cfdef(cfdef):
+        copy = CfDef(keyspace=cfdef.keyspace, name=cfdef.name)
+        for field in _CFDEF_FIELDS:
+            setattr(copy, field, getattr(cfdef, field, None))
+
+        metadata = cfdef.column_metadata or {}
+        if not isinstance(metadata, dict):
+            metadata = dict((coldef.name, coldef) for coldef in metadata)
+        copy.column_metadata = dict(metadata)
+        return copy
@@ -5,6 +5,7 @@ from pycassa.connection import (Connection, default_socket_factory,
 from pycassa.cassandra.ttypes import IndexType, KsDef, CfDef, ColumnDef,\
                                      SchemaDisagreementException
 import pycassa.marshal as marshal
+from pycassa.pool import _note_schema_change
 import pycassa.types as types
 
 _DEFAULT_TIMEOUT = 30
@@ -465,4 +466,5 @@ class SystemManager(object):
                 self._wait_for_agreement()
             else:
                 break
+        _note_schema_change()
         return schema_version
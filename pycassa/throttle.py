@@ -0,0 +1,242 @@
+"""
+Throttles that keep bulk jobs from overloading a cluster.
+
+A throttle is consulted before every attempt at an operation, including
+retries, and is told how each attempt went. Operations wait on their
+throttles before checking out a connection, so a throttled bulk job does
+not hold pooled connections that other requests could use while it waits. A list of throttles may be
+set for a whole pool with :attr:`.ConnectionPool.throttles`, for a single
+column family with :attr:`.ColumnFamily.throttles` or for a
+:class:`~pycassa.batch.Mutator`:
+
+.. code-block:: python
+
+    >>> limiter = AdaptiveConcurrencyLimiter(max_limit=32, latency_tolerance=2.0)
+    >>> rate = RateLimiter(ops_per_second=500, bytes_per_second=5 * 1024 * 1024)
+    >>> backfill_cf = ColumnFamily(pool, 'Standard1', throttles=[rate, limiter])
+    >>> for key, columns in rows:
+    ...     backfill_cf.insert(key, columns)
+
+:class:`RateLimiter` puts a fixed cap on the rate of operations and bytes
+transferred, while :class:`AdaptiveConcurrencyLimiter` looks for the
+highest number of concurrent operations that the cluster handles without
+timing out or slowing down.
+
+Waiting for a throttle counts against an operation's `timeout_budget`;
+see :mod:`pycassa.deadline`.
+
+.. versionadded:: 1.12.0
+"""
+
+import socket
+import threading
+import time
+
+from pycassa.cassandra.ttypes import TimedOutException
+
+__all__ = ['Throttle', 'TokenBucket', 'RateLimiter', 'AdaptiveConcurrencyLimiter']
+
+
+class Throttle(object):
+    """
+    The interface that throttles implement. Both methods must be
+    thread-safe.
+    """
+
+    def acquire(self, deadline=None):
+        """
+        Called before each attempt at an operation; blocks until the attempt
+        may start. If `deadline`, a :class:`~pycassa.deadline.Deadline`,
+        would pass first, :exc:`~pycassa.deadline.DeadlineExceeded` should
+        be raised instead.
+        """
+
+    def release(self, latency, nbytes, failure):
+        """
+        Called after each attempt that :meth:`acquire()` allowed to start.
+        `latency` is its duration in seconds, `nbytes` is the number of bytes
+        sent and received, if known, and `failure` is the exception it
+        failed with, or ``None`` if it succeeded.
+        """
+
+
+class TokenBucket(object):
+    """
+    Hands out up to `rate` tokens per second, allowing bursts of up to
+    `capacity` tokens, which defaults to `rate`.
+
+    Tokens may be borrowed: :meth:`charge()` may take the bucket below
+    zero, which makes later calls to :meth:`take()` wait until the debt
+    is paid off.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        if capacity is None:
+            capacity = rate
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity,
+                           self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self, tokens=1, deadline=None):
+        """
+        Takes `tokens` tokens, sleeping until they are available. Returns
+        the number of seconds spent waiting.
+        """
+        with self._lock:
+            self._refill(time.time())
+            # Reserve the tokens now, so that waiting threads are served
+            # in the order they arrived
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate
+            if wait > 0 and deadline is not None and wait >= deadline.remaining():
+                self._tokens += tokens
+                raise deadline.exceeded()
+        if wait > 0:
+            time.sleep(wait)
+            return wait
+        return 0
+
+    def charge(self, tokens):
+        """ Takes `tokens` tokens without waiting, possibly going into debt. """
+        with self._lock:
+            self._refill(time.time())
+            self._tokens -= tokens
+
+    def available(self):
+        """ Returns the number of tokens currently available. """
+        with self._lock:
+            self._refill(time.time())
+            return self._tokens
+
+
+class RateLimiter(Throttle):
+    """
+    Limits operations to `ops_per_second` attempts per second and the data
+    transferred to `bytes_per_second`, in both directions combined. Either
+    limit may be ``None``. Bursts of up to `burst` seconds' worth of
+    operations or bytes are allowed after a quiet period.
+
+    Since the size of a request and its response are only known once it
+    completes, bytes are counted afterwards, and an operation waits if
+    earlier operations have gone over the limit.
+    """
+
+    def __init__(self, ops_per_second=None, bytes_per_second=None, burst=1.0):
+        self.ops = None
+        self.bytes = None
+        if ops_per_second is not None:
+            self.ops = TokenBucket(ops_per_second, max(ops_per_second * burst, 1))
+        if bytes_per_second is not None:
+            self.bytes = TokenBucket(bytes_per_second, bytes_per_second * burst)
+
+    def acquire(self, deadline=None):
+        if self.ops is not None:
+            self.ops.take(1, deadline)
+        if self.bytes is not None:
+            self.bytes.take(0, deadline)
+
+    def release(self, latency, nbytes, failure):
+        if self.bytes is not None and nbytes:
+            self.bytes.charge(nbytes)
+
+
+class AdaptiveConcurrencyLimiter(Throttle):
+    """
+    Limits the number of operations in progress at once, adjusting the
+    limit with additive increase, multiplicative decrease (AIMD).
+
+    While operations succeed, the limit grows by about one for every
+    `limit` operations that complete, between `min_limit` and `max_limit`.
+    When the cluster shows signs of overload, the limit is multiplied by
+    `backoff_ratio`, at most once every `cooldown` seconds so that one
+    burst of failures only counts once. Overload is signaled by:
+
+    * an attempt timing out, either with a
+      :exc:`~pycassa.cassandra.ttypes.TimedOutException` or a socket timeout;
+    * an attempt taking longer than `latency_threshold` seconds, if set;
+    * the recent average latency rising above `latency_tolerance` times
+      the long-term average, if `latency_tolerance` is set.
+
+    The current limit is available as :attr:`limit`.
+    """
+
+    short_smoothing = 0.2
+    """ The weight of each latency in the recent average. """
+
+    long_smoothing = 0.01
+    """ The weight of each latency in the long-term average. """
+
+    def __init__(self, initial_limit=8, min_limit=1, max_limit=128,
+                 backoff_ratio=0.5, cooldown=1.0, latency_threshold=None,
+                 latency_tolerance=None):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.cooldown = cooldown
+        self.latency_threshold = latency_threshold
+        self.latency_tolerance = latency_tolerance
+
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._last_backoff = 0
+        self._recent_latency = None
+        self._long_latency = None
+        self._available = threading.Condition(threading.Lock())
+
+    @property
+    def limit(self):
+        """ The current number of operations that may run at once. """
+        return int(self._limit)
+
+    @property
+    def in_flight(self):
+        """ The number of operations currently in progress. """
+        return self._in_flight
+
+    def acquire(self, deadline=None):
+        with self._available:
+            while self._in_flight >= int(self._limit):
+                if deadline is None:
+                    self._available.wait()
+                else:
+                    remaining = deadline.remaining()
+                    if remaining <= 0:
+                        raise deadline.exceeded()
+                    self._available.wait(remaining)
+            self._in_flight += 1
+
+    def release(self, latency, nbytes, failure):
+        with self._available:
+            self._in_flight -= 1
+            if self._overloaded(latency, failure):
+                now = time.time()
+                if now - self._last_backoff >= self.cooldown:
+                    self._last_backoff = now
+                    self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+            elif failure is None:
+                self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+            self._available.notify()
+
+    def _overloaded(self, latency, failure):
+        if failure is not None:
+            return isinstance(failure, (TimedOutException, socket.timeout))
+
+        if self._recent_latency is None:
+            self._recent_latency = self._long_latency = latency
+        else:
+            self._recent_latency += self.short_smoothing * (latency - self._recent_latency)
+            self._long_latency += self.long_smoothing * (latency - self._long_latency)
+
+        if self.latency_threshold is not None and latency > self.latency_threshold:
+            return True
+        if self.latency_tolerance is not None and \
+                self._recent_latency > self.latency_tolerance * self._long_latency:
+            return True
+        return False
@@ -4,11 +4,18 @@ available for use by others working with pycassa.
 
 """
 
+from __future__ import with_statement
+
+import os
 import random
+import struct
+import threading
+import time
 import uuid
 import calendar
 
-__all__ = ['convert_time_to_uuid', 'convert_uuid_to_time', 'OrderedDict']
+__all__ = ['convert_time_to_uuid', 'convert_uuid_to_time', 'TimeUUIDGenerator',
+           'OrderedDict']
 
 _number_types = frozenset((int, long, float))
 
@@ -132,6 +139,115 @@ def convert_uuid_to_time(uuid_arg):
     ts = uuid_arg.get_time()
     return (ts - 0x01b21dd213814000L)/1e7
 
+_time_fields_packer = struct.Struct('>IHH')
+
+# The random module's state is copied into forked children, so it would
+# give every child of a process the same node and clock sequence
+_system_random = random.SystemRandom()
+
+class TimeUUIDGenerator(object):
+    """
+    A thread-safe source of unique, strictly increasing version 1 UUIDs.
+
+    Every UUID produced by a generator has a later timestamp than the
+    one before it. When several UUIDs are requested within the same 100ns
+    tick, or when the system clock moves backwards, the generator uses the
+    tick after the last one it handed out instead of the current time.
+    The clock sequence and node are chosen randomly when the generator is
+    created (unless supplied) and are chosen again in a forked child
+    process, so generators in different processes do not collide.
+
+    Raw 16 byte values, as returned by :meth:`next_bytes()` and
+    :meth:`next_many_bytes()`, may be used directly as ``TimeUUIDType``
+    column names or values without creating :class:`uuid.UUID` objects.
+
+    Example usage:
+
+    .. code-block:: python
+
+        >>> gen = TimeUUIDGenerator()
+        >>> gen.next()
+        UUID('6fa459ea-ee8a-11e3-ac10-0800200c9a66')
+        >>> cf.insert('key', dict.fromkeys(gen.next_many_bytes(1000), ''))
+
+    .. versionadded:: 1.12.0
+
+    """
+
+    def __init__(self, node=None, clock_seq=None):
+        """
+        `node` is the 48 bit node id to use for every UUID. If left as
+        ``None``, a random node id with the multicast bit set is used, as
+        recommended by RFC 4122 for ids that are not a MAC address.
+
+        `clock_seq` is the 14 bit clock sequence to use. If left as
+        ``None``, a random value is used.
+        """
+        self._lock = threading.Lock()
+        self._node = node
+        self._clock_seq = clock_seq
+        self._last_timestamp = 0
+        self._reseed()
+
+    def _reseed(self):
+        self._pid = os.getpid()
+        node = self._node
+        if node is None:
+            node = _system_random.getrandbits(48) | 0x010000000000L
+        clock_seq = self._clock_seq
+        if clock_seq is None:
+            clock_seq = _system_random.getrandbits(14)
+
+        # clock_seq_hi_variant, clock_seq_low and node never change, so
+        # the last eight bytes of every UUID are the same
+        self._tail = struct.pack('>BBHI', 0x80 | ((clock_seq >> 8) & 0x3f),
+                                 clock_seq & 0xff, node >> 32,
+                                 node & 0xffffffffL)
+
+    def _reserve(self, count):
+        """ Returns the first of `count` consecutive unused timestamps. """
+        # 0x01b21dd213814000 is the number of 100-ns intervals between the
+        # UUID epoch 1582-10-15 00:00:00 and the Unix epoch 1970-01-01 00:00:00.
+        now = int(time.time() * 1e7) + 0x01b21dd213814000L
+        with self._lock:
+            if os.getpid() != self._pid:
+                self._reseed()
+            if now <= self._last_timestamp:
+                now = self._last_timestamp + 1
+            self._last_timestamp = now + count - 1
+            tail = self._tail
+        return now, tail
+
+    @staticmethod
+    def _pack(timestamp, tail):
+        return _time_fields_packer.pack(timestamp & 0xffffffffL,
+                                        (timestamp >> 32) & 0xffff,
+                                        ((timestamp >> 48) & 0x0fff) | 0x1000) + tail
+
+    def next_bytes(self):
+        """ Returns the next UUID as a 16 byte string. """
+        timestamp, tail = self._reserve(1)
+        return self._pack(timestamp, tail)
+
+    def next_many_bytes(self, count):
+        """ Returns a list of the next `count` UUIDs as 16 byte strings. """
+        if count <= 0:
+            return []
+        start, tail = self._reserve(count)
+        pack = self._pack
+        return [pack(timestamp, tail) for timestamp in xrange(start, start + count)]
+
+    def next(self):
+        """ Returns the next UUID as a :class:`uuid.UUID`. """
+        return uuid.UUID(bytes=self.next_bytes())
+
+    def next_many(self, count):
+        """ Returns a list of the next `count` UUIDs as :class:`uuid.UUID` objects. """
+        return [uuid.UUID(bytes=b) for b in self.next_many_bytes(count)]
+
+    def __iter__(self):
+        return self
+
 # Copyright (C) 2005, 2006, 2007, 2008, 2009, 2010 Michael Bayer mike_mp@zzzcomputing.com
 #
 # The 'as_interface' method is part of SQLAlchemy and is released under
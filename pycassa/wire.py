@@ -0,0 +1,544 @@
+"""
+Encoding of Thrift request payloads and decoding of Thrift responses
+without building the intermediate Thrift objects.
+
+Creating a :class:`~pycassa.cassandra.ttypes.Mutation`,
+:class:`~pycassa.cassandra.ttypes.ColumnOrSuperColumn` and
+:class:`~pycassa.cassandra.ttypes.Column` for every column that is written
+only for Thrift to walk all of them again during serialization is a
+large part of the cost of a write. The functions in this module encode
+mutations directly in the Thrift binary protocol format instead.
+
+:class:`~pycassa.columnfamily.ColumnFamily` and
+:class:`~pycassa.batch.Mutator` use this automatically. It may also be
+used directly for bulk loading data that is already packed:
+
+.. code-block:: python
+
+    >>> rows = [('key1', 'Standard1', [('name1', 'value1', ts, None),
+    ...                                ('name2', 'value2', ts, 3600)]),
+    ...         ('key2', 'Standard1', [('name1', 'value1', ts, None)])]
+    >>> pool.execute('batch_mutate', wire.encode_rows(rows),
+    ...              ConsistencyLevel.ONE)
+
+Reads work the same way in the other direction: the results of
+`get_slice`, `multiget_slice`, `get_range_slices` and `get_indexed_slices`
+are decoded by a :class:`SliceDecoder` straight from the response frame
+into the rows that :class:`~pycassa.columnfamily.ColumnFamily` returns,
+with column names and values unpacked as they are read.
+
+"""
+
+import struct
+
+from thrift.Thrift import TType
+from thrift.protocol import TBinaryProtocol
+from thrift.protocol.TProtocol import TProtocolException
+from thrift.transport import TTransport
+
+_i32 = struct.Struct('>i').pack
+_i64 = struct.Struct('>q').pack
+
+_read_i32 = struct.Struct('>i').unpack_from
+_read_i64 = struct.Struct('>q').unpack_from
+_read_field_header = struct.Struct('>bh').unpack_from
+_read_list_header = struct.Struct('>bi').unpack_from
+_read_map_header = struct.Struct('>bbi').unpack_from
+
+_FIXED_SIZES = {TType.BOOL: 1, TType.BYTE: 1, TType.I16: 2, TType.I32: 4,
+                TType.I64: 8, TType.DOUBLE: 8}
+
+# Mutation.column_or_supercolumn, then ColumnOrSuperColumn.column,
+# then Column.name
+_COLUMN_MUTATION_HEAD = '\x0c\x00\x01\x0c\x00\x01\x0b\x00\x01'
+
+# Mutation.column_or_supercolumn, then ColumnOrSuperColumn.counter_column,
+# then CounterColumn.name
+_COUNTER_MUTATION_HEAD = '\x0c\x00\x01\x0c\x00\x03\x0b\x00\x01'
+
+# Mutation.column_or_supercolumn, then ColumnOrSuperColumn.super_column or
+# ColumnOrSuperColumn.counter_super_column, then the struct's name
+_SUPER_MUTATION_HEAD = '\x0c\x00\x01\x0c\x00\x02\x0b\x00\x01'
+_COUNTER_SUPER_MUTATION_HEAD = '\x0c\x00\x01\x0c\x00\x04\x0b\x00\x01'
+
+# The columns list field of a SuperColumn or CounterSuperColumn,
+# followed by the list's element type
+_SUBCOLUMNS_HEAD = '\x0f\x00\x02\x0c'
+
+_VALUE_FIELD = '\x0b\x00\x02'
+_TIMESTAMP_FIELD = '\x0a\x00\x03'
+_TTL_FIELD = '\x08\x00\x04'
+_COUNTER_VALUE_FIELD = '\x0a\x00\x02'
+
+# map<binary, map<string, list<Mutation>>> headers
+_ROW_MAP_TYPES = '\x0b\x0d'
+_CF_MAP_TYPES = '\x0b\x0f'
+_MUTATION_LIST_TYPE = '\x0c'
+
+# batch_mutate_args.mutation_map and batch_mutate_args.consistency_level
+_MUTATION_MAP_FIELD = '\x0d\x00\x01'
+_CONSISTENCY_LEVEL_FIELD = '\x08\x00\x02'
+
+_STOP = '\x00'
+
+# ColumnOrSuperColumn.column, then Column.name
+_COLUMN_RESULT_HEAD = '\x0c\x00\x01\x0b\x00\x01'
+
+# The ends of a Column and its ColumnOrSuperColumn
+_COLUMN_RESULT_TAIL = '\x00\x00'
+
+__all__ = ['EncodedMutationMap', 'encode_column', 'encode_column_mutation',
+           'encode_counter_mutation', 'encode_super_column_mutation',
+           'encode_counter_super_column_mutation', 'encode_mutation',
+           'encode_mutation_map', 'encode_rows', 'encode_batch_mutate_args',
+           'SliceDecoder']
+
+
+class EncodedMutationMap(str):
+    """
+    A mutation map for `batch_mutate` or `atomic_batch_mutate` that has
+    already been encoded in the Thrift binary protocol format.
+
+    :class:`~pycassa.connection.Connection` writes these directly to the
+    transport; they may be passed anywhere a mutation map is expected.
+    """
+
+
+def _to_bytes(s):
+    if s.__class__ is unicode:
+        return s.encode('utf-8')
+    return s
+
+
+def encode_column(name, value, timestamp, ttl=None):
+    """ Encodes a :class:`~pycassa.cassandra.ttypes.Column` struct. """
+    name = _to_bytes(name)
+    parts = ['\x0b\x00\x01', _i32(len(name)), name]
+    if value is not None:
+        value = _to_bytes(value)
+        parts.extend((_VALUE_FIELD, _i32(len(value)), value))
+    if timestamp is not None:
+        parts.extend((_TIMESTAMP_FIELD, _i64(timestamp)))
+    if ttl is not None:
+        parts.extend((_TTL_FIELD, _i32(ttl)))
+    parts.append(_STOP)
+    return ''.join(parts)
+
+
+def encode_column_mutation(name, value, timestamp, ttl=None):
+    """
+    Encodes a :class:`~pycassa.cassandra.ttypes.Mutation` that inserts
+    a single column. `name` and `value` must already be packed.
+    """
+    if name.__class__ is not str or value.__class__ is not str or timestamp is None:
+        return '\x0c\x00\x01\x0c\x00\x01' + \
+                encode_column(name, value, timestamp, ttl) + '\x00\x00'
+
+    if ttl is None:
+        return ''.join((_COLUMN_MUTATION_HEAD, _i32(len(name)), name,
+                        _VALUE_FIELD, _i32(len(value)), value,
+                        _TIMESTAMP_FIELD, _i64(timestamp),
+                        '\x00\x00\x00'))
+    return ''.join((_COLUMN_MUTATION_HEAD, _i32(len(name)), name,
+                    _VALUE_FIELD, _i32(len(value)), value,
+                    _TIMESTAMP_FIELD, _i64(timestamp),
+                    _TTL_FIELD, _i32(ttl),
+                    '\x00\x00\x00'))
+
+
+def encode_counter_mutation(name, value):
+    """
+    Encodes a :class:`~pycassa.cassandra.ttypes.Mutation` that adjusts
+    a single counter column by `value`.
+    """
+    name = _to_bytes(name)
+    return ''.join((_COUNTER_MUTATION_HEAD, _i32(len(name)), name,
+                    _COUNTER_VALUE_FIELD, _i64(value),
+                    '\x00\x00\x00'))
+
+
+def encode_super_column_mutation(name, columns):
+    """
+    Encodes a :class:`~pycassa.cassandra.ttypes.Mutation` that inserts
+    subcolumns into a super column. `columns` should be a list of
+    ``(name, value, timestamp, ttl)`` tuples.
+    """
+    name = _to_bytes(name)
+    parts = [_SUPER_MUTATION_HEAD, _i32(len(name)), name,
+             _SUBCOLUMNS_HEAD, _i32(len(columns))]
+    for column in columns:
+        parts.append(encode_column(*column))
+    parts.append('\x00\x00\x00')
+    return ''.join(parts)
+
+
+def encode_counter_super_column_mutation(name, columns):
+    """
+    Encodes a :class:`~pycassa.cassandra.ttypes.Mutation` that adjusts
+    counters in a super column. `columns` should be a list of
+    ``(name, value)`` tuples; any further items in each tuple, such
+    as a timestamp, are ignored.
+    """
+    name = _to_bytes(name)
+    parts = [_COUNTER_SUPER_MUTATION_HEAD, _i32(len(name)), name,
+             _SUBCOLUMNS_HEAD, _i32(len(columns))]
+    for column in columns:
+        subname = _to_bytes(column[0])
+        parts.extend(('\x0b\x00\x01', _i32(len(subname)), subname,
+                      _COUNTER_VALUE_FIELD, _i64(column[1]), _STOP))
+    parts.append('\x00\x00\x00')
+    return ''.join(parts)
+
+
+def encode_mutation(mutation):
+    """
+    Encodes any :class:`~pycassa.cassandra.ttypes.Mutation` object, such
+    as one holding a :class:`~pycassa.cassandra.ttypes.Deletion`.
+    """
+    trans = TTransport.TMemoryBuffer()
+    mutation.write(TBinaryProtocol.TBinaryProtocolAccelerated(trans))
+    return trans.getvalue()
+
+
+def encode_mutation_map(mutation_map):
+    """
+    Encodes a mutation map of the form ``{key: {column_family: mutations}}``,
+    where each item in `mutations` is either an encoded mutation, as
+    returned by the other functions in this module, or a
+    :class:`~pycassa.cassandra.ttypes.Mutation` object.
+
+    An :class:`EncodedMutationMap` is returned.
+    """
+    parts = [_ROW_MAP_TYPES, _i32(len(mutation_map))]
+    for key, cf_map in mutation_map.iteritems():
+        key = _to_bytes(key)
+        parts.extend((_i32(len(key)), key, _CF_MAP_TYPES, _i32(len(cf_map))))
+        for cf_name, mutations in cf_map.iteritems():
+            cf_name = _to_bytes(cf_name)
+            parts.extend((_i32(len(cf_name)), cf_name,
+                          _MUTATION_LIST_TYPE, _i32(len(mutations))))
+            for mutation in mutations:
+                if mutation.__class__ is not str:
+                    mutation = encode_mutation(mutation)
+                parts.append(mutation)
+    return EncodedMutationMap(''.join(parts))
+
+
+def encode_rows(rows):
+    """
+    Encodes a mutation map from an iterable of
+    ``(key, column_family, columns)`` tuples, where `columns` is a list of
+    ``(name, value, timestamp, ttl)`` tuples. Keys, names and values must
+    already be packed. Rows that share a key and column family are merged.
+
+    An :class:`EncodedMutationMap` is returned.
+    """
+    mutation_map = {}
+    for key, cf_name, columns in rows:
+        encoded = [encode_column_mutation(*column) for column in columns]
+        mutation_map.setdefault(key, {}).setdefault(cf_name, []).extend(encoded)
+    return encode_mutation_map(mutation_map)
+
+
+def encode_batch_mutate_args(mutation_map, consistency_level):
+    """
+    Encodes the arguments struct for `batch_mutate` or
+    `atomic_batch_mutate`. `mutation_map` should be an
+    :class:`EncodedMutationMap`.
+    """
+    return ''.join((_MUTATION_MAP_FIELD, mutation_map,
+                    _CONSISTENCY_LEVEL_FIELD, _i32(consistency_level), _STOP))
+
+
+def _identity(value):
+    return value
+
+
+def _skip(data, offset, ftype):
+    size = _FIXED_SIZES.get(ftype)
+    if size is not None:
+        return offset + size
+    if ftype == TType.STRING:
+        return offset + 4 + _read_i32(data, offset)[0]
+    if ftype == TType.STRUCT:
+        while data[offset] != _STOP:
+            offset = _skip(data, offset + 3, ord(data[offset]))
+        return offset + 1
+    if ftype == TType.MAP:
+        ktype, vtype, size = _read_map_header(data, offset)
+        offset += 6
+        for i in xrange(size):
+            offset = _skip(data, _skip(data, offset, ktype), vtype)
+        return offset
+    if ftype == TType.LIST or ftype == TType.SET:
+        etype, size = _read_list_header(data, offset)
+        offset += 5
+        for i in xrange(size):
+            offset = _skip(data, offset, etype)
+        return offset
+    raise TProtocolException(TProtocolException.INVALID_DATA,
+                             "Unexpected Thrift type %d" % ftype)
+
+
+def _read_string(data, offset):
+    size = _read_i32(data, offset)[0]
+    offset += 4
+    return data[offset:offset + size], offset + size
+
+
+def _read_column(data, offset):
+    """
+    Reads a Column or CounterColumn struct, returning
+    ``(name, value, timestamp, ttl, offset)``.
+    """
+    name = value = timestamp = ttl = None
+    while data[offset] != _STOP:
+        ftype, fid = _read_field_header(data, offset)
+        offset += 3
+        if fid == 1 and ftype == TType.STRING:
+            name, offset = _read_string(data, offset)
+        elif fid == 2 and ftype == TType.STRING:
+            value, offset = _read_string(data, offset)
+        elif fid == 2 and ftype == TType.I64:
+            # CounterColumn.value
+            value = _read_i64(data, offset)[0]
+            offset += 8
+        elif fid == 3 and ftype == TType.I64:
+            timestamp = _read_i64(data, offset)[0]
+            offset += 8
+        elif fid == 4 and ftype == TType.I32:
+            ttl = _read_i32(data, offset)[0]
+            offset += 4
+        else:
+            offset = _skip(data, offset, ftype)
+    return name, value, timestamp, ttl, offset + 1
+
+
+def _success_offset(data, ftype):
+    """
+    Returns the offset of the `success` field's value in an encoded
+    result struct, or ``None`` if the result holds an exception instead.
+    """
+    offset = 0
+    while data[offset] != _STOP:
+        field_type, fid = _read_field_header(data, offset)
+        offset += 3
+        if fid == 0 and field_type == ftype:
+            return offset
+        offset = _skip(data, offset, field_type)
+    return None
+
+
+class SliceDecoder(object):
+    """
+    Decodes the encoded results of slice queries directly into result rows.
+
+    `name_unpacker` and `super_name_unpacker` are called with each packed
+    column or super column name. Column values are unpacked by the entry
+    for the column's packed name in `value_unpackers`, if there is one, or
+    by `value_unpacker` otherwise. Any of these may be ``None`` to leave
+    names or values packed. Rows and super columns are instances of
+    `dict_class`.
+
+    As with :meth:`.ColumnFamily.get()`, each column's value is replaced
+    by a ``(value, timestamp)``, ``(value, ttl)`` or
+    ``(value, timestamp, ttl)`` tuple when `include_timestamp` or
+    `include_ttl` are set. If `as_items` is ``True``, rows are lists
+    of ``(name, value)`` tuples instead.
+
+    The ``decode_*`` methods return ``None`` if the result contains an
+    exception instead of a successful response.
+    """
+
+    def __init__(self, name_unpacker=None, super_name_unpacker=None,
+                 value_unpacker=None, value_unpackers=None, dict_class=dict,
+                 include_timestamp=False, include_ttl=False, as_items=False):
+        self.name_unpacker = name_unpacker or _identity
+        self.super_name_unpacker = super_name_unpacker or _identity
+        self.value_unpacker = value_unpacker or _identity
+        self.value_unpackers = value_unpackers or {}
+        self.dict_class = dict_class
+        self.include_timestamp = include_timestamp
+        self.include_ttl = include_ttl
+        self.as_items = as_items
+
+    def _read_subcolumns(self, data, offset, counters):
+        etype, size = _read_list_header(data, offset)
+        offset += 5
+        unpack_name = self.name_unpacker
+        unpack_value = self.value_unpacker
+        value_unpackers = self.value_unpackers
+        include_timestamp = self.include_timestamp
+        include_ttl = self.include_ttl
+        ret = self.dict_class()
+        for i in xrange(size):
+            name, value, timestamp, ttl, offset = _read_column(data, offset)
+            if counters:
+                ret[unpack_name(name)] = value
+                continue
+            value = value_unpackers.get(name, unpack_value)(value)
+            if include_timestamp:
+                if include_ttl:
+                    value = (value, timestamp, ttl)
+                else:
+                    value = (value, timestamp)
+            elif include_ttl:
+                value = (value, ttl)
+            ret[unpack_name(name)] = value
+        return ret, offset
+
+    def _read_super_column(self, data, offset, counters):
+        name = columns = None
+        while data[offset] != _STOP:
+            ftype, fid = _read_field_header(data, offset)
+            offset += 3
+            if fid == 1 and ftype == TType.STRING:
+                name, offset = _read_string(data, offset)
+            elif fid == 2 and ftype == TType.LIST:
+                columns, offset = self._read_subcolumns(data, offset, counters)
+            else:
+                offset = _skip(data, offset, ftype)
+        if columns is None:
+            columns = self.dict_class()
+        return name, columns, offset + 1
+
+    def _read_row(self, data, offset):
+        """
+        Reads a list<ColumnOrSuperColumn>, returning
+        ``(row, count, last_name, offset)``.
+        """
+        etype, count = _read_list_header(data, offset)
+        offset += 5
+
+        if self.as_items:
+            row = []
+            append = row.append
+            put = lambda name, value: append((name, value))
+        else:
+            row = self.dict_class()
+            put = row.__setitem__
+
+        unpack_name = self.name_unpacker
+        unpack_value = self.value_unpacker
+        value_unpackers = self.value_unpackers
+        include_timestamp = self.include_timestamp
+        include_ttl = self.include_ttl
+        startswith = data.startswith
+        last_name = None
+        for i in xrange(count):
+            # Cassandra writes the fields of a Column in order, so try
+            # reading them by position before falling back to the general
+            # field by field parsing
+            if startswith(_COLUMN_RESULT_HEAD, offset):
+                pos = offset + 10
+                end = pos + _read_i32(data, offset + 6)[0]
+                name = data[pos:end]
+                if startswith(_VALUE_FIELD, end):
+                    pos = end + 7
+                    end = pos + _read_i32(data, end + 3)[0]
+                    if startswith(_TIMESTAMP_FIELD, end):
+                        value = data[pos:end]
+                        timestamp = _read_i64(data, end + 3)[0]
+                        end += 11
+                        ttl = None
+                        if startswith(_TTL_FIELD, end):
+                            ttl = _read_i32(data, end + 3)[0]
+                            end += 7
+                        if startswith(_COLUMN_RESULT_TAIL, end):
+                            offset = end + 2
+                            value = value_unpackers.get(name, unpack_value)(value)
+                            if include_timestamp:
+                                if include_ttl:
+                                    value = (value, timestamp, ttl)
+                                else:
+                                    value = (value, timestamp)
+                            elif include_ttl:
+                                value = (value, ttl)
+                            put(unpack_name(name), value)
+                            last_name = name
+                            continue
+
+            while data[offset] != _STOP:
+                ftype, fid = _read_field_header(data, offset)
+                offset += 3
+                if fid == 1:
+                    name, value, timestamp, ttl, offset = _read_column(data, offset)
+                    value = value_unpackers.get(name, unpack_value)(value)
+                    if include_timestamp:
+                        if include_ttl:
+                            value = (value, timestamp, ttl)
+                        else:
+                            value = (value, timestamp)
+                    elif include_ttl:
+                        value = (value, ttl)
+                    put(unpack_name(name), value)
+                elif fid == 3:
+                    name, value, timestamp, ttl, offset = _read_column(data, offset)
+                    put(unpack_name(name), value)
+                elif fid == 2 or fid == 4:
+                    name, columns, offset = self._read_super_column(data, offset, fid == 4)
+                    put(self.super_name_unpacker(name), columns)
+                else:
+                    offset = _skip(data, offset, ftype)
+                    continue
+                last_name = name
+            offset += 1
+        return row, count, last_name, offset
+
+    def _read_key_slices(self, data, offset):
+        etype, size = _read_list_header(data, offset)
+        offset += 5
+        ret = []
+        for i in xrange(size):
+            key = None
+            row = self.dict_class()
+            while data[offset] != _STOP:
+                ftype, fid = _read_field_header(data, offset)
+                offset += 3
+                if fid == 1 and ftype == TType.STRING:
+                    key, offset = _read_string(data, offset)
+                elif fid == 2 and ftype == TType.LIST:
+                    row, count, last_name, offset = self._read_row(data, offset)
+                else:
+                    offset = _skip(data, offset, ftype)
+            offset += 1
+            ret.append((key, row))
+        return ret
+
+    def decode_slice(self, data):
+        """
+        Decodes an encoded `get_slice_result`, returning a
+        ``(row, count, last_name)`` tuple, where `last_name` is the packed
+        name of the last column or super column in the row.
+        """
+        offset = _success_offset(data, TType.LIST)
+        if offset is None:
+            return None
+        return self._read_row(data, offset)[:3]
+
+    def decode_multiget_slice(self, data):
+        """
+        Decodes an encoded `multiget_slice_result`, returning a dictionary
+        mapping each packed key to its row.
+        """
+        offset = _success_offset(data, TType.MAP)
+        if offset is None:
+            return None
+        ktype, vtype, size = _read_map_header(data, offset)
+        offset += 6
+        ret = {}
+        for i in xrange(size):
+            key, offset = _read_string(data, offset)
+            ret[key], count, last_name, offset = self._read_row(data, offset)
+        return ret
+
+    def decode_key_slices(self, data):
+        """
+        Decodes an encoded `get_range_slices_result` or
+        `get_indexed_slices_result`, returning a list of
+        ``(key, row)`` tuples in which `key` is still packed.
+        """
+        offset = _success_offset(data, TType.LIST)
+        if offset is None:
+            return None
+        return self._read_key_slices(data, offset)
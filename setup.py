@@ -126,7 +126,7 @@ setup(
       tests_require = ['nose'],
       install_requires = ['thrift'],
       py_modules=['ez_setup'],
-      scripts=['pycassaShell'],
+      scripts=['pycassaShell', 'pycassaStress'],
       cmdclass={"doc": doc, "rpm": rpm},
       classifiers=[
           'Development Status :: 5 - Production/Stable',
@@ -0,0 +1,140 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import assert_raises, assert_equal
+
+from pycassa import ColumnFamily, ColumnFamilyMap, NotFoundException
+from pycassa.batch import Mutator
+from pycassa.contrib.filestore import LocalPool
+from pycassa.contrib.ordering import SortedDict
+from pycassa.system_manager import SystemManager
+from pycassa.types import LongType, UTF8Type
+
+
+class TestSortedDictUpdate(unittest.TestCase):
+
+    def test_update(self):
+        d = SortedDict()
+        d['b'] = 1
+        d.update([('c', 2), ('a', 3), ('b', 4)])
+        assert_equal(d.items(), [('a', 3), ('b', 4), ('c', 2)])
+        assert_equal(d.slice('b', 'c'), [('b', 4), ('c', 2)])
+        del d['b']
+        assert_equal(d.keys(), ['a', 'c'])
+
+
+class User(object):
+    name = UTF8Type()
+    age = LongType()
+
+
+class TestLocalPool(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'test.db')
+        self.pool = self.open()
+
+    def tearDown(self):
+        self.pool.dispose()
+        shutil.rmtree(self.dir)
+
+    def open(self):
+        pool = LocalPool('TestKeyspace', self.path, pool_size=2)
+        pool.create_column_family('Long', comparator_type='LongType')
+        pool.create_column_family('Super1', column_type='Super',
+                                  comparator_type='UTF8Type', subcomparator_type='LongType')
+        pool.create_column_family('Counter1', default_validation_class='CounterColumnType')
+        return pool
+
+    def reopen(self):
+        self.pool.dispose()
+        self.pool = self.open()
+
+    def test_persisted(self):
+        cf = ColumnFamily(self.pool, 'Long')
+        cf.insert('key1', {10: 'ten', -1: 'minus one', 2: 'two'})
+        cf.insert('key2', {1: 'one'}, timestamp=5)
+        cf.remove('key1', [2])
+        ColumnFamily(self.pool, 'Super1').insert('key', {u'b': {2: 'x'}, u'a': {1: 'y'}})
+        ColumnFamily(self.pool, 'Counter1').add('key', 'hits', 3)
+        self.reopen()
+
+        cf = ColumnFamily(self.pool, 'Long')
+        assert_equal(cf.get('key1').items(), [(-1, 'minus one'), (10, 'ten')])
+        assert_equal(cf.get('key1', column_start=0).keys(), [10])
+        assert_equal(cf.get('key2', include_timestamp=True), {1: ('one', 5)})
+        assert_equal(ColumnFamily(self.pool, 'Super1').get('key').items(),
+                     [(u'a', {1: 'y'}), (u'b', {2: 'x'})])
+        counter = ColumnFamily(self.pool, 'Counter1')
+        assert_equal(counter.get('key'), {'hits': 3})
+        counter.add('key', 'hits', 2)
+        self.reopen()
+        assert_equal(ColumnFamily(self.pool, 'Counter1').get('key'), {'hits': 5})
+
+    def test_truncate_and_drop(self):
+        cf = ColumnFamily(self.pool, 'Long')
+        cf.insert('key', {1: 'one'})
+        cf.truncate()
+        self.reopen()
+        assert_raises(NotFoundException, ColumnFamily(self.pool, 'Long').get, 'key')
+
+        ColumnFamily(self.pool, 'Super1').insert('key', {u'a': {1: 'y'}})
+        sys = SystemManager(self.pool.local_server.server)
+        sys.drop_column_family('TestKeyspace', 'Super1')
+        sys.close()
+        self.reopen()
+        assert_raises(NotFoundException, ColumnFamily(self.pool, 'Super1').get, 'key')
+
+    def test_mutator_and_map(self):
+        cf = ColumnFamily(self.pool, 'Long')
+        mutator = Mutator(self.pool)
+        mutator.insert(cf, 'key1', {1: 'one'})
+        mutator.insert(cf, 'key2', {2: 'two'})
+        mutator.remove(cf, 'key1')
+        mutator.send()
+        self.reopen()
+        assert_equal(dict(ColumnFamily(self.pool, 'Long').get_range()), {'key2': {2: 'two'}})
+
+        self.pool.create_column_family('Users', comparator_type='UTF8Type')
+        users = ColumnFamilyMap(User, self.pool, 'Users')
+        user = User()
+        user.key, user.name, user.age = 'jsmith', u'John', 42
+        users.insert(user)
+        self.reopen()
+        user = ColumnFamilyMap(User, self.pool, 'Users').get('jsmith')
+        assert_equal((user.name, user.age), (u'John', 42))
+
+    def test_import_rows(self):
+        rows = [('key%03d' % i, dict((j, str(j)) for j in range(20))) for i in range(50)]
+        assert_equal(self.pool.import_rows('Long', rows, timestamp=7), 1000)
+        cf = ColumnFamily(self.pool, 'Long')
+        assert_equal(cf.get('key010', column_start=18, include_timestamp=True),
+                     {18: ('18', 7), 19: ('19', 7)})
+
+        # a round trip through an export with timestamps
+        export = list(cf.get_range(include_timestamp=True, column_count=100))
+        cf.truncate()
+        assert_equal(self.pool.import_rows('Long', export, include_timestamp=True), 1000)
+        self.reopen()
+        cf = ColumnFamily(self.pool, 'Long')
+        assert_equal(list(cf.get_range(include_timestamp=True, column_count=100)), export)
+
+        self.pool.import_rows('Super1', [('key', {u'a': {1: 'x', 2: 'y'}})])
+        self.pool.import_rows('Counter1', [('key', {'hits': 4})])
+        self.pool.import_rows('Counter1', [('key', {'hits': 1})])
+        assert_equal(ColumnFamily(self.pool, 'Super1').get('key'), {u'a': {1: 'x', 2: 'y'}})
+        assert_equal(ColumnFamily(self.pool, 'Counter1').get('key'), {'hits': 5})
+
+    def test_expired_columns_dropped(self):
+        cf = ColumnFamily(self.pool, 'Long')
+        cf.insert('key', {1: 'one'})
+        cf.insert('key', {2: 'two'}, ttl=1)
+        self.pool.storage._db.execute('UPDATE columns SET expires = 0 WHERE expires IS NOT NULL')
+        self.pool.storage.commit()
+        self.reopen()
+        assert_equal(ColumnFamily(self.pool, 'Long').get('key'), {1: 'one'})
+        assert_equal(self.pool.storage._db.execute('SELECT COUNT(*) FROM columns').fetchone(),
+                     (1,))
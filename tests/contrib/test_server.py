@@ -0,0 +1,250 @@
+import time
+import unittest
+import uuid
+
+from nose.tools import assert_raises, assert_equal, assert_true
+
+from pycassa import ColumnFamily, ConnectionPool, NotFoundException, index
+from pycassa.cassandra.ttypes import TimedOutException
+from pycassa.contrib.ordering import SortedDict, sort_key_for
+from pycassa.contrib.server import CassandraServer, DISCONNECT
+from pycassa.pool import MaximumRetryException
+from pycassa.system_manager import SystemManager, LONG_TYPE, UTF8_TYPE
+from pycassa.marshal import packer_for
+from pycassa.types import CompositeType, LongType, UTF8Type, TimeUUIDType
+from pycassa.util import convert_time_to_uuid
+
+server = pool = None
+
+
+def setup_module():
+    global server, pool
+    server = CassandraServer().start()
+    sys = SystemManager(server.server)
+    sys.create_keyspace('TestKeyspace', 'SimpleStrategy', {'replication_factor': '1'})
+    sys.create_column_family('TestKeyspace', 'Standard1')
+    sys.create_column_family('TestKeyspace', 'Long', comparator_type=LONG_TYPE)
+    sys.create_column_family('TestKeyspace', 'Super1', super=True,
+                             comparator_type=UTF8_TYPE, subcomparator_type=LONG_TYPE)
+    sys.create_column_family('TestKeyspace', 'Counter1',
+                             default_validation_class='CounterColumnType')
+    sys.create_column_family('TestKeyspace', 'Composite1',
+            comparator_type=CompositeType(LongType(reversed=True), UTF8Type()))
+    sys.create_column_family('TestKeyspace', 'Indexed1')
+    sys.create_column_family('TestKeyspace', 'DynamicComposite1',
+            comparator_type='DynamicCompositeType(a=>AsciiType,l=>LongType)')
+    sys.create_index('TestKeyspace', 'Indexed1', 'birthdate', LONG_TYPE)
+    sys.close()
+    pool = ConnectionPool('TestKeyspace', [server.server], pool_size=2,
+                          max_retries=3)
+
+
+def teardown_module():
+    pool.dispose()
+    server.stop()
+
+
+class TestOrdering(unittest.TestCase):
+
+    def test_long(self):
+        d = SortedDict(sort_key_for('LongType'))
+        for n in (10, -3, 2):
+            d[LongType().pack(n)] = n
+        assert_equal(d.values(), [-3, 2, 10])
+        assert_equal([v for k, v in d.slice(LongType().pack(2))], [2, 10])
+        assert_equal([v for k, v in d.slice(reversed=True, count=2)], [10, 2])
+
+    def test_timeuuid(self):
+        d = SortedDict(sort_key_for('TimeUUIDType'))
+        for t in (3, 1, 2):
+            d[TimeUUIDType().pack(convert_time_to_uuid(t, randomize=True))] = t
+        assert_equal(d.values(), [1, 2, 3])
+
+    def test_timeuuid_bounds(self):
+        key = sort_key_for('TimeUUIDType')
+        lowest = convert_time_to_uuid(1000, lowest_val=True)
+        highest = convert_time_to_uuid(1000, lowest_val=False)
+        # the variant bits keep the first byte between 0x80 and 0xbf
+        for first in (0x80, 0xa5, 0xbf):
+            for last in (0x00, 0x7f, 0x80, 0xff):
+                tail = chr(first) + '\x11' * 6 + chr(last)
+                u = uuid.UUID(bytes=lowest.bytes[:8] + tail)
+                assert_true(key(lowest.bytes) <= key(u.bytes) <= key(highest.bytes))
+        assert_true(key(highest.bytes) < key(convert_time_to_uuid(1000.001).bytes))
+
+    def test_lexical_uuid(self):
+        key = sort_key_for('LexicalUUIDType')
+        names = [uuid.UUID(u).bytes for u in ('7fffffff-0000-0000-0000-000000000000',
+                                              '80000000-0000-0000-0000-000000000000',
+                                              '00000000-0000-0000-8000-000000000000',
+                                              '00000000-0000-0000-7fff-000000000000')]
+        assert_equal(sorted(names, key=key), [names[1], names[2], names[3], names[0]])
+
+    def test_dynamic_composite(self):
+        typestr = 'DynamicCompositeType(a=>AsciiType,l=>LongType)'
+        pack = packer_for(typestr)
+        d = SortedDict(sort_key_for(typestr))
+        for name in [(('l', 1),), (('l', -1),), (('a', 'x'),), (('l', -1), ('a', 'b'))]:
+            d[pack(name)] = name
+        for n in (2, 3):
+            # pycassa cannot pack the swapped-case alias of a reversed type
+            d['\x80L' + pack((('l', n),))[2:]] = (('L', n),)
+        # reversed aliases are ReversedType, which sorts after LongType
+        assert_equal(d.values(), [(('a', 'x'),), (('l', -1),), (('l', -1), ('a', 'b')),
+                                  (('l', 1),), (('L', 3),), (('L', 2),)])
+        start = pack(((('l', -5), True),), True)
+        finish = pack(((('l', 0), True),), False)
+        assert_equal([v for k, v in d.slice(start, finish)],
+                     [(('l', -1),), (('l', -1), ('a', 'b'))])
+
+    def test_reversed_composite(self):
+        comp = CompositeType(LongType(reversed=True), UTF8Type())
+        d = SortedDict(sort_key_for('CompositeType(ReversedType(LongType),UTF8Type)'))
+        for name in ((1, 'a'), (3, 'b'), (3, 'a'), (2, 'z')):
+            d[comp.pack(name)] = name
+        assert_equal(d.values(), [(3, 'a'), (3, 'b'), (2, 'z'), (1, 'a')])
+
+    def test_delete(self):
+        d = SortedDict()
+        d['b'] = 1
+        d['a'] = 2
+        del d['b']
+        assert_equal(d.items(), [('a', 2)])
+        assert_equal(d.pop('x', None), None)
+
+
+class TestServer(unittest.TestCase):
+
+    def tearDown(self):
+        server.clear_failures()
+        server.latency = 0
+        for name in ('Standard1', 'Long', 'Super1', 'Counter1', 'Composite1', 'Indexed1',
+                     'DynamicComposite1'):
+            ColumnFamily(pool, name).truncate()
+
+    def test_insert_get(self):
+        cf = ColumnFamily(pool, 'Standard1')
+        cf.insert('key', {'b': 'vb', 'a': 'va'})
+        assert_equal(cf.get('key').items(), [('a', 'va'), ('b', 'vb')])
+        assert_equal(cf.get('key', columns=['b']), {'b': 'vb'})
+        assert_equal(cf.get_count('key'), 2)
+        cf.remove('key', ['a'])
+        assert_equal(cf.get('key').keys(), ['b'])
+        cf.remove('key')
+        assert_raises(NotFoundException, cf.get, 'key')
+
+    def test_timestamps(self):
+        cf = ColumnFamily(pool, 'Standard1')
+        cf.insert('key', {'a': 'new'}, timestamp=10)
+        cf.insert('key', {'a': 'old'}, timestamp=5)
+        assert_equal(cf.get('key'), {'a': 'new'})
+
+    def test_ttl(self):
+        cf = ColumnFamily(pool, 'Standard1')
+        cf.insert('key', {'a': 'v'}, ttl=1)
+        time.sleep(1.1)
+        assert_raises(NotFoundException, cf.get, 'key')
+
+    def test_comparator_order(self):
+        cf = ColumnFamily(pool, 'Long')
+        cf.insert('key', {10: 'a', -3: 'b', 2: 'c'})
+        assert_equal(cf.get('key').keys(), [-3, 2, 10])
+        assert_equal(cf.get('key', column_start=0).keys(), [2, 10])
+        assert_equal(cf.get('key', column_reversed=True, column_count=2).keys(), [10, 2])
+
+        cf = ColumnFamily(pool, 'Composite1')
+        cf.insert('key', {(1, 'a'): '1', (3, 'b'): '2', (3, 'a'): '3', (2, 'z'): '4'})
+        assert_equal(cf.get('key').keys(), [(3, 'a'), (3, 'b'), (2, 'z'), (1, 'a')])
+        assert_equal(cf.get('key', column_start=(3,), column_finish=(2,)).keys(),
+                     [(3, 'a'), (3, 'b'), (2, 'z')])
+
+    def test_dynamic_composite_slice(self):
+        cf = ColumnFamily(pool, 'DynamicComposite1')
+        cf.insert('key', {(('l', 1),): '1', (('l', -1),): '2', (('a', 'x'),): '3',
+                          (('l', -2), ('a', 'b')): '4'})
+        assert_equal(cf.get('key').values(), ['3', '4', '2', '1'])
+        assert_equal(cf.get('key', column_start=((('l', -1), True),),
+                            column_finish=((('l', 1), True),)).values(), ['2', '1'])
+
+        # an alias and its class name are the same type, so name the same column
+        cf.insert('key', {(('LongType', 1),): '5'})
+        assert_equal(cf.get('key', column_start=((('l', 1), True),)),
+                     {(('LongType', 1),): '5'})
+        assert_equal(cf.get('key', columns=[(('l', 1),)]).values(), ['5'])
+
+    def test_caching(self):
+        sys = SystemManager(server.server)
+        sys.create_column_family('TestKeyspace', 'Cached1')
+        sys.alter_column_family('TestKeyspace', 'Cached1', caching='rows_only')
+        caching = sys.get_keyspace_column_families('TestKeyspace')['Cached1'].caching
+        sys.drop_column_family('TestKeyspace', 'Cached1')
+        sys.close()
+        assert_equal(caching, 'ROWS_ONLY')
+
+    def test_get_range_paging(self):
+        cf = ColumnFamily(pool, 'Standard1')
+        keys = ['key%02d' % i for i in range(25)]
+        for key in keys:
+            cf.insert(key, {'a': 'v'})
+        assert_equal([k for k, _ in cf.get_range(buffer_size=7)], keys)
+        assert_equal([k for k, _ in cf.get_range(start='key03', finish='key05')],
+                     ['key03', 'key04', 'key05'])
+        assert_equal(len(cf.multiget(keys[:5] + ['missing'])), 5)
+
+    def test_indexed_slices(self):
+        cf = ColumnFamily(pool, 'Indexed1')
+        cf.insert('a', {'birthdate': 1})
+        cf.insert('b', {'birthdate': 2})
+        cf.insert('c', {'birthdate': 3})
+        clause = index.create_index_clause(
+                [index.create_index_expression('birthdate', 2, index.GTE)])
+        assert_raises(Exception, list, cf.get_indexed_slices(clause))
+        clause = index.create_index_clause(
+                [index.create_index_expression('birthdate', 2)])
+        assert_equal([k for k, _ in cf.get_indexed_slices(clause)], ['b'])
+
+    def test_super_and_counters(self):
+        cf = ColumnFamily(pool, 'Super1')
+        cf.insert('key', {'b': {2: 'x', 1: 'y'}, 'a': {5: 'z'}})
+        assert_equal(cf.get('key').keys(), ['a', 'b'])
+        assert_equal(cf.get('key', super_column='b').keys(), [1, 2])
+        cf.remove('key', super_column='a')
+        assert_equal(cf.get('key').keys(), ['b'])
+
+        cf = ColumnFamily(pool, 'Counter1')
+        cf.add('key', 'c')
+        cf.add('key', 'c', 4)
+        assert_equal(cf.get('key'), {'c': 5})
+
+    def test_batch(self):
+        cf = ColumnFamily(pool, 'Standard1')
+        cf.insert('gone', {'a': 'v'})
+        b = cf.batch()
+        b.insert('new', {'a': 'v'})
+        b.remove('gone')
+        b.send()
+        assert_equal(cf.get('new'), {'a': 'v'})
+        assert_raises(NotFoundException, cf.get, 'gone')
+
+    def test_injected_failures(self):
+        cf = ColumnFamily(pool, 'Standard1')
+        cf.insert('key', {'a': 'v'})
+
+        server.inject_failure(TimedOutException(), methods=['get_slice'], count=2)
+        assert_equal(cf.get('key'), {'a': 'v'})
+
+        server.inject_failure(DISCONNECT)
+        assert_equal(cf.get('key'), {'a': 'v'})
+
+        server.inject_failure(TimedOutException(), methods=['get_slice'], count=None)
+        assert_raises(MaximumRetryException, cf.get, 'key')
+        server.clear_failures()
+        assert_equal(cf.get('key'), {'a': 'v'})
+
+    def test_latency(self):
+        cf = ColumnFamily(pool, 'Standard1')
+        cf.insert('key', {'a': 'v'})
+        server.latency = lambda method: 0.1 if method == 'get_slice' else 0
+        start = time.time()
+        cf.get('key')
+        assert_true(time.time() - start >= 0.1)
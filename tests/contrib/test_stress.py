@@ -0,0 +1,87 @@
+import random
+import sys
+import unittest
+from StringIO import StringIO
+
+from nose.tools import assert_raises, assert_equal, assert_true
+
+from pycassa.contrib import stress
+from pycassa.contrib.stress import KeyChooser, Recorder, parse_args
+
+
+class TestKeyChooser(unittest.TestCase):
+
+    def test_uniform(self):
+        chooser = KeyChooser(10, rand=random.Random(1))
+        picks = [chooser.next() for i in range(1000)]
+        assert_equal(set(picks), set(range(10)))
+
+    def test_zipf(self):
+        chooser = KeyChooser(1000, 'zipf', rand=random.Random(1))
+        picks = [chooser.next() for i in range(10000)]
+        assert_true(all(0 <= p < 1000 for p in picks))
+        # with exponent 1, the first key gets about 1 / H(1000) of the picks
+        assert_true(1000 < picks.count(0) < 1600)
+        assert_true(picks.count(0) > 5 * picks.count(9))
+
+    def test_unknown_distribution(self):
+        assert_raises(ValueError, KeyChooser, 10, 'normal')
+
+
+class TestRecorder(unittest.TestCase):
+
+    def test_drain_and_merge(self):
+        recorder = Recorder()
+        recorder.record('read', 0.001)
+        recorder.record('read', 0.002, failed=True)
+        stats = recorder.drain()
+        assert_equal(stats['read'][0].count, 2)
+        assert_equal(stats['read'][1], 1)
+        assert_equal(recorder.drain(), {})
+
+        total = Recorder()
+        total.merge(stats)
+        total.merge(stats)
+        assert_equal(total.drain()['read'][0].count, 4)
+
+
+class TestOptions(unittest.TestCase):
+
+    def test_mix(self):
+        options = parse_args(['--mix', 'read=8,write=2,scan'])
+        assert_equal(options.mix, [('read', 8.0), ('write', 2.0), ('scan', 1.0)])
+        assert_equal(options.duration, 30.0)
+        assert_equal(options.servers, ['localhost:9160'])
+
+    def test_invalid(self):
+        cases = [(['--mix', 'delete=1'], "unknown operation 'delete'"),
+                 (['--mix', 'read=x'], "invalid weight 'x'"),
+                 (['--mix', 'read=0'], 'no operations to run'),
+                 (['--local', '-s', 'localhost:9160'], 'can not be used together')]
+        stderr = sys.stderr
+        for argv, message in cases:
+            # optparse prints the usage and the error before exiting
+            sys.stderr = StringIO()
+            try:
+                assert_raises(SystemExit, parse_args, argv)
+                assert_true(message in sys.stderr.getvalue())
+            finally:
+                sys.stderr = stderr
+
+
+class TestRun(unittest.TestCase):
+
+    def test_local(self):
+        options = parse_args(['--local', '--populate', '--keys', '50', '-n', '200',
+                              '-t', '2', '--mix', ','.join(stress.OPERATIONS),
+                              '--distribution', 'zipf', '--seed', '1',
+                              '--scan-rows', '5', '--batch-rows', '3'])
+        out = StringIO()
+        stats = stress.run(options, out)
+        assert_equal(sum(histogram.count for histogram, errors in stats.values()), 200)
+        assert_equal(sum(errors for histogram, errors in stats.values()), 0)
+        assert_equal(set(stats), set(stress.OPERATIONS))
+
+        lines = out.getvalue().splitlines()
+        assert_true(lines[0].startswith('populated 50 keys'))
+        assert_equal(lines[-1].split()[:2], ['total', '200'])
@@ -0,0 +1,267 @@
+import struct
+import time
+import unittest
+import uuid
+
+from nose.tools import assert_raises, assert_equal, assert_true
+
+from pycassa import index, NotFoundException
+from pycassa.contrib.stubs import ColumnFamilyStub, ConnectionPoolStub
+from pycassa.types import CompositeType, LongType, UTF8Type
+from pycassa.util import convert_time_to_uuid
+
+
+class TestOrdering(unittest.TestCase):
+
+    def test_comparator(self):
+        cf = ColumnFamilyStub(comparator_type='LongType')
+        cf.insert('key', dict((i, str(i)) for i in (10, -1, 2, 300)))
+        assert_equal(cf.get('key').keys(), [-1, 2, 10, 300])
+        assert_equal(cf.get('key', column_start=2, column_finish=10).keys(), [2, 10])
+        assert_equal(cf.get('key', column_start=10, column_reversed=True).keys(),
+                     [10, 2, -1])
+        assert_raises(struct.error, cf.insert, 'key', {'a': 'a'})
+
+    def test_reversed_comparator(self):
+        cf = ColumnFamilyStub(comparator_type=LongType(reversed=True))
+        cf.insert('key', {1: 'a', 3: 'c', 2: 'b'})
+        assert_equal(cf.get('key').keys(), [3, 2, 1])
+        assert_equal(cf.get('key', column_start=2).keys(), [2, 1])
+
+    def test_inferred_types(self):
+        cf = ColumnFamilyStub()
+        cf.insert('key', dict((i, '') for i in (10, -1, 2)))
+        assert_equal(cf.get('key').keys(), [-1, 2, 10])
+
+        cf.truncate()
+        uuids = [convert_time_to_uuid(time.time() + i, randomize=True) for i in (2, 0, 1)]
+        cf.insert('key', dict.fromkeys(uuids, ''))
+        assert_equal(cf.get('key').keys(), [uuids[1], uuids[2], uuids[0]])
+
+    def test_mixed_types(self):
+        cf = ColumnFamilyStub()
+        tuuid = convert_time_to_uuid(time.time(), randomize=True)
+        for key in (1, 'a', tuuid, 'z', 2L):
+            cf.insert(key, {'col': ''})
+        assert_equal(cf.get(1), {'col': ''})
+        assert_equal(cf.get('a'), {'col': ''})
+        assert_equal(cf.get(tuuid), {'col': ''})
+        assert_equal(len(list(cf.get_range())), 5)
+
+        cf.insert('row1', {'b': ''})
+        cf.insert('row1', {10: '', 'a': '', 2.5: ''})
+        assert_equal(cf.get('row1').keys(), [2.5, 10, 'a', 'b'])
+        assert_equal(cf.get('row1', column_start=3).keys(), [10, 'a', 'b'])
+        # names are not bound to the types of other rows' names
+        cf.insert('row2', {tuuid: '', u'x': ''})
+        assert_equal(set(cf.get('row2')), set([tuuid, u'x']))
+
+    def test_composite(self):
+        cf = ColumnFamilyStub(comparator_type=CompositeType(LongType(), UTF8Type()))
+        cf.insert('key', {(1, u'b'): '', (2, u'a'): '', (1, u'a'): '', (3, u'a'): ''})
+        assert_equal(cf.get('key').keys(), [(1, u'a'), (1, u'b'), (2, u'a'), (3, u'a')])
+        assert_equal(cf.get('key', column_start=(1,), column_finish=(2,)).keys(),
+                     [(1, u'a'), (1, u'b'), (2, u'a')])
+        assert_equal(cf.get('key', column_start=(2,), column_reversed=True).keys(),
+                     [(2, u'a'), (1, u'b'), (1, u'a')])
+
+    def test_dynamic_composite(self):
+        cf = ColumnFamilyStub(comparator_type='DynamicCompositeType(a=>AsciiType,l=>LongType)')
+        cf.insert('key', {(('l', 1),): '1', (('l', -1),): '2', (('a', 'x'),): '3',
+                          (('l', -2), ('a', 'b')): '4'})
+        assert_equal(cf.get('key').values(), ['3', '4', '2', '1'])
+        assert_equal(cf.get('key', column_start=((('l', -1), True),),
+                            column_finish=((('l', 1), True),)).values(), ['2', '1'])
+        assert_equal(cf.get('key', column_start=(('l', 0),),
+                            column_reversed=True).values(), ['2', '4', '3'])
+
+        # an alias and its class name name the same column
+        cf.insert('key', {(('LongType', 1),): '5'})
+        assert_equal(cf.get('key', column_start=((('l', 1), True),)),
+                     {(('LongType', 1),): '5'})
+
+    def test_timeuuid(self):
+        cf = ColumnFamilyStub(comparator_type='TimeUUIDType')
+        t = time.time()
+        uuids = [convert_time_to_uuid(t, randomize=True) for i in range(20)]
+        later = convert_time_to_uuid(t + 1, randomize=True)
+        cf.insert('key', dict.fromkeys(uuids + [later], ''))
+        lowest = convert_time_to_uuid(t, lowest_val=True)
+        highest = convert_time_to_uuid(t, lowest_val=False)
+        assert_equal(sorted(cf.get('key', column_start=lowest, column_finish=highest)),
+                     sorted(uuids))
+        assert_equal(cf.get('key', column_start=highest).keys(), [later])
+
+    def test_lexical_uuid(self):
+        cf = ColumnFamilyStub(comparator_type='LexicalUUIDType')
+        uuids = [uuid.UUID(int=i) for i in (0x7fffffffffffffff << 64,
+                                            1 << 127, 0x8000000000000000, 1)]
+        cf.insert('key', dict.fromkeys(uuids, ''))
+        assert_equal(cf.get('key').keys(), [uuids[1], uuids[2], uuids[3], uuids[0]])
+        assert_equal(cf.get('key', column_start=uuid.UUID(int=0),
+                            column_finish=uuids[0]).keys(), [uuids[3], uuids[0]])
+
+    def test_keys(self):
+        cf = ColumnFamilyStub()
+        for key in ('b', 'c', 'a'):
+            cf.insert(key, {'col': key})
+        assert_equal([key for key, row in cf.get_range()], ['a', 'b', 'c'])
+        assert_equal([key for key, row in cf.get_range(start='b')], ['b', 'c'])
+        assert_equal([key for key, row in cf.get_range(row_count=2)], ['a', 'b'])
+        assert_equal([key for key, row in cf.get_range(start_token='61')], ['b', 'c'])
+        assert_equal([key for key, row in cf.get_range(start_token='61', finish_token='62')],
+                     ['b'])
+        assert_equal([key for key, row in cf.get_range(start='a', finish_token='62')],
+                     ['a', 'b'])
+        assert_raises(ValueError, list, cf.get_range(start='a', start_token='61'))
+
+
+class TestColumnFamilyStub(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ConnectionPoolStub()
+        self.cf = ColumnFamilyStub(self.pool, 'Standard1')
+
+    def test_registered(self):
+        assert_true(self.pool.column_families['Standard1'] is self.cf)
+
+    def test_initial_rows(self):
+        cf = ColumnFamilyStub(rows={'key': {'a': '1', 'b': '2'}})
+        assert_equal(cf.get('key'), {'a': '1', 'b': '2'})
+        assert_true('key' in cf)
+        assert_equal(len(cf), 1)
+
+    def test_columns(self):
+        self.cf.insert('key', {'a': '1', 'b': '2', 'c': '3'})
+        assert_equal(self.cf.get('key', columns=['c', 'a', 'x']).keys(), ['a', 'c'])
+        assert_raises(NotFoundException, self.cf.get, 'key', columns=['x'])
+
+    def test_timestamps(self):
+        self.cf.insert('key', {'a': '1'}, timestamp=10)
+        assert_equal(self.cf.get('key', include_timestamp=True), {'a': ('1', 10)})
+        self.cf.insert('key', {'a': 'old'}, timestamp=5)
+        assert_equal(self.cf.get('key'), {'a': '1'})
+        self.cf.insert('key', {'a': 'new'}, timestamp=20)
+        assert_equal(self.cf.get('key'), {'a': 'new'})
+
+        self.cf.remove('key', ['a'], timestamp=15)
+        assert_equal(self.cf.get('key'), {'a': 'new'})
+        self.cf.remove('key', ['a'], timestamp=20)
+        assert_raises(NotFoundException, self.cf.get, 'key')
+        assert_true('key' not in self.cf)
+
+    def test_ttl(self):
+        self.cf.insert('key', {'a': '1'}, ttl=100)
+        self.cf.insert('key', {'b': '2'})
+        assert_equal(self.cf.get('key', include_ttl=True), {'a': ('1', 100), 'b': ('2', None)})
+        self.cf.rows['key']['a'].expires = time.time() - 1
+        assert_equal(self.cf.get('key'), {'b': '2'})
+        assert_equal(self.cf.get_count('key'), 1)
+
+        self.cf.rows['key']['b'].expires = time.time() - 1
+        assert_raises(NotFoundException, self.cf.get, 'key')
+        assert_equal(len(self.cf), 0)
+
+    def test_counts(self):
+        self.cf.insert('key1', dict(('c%02d' % i, '') for i in range(20)))
+        self.cf.insert('key2', {'c00': ''})
+        assert_equal(self.cf.get_count('key1'), 20)
+        assert_equal(self.cf.get_count('key1', column_start='c05', column_finish='c09'), 5)
+        assert_equal(self.cf.get_count('key1', max_count=3), 3)
+        assert_equal(self.cf.get_count('missing'), 0)
+        assert_equal(self.cf.multiget_count(['key2', 'missing', 'key1']),
+                     {'key2': 1, 'missing': 0, 'key1': 20})
+        assert_equal(self.cf.multiget_count(['key2', 'key1']).keys(), ['key2', 'key1'])
+
+    def test_xget(self):
+        columns = dict(('c%03d' % i, str(i)) for i in range(150))
+        self.cf.insert('key', columns)
+        assert_equal(list(self.cf.xget('key')), sorted(columns.items()))
+        assert_equal([name for name, value in self.cf.xget('key', column_start='c148')],
+                     ['c148', 'c149'])
+        assert_equal(len(list(self.cf.xget('key', column_count=120))), 120)
+        assert_equal(list(self.cf.xget('missing')), [])
+
+    def test_multiget(self):
+        self.cf.insert('key1', {'a': '1'})
+        self.cf.insert('key2', {'b': '2'})
+        rows = self.cf.multiget(['key2', 'missing', 'key1'])
+        assert_equal(rows.keys(), ['key2', 'key1'])
+        assert_equal(self.cf.multiget(['key1', 'key2'], columns=['b']), {'key2': {'b': '2'}})
+
+    def test_get_range_filter_empty(self):
+        self.cf.insert('key1', {'a': '1'})
+        self.cf.insert('key2', {'b': '2'})
+        assert_equal(list(self.cf.get_range(columns=['a'])), [('key1', {'a': '1'})])
+        assert_equal(list(self.cf.get_range(columns=['a'], filter_empty=False)),
+                     [('key1', {'a': '1'}), ('key2', {})])
+
+    def test_counters(self):
+        self.cf.add('key', 'hits')
+        self.cf.add('key', 'hits', 10)
+        self.cf.add('key', 'misses', -2)
+        assert_equal(self.cf.get('key'), {'hits': 11, 'misses': -2})
+        self.cf.remove_counter('key', 'hits')
+        assert_equal(self.cf.get('key', include_timestamp=True), {'misses': -2})
+
+    def test_batch(self):
+        with self.cf.batch() as b:
+            b.insert('key1', {'a': '1'})
+            b.insert('key2', {'a': '2'})
+            b.remove('key1')
+            assert_equal(len(self.cf), 0)
+        assert_equal(dict(self.cf.get_range()), {'key2': {'a': '2'}})
+
+        b = self.cf.batch(queue_size=2)
+        b.insert('key3', {'a': '3'})
+        assert_true('key3' not in self.cf)
+        b.insert('key4', {'a': '4'})
+        assert_true('key3' in self.cf)
+
+    def test_remove_missing(self):
+        self.cf.remove('missing')
+        self.cf.remove('missing', ['a'])
+
+    def test_indexed_slices(self):
+        for i in range(5):
+            self.cf.insert('key%d' % i, {'birthdate': long(i), 'other': 'x'})
+        self.cf.insert('nobirthdate', {'other': 'x'})
+
+        expr = index.create_index_expression('birthdate', 2L, index.GTE)
+        clause = index.create_index_clause([expr])
+        assert_equal([key for key, row in self.cf.get_indexed_slices(clause)],
+                     ['key2', 'key3', 'key4'])
+
+        exprs = [index.create_index_expression('birthdate', 1L, index.GT),
+                 index.create_index_expression('birthdate', 3L, index.LT)]
+        clause = index.create_index_clause(exprs, start_key='key2', count=1)
+        assert_equal(list(self.cf.get_indexed_slices(clause, columns=['birthdate'])),
+                     [('key2', {'birthdate': 2L})])
+
+
+class TestSuperColumnFamilyStub(unittest.TestCase):
+
+    def setUp(self):
+        self.cf = ColumnFamilyStub(super=True, comparator_type='UTF8Type',
+                                   subcomparator_type='LongType')
+        self.cf.insert('key', {'sc2': {2: 'b', 1: 'a'}, 'sc1': {3: 'c'}})
+
+    def test_get(self):
+        assert_equal(self.cf.get('key'), {'sc1': {3: 'c'}, 'sc2': {1: 'a', 2: 'b'}})
+        assert_equal(self.cf.get('key').keys(), ['sc1', 'sc2'])
+        assert_equal(self.cf.get('key', super_column='sc2', column_start=2), {2: 'b'})
+        assert_raises(NotFoundException, self.cf.get, 'key', super_column='sc3')
+        assert_equal(self.cf.get_count('key'), 2)
+        assert_equal(self.cf.get_count('key', super_column='sc2'), 2)
+
+    def test_remove(self):
+        self.cf.remove('key', [1], super_column='sc2')
+        assert_equal(self.cf.get('key', super_column='sc2'), {2: 'b'})
+        self.cf.remove('key', super_column='sc2')
+        assert_equal(self.cf.get('key'), {'sc1': {3: 'c'}})
+        self.cf.remove('key', ['sc1'])
+        assert_true('key' not in self.cf)
+
+    def test_counters(self):
+        self.cf.add('key2', 5, 3, super_column='sc1')
+        assert_equal(self.cf.get('key2'), {'sc1': {5: 3}})
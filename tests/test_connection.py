@@ -0,0 +1,109 @@
+import socket
+import struct
+import threading
+import unittest
+
+from nose.tools import assert_equal, assert_raises
+
+from thrift.protocol import TBinaryProtocol
+from thrift.transport import TSocket, TTransport
+from thrift.transport.TTransport import TTransportException
+
+from pycassa.cassandra import Cassandra
+from pycassa.cassandra.ttypes import Column, ColumnOrSuperColumn
+from pycassa import connection
+from pycassa.connection import TFramedSocketTransport
+
+
+def frame(data):
+    return struct.pack('!i', len(data)) + data
+
+
+def read_exactly(sock, size):
+    data = ''
+    while len(data) < size:
+        data += sock.recv(size - len(data))
+    return data
+
+
+class TestFramedSocketTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.sock, self.peer = socket.socketpair()
+        tsocket = TSocket.TSocket()
+        tsocket.handle = self.sock
+        self.transport = TFramedSocketTransport(tsocket)
+        self.transport.initial_buffer_size = 16
+        self.transport._init_buffers()
+
+    def tearDown(self):
+        self.sock.close()
+        self.peer.close()
+
+    def test_write_frames(self):
+        self.transport.write('abc')
+        self.transport.write('def')
+        self.transport.flush()
+        # larger than the initial buffer
+        self.transport.write('x' * 100)
+        self.transport.flush()
+        self.transport.write('y')
+        self.transport.flush()
+
+        expected = frame('abcdef') + frame('x' * 100) + frame('y')
+        assert_equal(read_exactly(self.peer, len(expected)), expected)
+
+    def test_read_frames(self):
+        self.peer.sendall(frame('hello') + frame('z' * 1000) + frame('bye'))
+        assert_equal(self.transport.readAll(5), 'hello')
+        assert_equal(self.transport.readAll(1000), 'z' * 1000)
+        assert_equal(self.transport.read(10), 'bye')
+
+    def test_partial_reads(self):
+        self.check_partial_reads()
+
+    def test_partial_reads_without_memoryview(self):
+        saved, connection._memoryview = connection._memoryview, None
+        try:
+            self.check_partial_reads()
+        finally:
+            connection._memoryview = saved
+
+    def check_partial_reads(self):
+        data = frame('hello' + 'z' * 100)
+        self.peer.sendall(data[:7])
+        timer = threading.Timer(0.05, self.peer.sendall, [data[7:]])
+        timer.start()
+        try:
+            assert_equal(self.transport.readAll(105), 'hello' + 'z' * 100)
+        finally:
+            timer.join()
+
+    def test_closed_peer(self):
+        self.peer.sendall(struct.pack('!i', 10) + 'abc')
+        self.peer.close()
+        assert_raises(TTransportException, self.transport.read, 1)
+
+    def test_accelerated_protocol(self):
+        columns = [ColumnOrSuperColumn(Column('c%d' % i, 'v' * 50, i)) for i in range(100)]
+
+        out = TTransport.TMemoryBuffer()
+        protocol = TBinaryProtocol.TBinaryProtocol(out)
+        protocol.writeMessageBegin('get_slice', 2, 0)
+        Cassandra.get_slice_result(columns).write(protocol)
+        protocol.writeMessageEnd()
+        self.peer.sendall(frame(out.getvalue()))
+
+        client = Cassandra.Client(TBinaryProtocol.TBinaryProtocolAccelerated(self.transport))
+        assert_equal(client.recv_get_slice(), columns)
+
+    def test_other_transports(self):
+        inner = TTransport.TMemoryBuffer(frame('abc'))
+        transport = TFramedSocketTransport(inner)
+        assert_equal(transport.read(3), 'abc')
+
+        inner = TTransport.TMemoryBuffer()
+        transport = TFramedSocketTransport(inner)
+        transport.write('def')
+        transport.flush()
+        assert_equal(inner.getvalue(), frame('def'))
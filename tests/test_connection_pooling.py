@@ -1,3 +1,4 @@
+import os
 import threading
 import unittest
 import time
@@ -9,6 +10,8 @@ from pycassa.logging.pool_stats_logger import StatsLogger
 from pycassa.cassandra.ttypes import ColumnPath
 from pycassa.cassandra.ttypes import InvalidRequestException
 from pycassa.cassandra.ttypes import NotFoundException
+from pycassa.system_manager import SystemManager
+from pycassa.types import LongType
 
 
 _credentials = {'username': 'jsmith', 'password': 'havebadpass'}
@@ -16,6 +19,23 @@ _credentials = {'username': 'jsmith', 'password': 'havebadpass'}
 def _get_list():
     return ['foo:bar']
 
+def _corrupt_connections(pool, count, method='batch_mutate'):
+    """
+    Makes the next call to `method` fail on `count` different connections.
+    They are all checked out before any are returned, because the pool
+    hands out the most recently returned connection first.
+    """
+    use_threadlocal = pool._pool_threadlocal
+    pool._pool_threadlocal = False
+    try:
+        conns = [pool.get() for i in range(count)]
+        for conn in conns:
+            setattr(conn, 'send_' + method, conn._fail_once)
+            conn._should_fail = True
+            conn.return_to_pool()
+    finally:
+        pool._pool_threadlocal = use_threadlocal
+
 class PoolingCase(unittest.TestCase):
 
     def tearDown(self):
@@ -358,11 +378,7 @@ class PoolingCase(unittest.TestCase):
 
         cf = ColumnFamily(pool, 'Standard1')
 
-        for i in range(5):
-            conn = pool.get()
-            setattr(conn, 'send_batch_mutate', conn._fail_once)
-            conn._should_fail = True
-            conn.return_to_pool()
+        _corrupt_connections(pool, 5)
 
         threads = []
         args = ('key', {'col': 'val', 'col2': 'val'})
@@ -386,11 +402,10 @@ class PoolingCase(unittest.TestCase):
                              server_list=['localhost:9160', 'localhost:9160'])
 
             # Corrupt all of the connections
-            for i in range(5):
-                conn = pool.get()
-                setattr(conn, 'send_batch_mutate', conn._fail_once)
-                conn._should_fail = True
-                conn.return_to_pool()
+            _corrupt_connections(pool, 5)
+            # Replacement connections would be healthy and handed out
+            # first, so retry on the corrupted ones instead
+            pool._replace_wrapper = lambda: None
 
             cf = ColumnFamily(pool, 'Standard1')
             assert_raises(MaximumRetryException, cf.insert, 'key', {'col': 'val', 'col2': 'val'})
@@ -413,11 +428,7 @@ class PoolingCase(unittest.TestCase):
         pool._replace_wrapper = raiser
 
         # Corrupt all of the connections
-        for i in range(5):
-            conn = pool.get()
-            setattr(conn, 'send_batch_mutate', conn._fail_once)
-            conn._should_fail = True
-            conn.return_to_pool()
+        _corrupt_connections(pool, 5)
 
         cf = ColumnFamily(pool, 'Standard1')
         assert_raises(MaximumRetryException, cf.insert, 'key', {'col': 'val', 'col2': 'val'})
@@ -434,11 +445,10 @@ class PoolingCase(unittest.TestCase):
                          server_list=['localhost:9160', 'localhost:9160'])
 
         # Corrupt all of the connections
-        for i in range(5):
-            conn = pool.get()
-            setattr(conn, 'send_batch_mutate', conn._fail_once)
-            conn._should_fail = True
-            conn.return_to_pool()
+        _corrupt_connections(pool, 5)
+        # Replacement connections would be healthy and handed out
+        # first, so retry on the corrupted ones instead
+        pool._replace_wrapper = lambda: None
 
         cf = ColumnFamily(pool, 'Standard1')
         assert_raises(MaximumRetryException, cf.insert, 'key', {'col': 'val', 'col2': 'val'})
@@ -455,11 +465,7 @@ class PoolingCase(unittest.TestCase):
                          server_list=['localhost:9160', 'localhost:9160'])
 
         # Corrupt all of the connections
-        for i in range(5):
-            conn = pool.get()
-            setattr(conn, 'send_batch_mutate', conn._fail_once)
-            conn._should_fail = True
-            conn.return_to_pool()
+        _corrupt_connections(pool, 5)
 
         cf = ColumnFamily(pool, 'Counter1')
         assert_raises(MaximumRetryException, cf.insert, 'key', {'col': 2, 'col2': 2})
@@ -489,6 +495,26 @@ class PoolingCase(unittest.TestCase):
         assert_equal(request['args'], ('greunt', ColumnPath('Counter1', None, 'col'), 1))
         assert_equal(request['kwargs'], {})
 
+        # Retries are made on other connections, whose info must describe
+        # the request as well
+        pool.dispose()
+        stats_logger = StatsLoggerRequestInfo()
+        pool = ConnectionPool(pool_size=3, max_overflow=0, recycle=10000,
+                              prefill=True, max_retries=2,
+                              keyspace='PycassaTestKeyspace', credentials=_credentials,
+                              listeners=[stats_logger], use_threadlocal=False,
+                              server_list=['localhost:9160'])
+        _corrupt_connections(pool, 3, 'get')
+        pool._replace_wrapper = lambda: None
+        cf = ColumnFamily(pool, 'Counter1')
+
+        assert_raises(MaximumRetryException, cf.get, 'greunt', columns=['col'])
+        assert_equal(stats_logger.stats['failed'], 3)
+        request = stats_logger.failure_dict['connection'].info['request']
+        assert_equal(request['method'], 'get')
+        assert_equal(request['args'], ('greunt', ColumnPath('Counter1', None, 'col'), 1))
+        pool.dispose()
+
     def test_pool_invalid_request(self):
         stats_logger = StatsLoggerWithListStorage()
         pool = ConnectionPool(pool_size=1, max_overflow=0, recycle=10000,
@@ -504,6 +530,71 @@ class PoolingCase(unittest.TestCase):
         pool.dispose()
 
 
+    def test_schema_cache(self):
+        stats_logger = StatsLoggerWithListStorage()
+        pool = ConnectionPool('PycassaTestKeyspace', listeners=[stats_logger],
+                              schema_check_interval=-1)
+        ColumnFamily(pool, 'Standard1')
+        checkouts = stats_logger.stats['checked_out']
+        for i in range(10):
+            ColumnFamily(pool, 'Standard1')
+            ColumnFamily(pool, 'Super1')
+        assert_equal(stats_logger.stats['checked_out'], checkouts)
+
+        description = pool.get_keyspace_description()
+        assert_true(description is pool.get_keyspace_description())
+        assert_true(description is not pool.get_keyspace_description(refresh=True))
+        pool.dispose()
+
+    def test_schema_cache_changes(self):
+        pool = ConnectionPool('PycassaTestKeyspace', schema_check_interval=-1)
+        ColumnFamily(pool, 'Standard1')
+
+        sys = SystemManager()
+        sys.create_column_family('PycassaTestKeyspace', 'SchemaCacheCF',
+                                 comparator_type=LongType())
+        try:
+            cf = ColumnFamily(pool, 'SchemaCacheCF')
+            assert_equal(cf.column_validators, {})
+
+            sys.alter_column('PycassaTestKeyspace', 'SchemaCacheCF', 1, LongType())
+            cf = ColumnFamily(pool, 'SchemaCacheCF')
+            assert_equal(cf.column_validators[1], 'LongType')
+        finally:
+            sys.drop_column_family('PycassaTestKeyspace', 'SchemaCacheCF')
+            sys.close()
+            pool.dispose()
+
+    def test_fork(self):
+        pool = ConnectionPool('PycassaTestKeyspace', pool_size=2, prefill=True)
+        cf = ColumnFamily(pool, 'Standard1')
+        cf.insert('key1', {'col': 'val'})
+        parent_conns = set(pool._idle)
+
+        # hold a connection across the fork like a request handler would
+        held = pool.get()
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                status = 1
+                assert_equal(cf.get('key1'), {'col': 'val'})
+                assert_true(not set(pool._idle) & parent_conns)
+                assert_true(pool.get() is not held)
+                held.return_to_pool()
+                assert_true(held not in pool._idle)
+                status = 0
+            finally:
+                os._exit(status)
+
+        assert_equal(os.waitpid(pid, 0)[1], 0)
+
+        # the parent's connections were not disturbed by the child
+        held.return_to_pool()
+        assert_equal(set(pool._idle), parent_conns)
+        assert_equal(cf.get('key1'), {'col': 'val'})
+        pool.dispose()
+
 class StatsLoggerWithListStorage(StatsLogger):
 
     def obtained_server_list(self, dic):
@@ -0,0 +1,60 @@
+import time
+import unittest
+
+from nose.tools import assert_equal, assert_raises, assert_true
+
+from pycassa.cassandra.ttypes import TimedOutException
+from pycassa.deadline import Deadline, DeadlineExceeded
+from pycassa.retry import RetryPolicy
+
+from tests.util import FakePool
+
+
+class TestDeadline(unittest.TestCase):
+
+    def test_start(self):
+        assert_equal(Deadline.start(None), None)
+        deadline = Deadline.start(10)
+        assert_true(9 < deadline.remaining() <= 10)
+        assert_true(Deadline.start(deadline) is deadline)
+
+    def test_socket_timeout(self):
+        deadline = Deadline(10)
+        assert_equal(deadline.socket_timeout(0.5), 0.5)
+        assert_true(deadline.socket_timeout(None) <= 10)
+        assert_true(deadline.socket_timeout(20) <= 10)
+
+        deadline = Deadline(0)
+        assert_true(deadline.expired())
+        assert_raises(DeadlineExceeded, deadline.socket_timeout, 0.5)
+
+    def test_checkout(self):
+        pool = FakePool('Keyspace1', pool_size=1, max_overflow=0, prefill=False,
+                        use_threadlocal=False, pool_timeout=30)
+        conn = pool.get()
+        start = time.time()
+        assert_raises(DeadlineExceeded, pool.get, Deadline(0.05))
+        assert_true(time.time() - start < 1)
+        pool.put(conn)
+        pool.dispose()
+
+    def test_retries(self):
+        pool = FakePool('Keyspace1', pool_size=1, max_overflow=0, prefill=False,
+                        use_threadlocal=False, timeout=0.5, max_retries=-1,
+                        retry_policy=RetryPolicy(base_delay=0.02, max_delay=0.02))
+        conn = pool.get()
+        socket = conn._socket
+        start = time.time()
+        try:
+            conn.describe_keyspace('Keyspace1', deadline=Deadline(0.1))
+        except DeadlineExceeded, exc:
+            assert_true(isinstance(exc.last_failure, TimedOutException))
+        else:
+            self.fail('DeadlineExceeded was not raised')
+        assert_true(time.time() - start < 1)
+
+        # the first attempt's socket timeout fits in the budget and the
+        # pool's timeout is restored afterwards
+        assert_true(socket.timeouts[0] <= 100)
+        assert_equal(socket.timeouts[1], 500)
+        pool.dispose()
@@ -0,0 +1,139 @@
+import os
+import socket
+import tempfile
+import unittest
+import urllib2
+
+from nose.tools import assert_equal, assert_true
+
+from pycassa.exporters import PrometheusExporter, StatsdExporter
+from pycassa.metrics import Metrics
+
+from tests.util import FakePool
+
+
+class SetEvent(object):
+    """
+    A set event whose wait() returns None, as on Python 2.6, and which
+    fails if it is waited on twice.
+    """
+
+    def __init__(self):
+        self.waits = 0
+
+    def set(self):
+        pass
+
+    def is_set(self):
+        return True
+
+    def wait(self, timeout=None):
+        self.waits += 1
+        assert_equal(self.waits, 1)
+
+
+class ExporterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = FakePool('Keyspace1', pool_size=2, prefill=False,
+                             use_threadlocal=False)
+        self.conn = self.pool.get()
+        self.metrics = Metrics(percentiles=(50, 99.9))
+        self.metrics.record_operation('get_slice', 'Standard1', 'host1:9160',
+                                      0.01, 100, 200)
+
+    def tearDown(self):
+        self.pool.put(self.conn)
+        self.pool.dispose()
+
+
+class TestPrometheusExporter(ExporterTestCase):
+
+    def test_render(self):
+        exporter = PrometheusExporter({'main': self.pool}, self.metrics)
+        exporter.export()
+        text = exporter.render()
+        assert_true('# TYPE pycassa_pool_checkedout gauge\n' in text)
+        assert_true('pycassa_pool_checkedout{pool="main"} 1\n' in text)
+        assert_true('pycassa_pool_opened{pool="main"} 1\n' in text)
+        assert_true('# TYPE pycassa_method_latency_seconds summary\n' in text)
+        assert_true('pycassa_method_latency_seconds{method="get_slice",quantile="0.999"} 0.01\n' in text)
+        assert_true('pycassa_server_bytes_sent_total{server="host1:9160"} 100\n' in text)
+
+        # counters accumulate, percentiles only cover the last interval
+        self.metrics.record_operation('get_slice', 'Standard1', 'host1:9160',
+                                      0.01, 100, 200)
+        exporter.export()
+        exporter.export()
+        text = exporter.render()
+        assert_true('pycassa_server_bytes_sent_total{server="host1:9160"} 200\n' in text)
+        assert_true('pycassa_method_latency_seconds_count{method="get_slice"} 2\n' in text)
+        assert_true('quantile="0.999"' not in text.replace('pycassa_checkout', ''))
+
+    def test_path(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            exporter = PrometheusExporter([self.pool], path=path)
+            exporter.export()
+            assert_equal(open(path).read(), exporter.render())
+            assert_true('{pool="Keyspace1"}' in exporter.render())
+        finally:
+            os.remove(path)
+
+    def test_serve(self):
+        exporter = PrometheusExporter([self.pool], self.metrics, interval=60)
+        port = exporter.serve(0, '127.0.0.1')
+        exporter.start()
+        exporter.export()
+        body = urllib2.urlopen('http://127.0.0.1:%d/metrics' % port).read()
+        exporter.stop()
+        assert_true('pycassa_method_failures_total{method="get_slice"} 0\n' in body)
+
+
+class TestStatsdExporter(ExporterTestCase):
+
+    def setUp(self):
+        ExporterTestCase.setUp(self)
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.settimeout(1)
+        self.port = self.server.getsockname()[1]
+
+    def tearDown(self):
+        self.server.close()
+        ExporterTestCase.tearDown(self)
+
+    def test_format(self):
+        exporter = StatsdExporter({'main': self.pool}, self.metrics)
+        lines = exporter.format(exporter.collect())
+        assert_true('pycassa.pool_checkedout.main:1|g' in lines)
+        assert_true('pycassa.method_latency_seconds.get_slice.p999:10.000|g' in lines)
+        assert_true('pycassa.method_latency_seconds.get_slice.count:1|c' in lines)
+        assert_true('pycassa.server_bytes_received_total.host1_9160:200|c' in lines)
+        # counters that did not change are not sent
+        assert_true('pycassa.method_failures_total.get_slice:0|c' not in lines)
+        exporter.stop()
+
+    def test_last_export(self):
+        exporter = StatsdExporter({'main': self.pool}, self.metrics,
+                                  host='127.0.0.1', port=self.port)
+        exporter._stopped = SetEvent()
+        exporter._run()
+        assert_true('pycassa.pool_checkedout.main:1|g' in self.server.recv(2048))
+        exporter.stop()
+
+    def test_batching(self):
+        exporter = StatsdExporter({'main': self.pool}, self.metrics,
+                                  host='127.0.0.1', port=self.port,
+                                  max_packet_size=100)
+        lines = exporter.format(exporter.collect())
+        packets = exporter._batch(lines)
+        assert_true(len(packets) > 1)
+        for packet in packets:
+            assert_true(len(packet) <= 100 or '\n' not in packet)
+        assert_equal('\n'.join(packets).split('\n'), lines)
+
+        exporter.publish([('pool_checkedin', '', (('pool', 'main'),), 0)])
+        assert_equal(self.server.recv(2048), 'pycassa.pool_checkedin.main:0|g')
+        exporter.stop()
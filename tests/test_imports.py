@@ -0,0 +1,53 @@
+import subprocess
+import sys
+import unittest
+
+from nose.tools import assert_equal, assert_true
+
+import pycassa
+
+HEAVY_MODULES = ('pycassa.cassandra.Cassandra', 'pycassa.cassandra.ttypes',
+                 'pycassa.connection', 'thrift')
+
+
+def loaded_modules(statement):
+    code = "import sys\n%s\nprint '\\n'.join(sys.modules)" % statement
+    output = subprocess.Popen([sys.executable, '-c', code],
+                              stdout=subprocess.PIPE).communicate()[0]
+    return set(output.split())
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_light_imports(self):
+        for statement in ('import pycassa', 'import pycassa.util',
+                          'import pycassa.marshal', 'import pycassa.types',
+                          'from pycassa.util import convert_time_to_uuid'):
+            modules = loaded_modules(statement)
+            assert_true('pycassa' in modules)
+            for heavy in HEAVY_MODULES:
+                assert_true(heavy not in modules,
+                            "'%s' imported %s" % (statement, heavy))
+
+    def test_heavy_imports(self):
+        modules = loaded_modules('from pycassa import ConnectionPool')
+        assert_true('pycassa.cassandra.Cassandra' in modules)
+
+    def test_exports(self):
+        from pycassa.cassandra.ttypes import NotFoundException
+        from pycassa.pool import ConnectionPool
+        import pycassa.util
+
+        assert_true(pycassa.NotFoundException is NotFoundException)
+        assert_true(pycassa.ConnectionPool is ConnectionPool)
+        assert_true(pycassa.util is sys.modules['pycassa.util'])
+        assert_true('ColumnFamily' in pycassa.__all__)
+        assert_true('ColumnFamily' in dir(pycassa))
+        assert_equal(pycassa.__version__, '.'.join(map(str, pycassa.__version_info__)))
+
+        namespace = {}
+        exec 'from pycassa import *' in namespace
+        for name in pycassa.__all__:
+            assert_true(namespace[name] is getattr(pycassa, name))
+
+        self.assertRaises(AttributeError, getattr, pycassa, 'missing')
@@ -0,0 +1,134 @@
+import unittest
+import uuid
+from decimal import Decimal
+
+from nose.tools import assert_equal, assert_true
+
+import pycassa.marshal as marshal
+from pycassa.types import CompositeType, DoubleType, LongType, TimeUUIDType
+
+TIME1 = uuid.UUID(hex='ddc6118e-a003-11df-8abf-00234d21610a')
+
+
+class TestCodecCache(unittest.TestCase):
+
+    def test_packers_are_reused(self):
+        assert_true(marshal.packer_for('LongType') is
+                    marshal.packer_for('org.apache.cassandra.db.marshal.LongType'))
+        assert_true(marshal.unpacker_for('LongType') is
+                    marshal.unpacker_for('org.apache.cassandra.db.marshal.LongType'))
+        assert_true(LongType().pack is marshal.packer_for('LongType'))
+
+    def test_reversed_types_share_codecs(self):
+        assert_true(marshal.packer_for('ReversedType(UTF8Type)') is
+                    marshal.packer_for('UTF8Type'))
+        assert_true(marshal.unpacker_for('ReversedType(UTF8Type)') is
+                    marshal.unpacker_for('UTF8Type'))
+
+    def test_composite_types_share_codecs(self):
+        full = ('org.apache.cassandra.db.marshal.CompositeType('
+                'org.apache.cassandra.db.marshal.LongType, '
+                'org.apache.cassandra.db.marshal.ReversedType('
+                'org.apache.cassandra.db.marshal.UTF8Type))')
+        short = 'CompositeType(LongType,UTF8Type)'
+        assert_true(marshal.packer_for(full) is marshal.packer_for(short))
+        assert_true(marshal.unpacker_for(full) is marshal.unpacker_for(short))
+
+        packed = marshal.packer_for(full)((1, u'a'))
+        assert_equal(marshal.unpacker_for(short)(packed), (1, u'a'))
+
+    def test_dynamic_composite_types_share_codecs(self):
+        full = 'DynamicCompositeType(a=>AsciiType, l=>ReversedType(LongType))'
+        short = 'DynamicCompositeType(a=>AsciiType,l=>LongType)'
+        assert_true(marshal.packer_for(full) is marshal.packer_for(short))
+
+        packed = marshal.packer_for(full)([('a', 'x'), ('l', 5), ('LongType', 7)])
+        assert_equal(marshal.unpacker_for(short)(packed),
+                     (('a', 'x'), ('l', 5), ('LongType', 7)))
+
+    def test_clear_codec_cache(self):
+        packer = marshal.packer_for('LongType')
+        marshal.clear_codec_cache()
+        new_packer = marshal.packer_for('LongType')
+        assert_true(packer is not new_packer)
+        assert_equal(packer(1), new_packer(1))
+
+
+class TestCompositeCodecs(unittest.TestCase):
+
+    def test_fixed_width_composite(self):
+        comp = CompositeType(LongType(), TimeUUIDType(), DoubleType())
+        packed = comp.pack((5, TIME1, 1.5))
+        assert_equal(comp.unpack(packed), (5, TIME1, 1.5))
+
+        # partial names fall back to component by component parsing
+        assert_equal(comp.unpack(comp.pack((5,))), (5,))
+        assert_equal(comp.unpack(comp.pack((5, TIME1))), (5, TIME1))
+
+    def test_variable_width_composite(self):
+        typestr = 'CompositeType(UTF8Type, LongType, BytesType)'
+        packer = marshal.packer_for(typestr)
+        unpacker = marshal.unpacker_for(typestr)
+        assert_equal(packer((u'a', 1, 'b')),
+                     '\x00\x01a\x00'
+                     '\x00\x08\x00\x00\x00\x00\x00\x00\x00\x01\x00'
+                     '\x00\x01b\x00')
+        assert_equal(unpacker(packer((u'a', 1, 'b'))), (u'a', 1, 'b'))
+        assert_equal(unpacker(packer((u'', 1, ''))), (u'', 1, ''))
+
+    def test_composite_slice_ends(self):
+        packer = marshal.packer_for('CompositeType(LongType, LongType)')
+        assert_equal(packer((1, 2), slice_start=True)[-1], '\xff')
+        assert_equal(packer((1, 2), slice_start=False)[-1], '\x01')
+        assert_equal(packer((1, (2, False)), slice_start=True)[-1], '\x01')
+
+    def test_dynamic_composite(self):
+        typestr = 'DynamicCompositeType(a=>AsciiType, t=>TimeUUIDType)'
+        packer = marshal.packer_for(typestr)
+        unpacker = marshal.unpacker_for(typestr)
+        items = [('a', 'x'), ('t', TIME1), ('UTF8Type', u'y')]
+        assert_equal(unpacker(packer(items)),
+                     (('a', 'x'), ('t', TIME1), ('UTF8Type', u'y')))
+
+
+class TestIntegerCodecs(unittest.TestCase):
+
+    def test_known_encodings(self):
+        cases = [(0, '\x00'), (1, '\x01'), (127, '\x7f'), (128, '\x00\x80'),
+                 (255, '\x00\xff'), (256, '\x01\x00'), (-1, '\xff'),
+                 (-128, '\x80'), (-129, '\xff\x7f'), (-256, '\xff\x00'),
+                 (-257, '\xfe\xff'), (2 ** 23, '\x00\x80\x00\x00'),
+                 (-2 ** 23, '\x80\x00\x00'),
+                 (2 ** 64, '\x01\x00\x00\x00\x00\x00\x00\x00\x00')]
+        for value, encoded in cases:
+            assert_equal(marshal.encode_int(value), encoded)
+            assert_equal(marshal.decode_int(encoded), value)
+
+    def test_round_trip(self):
+        values = [0, -1]
+        for bits in range(1, 130):
+            for delta in (-1, 0, 1):
+                values.append(2 ** bits + delta)
+                values.append(-2 ** bits + delta)
+        for value in values:
+            encoded = marshal.encode_int(value)
+            assert_equal(marshal.decode_int(encoded), value)
+            # the shortest encoding: the first byte is not just sign extension
+            if len(encoded) > 1:
+                first, second = ord(encoded[0]), ord(encoded[1])
+                assert_true(first not in (0x00, 0xff) or (first ^ second) & 0x80)
+
+    def test_bulk(self):
+        values = [0, 1, -1, 300, -70000, 2 ** 100]
+        encoded = marshal.encode_ints(values)
+        assert_equal(encoded, map(marshal.encode_int, values))
+        assert_equal(marshal.decode_ints(encoded), values)
+
+    def test_empty(self):
+        assert_equal(marshal.decode_int(''), None)
+
+    def test_decimal(self):
+        packer = marshal.packer_for('DecimalType')
+        unpacker = marshal.unpacker_for('DecimalType')
+        for value in ('0', '1.5', '-0.001', '12345678901234567890.123'):
+            assert_equal(unpacker(packer(Decimal(value))), Decimal(value))
@@ -0,0 +1,112 @@
+import threading
+import unittest
+
+from nose.tools import assert_equal, assert_raises, assert_true
+
+from pycassa.cassandra.ttypes import TimedOutException
+from pycassa.metrics import LatencyHistogram, Metrics
+from pycassa.pool import MaximumRetryException
+from pycassa.retry import RetryPolicy
+
+from tests.util import FakePool
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_empty(self):
+        histogram = LatencyHistogram()
+        assert_equal(histogram.percentile(50), None)
+        summary = histogram.summary((50, 99.9))
+        assert_equal(summary, {'count': 0, 'mean': None, 'max': None,
+                               'p50': None, 'p999': None})
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for i in range(1, 1001):
+            histogram.record(i / 1000.0)
+        assert_equal(histogram.count, 1000)
+        for percent in (10, 50, 90, 99):
+            expected = percent / 100.0
+            value = histogram.percentile(percent)
+            assert_true(abs(value - expected) / expected < 0.05, (percent, value))
+        assert_equal(histogram.percentile(100), 1.0)
+        assert_true(abs(histogram.summary()['mean'] - 0.5005) < 1e-9)
+
+    def test_bounds(self):
+        histogram = LatencyHistogram()
+        histogram.record(0)
+        histogram.record(1e9)
+        assert_equal(histogram.counts[0], 1)
+        assert_equal(histogram.counts[-1], 1)
+        assert_equal(histogram.max, 1e9)
+
+    def test_merge(self):
+        a, b = LatencyHistogram(), LatencyHistogram()
+        a.record(0.001)
+        b.record(0.1)
+        b.record(0.2)
+        a.merge(b)
+        assert_equal(a.count, 3)
+        assert_equal(a.max, 0.2)
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_snapshot(self):
+        metrics = Metrics(percentiles=(50,))
+        metrics.record_operation('get_slice', 'Standard1', 'host1:9160', 0.01, 10, 20)
+        metrics.record_operation('get_slice', None, 'host2:9160', 0.02,
+                                 failure=TimedOutException())
+        metrics.record_checkout(0.001)
+
+        snapshot = metrics.snapshot(reset=True)
+        stats = snapshot['methods']['get_slice']
+        assert_equal(stats['count'], 2)
+        assert_equal(stats['failures'], 1)
+        assert_equal(stats['bytes_sent'], 10)
+        assert_equal(stats['bytes_received'], 20)
+        assert_equal(sorted(stats['latency']), ['count', 'max', 'mean', 'p50'])
+        assert_equal(snapshot['column_families'].keys(), ['Standard1'])
+        assert_equal(snapshot['servers']['host2:9160']['failures'], 1)
+        assert_equal(snapshot['checkout_wait']['count'], 1)
+
+        snapshot = metrics.snapshot()
+        assert_equal(snapshot['methods'], {})
+        assert_equal(snapshot['checkout_wait']['count'], 0)
+
+    def test_threads(self):
+        metrics = Metrics()
+
+        def record():
+            for i in range(1000):
+                metrics.record_operation('insert', 'Standard1', 'host1:9160', 0.001)
+
+        threads = [threading.Thread(target=record) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert_equal(metrics.snapshot()['methods']['insert']['count'], 4000)
+
+
+class TestPoolMetrics(unittest.TestCase):
+
+    def test_attempts(self):
+        metrics = Metrics()
+        pool = FakePool('Keyspace1', pool_size=1, prefill=False, max_retries=2,
+                        use_threadlocal=False, metrics=metrics,
+                        retry_policy=RetryPolicy(base_delay=0.001, max_delay=0.001))
+        conn = pool.get()
+        assert_raises(MaximumRetryException, conn.describe_keyspace, 'Keyspace1',
+                      column_family='Standard1')
+        pool.dispose()
+
+        snapshot = metrics.snapshot()
+        # _time_out is recorded under the name of the method it wraps
+        stats = snapshot['methods']['_time_out']
+        assert_equal(stats['count'], 3)
+        assert_equal(stats['failures'], 3)
+        assert_equal(snapshot['column_families']['Standard1']['count'], 3)
+        assert_equal(snapshot['servers']['localhost:9160']['count'], 3)
+        # the first checkout and the two for the retries
+        assert_equal(snapshot['checkout_wait']['count'], 3)
@@ -1,13 +1,53 @@
+import logging
 from unittest import TestCase
-from nose.tools import assert_equal, assert_raises
+from nose.tools import assert_equal, assert_raises, assert_true
 
 from pycassa.logging.pool_stats_logger import StatsLogger
+from pycassa.logging.pycassa_logger import PycassaLogger
 from pycassa.pool import ConnectionPool, NoConnectionAvailable, InvalidRequestError
 
+from tests.util import FakePool
+
 __author__ = 'gilles'
 
 _credentials = {'username': 'jsmith', 'password': 'havebadpass'}
 
+class RecordingHandler(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class TestPoolLogger(TestCase):
+
+    def test_checkouts_follow_level(self):
+        log = PycassaLogger()
+        level = log.get_logger_level()
+        handler = RecordingHandler()
+        log.get_logger().addHandler(handler)
+        pool = FakePool('Keyspace1', pool_size=1, prefill=False, use_threadlocal=False)
+        try:
+            log.set_logger_level('info')
+            pool.get().return_to_pool()
+            assert_equal([m for m in handler.messages if 'checked' in m], [])
+
+            # raised after the pool was created
+            log.set_logger_level('debug')
+            pool.get().return_to_pool()
+            checked = [m for m in handler.messages if 'checked' in m]
+            assert_equal(len(checked), 2)
+            assert_true('checked out' in checked[0])
+            assert_true('checked in' in checked[1])
+        finally:
+            pool.dispose()
+            log.get_logger().removeHandler(handler)
+            log.set_logger_level(level)
+
+
 class TestStatsLogger(TestCase):
     def __init__(self, methodName='runTest'):
         super(TestStatsLogger, self).__init__(methodName)
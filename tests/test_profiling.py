@@ -0,0 +1,102 @@
+import time
+import unittest
+
+from nose.tools import assert_equal, assert_true
+
+from pycassa import profiling
+from pycassa.cassandra.ttypes import CfDef, Column, ColumnOrSuperColumn
+from pycassa.columnfamily import ColumnFamily
+
+
+class SlowPool(object):
+    """ Answers every request after `latency` seconds. """
+
+    keyspace = 'Keyspace1'
+    latency = 0.01
+
+    def get_keyspace_description(self, refresh=False):
+        return {'Standard1': CfDef('Keyspace1', 'Standard1', column_type='Standard',
+                                   comparator_type='UTF8Type',
+                                   default_validation_class='UTF8Type',
+                                   key_validation_class='UTF8Type',
+                                   column_metadata={})}
+
+    def get(self, *args):
+        return self
+
+    def return_to_pool(self):
+        pass
+
+    def batch_mutate(self, *args, **kwargs):
+        time.sleep(self.latency)
+
+    def execute(self, f, *args, **kwargs):
+        time.sleep(self.latency)
+        if f == 'get':
+            return ColumnOrSuperColumn(column=Column('col', 'val', 1))
+        elif f == 'get_range_slices_decoded':
+            return [('key1', {u'col': u'val'}), ('key2', {u'col': u'val'})]
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.cf = ColumnFamily(SlowPool(), 'Standard1')
+
+    def test_phases(self):
+        original = ColumnFamily.__dict__['get']
+        with profiling.profile() as prof:
+            assert_true(ColumnFamily.__dict__['get'] is not original)
+            assert_equal(self.cf.get('key1', columns=['col']), {u'col': u'val'})
+            self.cf.insert('key1', {'col': 'val'})
+            self.cf.insert('key2', {'col': 'val'})
+        assert_true(ColumnFamily.__dict__['get'] is original)
+
+        stats = prof.stats()
+        get = stats[('get', 'Standard1')]
+        assert_equal(get['calls'], 1)
+        assert_true(get['seconds']['network'] >= 0.01)
+        assert_true(get['seconds']['pack'] < 0.01)
+        assert_true(get['seconds']['unpack'] < 0.01)
+        assert_equal(stats[('insert', 'Standard1')]['calls'], 2)
+
+        table = prof.table().splitlines()
+        assert_equal(table[0].split()[:3], ['operation', 'column_family', 'calls'])
+        assert_equal(len(table), 3)
+        # sorted by total time
+        assert_equal(table[1].split()[:3], ['insert', 'Standard1', '2'])
+
+    def test_batched(self):
+        # remove() is sent with a Mutator rather than through _execute()
+        with profiling.profile() as prof:
+            self.cf.remove('key1')
+            self.cf.remove('key2', columns=['col'])
+        stats = prof.stats()[('remove', 'Standard1')]
+        assert_equal(stats['calls'], 2)
+        assert_true(stats['seconds']['network'] >= 0.02)
+        assert_true(stats['seconds']['pack'] < 0.01)
+
+        table = prof.table().splitlines()
+        assert_equal(table[1].split()[:3], ['remove', 'Standard1', '2'])
+        assert_true(float(table[1].split()[4]) >= 10)
+
+    def test_generator(self):
+        with profiling.profile() as prof:
+            for key, row in self.cf.get_range():
+                # the caller's own time is not counted
+                time.sleep(0.05)
+        stats = prof.stats()[('get_range', 'Standard1')]
+        assert_equal(stats['calls'], 1)
+        assert_true(stats['seconds']['network'] >= 0.01)
+        assert_true(sum(stats['seconds'].values()) < 0.05)
+
+    def test_enable(self):
+        profiling.default_profile.reset()
+        profiling.enable()
+        try:
+            self.cf.get('key1', columns=['col'])
+        finally:
+            profiling.disable()
+        self.cf.get('key1', columns=['col'])
+        stats = profiling.default_profile.stats()
+        assert_equal(stats[('get', 'Standard1')]['calls'], 1)
@@ -0,0 +1,57 @@
+import socket
+import unittest
+
+from nose.tools import assert_equal, assert_true, assert_false
+
+from pycassa.cassandra.ttypes import TimedOutException, UnavailableException
+from pycassa.retry import RetryPolicy, RetryBudget
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_should_retry(self):
+        policy = RetryPolicy()
+        assert_true(policy.should_retry(TimedOutException()))
+        assert_true(policy.should_retry(UnavailableException()))
+        assert_true(policy.should_retry(socket.error()))
+
+        policy = RetryPolicy(retry_timeouts=False, retry_unavailable=False,
+                             retry_transport_errors=False)
+        assert_false(policy.should_retry(TimedOutException()))
+        assert_false(policy.should_retry(UnavailableException()))
+        assert_false(policy.should_retry(socket.error()))
+
+    def test_first_transport_retry_is_immediate(self):
+        policy = RetryPolicy(base_delay=0.5)
+        assert_equal(policy.retry_delay(socket.error(), 1, 0), 0)
+        assert_true(policy.retry_delay(socket.error(), 2, 0) >= 0.5)
+        assert_true(policy.retry_delay(TimedOutException(), 1, 0) >= 0.5)
+
+    def test_backoff_bounds(self):
+        policy = RetryPolicy(base_delay=0.1, max_delay=1.0)
+        delay = 0
+        for attempt in range(1, 50):
+            last = delay
+            delay = policy.backoff(TimedOutException(), attempt, delay)
+            assert_true(0.1 <= delay <= 1.0)
+            assert_true(delay <= max(last, 0.1) * 3)
+
+    def test_not_retried(self):
+        policy = RetryPolicy(retry_unavailable=False)
+        assert_equal(policy.retry_delay(UnavailableException(), 1, 0), None)
+
+
+class TestRetryBudget(unittest.TestCase):
+
+    def test_budget(self):
+        budget = RetryBudget(ratio=0.1, min_retries_per_second=0, ttl=60)
+        policy = RetryPolicy(budget=budget)
+        for i in range(100):
+            policy.started()
+        delays = [policy.retry_delay(TimedOutException(), 1, 0) for i in range(20)]
+        assert_equal(len([d for d in delays if d is not None]), 10)
+
+    def test_min_retries(self):
+        budget = RetryBudget(ratio=0, min_retries_per_second=1, ttl=5)
+        results = [budget.withdraw() for i in range(10)]
+        assert_equal(results, [True] * 5 + [False] * 5)
@@ -0,0 +1,102 @@
+import unittest
+
+from nose.tools import assert_equal, assert_raises, assert_true
+
+from pycassa.cassandra.ttypes import (ColumnParent, SlicePredicate, SliceRange,
+                                      KeyRange, ConsistencyLevel, Mutation)
+from pycassa.pool import MaximumRetryException
+from pycassa.retry import RetryPolicy
+from pycassa.slowlog import SlowOperationLog, describe_request
+from pycassa.wire import encode_rows
+
+from tests.util import FakePool
+
+
+class TestDescribeRequest(unittest.TestCase):
+
+    def test_get_slice(self):
+        predicate = SlicePredicate(slice_range=SliceRange('a', 'z', True, 10))
+        description = describe_request(('key1', ColumnParent('Standard1'), predicate,
+                                        ConsistencyLevel.QUORUM))
+        assert_equal(description, {'key': "'key1'",
+                                   'predicate': {'start': "'a'", 'finish': "'z'",
+                                                 'reversed': True, 'count': 10},
+                                   'consistency_level': 'QUORUM'})
+
+    def test_multiget(self):
+        predicate = SlicePredicate(column_names=['a', 'b'])
+        description = describe_request((['k1', 'k2', 'k3'], ColumnParent('Standard1'),
+                                        predicate, ConsistencyLevel.ONE))
+        assert_equal(description['keys'], 3)
+        assert_equal(description['predicate'], {'column_names': 2})
+
+    def test_range(self):
+        key_range = KeyRange(start_key='a' * 100, end_key='', count=50)
+        description = describe_request((ColumnParent('Standard1'), SlicePredicate(),
+                                        key_range, ConsistencyLevel.ONE))
+        assert_equal(description['range']['count'], 50)
+        assert_equal(description['range']['end_key'], "''")
+        assert_true(description['range']['start_key'].endswith('...'))
+
+    def test_batch_mutate(self):
+        mutation_map = {'k1': {'Standard1': [Mutation(), Mutation()]},
+                        'k2': {'Standard1': [Mutation()]}}
+        description = describe_request((mutation_map, ConsistencyLevel.ONE))
+        assert_equal(description['rows'], 2)
+        assert_equal(description['mutations'], 3)
+
+        encoded = encode_rows([('k1', 'Standard1', [('c', 'v', 1, None)]),
+                               ('k2', 'Standard1', [('c', 'v', 1, None)])])
+        description = describe_request((encoded, ConsistencyLevel.ONE))
+        assert_equal(description['rows'], 2)
+        assert_equal(description['mutation_bytes'], len(encoded))
+
+
+class TestSlowOperationLog(unittest.TestCase):
+
+    def make_pool(self, slow_log):
+        return FakePool('Keyspace1', pool_size=1, prefill=False, max_retries=2,
+                        use_threadlocal=False, slow_log=slow_log,
+                        retry_policy=RetryPolicy(base_delay=0.001, max_delay=0.001))
+
+    def test_entry(self):
+        slow_log = SlowOperationLog(threshold=0)
+        pool = self.make_pool(slow_log)
+        conn = pool.get()
+        assert_raises(MaximumRetryException, conn.describe_keyspace, 'Keyspace1',
+                      column_family='Standard1')
+        pool.dispose()
+
+        entries = slow_log.entries()
+        assert_equal(len(entries), 1)
+        entry = entries[0]
+        assert_equal(entry['method'], '_time_out')
+        assert_equal(entry['column_family'], 'Standard1')
+        assert_equal(entry['request'], {'key': "'Keyspace1'"})
+        assert_equal(entry['retries'], 2)
+        assert_equal(entry['server'], 'localhost:9160')
+        assert_equal(len(entry['attempts']), 3)
+        assert_true(entry['attempts'][0]['failure'].startswith('TimedOutException'))
+        assert_true(entry['failure'].startswith('MaximumRetryException'))
+        assert_true(entry['backoff'] > 0)
+        assert_true(entry['duration'] >= entry['backoff'])
+
+        slow_log.clear()
+        assert_equal(slow_log.entries(), [])
+
+    def test_threshold(self):
+        for slow_log in (SlowOperationLog(threshold=60),
+                         SlowOperationLog(threshold=0, sample_rate=0)):
+            pool = self.make_pool(slow_log)
+            conn = pool.get()
+            assert_raises(MaximumRetryException, conn.describe_keyspace, 'Keyspace1')
+            pool.dispose()
+            assert_equal(slow_log.entries(), [])
+
+    def test_ring_buffer(self):
+        slow_log = SlowOperationLog(threshold=0, size=2)
+        for i in range(3):
+            trace = slow_log.trace()
+            slow_log.finish(trace, 'get_slice', 'Standard%d' % i, ())
+        assert_equal([entry['column_family'] for entry in slow_log.entries()],
+                     ['Standard1', 'Standard2'])
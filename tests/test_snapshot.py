@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import assert_equal, assert_raises, assert_true, assert_false
+
+from pycassa.cassandra.ttypes import CfDef, ColumnDef, NotFoundException
+from pycassa.columnfamily import ColumnFamily
+from pycassa.columnfamilymap import ColumnFamilyMap
+from pycassa.snapshot import SchemaSnapshot
+from pycassa.types import IntegerType, LongType, UTF8Type
+
+
+class OfflinePool(object):
+    """ Fails any request, since a snapshot should make them unnecessary. """
+
+    keyspace = 'Keyspace1'
+
+    def __init__(self, schema_versions=None):
+        self.schema_versions = schema_versions or {}
+
+    def execute(self, f, *args, **kwargs):
+        if f == 'describe_schema_versions':
+            return self.schema_versions
+        raise AssertionError('unexpected request: %s' % f)
+
+
+def make_snapshot():
+    cfdefs = {
+        'Standard1': CfDef('Keyspace1', 'Standard1',
+                           column_type='Standard',
+                           comparator_type='org.apache.cassandra.db.marshal.LongType',
+                           default_validation_class='UTF8Type',
+                           key_validation_class='IntegerType',
+                           column_metadata=[ColumnDef('\x00\x00\x00\x00\x00\x00\x00\x01',
+                                                      'LongType')]),
+        'Super1': CfDef('Keyspace1', 'Super1',
+                        column_type='Super',
+                        comparator_type='UTF8Type',
+                        subcomparator_type='LongType',
+                        default_validation_class='BytesType',
+                        key_validation_class='BytesType',
+                        column_metadata=[]),
+    }
+    return SchemaSnapshot('Keyspace1', cfdefs, ['abc-123'])
+
+
+class TestSchemaSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_save_and_load(self):
+        path = os.path.join(self.dir, 'schema.json')
+        original = make_snapshot()
+        original.save(path)
+        loaded = SchemaSnapshot.load(path)
+
+        assert_equal(loaded.keyspace, 'Keyspace1')
+        assert_equal(loaded.schema_versions, frozenset(['abc-123']))
+        assert_equal(loaded.created_at, original.created_at)
+        assert_equal(sorted(loaded.column_families), ['Standard1', 'Super1'])
+        assert_equal(loaded.to_dict(), original.to_dict())
+
+        cfdef = loaded.get_cfdef('Standard1')
+        assert_equal(cfdef.comparator_type, 'org.apache.cassandra.db.marshal.LongType')
+        assert_equal(cfdef.key_validation_class, 'IntegerType')
+        coldef = cfdef.column_metadata['\x00\x00\x00\x00\x00\x00\x00\x01']
+        assert_equal(coldef.validation_class, 'LongType')
+
+        assert_raises(NotFoundException, loaded.get_cfdef, 'Missing')
+
+    def test_unknown_versions(self):
+        d = make_snapshot().to_dict()
+        d['version'] = SchemaSnapshot.format_version + 1
+        assert_raises(ValueError, SchemaSnapshot.from_dict, d)
+        assert_raises(ValueError, SchemaSnapshot.from_dict, {'version': 1})
+
+    def test_column_family(self):
+        path = os.path.join(self.dir, 'schema.json')
+        make_snapshot().save(path)
+        snapshot = SchemaSnapshot.load(path)
+        pool = OfflinePool()
+
+        cf = ColumnFamily(pool, 'Standard1', schema_snapshot=snapshot)
+        assert_false(cf.super)
+        assert_equal(cf.column_name_class, 'LongType')
+        assert_equal(cf.default_validation_class, 'UTF8Type')
+        assert_equal(cf.key_validation_class, 'IntegerType')
+        assert_equal(cf.column_validators[1], 'LongType')
+
+        scf = ColumnFamily(pool, 'Super1', schema_snapshot=snapshot)
+        assert_true(scf.super)
+        assert_equal(scf.super_column_name_class, 'UTF8Type')
+        assert_equal(scf.column_name_class, 'LongType')
+
+        class Thing(object):
+            key = IntegerType()
+            name = UTF8Type()
+            count = LongType()
+
+        cfmap = ColumnFamilyMap(Thing, pool, 'Standard1', schema_snapshot=snapshot)
+        assert_equal(cfmap.column_name_class, 'LongType')
+
+        assert_raises(NotFoundException, ColumnFamily, pool, 'Missing',
+                      schema_snapshot=snapshot)
+
+        pool.keyspace = 'Keyspace2'
+        assert_raises(ValueError, ColumnFamily, pool, 'Standard1',
+                      schema_snapshot=snapshot)
+
+    def test_verify(self):
+        snapshot = make_snapshot()
+        assert_true(snapshot.verify(OfflinePool({'abc-123': ['127.0.0.1']})))
+        assert_false(snapshot.verify(OfflinePool({'def-456': ['127.0.0.1']})))
+
+        mismatches = []
+        def callback(snap, pool):
+            mismatches.append(snap)
+
+        snapshot.verify_in_background(OfflinePool({'abc-123': ['127.0.0.1']}), callback).join()
+        assert_equal(mismatches, [])
+        snapshot.verify_in_background(OfflinePool({'def-456': ['127.0.0.1']}), callback).join()
+        assert_equal(mismatches, [snapshot])
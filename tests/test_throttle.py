@@ -0,0 +1,236 @@
+import socket
+import threading
+import time
+import unittest
+
+from nose.tools import assert_equal, assert_raises, assert_true
+
+from pycassa import ColumnFamily, ConnectionPool
+from pycassa.cassandra.ttypes import TimedOutException
+from pycassa.contrib.server import CassandraServer
+from pycassa.deadline import Deadline, DeadlineExceeded
+from pycassa.pool import MaximumRetryException
+from pycassa.retry import RetryPolicy
+from pycassa.throttle import (Throttle, TokenBucket, RateLimiter,
+                              AdaptiveConcurrencyLimiter)
+
+from tests.util import FakePool
+
+
+class RecordingThrottle(Throttle):
+
+    def __init__(self):
+        self.acquired = 0
+        self.failures = []
+
+    def acquire(self, deadline=None):
+        self.acquired += 1
+
+    def release(self, latency, nbytes, failure):
+        self.failures.append(failure)
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_take(self):
+        bucket = TokenBucket(100, capacity=2)
+        assert_equal(bucket.take(), 0)
+        assert_equal(bucket.take(), 0)
+        start = time.time()
+        bucket.take()
+        bucket.take()
+        assert_true(time.time() - start >= 0.015)
+
+    def test_debt(self):
+        bucket = TokenBucket(1000, capacity=1000)
+        bucket.charge(1050)
+        assert_true(bucket.available() < 0)
+        assert_true(bucket.take(0) > 0)
+
+    def test_deadline(self):
+        bucket = TokenBucket(1, capacity=1)
+        bucket.take()
+        assert_raises(DeadlineExceeded, bucket.take, 1, Deadline(0.01))
+        # the tokens were not reserved
+        assert_true(bucket.available() > -0.5)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_ops(self):
+        limiter = RateLimiter(ops_per_second=200, burst=0.01)
+        start = time.time()
+        for i in range(6):
+            limiter.acquire()
+        assert_true(time.time() - start >= 0.02)
+
+    def test_bytes(self):
+        limiter = RateLimiter(bytes_per_second=10000, burst=0.1)
+        limiter.acquire()
+        limiter.release(0.001, 1200, None)
+        start = time.time()
+        limiter.acquire()
+        assert_true(time.time() - start >= 0.015)
+
+
+class TestAdaptiveConcurrencyLimiter(unittest.TestCase):
+
+    def test_increase(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=4)
+        for i in range(50):
+            limiter.acquire()
+            limiter.release(0.001, 0, None)
+        assert_equal(limiter.limit, 4)
+
+    def test_backoff(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=16, cooldown=60)
+        limiter.acquire()
+        limiter.acquire()
+        limiter.release(0.5, 0, TimedOutException())
+        assert_equal(limiter.limit, 8)
+        # a second timeout within the cooldown does not count
+        limiter.release(0.5, 0, socket.timeout())
+        assert_equal(limiter.limit, 8)
+        assert_equal(limiter.in_flight, 0)
+
+        # neither do failures that are not caused by load
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=16)
+        limiter.acquire()
+        limiter.release(0.001, 0, socket.error())
+        assert_equal(limiter.limit, 16)
+
+    def test_latency(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=16, cooldown=0,
+                                             latency_threshold=0.1)
+        limiter.acquire()
+        limiter.release(0.2, 0, None)
+        assert_equal(limiter.limit, 8)
+
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=16, cooldown=0,
+                                             latency_tolerance=2.0)
+        for i in range(20):
+            limiter.acquire()
+            limiter.release(0.01, 0, None)
+        limit = limiter.limit
+        for i in range(5):
+            limiter.acquire()
+            limiter.release(0.1, 0, None)
+        assert_true(limiter.limit < limit)
+
+    def test_blocks(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        limiter.acquire()
+        assert_raises(DeadlineExceeded, limiter.acquire, Deadline(0.02))
+
+        acquired = []
+        thread = threading.Thread(target=lambda: acquired.append(limiter.acquire()))
+        thread.start()
+        time.sleep(0.02)
+        assert_equal(acquired, [])
+        limiter.release(0.001, 0, None)
+        thread.join(1)
+        assert_equal(len(acquired), 1)
+
+
+class TestRetryThrottling(unittest.TestCase):
+
+    def test_attempts(self):
+        throttle = RecordingThrottle()
+        pool = FakePool('Keyspace1', pool_size=1, prefill=False, max_retries=2,
+                        use_threadlocal=False, throttles=[throttle],
+                        retry_policy=RetryPolicy(base_delay=0.001, max_delay=0.001))
+        conn = pool.get()
+        assert_raises(MaximumRetryException, conn.describe_keyspace, 'Keyspace1')
+        assert_equal(throttle.acquired, 3)
+        assert_equal(len(throttle.failures), 3)
+        assert_true(isinstance(throttle.failures[0], TimedOutException))
+
+        # throttles passed with the request take the place of the pool's
+        other = RecordingThrottle()
+        conn = pool.get()
+        assert_raises(MaximumRetryException, conn.describe_keyspace, 'Keyspace1',
+                      throttles=[other])
+        assert_equal(throttle.acquired, 3)
+        assert_equal(other.acquired, 3)
+        pool.dispose()
+
+    def test_no_connection_held_while_waiting(self):
+        waiting, proceed = threading.Event(), threading.Event()
+
+        class BlockingThrottle(RecordingThrottle):
+            def acquire(self, deadline=None):
+                waiting.set()
+                proceed.wait()
+                RecordingThrottle.acquire(self, deadline)
+
+        throttle = BlockingThrottle()
+        pool = FakePool('Keyspace1', pool_size=1, max_overflow=0, prefill=False,
+                        max_retries=0, pool_timeout=0.1, use_threadlocal=False)
+        errors = []
+
+        def throttled():
+            try:
+                pool.execute('describe_keyspace', 'Keyspace1', throttles=[throttle])
+            except MaximumRetryException, exc:
+                errors.append(exc)
+
+        thread = threading.Thread(target=throttled)
+        thread.start()
+        waiting.wait()
+        try:
+            # the only connection is free for unthrottled requests
+            conn = pool.get()
+            assert_raises(MaximumRetryException, conn.describe_keyspace, 'Keyspace1')
+        finally:
+            proceed.set()
+            thread.join()
+        assert_equal(len(errors), 1)
+        assert_equal(throttle.acquired, 1)
+        assert_equal(len(throttle.failures), 1)
+        pool.dispose()
+
+
+class TestSharedPool(unittest.TestCase):
+
+    def setUp(self):
+        self.server = CassandraServer().start()
+        self.server.create_keyspace('Keyspace1')
+        self.server.create_column_family('Keyspace1', 'Standard1')
+        self.pool = ConnectionPool('Keyspace1', [self.server.server], pool_size=2,
+                                   max_overflow=0, pool_timeout=0.5)
+
+    def tearDown(self):
+        self.pool.dispose()
+        self.server.stop()
+
+    def test_throttled_cf_does_not_starve_others(self):
+        throttled = ColumnFamily(self.pool, 'Standard1',
+                                 throttles=[RateLimiter(ops_per_second=2)])
+        interactive = ColumnFamily(self.pool, 'Standard1')
+        interactive.insert('key', {'col': 'val'})
+        errors = []
+
+        def insert(i):
+            try:
+                if i % 2:
+                    throttled.insert('bulk%d' % i, {'col': 'val'})
+                else:
+                    with throttled.batch() as b:
+                        b.insert('bulk%d' % i, {'col': 'val'})
+            except Exception, exc:
+                errors.append(exc)
+
+        # the bulk job waits up to 1.5 seconds for its throttle
+        threads = [threading.Thread(target=insert, args=(i,)) for i in range(5)]
+        for thread in threads:
+            thread.start()
+        try:
+            time.sleep(0.1)
+            start = time.time()
+            assert_equal(interactive.get('key'), {'col': 'val'})
+            assert_true(time.time() - start < 0.5)
+        finally:
+            for thread in threads:
+                thread.join()
+        assert_equal(errors, [])
+        assert_equal(len(list(interactive.get_range())), 6)
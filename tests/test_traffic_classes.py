@@ -0,0 +1,107 @@
+import threading
+import time
+import unittest
+
+from nose.tools import assert_equal, assert_raises, assert_true
+
+from pycassa.logging.pool_stats_logger import StatsLogger
+from pycassa.pool import (TrafficClass, MaximumRetryException,
+                          NoConnectionAvailable, InvalidRequestError)
+
+from tests.util import FakePool
+
+
+def make_pool(**kwargs):
+    kwargs.setdefault('pool_size', 4)
+    kwargs.setdefault('max_overflow', 0)
+    kwargs.setdefault('pool_timeout', 0)
+    return FakePool('Keyspace1', prefill=False, use_threadlocal=False, **kwargs)
+
+
+class TestTrafficClasses(unittest.TestCase):
+
+    def test_reserved(self):
+        pool = make_pool(traffic_classes=[TrafficClass('interactive', reserved=2),
+                                          TrafficClass('batch')])
+        batch = [pool.get(traffic_class='batch') for i in range(2)]
+        assert_raises(NoConnectionAvailable, pool.get, traffic_class='batch')
+
+        interactive = [pool.get(traffic_class='interactive') for i in range(2)]
+        assert_raises(NoConnectionAvailable, pool.get, traffic_class='interactive')
+
+        # once an interactive connection is returned, it is still held back
+        pool.put(interactive.pop())
+        assert_raises(NoConnectionAvailable, pool.get, traffic_class='batch')
+        interactive.append(pool.get(traffic_class='interactive'))
+
+        for conn in batch + interactive:
+            pool.put(conn)
+        pool.dispose()
+
+    def test_limit(self):
+        pool = make_pool(traffic_classes=[TrafficClass('batch', limit=1)])
+        conn = pool.get(traffic_class='batch')
+        assert_raises(NoConnectionAvailable, pool.get, traffic_class='batch')
+
+        # the default class is not limited
+        others = [pool.get() for i in range(3)]
+        assert_equal(others[0]._traffic_class, 'default')
+
+        pool.put(conn)
+        conn = pool.get(traffic_class='batch')
+        for c in [conn] + others:
+            pool.put(c)
+        pool.dispose()
+
+    def test_unknown_class(self):
+        pool = make_pool(traffic_classes=[TrafficClass('batch')])
+        assert_raises(InvalidRequestError, pool.get, traffic_class='other')
+        assert_raises(InvalidRequestError, make_pool,
+                      traffic_classes=[TrafficClass('interactive', reserved=5)])
+
+    def test_priority(self):
+        pool = make_pool(pool_size=1, pool_timeout=5,
+                         traffic_classes=[TrafficClass('interactive', priority=1),
+                                          TrafficClass('batch')])
+        conn = pool.get(traffic_class='batch')
+        order = []
+
+        def worker(tclass):
+            c = pool.get(traffic_class=tclass)
+            order.append(tclass)
+            time.sleep(0.01)
+            pool.put(c)
+
+        batch = threading.Thread(target=worker, args=('batch',))
+        batch.start()
+        time.sleep(0.05)
+        interactive = threading.Thread(target=worker, args=('interactive',))
+        interactive.start()
+        time.sleep(0.05)
+
+        pool.put(conn)
+        batch.join()
+        interactive.join()
+        assert_equal(order, ['interactive', 'batch'])
+        pool.dispose()
+
+    def test_stats(self):
+        stats = StatsLogger()
+        pool = make_pool(pool_size=1, listeners=[stats],
+                         traffic_classes=[TrafficClass('batch')])
+        conn = pool.get(traffic_class='batch')
+        assert_raises(NoConnectionAvailable, pool.get)
+        pool.put(conn)
+
+        assert_equal(stats.stats['traffic_classes'],
+                     {'batch': {'checked_out': 1, 'checked_in': 1, 'at_max': 0},
+                      'default': {'checked_out': 0, 'checked_in': 0, 'at_max': 1}})
+        pool.dispose()
+
+    def test_retry_keeps_class(self):
+        pool = make_pool(max_retries=2,
+                         traffic_classes=[TrafficClass('batch', limit=1)])
+        conn = pool.get(traffic_class='batch')
+        assert_raises(MaximumRetryException, conn.describe_keyspace, 'Keyspace1')
+        assert_equal(pool._class_checkouts['batch'], 0)
+        pool.dispose()
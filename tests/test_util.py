@@ -0,0 +1,80 @@
+import os
+import threading
+import unittest
+import uuid
+
+from nose.tools import assert_equal, assert_true
+
+import pycassa.marshal as marshal
+from pycassa.util import TimeUUIDGenerator
+
+
+class TestTimeUUIDGenerator(unittest.TestCase):
+
+    def test_version_and_fields(self):
+        gen = TimeUUIDGenerator(node=0x123456789abc, clock_seq=0x1234)
+        u = gen.next()
+        assert_equal(u.version, 1)
+        assert_equal(u.variant, uuid.RFC_4122)
+        assert_equal(u.node, 0x123456789abc)
+        assert_equal(u.clock_seq, 0x1234)
+
+    def test_monotonic(self):
+        gen = TimeUUIDGenerator()
+        uuids = [gen.next() for _ in xrange(1000)] + gen.next_many(1000)
+        times = [u.time for u in uuids]
+        assert_equal(times, sorted(set(times)))
+
+    def test_bulk_bytes(self):
+        gen = TimeUUIDGenerator()
+        raw = gen.next_many_bytes(100)
+        assert_equal(len(raw), 100)
+        assert_true(all(len(b) == 16 for b in raw))
+        times = [uuid.UUID(bytes=b).time for b in raw]
+        assert_equal(times, range(times[0], times[0] + 100))
+        assert_equal(gen.next_many_bytes(0), [])
+
+    def test_threads(self):
+        gen = TimeUUIDGenerator()
+        results = []
+
+        def generate():
+            ret = [gen.next_bytes() for _ in xrange(1000)]
+            ret.extend(gen.next_many_bytes(1000))
+            results.extend(ret)
+
+        threads = [threading.Thread(target=generate) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert_equal(len(set(results)), 10000)
+
+    def test_forked_children(self):
+        gen = TimeUUIDGenerator()
+        gen.next_bytes()
+        generated = []
+        for i in range(2):
+            read_end, write_end = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    os.close(read_end)
+                    os.write(write_end, gen.next_bytes())
+                finally:
+                    os._exit(0)
+            os.close(write_end)
+            generated.append(os.read(read_end, 16))
+            os.close(read_end)
+            os.waitpid(pid, 0)
+        assert_equal(len(generated[0]), 16)
+        # each child chose its own clock sequence and node
+        assert_true(generated[0][8:] != generated[1][8:])
+        assert_true(gen.next_bytes()[8:] not in (generated[0][8:], generated[1][8:]))
+
+    def test_raw_bytes_are_packable(self):
+        raw = TimeUUIDGenerator().next_bytes()
+        packer = marshal.packer_for('TimeUUIDType')
+        assert_equal(packer(raw), raw)
+        assert_equal(packer(raw, slice_start=True), raw)
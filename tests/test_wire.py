@@ -0,0 +1,160 @@
+import unittest
+
+from nose.tools import assert_equal
+
+from thrift.protocol import TBinaryProtocol
+from thrift.transport import TTransport
+
+from pycassa import wire
+from pycassa.cassandra.Cassandra import (batch_mutate_args, get_slice_result,
+        multiget_slice_result, get_range_slices_result)
+from pycassa.cassandra.ttypes import (Column, ColumnOrSuperColumn,
+        ConsistencyLevel, CounterColumn, CounterSuperColumn, Deletion,
+        InvalidRequestException, KeySlice, Mutation, SlicePredicate,
+        SuperColumn)
+from pycassa.util import OrderedDict
+
+
+def thrift_encode(obj):
+    trans = TTransport.TMemoryBuffer()
+    obj.write(TBinaryProtocol.TBinaryProtocol(trans))
+    return trans.getvalue()
+
+
+def thrift_decode_args(data):
+    args = batch_mutate_args()
+    args.read(TBinaryProtocol.TBinaryProtocol(TTransport.TMemoryBuffer(data)))
+    return args
+
+
+class TestMutationEncoding(unittest.TestCase):
+
+    def test_column_mutation(self):
+        for ttl in (None, 3600):
+            expected = Mutation(ColumnOrSuperColumn(Column('name', 'value', 123, ttl)))
+            assert_equal(wire.encode_column_mutation('name', 'value', 123, ttl),
+                         thrift_encode(expected))
+
+        expected = Mutation(ColumnOrSuperColumn(Column('name', None, 123, None)))
+        assert_equal(wire.encode_column_mutation('name', None, 123),
+                     thrift_encode(expected))
+
+        expected = Mutation(ColumnOrSuperColumn(Column('name', 'value', 123, None)))
+        assert_equal(wire.encode_column_mutation(u'name', u'value', 123),
+                     thrift_encode(expected))
+
+    def test_counter_mutation(self):
+        expected = Mutation(ColumnOrSuperColumn(counter_column=CounterColumn('name', -3)))
+        assert_equal(wire.encode_counter_mutation('name', -3),
+                     thrift_encode(expected))
+
+    def test_super_column_mutation(self):
+        subcols = [Column('a', 'b', 1, None), Column('c', 'd', 2, 60)]
+        expected = Mutation(ColumnOrSuperColumn(super_column=SuperColumn('sc', subcols)))
+        assert_equal(wire.encode_super_column_mutation('sc', [('a', 'b', 1, None),
+                                                              ('c', 'd', 2, 60)]),
+                     thrift_encode(expected))
+
+    def test_counter_super_column_mutation(self):
+        subcols = [CounterColumn('a', 1), CounterColumn('b', 2)]
+        expected = Mutation(ColumnOrSuperColumn(
+            counter_super_column=CounterSuperColumn('sc', subcols)))
+        assert_equal(wire.encode_counter_super_column_mutation('sc', [('a', 1), ('b', 2)]),
+                     thrift_encode(expected))
+
+    def test_mutation_map(self):
+        deletion = Mutation(deletion=Deletion(timestamp=5,
+                predicate=SlicePredicate(column_names=['a', 'b'])))
+        mutation_map = {'key1': {'cf1': [wire.encode_column_mutation('a', 'b', 1),
+                                         deletion],
+                                 'cf2': [wire.encode_counter_mutation('c', 1)]},
+                        'key2': {'cf1': [wire.encode_column_mutation('d', 'e', 2, 10)]}}
+        expected = {'key1': {'cf1': [Mutation(ColumnOrSuperColumn(Column('a', 'b', 1))),
+                                     deletion],
+                             'cf2': [Mutation(ColumnOrSuperColumn(
+                                 counter_column=CounterColumn('c', 1)))]},
+                    'key2': {'cf1': [Mutation(ColumnOrSuperColumn(Column('d', 'e', 2, 10)))]}}
+
+        encoded = wire.encode_mutation_map(mutation_map)
+        data = wire.encode_batch_mutate_args(encoded, ConsistencyLevel.QUORUM)
+        assert_equal(thrift_decode_args(data),
+                     batch_mutate_args(expected, ConsistencyLevel.QUORUM))
+
+    def test_encode_rows(self):
+        rows = [('key1', 'cf1', [('a', 'b', 1, None)]),
+                ('key2', 'cf1', [('c', 'd', 2, 10)]),
+                ('key1', 'cf1', [('e', 'f', 3, None)])]
+        expected = {'key1': {'cf1': [Mutation(ColumnOrSuperColumn(Column('a', 'b', 1))),
+                                     Mutation(ColumnOrSuperColumn(Column('e', 'f', 3)))]},
+                    'key2': {'cf1': [Mutation(ColumnOrSuperColumn(Column('c', 'd', 2, 10)))]}}
+
+        data = wire.encode_batch_mutate_args(wire.encode_rows(rows), ConsistencyLevel.ONE)
+        assert_equal(thrift_decode_args(data),
+                     batch_mutate_args(expected, ConsistencyLevel.ONE))
+
+
+def make_decoder(**kwargs):
+    return wire.SliceDecoder(lambda name: 'n:' + name,
+                             lambda name: 's:' + name,
+                             lambda value: 'v:' + value,
+                             {'b': lambda value: 'b:' + value},
+                             OrderedDict, **kwargs)
+
+
+class TestSliceDecoding(unittest.TestCase):
+
+    columns = [ColumnOrSuperColumn(Column('a', '1', 10)),
+               ColumnOrSuperColumn(Column('b', '2', 20, 60))]
+
+    def test_columns(self):
+        data = thrift_encode(get_slice_result(self.columns))
+        row, count, last_name = make_decoder().decode_slice(data)
+        assert_equal(row, OrderedDict([('n:a', 'v:1'), ('n:b', 'b:2')]))
+        assert_equal(row.keys(), ['n:a', 'n:b'])
+        assert_equal(count, 2)
+        assert_equal(last_name, 'b')
+
+        row = make_decoder(include_timestamp=True).decode_slice(data)[0]
+        assert_equal(row, {'n:a': ('v:1', 10), 'n:b': ('b:2', 20)})
+        row = make_decoder(include_ttl=True).decode_slice(data)[0]
+        assert_equal(row, {'n:a': ('v:1', None), 'n:b': ('b:2', 60)})
+        row = make_decoder(include_timestamp=True, include_ttl=True).decode_slice(data)[0]
+        assert_equal(row, {'n:a': ('v:1', 10, None), 'n:b': ('b:2', 20, 60)})
+
+        items = make_decoder(as_items=True).decode_slice(data)[0]
+        assert_equal(items, [('n:a', 'v:1'), ('n:b', 'b:2')])
+
+    def test_empty(self):
+        data = thrift_encode(get_slice_result([]))
+        assert_equal(make_decoder().decode_slice(data), ({}, 0, None))
+
+    def test_counters(self):
+        data = thrift_encode(get_slice_result(
+            [ColumnOrSuperColumn(counter_column=CounterColumn('a', 5)),
+             ColumnOrSuperColumn(counter_column=CounterColumn('b', -2))]))
+        row = make_decoder(include_timestamp=True).decode_slice(data)[0]
+        assert_equal(row, {'n:a': 5, 'n:b': -2})
+
+    def test_super_columns(self):
+        data = thrift_encode(get_slice_result(
+            [ColumnOrSuperColumn(super_column=SuperColumn('x', [Column('a', '1', 10)])),
+             ColumnOrSuperColumn(counter_super_column=CounterSuperColumn(
+                 'y', [CounterColumn('b', 3)]))]))
+        row, count, last_name = make_decoder(include_timestamp=True).decode_slice(data)
+        assert_equal(row, {'s:x': {'n:a': ('v:1', 10)}, 's:y': {'n:b': 3}})
+        assert_equal(last_name, 'y')
+
+    def test_exception(self):
+        data = thrift_encode(get_slice_result(ire=InvalidRequestException('bad')))
+        assert_equal(make_decoder().decode_slice(data), None)
+
+    def test_multiget_slice(self):
+        data = thrift_encode(multiget_slice_result({'k1': self.columns, 'k2': []}))
+        rows = make_decoder().decode_multiget_slice(data)
+        assert_equal(rows, {'k1': {'n:a': 'v:1', 'n:b': 'b:2'}, 'k2': {}})
+
+    def test_key_slices(self):
+        data = thrift_encode(get_range_slices_result(
+            [KeySlice('k1', self.columns), KeySlice('k2', [])]))
+        rows = make_decoder().decode_key_slices(data)
+        assert_equal(rows, [('k1', {'n:a': 'v:1', 'n:b': 'b:2'}), ('k2', {})])
@@ -1,7 +1,11 @@
+import time
 from functools import wraps
 
 from nose.plugins.skip import SkipTest
 
+from pycassa.cassandra.ttypes import TimedOutException
+from pycassa.pool import ConnectionPool, ConnectionWrapper
+
 def requireOPP(f):
     """ Decorator to require an order-preserving partitioner """
 
@@ -13,3 +17,56 @@ def requireOPP(f):
         return f(self, *args, **kwargs)
 
     return wrapper
+
+
+class FakeSocket(object):
+
+    def __init__(self):
+        self.timeouts = []
+
+    def setTimeout(self, ms):
+        self.timeouts.append(ms)
+
+
+class FakeTransport(object):
+
+    def __init__(self):
+        self.open = True
+
+    def isOpen(self):
+        return self.open
+
+    def close(self):
+        self.open = False
+
+
+class FakeWrapper(ConnectionWrapper):
+    """ A connection whose requests always time out. """
+
+    def __init__(self, pool, server):
+        self._pool = pool
+        self._retry_count = 0
+        self.max_retries = pool.max_retries
+        self.info = {}
+        self.starttime = time.time()
+        self.operation_count = 0
+        self.server = server
+        self.transport = FakeTransport()
+        self._socket = FakeSocket()
+        self._iprot = self._oprot = None
+        self._state = ConnectionWrapper._CHECKED_OUT
+        self._pid = pool._pid
+        self._should_fail = False
+        self.attempts = 0
+
+    def _time_out(self, *args, **kwargs):
+        self.attempts += 1
+        raise TimedOutException()
+
+    describe_keyspace = ConnectionWrapper._retry(_time_out)
+
+
+class FakePool(ConnectionPool):
+
+    def _get_new_wrapper(self, server):
+        return FakeWrapper(self, server)